@@ -1,13 +1,31 @@
 # OracleIQTrader - Algorithmic Execution Engine
 # Institutional-grade order execution: VWAP, TWAP, Iceberg, Smart Routing
 
-import asyncio
+import logging
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
 from enum import Enum
 import random
 import math
 
+from modules.task_supervisor import task_supervisor
+from modules.fill_simulator import ImpactModel, fill_model, market_tapes, simulate_orders
+from modules.execution_archive import ExecutionArchive
+from modules.execution_tca import tca_report, window_benchmarks
+from modules.event_bus import event_bus, OrderFilled
+from modules.timer_wheel import TimerScheduler
+
+logger = logging.getLogger(__name__)
+
+# Simulated time between an order's child slices
+SLICE_INTERVAL = 0.1
+# Recent executions kept on an order for display; the full record goes to the archive
+EXECUTION_LOG_LIMIT = 100
+ARCHIVE_INTERVAL = 1.0
+# Share of the parent quantity at which an order counts as filled
+FILL_COMPLETE_RATIO = 0.99
+
 class OrderType(str, Enum):
     MARKET = "market"
     LIMIT = "limit"
@@ -33,19 +51,35 @@ class AlgoOrder:
     """Base class for algorithmic orders"""
     
     def __init__(self, order_id: str, symbol: str, side: OrderSide, 
-                 total_quantity: float, order_type: OrderType):
+                 total_quantity: float, order_type: OrderType, user_id: Optional[str] = None):
         self.order_id = order_id
+        self.user_id = user_id  # submitting user; fill notifications go to them
         self.symbol = symbol
         self.side = side
         self.total_quantity = total_quantity
         self.filled_quantity = 0.0
+        self.remaining = total_quantity
         self.order_type = order_type
         self.status = OrderStatus.PENDING
         self.created_at = datetime.utcnow()
-        self.child_orders: List[Dict] = []
-        self.execution_log: List[Dict] = []
+        self.child_orders = deque(maxlen=EXECUTION_LOG_LIMIT)
+        self.execution_log = deque(maxlen=EXECUTION_LOG_LIMIT)
+        self.child_count = 0
+        self.completed_at: Optional[datetime] = None
         self.avg_fill_price = 0.0
         self.slippage = 0.0
+        # Execution state between child slices
+        self.tape = None  # MarketTape the children fill against
+        self.start_bar = 0
+        self.bars_used = 1  # tape bars from start_bar to the latest child
+        self.current_bar = 0
+        self.arrival_price: Optional[float] = None
+        self.next_slice = 0
+        self.timer = None
+    
+    @property
+    def complete(self) -> bool:
+        return self.filled_quantity >= self.total_quantity * FILL_COMPLETE_RATIO
         
     def to_dict(self) -> Dict:
         return {
@@ -62,7 +96,29 @@ class AlgoOrder:
             "avg_fill_price": self.avg_fill_price,
             "slippage_bps": round(self.slippage * 10000, 2),
             "child_orders": len(self.child_orders),
-            "execution_log": self.execution_log[-10:]  # Last 10 executions
+            "execution_log": list(self.execution_log)[-10:]  # Last 10 executions
+        }
+    
+    def archive_doc(self) -> Dict:
+        """Archived form of a finished order (benchmark columns are added by the engine)"""
+        completed_at = self.completed_at or datetime.utcnow()
+        return {
+            "order_id": self.order_id,
+            "symbol": self.symbol,
+            "side": self.side.value,
+            "order_type": self.order_type.value,
+            "status": self.status.value,
+            "total_quantity": self.total_quantity,
+            "filled_quantity": self.filled_quantity,
+            "avg_fill_price": self.avg_fill_price if self.filled_quantity else None,
+            "arrival_price": self.arrival_price,
+            "slippage_bps": round(self.slippage * 10000, 2),
+            "child_fills": self.child_count,  # running total; child_orders keeps only the latest
+            "created_at": self.created_at.isoformat(),
+            "completed_at": completed_at.isoformat(),
+            "day": completed_at.date().isoformat(),
+            "tape": {"source": self.tape.source, "day": self.tape.day, "start_bar": self.start_bar,
+                     "bars": self.bars_used} if self.tape is not None else None,
         }
 
 
@@ -72,19 +128,45 @@ class AlgorithmicExecutionEngine:
     Implements VWAP, TWAP, Iceberg, POV, and Smart Order Routing.
     """
     
-    def __init__(self):
+    def __init__(self, tick: float = 0.01, archive: Optional[ExecutionArchive] = None):
         self.active_orders: Dict[str, AlgoOrder] = {}
+        # Finished orders waiting to move to the archive; without one they stay in active_orders
+        self.archive = archive
+        self._finished: List[AlgoOrder] = []
         self.order_counter = 0
         self.execution_callbacks: List[Callable] = []
+        # One timer wheel owns every child-slice deadline; run() must be running (a supervised service)
+        self.scheduler = TimerScheduler("algo_slices", self._execute_due_slices, tick=tick)
+        self._slice_steps = {
+            OrderType.VWAP: self._vwap_slice,
+            OrderType.TWAP: self._twap_slice,
+            OrderType.ICEBERG: self._iceberg_slice,
+            OrderType.POV: self._pov_slice,
+        }
         
     def _generate_order_id(self) -> str:
         self.order_counter += 1
         return f"ALGO-{datetime.utcnow().strftime('%Y%m%d')}-{self.order_counter:06d}"
     
+    def _publish_fill(self, order: AlgoOrder, quantity: float, price: float):
+        """Announce a child fill on the event bus"""
+        event_bus.publish(OrderFilled(
+            order_id=order.order_id,
+            symbol=order.symbol,
+            side=order.side.value,
+            quantity=quantity,
+            price=price,
+            filled_quantity=order.filled_quantity,
+            total_quantity=order.total_quantity,
+            status="filled" if order.complete else "partially_filled",
+            user_id=order.user_id
+        ))
+    
     async def create_vwap_order(self, symbol: str, side: OrderSide, 
                                  quantity: float, duration_minutes: int = 60,
                                  participation_rate: float = 0.1,
-                                 limit_price: Optional[float] = None) -> Dict:
+                                 limit_price: Optional[float] = None,
+                                 user_id: Optional[str] = None) -> Dict:
         """
         Create Volume Weighted Average Price (VWAP) order.
         Executes order to match or beat market VWAP over duration.
@@ -96,9 +178,10 @@ class AlgorithmicExecutionEngine:
             duration_minutes: Time window for execution
             participation_rate: Max % of market volume to capture (0.1 = 10%)
             limit_price: Optional price limit
+            user_id: Submitting user (receives fill notifications)
         """
         order_id = self._generate_order_id()
-        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.VWAP)
+        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.VWAP, user_id)
         
         # VWAP-specific parameters
         order.duration_minutes = duration_minutes
@@ -117,7 +200,7 @@ class AlgorithmicExecutionEngine:
         self.active_orders[order_id] = order
         
         # Start execution (simulated)
-        asyncio.create_task(self._execute_vwap(order))
+        self._start(order)
         
         return {
             "order_id": order_id,
@@ -136,7 +219,8 @@ class AlgorithmicExecutionEngine:
     async def create_twap_order(self, symbol: str, side: OrderSide,
                                  quantity: float, duration_minutes: int = 60,
                                  slices: int = 12,
-                                 randomize: bool = True) -> Dict:
+                                 randomize: bool = True,
+                                 user_id: Optional[str] = None) -> Dict:
         """
         Create Time Weighted Average Price (TWAP) order.
         Executes equal slices over time to minimize market impact.
@@ -148,9 +232,10 @@ class AlgorithmicExecutionEngine:
             duration_minutes: Time window for execution
             slices: Number of execution slices
             randomize: Add randomization to prevent pattern detection
+            user_id: Submitting user (receives fill notifications)
         """
         order_id = self._generate_order_id()
-        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.TWAP)
+        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.TWAP, user_id)
         
         # TWAP-specific parameters
         order.duration_minutes = duration_minutes
@@ -187,7 +272,7 @@ class AlgorithmicExecutionEngine:
         self.active_orders[order_id] = order
         
         # Start execution
-        asyncio.create_task(self._execute_twap(order))
+        self._start(order)
         
         return {
             "order_id": order_id,
@@ -206,7 +291,8 @@ class AlgorithmicExecutionEngine:
     async def create_iceberg_order(self, symbol: str, side: OrderSide,
                                     quantity: float, visible_quantity: float,
                                     limit_price: float,
-                                    variance: float = 0.1) -> Dict:
+                                    variance: float = 0.1,
+                                    user_id: Optional[str] = None) -> Dict:
         """
         Create Iceberg (Hidden) order.
         Shows only a portion of the order to hide large positions.
@@ -218,9 +304,10 @@ class AlgorithmicExecutionEngine:
             visible_quantity: Quantity shown on order book
             limit_price: Limit price for execution
             variance: Randomize visible quantity (+/- %)
+            user_id: Submitting user (receives fill notifications)
         """
         order_id = self._generate_order_id()
-        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.ICEBERG)
+        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.ICEBERG, user_id)
         
         # Iceberg-specific parameters
         order.visible_quantity = visible_quantity
@@ -236,7 +323,7 @@ class AlgorithmicExecutionEngine:
         self.active_orders[order_id] = order
         
         # Start execution
-        asyncio.create_task(self._execute_iceberg(order))
+        self._start(order)
         
         return {
             "order_id": order_id,
@@ -255,7 +342,8 @@ class AlgorithmicExecutionEngine:
     
     async def create_pov_order(self, symbol: str, side: OrderSide,
                                 quantity: float, participation_rate: float = 0.15,
-                                min_rate: float = 0.05, max_rate: float = 0.25) -> Dict:
+                                min_rate: float = 0.05, max_rate: float = 0.25,
+                                user_id: Optional[str] = None) -> Dict:
         """
         Create Percentage of Volume (POV) order.
         Maintains a target percentage of market volume.
@@ -267,9 +355,10 @@ class AlgorithmicExecutionEngine:
             participation_rate: Target % of market volume
             min_rate: Minimum participation rate
             max_rate: Maximum participation rate
+            user_id: Submitting user (receives fill notifications)
         """
         order_id = self._generate_order_id()
-        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.POV)
+        order = AlgoOrder(order_id, symbol, side, quantity, OrderType.POV, user_id)
         
         order.participation_rate = participation_rate
         order.min_rate = min_rate
@@ -278,7 +367,7 @@ class AlgorithmicExecutionEngine:
         order.status = OrderStatus.ACTIVE
         self.active_orders[order_id] = order
         
-        asyncio.create_task(self._execute_pov(order))
+        self._start(order)
         
         return {
             "order_id": order_id,
@@ -293,7 +382,8 @@ class AlgorithmicExecutionEngine:
     
     async def create_smart_order(self, symbol: str, side: OrderSide,
                                   quantity: float, urgency: str = "medium",
-                                  limit_price: Optional[float] = None) -> Dict:
+                                  limit_price: Optional[float] = None,
+                                  user_id: Optional[str] = None) -> Dict:
         """
         Create Smart Order with intelligent routing.
         Automatically selects best execution strategy based on market conditions.
@@ -304,6 +394,7 @@ class AlgorithmicExecutionEngine:
             quantity: Total quantity
             urgency: low, medium, high - affects execution speed vs cost tradeoff
             limit_price: Optional price limit
+            user_id: Submitting user (receives fill notifications)
         """
         order_id = self._generate_order_id()
         
@@ -331,25 +422,25 @@ class AlgorithmicExecutionEngine:
         
         # Create the selected order type
         if strategy == "VWAP":
-            return await self.create_vwap_order(symbol, side, quantity, duration)
+            return await self.create_vwap_order(symbol, side, quantity, duration, user_id=user_id)
         elif strategy in ["TWAP", "AGGRESSIVE_TWAP"]:
             slices = 6 if strategy == "AGGRESSIVE_TWAP" else 12
-            return await self.create_twap_order(symbol, side, quantity, duration, slices)
+            return await self.create_twap_order(symbol, side, quantity, duration, slices, user_id=user_id)
         else:  # ICEBERG
             visible = quantity * 0.1
-            return await self.create_iceberg_order(symbol, side, quantity, visible, limit_price or 0)
+            return await self.create_iceberg_order(symbol, side, quantity, visible, limit_price or 0,
+                                                   user_id=user_id)
+    
+    def _session_bar(self, tape) -> int:
+        """Tape bar matching the current UTC time of day"""
+        now = datetime.utcnow()
+        return tape.bar_at((now.hour * 3600 + now.minute * 60 + now.second) / tape.bar_seconds)
     
     def _get_volume_profile(self, symbol: str, duration: int) -> List[float]:
-        """Get historical volume profile (simulated)"""
-        # Simulated U-shaped volume profile (higher at open/close)
-        intervals = min(duration, 60)
-        profile = []
-        for i in range(intervals):
-            # U-shape: higher volume at start and end
-            x = i / intervals
-            volume = 1 + 0.5 * (4 * (x - 0.5) ** 2)
-            profile.append(volume)
-        return profile
+        """Volume profile of the next `duration` minutes from the symbol's market tape"""
+        tape = market_tapes.get(symbol)
+        bars = max(1, round(duration * 60 / tape.bar_seconds))
+        return tape.volume_profile(self._session_bar(tape), bars, buckets=min(duration, 60)).tolist()
     
     def _create_vwap_schedule(self, quantity: float, duration: int, 
                                volume_profile: List[float], 
@@ -385,25 +476,78 @@ class AlgorithmicExecutionEngine:
             "recommended_strategy": "VWAP" if quantity > 10000 else "TWAP"
         }
     
-    async def _execute_vwap(self, order: AlgoOrder):
-        """Execute VWAP order (simulated)"""
-        base_price = 100  # Simulated base price
-        
-        for slice_info in order.execution_schedule:
-            if order.status == OrderStatus.CANCELLED:
-                break
-                
-            await asyncio.sleep(0.1)  # Simulate time passing
+    def _start(self, order: AlgoOrder):
+        """Attach the order to its market tape and schedule the first child slice"""
+        order.tape = market_tapes.get(order.symbol)
+        order.start_bar = self._session_bar(order.tape)
+        order.arrival_price = float(order.tape.prices[order.start_bar])
+        order.timer = self.scheduler.schedule(SLICE_INTERVAL, order)
+    
+    def _execute_due_slices(self, orders: List[AlgoOrder]):
+        """Timer-wheel callback: execute every child slice due in this tick in one pass"""
+        for order in orders:
+            order.timer = None
+            if order.status != OrderStatus.ACTIVE:
+                continue
+            try:
+                more = self._slice_steps[order.order_type](order)
+            except Exception as e:
+                logger.error(f"Algo order {order.order_id} slice failed: {type(e).__name__}: {e}")
+                # No further slice gets scheduled, so the order must not stay ACTIVE
+                self._finish(order, OrderStatus.CANCELLED)
+                continue
+            if more:
+                order.timer = self.scheduler.schedule(SLICE_INTERVAL, order)
+    
+    def _slice_bar(self, order: AlgoOrder, minutes: float) -> int:
+        """Tape bar `minutes` into the order's execution"""
+        offset = int(minutes * 60 / order.tape.bar_seconds)
+        order.bars_used = max(order.bars_used, offset + 1)
+        order.current_bar = order.tape.bar_at(order.start_bar + offset)
+        return order.current_bar
+    
+    def _fill_price(self, order: AlgoOrder, bar: int, quantity: float) -> float:
+        """Child fill price: the bar's price moved against us by the impact model"""
+        return fill_model.fill_price(order.tape, bar, order.side.value, quantity, order.filled_quantity)
+    
+    def _record_fill(self, order: AlgoOrder, fill_qty: float, fill_price: float):
+        order.filled_quantity += fill_qty
+        order.avg_fill_price = (
+            (order.avg_fill_price * (order.filled_quantity - fill_qty) + fill_price * fill_qty) 
+            / order.filled_quantity
+        ) if order.filled_quantity > 0 else fill_price
+        # Implementation shortfall against the arrival price (positive = cost)
+        sign = 1 if order.side == OrderSide.BUY else -1
+        order.slippage = sign * (order.avg_fill_price - order.arrival_price) / order.arrival_price
+        order.child_count += 1
+        if self.archive is not None:
+            self.archive.add_child({
+                "order_id": order.order_id,
+                "seq": order.child_count,
+                "timestamp": datetime.utcnow().isoformat(),
+                "quantity": fill_qty,
+                "price": fill_price,
+                "bar": order.current_bar,
+            })
+    
+    def _finish(self, order: AlgoOrder, status: OrderStatus):
+        """Final status; the order leaves memory on the next archive pass"""
+        order.status = status
+        order.completed_at = datetime.utcnow()
+        if self.archive is not None:
+            self._finished.append(order)
+    
+    def _vwap_slice(self, order: AlgoOrder) -> bool:
+        """Execute the next VWAP slice (simulated); returns whether more slices follow"""
+        schedule = order.execution_schedule
+        if order.next_slice < len(schedule):
+            slice_info = schedule[order.next_slice]
+            order.next_slice += 1
             
-            # Simulate execution
-            fill_price = base_price * (1 + random.uniform(-0.001, 0.001))
+            # Simulate execution against the tape
             fill_qty = slice_info["quantity"]
-            
-            order.filled_quantity += fill_qty
-            order.avg_fill_price = (
-                (order.avg_fill_price * (order.filled_quantity - fill_qty) + fill_price * fill_qty) 
-                / order.filled_quantity
-            )
+            fill_price = self._fill_price(order, self._slice_bar(order, slice_info["time_offset_minutes"]), fill_qty)
+            self._record_fill(order, fill_qty, fill_price)
             
             slice_info["status"] = "filled"
             slice_info["fill_price"] = fill_price
@@ -415,32 +559,25 @@ class AlgorithmicExecutionEngine:
                 "price": fill_price,
                 "cumulative_filled": order.filled_quantity
             })
+            self._publish_fill(order, fill_qty, fill_price)
             
-            if order.filled_quantity >= order.total_quantity:
-                order.status = OrderStatus.FILLED
-                break
+            if order.filled_quantity < order.total_quantity and order.next_slice < len(schedule):
+                return True
         
-        if order.filled_quantity >= order.total_quantity * 0.99:
-            order.status = OrderStatus.FILLED
+        # A schedule that ran out short of the quantity expires
+        self._finish(order, OrderStatus.FILLED if order.complete else OrderStatus.EXPIRED)
+        return False
     
-    async def _execute_twap(self, order: AlgoOrder):
-        """Execute TWAP order (simulated)"""
-        base_price = 100
-        
-        for slice_info in order.execution_schedule:
-            if order.status == OrderStatus.CANCELLED:
-                break
-                
-            await asyncio.sleep(0.1)
+    def _twap_slice(self, order: AlgoOrder) -> bool:
+        """Execute the next TWAP slice (simulated); returns whether more slices follow"""
+        schedule = order.execution_schedule
+        if order.next_slice < len(schedule):
+            slice_info = schedule[order.next_slice]
+            order.next_slice += 1
             
-            fill_price = base_price * (1 + random.uniform(-0.001, 0.001))
             fill_qty = slice_info["quantity"]
-            
-            order.filled_quantity += fill_qty
-            order.avg_fill_price = (
-                (order.avg_fill_price * (order.filled_quantity - fill_qty) + fill_price * fill_qty) 
-                / order.filled_quantity
-            ) if order.filled_quantity > 0 else fill_price
+            fill_price = self._fill_price(order, self._slice_bar(order, max(slice_info["time_offset_minutes"], 0)), fill_qty)
+            self._record_fill(order, fill_qty, fill_price)
             
             slice_info["status"] = "filled"
             
@@ -450,32 +587,31 @@ class AlgorithmicExecutionEngine:
                 "quantity": fill_qty,
                 "price": fill_price
             })
+            self._publish_fill(order, fill_qty, fill_price)
+            
+            if order.next_slice < len(schedule):
+                return True
         
-        order.status = OrderStatus.FILLED
+        self._finish(order, OrderStatus.FILLED)
+        return False
     
-    async def _execute_iceberg(self, order: AlgoOrder):
-        """Execute Iceberg order (simulated)"""
-        base_price = order.limit_price or 100
-        remaining = order.total_quantity
-        
-        while remaining > 0 and order.status != OrderStatus.CANCELLED:
-            await asyncio.sleep(0.1)
-            
+    def _iceberg_slice(self, order: AlgoOrder) -> bool:
+        """Refresh the visible Iceberg slice (simulated); returns whether more refreshes follow"""
+        if order.remaining > 0:
             # Calculate visible slice (with variance)
             variance_mult = 1 + random.uniform(-order.variance, order.variance)
-            slice_qty = min(order.visible_quantity * variance_mult, remaining)
+            slice_qty = min(order.visible_quantity * variance_mult, order.remaining)
             
-            fill_price = base_price * (1 + random.uniform(-0.0005, 0.0005))
+            # One refresh per bar; never worse than the limit
+            fill_price = self._fill_price(order, self._slice_bar(order, order.refresh_count), slice_qty)
+            if order.limit_price:
+                limit = min if order.side == OrderSide.BUY else max
+                fill_price = limit(fill_price, order.limit_price)
             
-            order.filled_quantity += slice_qty
-            remaining -= slice_qty
+            self._record_fill(order, slice_qty, fill_price)
+            order.remaining -= slice_qty
             order.refresh_count += 1
             
-            order.avg_fill_price = (
-                (order.avg_fill_price * (order.filled_quantity - slice_qty) + fill_price * slice_qty) 
-                / order.filled_quantity
-            ) if order.filled_quantity > 0 else fill_price
-            
             order.child_orders.append({
                 "refresh": order.refresh_count,
                 "quantity": slice_qty,
@@ -489,34 +625,28 @@ class AlgorithmicExecutionEngine:
                 "refresh_count": order.refresh_count,
                 "quantity": slice_qty,
                 "price": fill_price,
-                "remaining": remaining
+                "remaining": order.remaining
             })
+            self._publish_fill(order, slice_qty, fill_price)
+            
+            if order.remaining > 0:
+                return True
         
-        order.status = OrderStatus.FILLED
+        self._finish(order, OrderStatus.FILLED)
+        return False
     
-    async def _execute_pov(self, order: AlgoOrder):
-        """Execute POV order (simulated)"""
-        base_price = 100
-        simulated_market_volume = 100000
-        
-        while order.filled_quantity < order.total_quantity:
-            if order.status == OrderStatus.CANCELLED:
-                break
-                
-            await asyncio.sleep(0.1)
-            
-            # Calculate participation based on simulated market volume
-            market_slice = simulated_market_volume * 0.01  # 1% of daily volume per tick
+    def _pov_slice(self, order: AlgoOrder) -> bool:
+        """Execute the next POV slice (simulated); returns whether more slices follow"""
+        if order.filled_quantity < order.total_quantity:
+            # Participate in one bar of tape volume per slice
+            bar = self._slice_bar(order, order.next_slice * order.tape.bar_seconds / 60)
+            order.next_slice += 1
+            market_slice = float(order.tape.volumes[bar])
             our_slice = market_slice * order.participation_rate
             our_slice = min(our_slice, order.total_quantity - order.filled_quantity)
             
-            fill_price = base_price * (1 + random.uniform(-0.001, 0.001))
-            
-            order.filled_quantity += our_slice
-            order.avg_fill_price = (
-                (order.avg_fill_price * (order.filled_quantity - our_slice) + fill_price * our_slice) 
-                / order.filled_quantity
-            ) if order.filled_quantity > 0 else fill_price
+            fill_price = self._fill_price(order, bar, our_slice)
+            self._record_fill(order, our_slice, fill_price)
             
             order.execution_log.append({
                 "timestamp": datetime.utcnow().isoformat(),
@@ -525,13 +655,29 @@ class AlgorithmicExecutionEngine:
                 "participation": round(our_slice / market_slice * 100, 2),
                 "price": fill_price
             })
+            self._publish_fill(order, our_slice, fill_price)
+            
+            if order.filled_quantity < order.total_quantity:
+                return True
         
-        order.status = OrderStatus.FILLED
+        self._finish(order, OrderStatus.FILLED)
+        return False
     
-    def get_order(self, order_id: str) -> Optional[Dict]:
-        """Get order status"""
+    async def get_order(self, order_id: str) -> Optional[Dict]:
+        """Get order status (from the archive once the order has left memory)"""
         order = self.active_orders.get(order_id)
-        return order.to_dict() if order else None
+        if order:
+            return order.to_dict()
+        if self.archive is None:
+            return None
+        doc = await self.archive.get_order(order_id)
+        if doc is None:
+            return None
+        doc["remaining_quantity"] = doc["total_quantity"] - doc["filled_quantity"]
+        doc["fill_percentage"] = round(doc["filled_quantity"] / doc["total_quantity"] * 100, 2)
+        doc["execution_log"] = await self.archive.get_children(order_id, limit=10, latest=True)
+        doc["archived"] = True
+        return doc
     
     def cancel_order(self, order_id: str) -> Dict:
         """Cancel an active order"""
@@ -539,10 +685,13 @@ class AlgorithmicExecutionEngine:
         if not order:
             return {"error": "Order not found"}
         
-        if order.status in [OrderStatus.FILLED, OrderStatus.CANCELLED]:
+        if order.status in [OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.EXPIRED]:
             return {"error": f"Order already {order.status.value}"}
         
-        order.status = OrderStatus.CANCELLED
+        # Drop the pending child slice from the timer wheel (O(1))
+        self.scheduler.cancel(order.timer)
+        order.timer = None
+        self._finish(order, OrderStatus.CANCELLED)
         return {
             "order_id": order_id,
             "status": "CANCELLED",
@@ -554,67 +703,104 @@ class AlgorithmicExecutionEngine:
         """Get all orders"""
         return [order.to_dict() for order in self.active_orders.values()]
     
-    def get_execution_analytics(self) -> Dict:
-        """Get execution performance analytics"""
-        filled_orders = [o for o in self.active_orders.values() if o.status == OrderStatus.FILLED]
-        
-        if not filled_orders:
-            return {"message": "No completed orders for analysis"}
-        
-        avg_slippage = sum(o.slippage for o in filled_orders) / len(filled_orders)
-        
-        by_type = {}
-        for order in filled_orders:
-            otype = order.order_type.value
-            if otype not in by_type:
-                by_type[otype] = {"count": 0, "total_quantity": 0, "avg_slippage": 0}
-            by_type[otype]["count"] += 1
-            by_type[otype]["total_quantity"] += order.total_quantity
+    def _archive_docs(self, orders: List[AlgoOrder]) -> List[Dict]:
+        """Archive documents with interval VWAP/TWAP/volume, one vectorized pass per tape"""
+        docs = [order.archive_doc() for order in orders]
+        by_tape = defaultdict(list)
+        for i, order in enumerate(orders):
+            if order.tape is not None:
+                by_tape[id(order.tape)].append(i)
+        for indices in by_tape.values():
+            tape = orders[indices[0]].tape
+            benchmarks = window_benchmarks(tape, [orders[i].start_bar for i in indices],
+                                           [orders[i].bars_used for i in indices])
+            columns = {key: values.tolist() for key, values in benchmarks.items()}
+            for row, i in enumerate(indices):
+                docs[i].update({key: values[row] for key, values in columns.items()})
+        return docs
+    
+    async def archive_completed(self):
+        """Move finished orders out of memory into the archive and flush it (a periodic job)"""
+        if self.archive is None:
+            return
+        finished, self._finished = self._finished, []
+        for doc in self._archive_docs(finished):
+            self.archive.add_order(doc)
+        for order in finished:
+            self.active_orders.pop(order.order_id, None)
+        await self.archive.flush()
+    
+    async def get_execution_analytics(self, day: Optional[str] = None) -> Dict:
+        """Transaction-cost analysis of the orders finished on `day` (default today, UTC)"""
+        day = day or datetime.utcnow().date().isoformat()
+        records = await self.archive.find_day(day) if self.archive is not None else []
+        archived = {doc["order_id"] for doc in records}
+        records += self._archive_docs([
+            o for o in self.active_orders.values()
+            if o.completed_at and o.completed_at.date().isoformat() == day and o.order_id not in archived
+        ])
+        status = {
+            "active_orders": sum(o.status == OrderStatus.ACTIVE for o in self.active_orders.values()),
+            "scheduler": self.scheduler.get_status(),
+            "archive": self.archive.get_status() if self.archive is not None else None,
+        }
+        if not records:
+            return {"message": "No completed orders for analysis", "day": day, **status}
         
+        report = tca_report(records)
+        summary = report["summary"]
         return {
-            "total_orders": len(filled_orders),
-            "average_slippage_bps": round(avg_slippage * 10000, 2),
-            "by_order_type": by_type,
-            "fill_rate": round(len(filled_orders) / len(self.active_orders) * 100, 2)
+            "day": day,
+            "total_orders": report["orders"],
+            "average_slippage_bps": summary["arrival_slippage_bps"],
+            "implementation_shortfall_bps": summary["shortfall_bps"],
+            "by_order_type": {row["order_type"]: row for row in report["groups"]["order_type"]},
+            "fill_rate": round(summary["fill_rate"] * 100, 2) if summary["fill_rate"] is not None else None,
+            "tca": report,
+            **status
         }
 
 
-# Singleton instance
+# Singleton instance (the server attaches its archive)
 algo_engine = AlgorithmicExecutionEngine()
+task_supervisor.service("algo_slice_scheduler", algo_engine.scheduler.run)
+task_supervisor.periodic("algo_archive", algo_engine.archive_completed, ARCHIVE_INTERVAL)
 
 
 # API Functions
 async def create_vwap_order(symbol: str, side: str, quantity: float, 
-                            duration_minutes: int = 60) -> Dict:
+                            duration_minutes: int = 60, user_id: Optional[str] = None) -> Dict:
     """Create VWAP order"""
     return await algo_engine.create_vwap_order(
-        symbol, OrderSide(side.lower()), quantity, duration_minutes
+        symbol, OrderSide(side.lower()), quantity, duration_minutes, user_id=user_id
     )
 
 async def create_twap_order(symbol: str, side: str, quantity: float,
-                            duration_minutes: int = 60, slices: int = 12) -> Dict:
+                            duration_minutes: int = 60, slices: int = 12,
+                            user_id: Optional[str] = None) -> Dict:
     """Create TWAP order"""
     return await algo_engine.create_twap_order(
-        symbol, OrderSide(side.lower()), quantity, duration_minutes, slices
+        symbol, OrderSide(side.lower()), quantity, duration_minutes, slices, user_id=user_id
     )
 
 async def create_iceberg_order(symbol: str, side: str, quantity: float,
-                               visible_quantity: float, limit_price: float) -> Dict:
+                               visible_quantity: float, limit_price: float,
+                               user_id: Optional[str] = None) -> Dict:
     """Create Iceberg order"""
     return await algo_engine.create_iceberg_order(
-        symbol, OrderSide(side.lower()), quantity, visible_quantity, limit_price
+        symbol, OrderSide(side.lower()), quantity, visible_quantity, limit_price, user_id=user_id
     )
 
 async def create_smart_order(symbol: str, side: str, quantity: float,
-                             urgency: str = "medium") -> Dict:
+                             urgency: str = "medium", user_id: Optional[str] = None) -> Dict:
     """Create Smart order with auto-routing"""
     return await algo_engine.create_smart_order(
-        symbol, OrderSide(side.lower()), quantity, urgency
+        symbol, OrderSide(side.lower()), quantity, urgency, user_id=user_id
     )
 
-def get_algo_order(order_id: str) -> Dict:
+async def get_algo_order(order_id: str) -> Dict:
     """Get order status"""
-    return algo_engine.get_order(order_id) or {"error": "Order not found"}
+    return await algo_engine.get_order(order_id) or {"error": "Order not found"}
 
 def cancel_algo_order(order_id: str) -> Dict:
     """Cancel order"""
@@ -624,6 +810,12 @@ def get_all_algo_orders() -> List[Dict]:
     """Get all orders"""
     return algo_engine.get_all_orders()
 
-def get_algo_analytics() -> Dict:
+async def get_algo_analytics(day: Optional[str] = None) -> Dict:
     """Get execution analytics"""
-    return algo_engine.get_execution_analytics()
+    return await algo_engine.get_execution_analytics(day)
+
+def simulate_algo_orders(orders: List[Dict], day: Optional[str] = None,
+                         impact: Optional[Dict] = None) -> Dict:
+    """Simulate parent orders over a day of market tape (CPU-bound; run off the event loop)"""
+    model = ImpactModel(**impact) if impact else fill_model
+    return simulate_orders(orders, model=model, day=day)
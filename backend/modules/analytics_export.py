@@ -0,0 +1,443 @@
+# OracleIQTrader - Analytics Export
+# Incremental export of trades, signals and predictions to Parquet files
+# partitioned by date and symbol with typed schemas, plus a local read API
+# with column projection and predicate pushdown so offline analytics never
+# query Mongo
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from modules.lazy_imports import lazy_import
+
+pa = lazy_import("pyarrow")
+pa_ds = lazy_import("pyarrow.dataset")
+pa_ipc = lazy_import("pyarrow.ipc")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50_000
+PARTITION_FIELDS = ("date", "symbol")
+STATE_FILE = "_export_state.json"
+
+# ============ SCHEMAS ============
+
+
+def _to_string(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def _to_timestamp(value) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _to_json(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str, separators=(",", ":"))
+
+
+def _to_string_list(value) -> Optional[List[str]]:
+    return [_to_string(v) for v in value] if isinstance(value, (list, tuple)) else None
+
+
+# kind -> (arrow type factory, python coercion)
+FIELD_KINDS: Dict[str, Tuple[Callable[[], Any], Callable[[Any], Any]]] = {
+    "string": (lambda: pa.string(), _to_string),
+    "float64": (lambda: pa.float64(), _to_float),
+    "int64": (lambda: pa.int64(), _to_int),
+    "bool": (lambda: pa.bool_(), _to_bool),
+    "timestamp": (lambda: pa.timestamp("us", tz="UTC"), _to_timestamp),
+    "json": (lambda: pa.string(), _to_json),
+    "list<string>": (lambda: pa.list_(pa.string()), _to_string_list),
+}
+
+
+class ExportDataset:
+    """
+    One exported collection: its typed columns, the timestamp that drives
+    both the date partition and the high-water mark, and how long rows are
+    left to settle before export (rows that change after insert, like trade
+    signal status, are exported once they are unlikely to change again).
+    """
+
+    def __init__(self, collection: str, fields: Dict[str, str], time_field: str, settle_seconds: int = 60):
+        if fields.get(time_field) != "timestamp" or fields.get("symbol") != "string":
+            raise ValueError(f"{collection}: needs a timestamp {time_field} column and a string symbol column")
+        self.collection = collection
+        self.fields = fields
+        self.time_field = time_field
+        self.settle_seconds = settle_seconds
+
+    @property
+    def schema(self):
+        """Full logical schema, partition columns included"""
+        columns = [(name, FIELD_KINDS[kind][0]()) for name, kind in self.fields.items()]
+        return pa.schema(columns + [("date", pa.string())])
+
+    def coerce(self, column: str, value):
+        kind = self.fields.get(column, "string")
+        return FIELD_KINDS[kind][1](value)
+
+
+DATASETS: Dict[str, ExportDataset] = {
+    "trades": ExportDataset("trades", {
+        "id": "string",
+        "user_id": "string",
+        "action": "string",
+        "symbol": "string",
+        "quantity": "float64",
+        "price": "float64",
+        "status": "string",
+        "profit_loss": "float64",
+        "consensus_confidence": "float64",
+        "announced": "bool",
+        "timestamp": "timestamp",
+    }, time_field="timestamp"),
+    "crawler_signals": ExportDataset("crawler_signals", {
+        "id": "string",
+        "signal_type": "string",
+        "urgency": "string",
+        "symbol": "string",
+        "message": "string",
+        "data": "json",
+        "action_suggested": "string",
+        "timestamp": "timestamp",
+    }, time_field="timestamp"),
+    "prediction_history": ExportDataset("prediction_history", {
+        "id": "string",
+        "prediction_id": "string",
+        "symbol": "string",
+        "prediction_type": "string",
+        "predicted_direction": "string",
+        "actual_direction": "string",
+        "predicted_change": "float64",
+        "actual_change": "float64",
+        "was_correct": "bool",
+        "created_at": "timestamp",
+        "resolved_at": "timestamp",
+    }, time_field="created_at"),
+    "trade_signals": ExportDataset("trade_signals", {
+        "id": "string",
+        "bot_id": "string",
+        "symbol": "string",
+        "signal": "string",
+        "confidence": "float64",
+        "technical_score": "float64",
+        "sentiment_score": "float64",
+        "ai_score": "float64",
+        "action": "string",
+        "quantity": "float64",
+        "entry_price": "float64",
+        "stop_loss": "float64",
+        "take_profit": "float64",
+        "reasoning": "list<string>",
+        "status": "string",
+        "created_at": "timestamp",
+        "expires_at": "timestamp",
+    }, time_field="created_at", settle_seconds=3600),
+}
+
+
+def _hive_partitioning():
+    return pa_ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITION_FIELDS]), flavor="hive")
+
+
+# ============ EXPORT ============
+
+class AnalyticsExporter:
+    """
+    Streams collections into <root>/<collection>/date=YYYY-MM-DD/symbol=X/*.parquet.
+
+    Each run resumes from the per-collection high-water mark (time field, id)
+    stored in <root>/_export_state.json and pages forward in (time, id) order.
+    File names are derived from the batch's starting mark, so a batch that is
+    rewritten after a crash overwrites its own files instead of duplicating
+    rows. Reads go to a secondary when one is available.
+    """
+
+    def __init__(self, db, root: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 datasets: Optional[Dict[str, ExportDataset]] = None):
+        self.db = db
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.datasets = datasets or DATASETS
+        self.state_path = self.root / STATE_FILE
+        self.state: Dict[str, dict] = self._load_state()
+        self._lock = asyncio.Lock()
+
+    def _load_state(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.error(f"Corrupt analytics export state {self.state_path}; starting from scratch")
+            return {}
+
+    def _save_state(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp, self.state_path)
+
+    def _source(self, dataset: ExportDataset):
+        """Collection handle that prefers secondaries, keeping bulk scans off the primary"""
+        try:
+            from pymongo import ReadPreference
+        except ImportError:
+            return self.db[dataset.collection]
+        return self.db.get_collection(dataset.collection, read_preference=ReadPreference.SECONDARY_PREFERRED)
+
+    async def run(self, collections: Optional[Sequence[str]] = None, full: bool = False) -> Dict[str, dict]:
+        """Export every (or the named) collection; `full` discards previous output first"""
+        names = list(collections or self.datasets)
+        unknown = [n for n in names if n not in self.datasets]
+        if unknown:
+            raise ValueError(f"Unknown export collections: {', '.join(unknown)}")
+        async with self._lock:
+            results = {}
+            for name in names:
+                try:
+                    results[name] = await self.export_collection(self.datasets[name], full=full)
+                except Exception as e:
+                    state = self.state.setdefault(name, {})
+                    state["last_error"] = f"{type(e).__name__}: {e}"
+                    self._save_state()
+                    logger.error(f"Analytics export of {name} failed: {state['last_error']}")
+                    results[name] = {"error": state["last_error"]}
+            return results
+
+    async def export_collection(self, dataset: ExportDataset, full: bool = False) -> dict:
+        name = dataset.collection
+        if full:
+            shutil.rmtree(self.root / name, ignore_errors=True)
+            self.state.pop(name, None)
+        state = self.state.setdefault(name, {"watermark": None, "last_id": None, "rows": 0, "files": 0})
+        source = self._source(dataset)
+        time_field = dataset.time_field
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=dataset.settle_seconds)).isoformat()
+        loop = asyncio.get_running_loop()
+        exported = 0
+
+        while True:
+            query: Dict[str, Any] = {time_field: {"$lte": cutoff}}
+            if state["watermark"] is not None:
+                query = {"$and": [query, {"$or": [
+                    {time_field: {"$gt": state["watermark"]}},
+                    {time_field: state["watermark"], "id": {"$gt": state["last_id"] or ""}},
+                ]}]}
+            docs = await source.find(query, {"_id": 0}) \
+                .sort([(time_field, 1), ("id", 1)]).limit(self.batch_size).to_list(self.batch_size)
+            if not docs:
+                break
+
+            batch_key = hashlib.sha1(f"{name}:{state['watermark']}:{state['last_id']}".encode()).hexdigest()[:16]
+            files = await loop.run_in_executor(None, self._write_batch, dataset, docs, batch_key)
+
+            last = docs[-1]
+            watermark = last[time_field]
+            state["watermark"] = watermark.isoformat() if isinstance(watermark, datetime) else watermark
+            state["last_id"] = last.get("id")
+            state["rows"] += len(docs)
+            state["files"] += files
+            exported += len(docs)
+            self._save_state()
+            if len(docs) < self.batch_size:
+                break
+
+        state["last_run"] = datetime.now(timezone.utc).isoformat()
+        state["last_error"] = None
+        self._save_state()
+        if exported:
+            logger.info(f"Analytics export: {exported} new {name} rows (watermark {state['watermark']})")
+        return {"exported": exported, **state}
+
+    def _write_batch(self, dataset: ExportDataset, docs: List[dict], batch_key: str) -> int:
+        """Convert one page of documents to Arrow and write it partitioned (runs in a worker thread)"""
+        columns = {
+            column: [FIELD_KINDS[kind][1](doc.get(column)) for doc in docs]
+            for column, kind in dataset.fields.items()
+        }
+        columns["date"] = [ts.date().isoformat() if ts else None for ts in columns[dataset.time_field]]
+        table = pa.Table.from_pydict(columns, schema=dataset.schema)
+
+        pa_ds.write_dataset(
+            table,
+            base_dir=str(self.root / dataset.collection),
+            format="parquet",
+            partitioning=_hive_partitioning(),
+            basename_template=f"part-{batch_key}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=pa_ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+        return len(set(zip(columns["date"], columns["symbol"])))
+
+    def get_status(self) -> dict:
+        return {
+            "root": str(self.root),
+            "collections": {
+                name: {**self.state.get(name, {}), "settle_seconds": dataset.settle_seconds}
+                for name, dataset in self.datasets.items()
+            },
+        }
+
+
+# ============ READ API ============
+
+_COMPARISONS = {
+    "==": lambda f, v: f == v,
+    "=": lambda f, v: f == v,
+    "!=": lambda f, v: f != v,
+    ">": lambda f, v: f > v,
+    ">=": lambda f, v: f >= v,
+    "<": lambda f, v: f < v,
+    "<=": lambda f, v: f <= v,
+    "in": lambda f, v: f.isin(v),
+    "not in": lambda f, v: ~f.isin(v),
+}
+
+_WHERE_RE = re.compile(r"^\s*(\w+)\s*(==|!=|>=|<=|=|>|<|\s+not\s+in\s+|\s+in\s+)\s*(.+?)\s*$")
+
+
+def parse_where(where: Optional[str]) -> List[Tuple[str, str, Any]]:
+    """
+    Parse "price>100,action==BUY,symbol in BTC|ETH" into (column, op, value)
+    filters; values are coerced to column types by AnalyticsReader.query
+    """
+    filters = []
+    for clause in (where or "").split(","):
+        if not clause.strip():
+            continue
+        match = _WHERE_RE.match(clause)
+        if not match:
+            raise ValueError(f"Invalid filter: {clause.strip()!r}")
+        column, op, value = match.group(1), " ".join(match.group(2).split()), match.group(3)
+        filters.append((column, op, value.split("|") if op in ("in", "not in") else value))
+    return filters
+
+
+class AnalyticsReader:
+    """
+    Queries the exported Parquet datasets. Date and symbol filters prune
+    partition directories, other predicates are pushed down to Parquet row
+    group statistics, and only the requested columns are read.
+    """
+
+    def __init__(self, root: str, datasets: Optional[Dict[str, ExportDataset]] = None):
+        self.root = Path(root)
+        self.datasets = datasets or DATASETS
+
+    def _dataset(self, name: str):
+        if name not in self.datasets:
+            raise KeyError(name)
+        path = self.root / name
+        if not path.exists():
+            raise FileNotFoundError(f"{name} has not been exported yet")
+        return pa_ds.dataset(str(path), format="parquet", schema=self.datasets[name].schema,
+                             partitioning=_hive_partitioning())
+
+    def _coerce(self, dataset: ExportDataset, column: str, value):
+        if column == "date":
+            return value
+        if dataset.fields.get(column) == "bool" and isinstance(value, str):
+            return value.lower() in ("1", "true", "yes")
+        if dataset.fields.get(column) in ("json", "list<string>"):
+            raise ValueError(f"Cannot filter on {column}")
+        return dataset.coerce(column, value)
+
+    def query(self, name: str, columns: Optional[List[str]] = None,
+              filters: Optional[List[Tuple[str, str, Any]]] = None,
+              start: Optional[datetime] = None, end: Optional[datetime] = None,
+              symbols: Optional[List[str]] = None, limit: Optional[int] = None):
+        """Return a pyarrow Table of matching rows (`end` is exclusive)"""
+        dataset = self.datasets.get(name)
+        if dataset is None:
+            raise KeyError(name)
+        source = self._dataset(name)
+        known = set(source.schema.names)
+        for column in columns or []:
+            if column not in known:
+                raise ValueError(f"Unknown column: {column}")
+
+        time_field = pa_ds.field(dataset.time_field)
+        conditions = []
+        if start:
+            start = _to_timestamp(start)
+            conditions += [pa_ds.field("date") >= start.date().isoformat(), time_field >= start]
+        if end:
+            end = _to_timestamp(end)
+            conditions += [pa_ds.field("date") <= end.date().isoformat(), time_field < end]
+        if symbols:
+            conditions.append(pa_ds.field("symbol").isin([s.upper() for s in symbols]))
+        for column, op, value in filters or []:
+            if column not in known:
+                raise ValueError(f"Unknown column: {column}")
+            if op not in _COMPARISONS:
+                raise ValueError(f"Unsupported operator: {op}")
+            if isinstance(value, list):
+                value = [self._coerce(dataset, column, v) for v in value]
+            else:
+                value = self._coerce(dataset, column, value)
+            conditions.append(_COMPARISONS[op](pa_ds.field(column), value))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        if limit:
+            return source.head(limit, columns=columns, filter=expression)
+        return source.to_table(columns=columns, filter=expression)
+
+    def summary(self) -> Dict[str, dict]:
+        """Files, bytes and partitions on disk per exported collection"""
+        result = {}
+        for name in self.datasets:
+            path = self.root / name
+            files = list(path.rglob("*.parquet")) if path.exists() else []
+            result[name] = {
+                "files": len(files),
+                "bytes": sum(f.stat().st_size for f in files),
+                "dates": sorted({p.name[5:] for p in path.glob("date=*")}) if path.exists() else [],
+            }
+        return result
+
+
+def to_arrow_ipc(table) -> bytes:
+    """Serialize a table as an Arrow IPC stream (for bulk clients: pandas, polars, DuckDB)"""
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -12,6 +12,9 @@ import random
 import asyncio
 import logging
 
+from modules.task_supervisor import GroupFull, task_supervisor
+from modules.event_bus import event_bus, SignalEmitted
+
 logger = logging.getLogger(__name__)
 
 # ============ ENUMS ============
@@ -194,7 +197,11 @@ class AutonomousBotEngine:
         bot = await self.get_bot(bot_id)
         if not bot:
             return {"success": False, "error": "Bot not found"}
+        if mode == BotMode.FULL_AUTO and not task_supervisor.has_slot("bots", bot_id):
+            # The bot loop holds its slot until the mode changes, so don't queue it
+            raise GroupFull(f"All {task_supervisor.group('bots').limit} full-auto bot slots are in use")
         
+        previous = {"mode": bot.mode, "is_active": bot.is_active, "updated_at": bot.updated_at}
         bot.mode = mode
         bot.is_active = mode != BotMode.PAUSED
         bot.updated_at = datetime.now(timezone.utc).isoformat()
@@ -206,7 +213,13 @@ class AutonomousBotEngine:
         
         if mode == BotMode.FULL_AUTO:
             # Start bot loop
-            asyncio.create_task(self.run_bot_loop(bot_id))
+            # Keyed by bot id, so switching to full auto twice does not start a second loop
+            try:
+                task_supervisor.spawn("bots", self.run_bot_loop(bot_id), key=bot_id, wait=False)
+            except GroupFull:
+                # Another bot took the last slot while the mode was being saved
+                await self.db.trading_bots.update_one({"id": bot_id}, {"$set": previous})
+                raise
         
         return {"success": True, "mode": mode}
     
@@ -368,6 +381,18 @@ class AutonomousBotEngine:
         )
         
         await self.db.trade_signals.insert_one(trade_signal.model_dump())
+        
+        if action != "hold":
+            event_bus.publish(SignalEmitted(
+                signal_id=trade_signal.id,
+                symbol=symbol,
+                signal_type="bot",
+                action=action,
+                confidence=round(confidence * 100, 1),
+                user_id=bot.user_id,
+                source="bot",
+                data={"name": bot.name, "bot_id": bot.id, "signal": signal.value}
+            ))
         return trade_signal
     
     async def approve_signal(self, signal_id: str) -> Dict:
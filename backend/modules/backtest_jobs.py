@@ -0,0 +1,363 @@
+# OracleIQTrader - Backtest Job Queue
+# Backtests, parameter sweeps and walk-forward studies submitted as jobs:
+# a dispatcher starts the cheapest waiting job whenever one of a bounded
+# number of slots frees up, jobs report progress and can be cancelled, and
+# finished results are cached by a hash of everything that determines them,
+# so a repeated configuration is answered at submission without running.
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pymongo import UpdateOne
+
+from modules.backtest_sweep import SweepBusy
+from modules.backtester import ENGINE_VERSION
+from modules.metrics import metrics
+from modules.task_supervisor import task_supervisor
+
+logger = logging.getLogger(__name__)
+
+JOB_GROUP = "backtest_jobs"
+MAX_QUEUED_JOBS = 1000
+MAX_FINISHED_JOBS = 2000     # finished jobs kept for status/result lookups
+AGING_SECONDS = 30.0         # a waiting job's cost estimate halves every AGING_SECONDS
+SWEEP_RETRY_SECONDS = 1.0    # wait for a sweep slot taken by the streaming endpoints
+FINISHED = ("completed", "failed", "cancelled")
+
+BACKTEST_JOBS = metrics.counter(
+    "oracle_backtest_jobs_total", "Backtest jobs by kind and outcome (cached = answered from the result cache)",
+    ("kind", "outcome"))
+
+
+class JobQueueFull(Exception):
+    """Raised when MAX_QUEUED_JOBS jobs are already waiting"""
+    pass
+
+
+def cache_key(kind: str, **fields) -> str:
+    """
+    Content address of a job: sha256 of the canonical JSON of its kind,
+    the engine version and every input that determines its result
+    """
+    payload = json.dumps({"kind": kind, "engine_version": ENGINE_VERSION, **fields},
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ============ RESULT CACHE ============
+
+class BacktestResultCache:
+    """
+    Maintains the `backtest_results` collection (one document per cache
+    key) behind an in-memory LRU of the most recently used results
+    """
+
+    COLLECTION = "backtest_results"
+
+    def __init__(self, db, max_entries: int = 256):
+        self.db = db
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def collection(self):
+        return self.db[self.COLLECTION]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("key", 1)], unique=True)
+
+    def _remember(self, key: str, result: Dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        result = self._memory.get(key)
+        if result is None:
+            doc = await self.collection.find_one({"key": key}, {"_id": 0, "result": 1})
+            result = doc["result"] if doc else None
+            if result is not None:
+                self._remember(key, result)
+        else:
+            self._memory.move_to_end(key)
+        self.stats["hits" if result is not None else "misses"] += 1
+        return result
+
+    async def put(self, key: str, kind: str, result: Dict):
+        self._remember(key, result)
+        now = datetime.now(timezone.utc).isoformat()
+        await self.collection.bulk_write([UpdateOne(
+            {"key": key},
+            {"$set": {"key": key, "kind": kind, "engine_version": ENGINE_VERSION, "result": result,
+                      "created_at": now}},
+            upsert=True)])
+        self.stats["stores"] += 1
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "memory_entries": len(self._memory)}
+
+
+# ============ JOBS ============
+
+@dataclass
+class BacktestJob:
+    """
+    One queued unit of backtest work; `run` fills in progress and returns
+    the result, running blocking steps through `offload(func, *args)`
+    """
+    kind: str
+    key: str
+    cost: float  # estimated work (bars x combinations); cheaper jobs start first
+    user_id: str
+    run: Callable[["BacktestJob"], Awaitable[Dict]] = field(repr=False)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"  # queued, running, cancelling, completed, failed, cancelled
+    progress: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+    result: Optional[Dict] = field(default=None, repr=False)
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    offload: Optional[Callable[..., Awaitable[Any]]] = field(default=None, repr=False)
+    threads: int = 0  # offloaded calls still running
+    task_done: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "cached": self.cached,
+            "cache_key": self.key,
+            "estimated_cost": self.cost,
+            "error": self.error,
+            "submitted_at": iso(self.submitted_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "run_seconds": round(self.finished_at - self.started_at, 3)
+            if self.finished_at and self.started_at else None,
+        }
+
+
+class BacktestJobQueue:
+    """
+    Bounded priority queue of backtest jobs.
+
+    - At most `max_running` jobs run at once, as tasks in the supervisor's
+      "backtest_jobs" group; the rest wait, at most `max_queued` of them
+    - Whenever a slot frees up the dispatcher starts the waiting job with
+      the smallest aged cost: estimated work halved for every AGING_SECONDS
+      spent waiting, so short jobs go first and long ones still get a turn
+    - Submitting a configuration whose result is cached completes the job
+      immediately; submitting one that is already queued or running
+      returns that job
+    - A job's blocking work runs on the queue's own `max_running` threads
+      and keeps its slot until it returns: a cancelled job whose thread
+      cannot be interrupted stays "cancelling" until then
+    """
+
+    def __init__(self, cache: BacktestResultCache, max_running: int = 2, max_queued: int = MAX_QUEUED_JOBS,
+                 max_finished: int = MAX_FINISHED_JOBS):
+        self.cache = cache
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.jobs: Dict[str, BacktestJob] = {}
+        self._queued: Dict[str, BacktestJob] = {}
+        self._active_keys: Dict[str, str] = {}  # cache key -> queued/running job id
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.running = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_running, thread_name_prefix="backtest-job")
+        return self._executor
+
+    # ---- submission ----
+
+    async def submit(self, kind: str, key: str, cost: float, user_id: str,
+                     run: Callable[[BacktestJob], Awaitable[Dict]]) -> BacktestJob:
+        existing = self.jobs.get(self._active_keys.get(key, ""))
+        if existing is not None:
+            return existing
+        job = BacktestJob(kind, key, cost, user_id, run)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            job.cached = True
+            job.started_at = job.submitted_at
+            self.jobs[job.id] = job
+            self._finish(job, "completed", result=cached)
+            BACKTEST_JOBS.inc(kind, "cached")
+            return job
+        if len(self._queued) >= self.max_queued:
+            raise JobQueueFull(f"{len(self._queued)} backtest jobs already queued")
+        self.jobs[job.id] = job
+        self._queued[job.id] = job
+        self._active_keys[key] = job.id
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job: BacktestJob) -> Optional[int]:
+        """1-based position among waiting jobs in the order they would start now"""
+        if job.status != "queued":
+            return None
+        now = time.time()
+        return 1 + sum(1 for other in self._queued.values()
+                       if self._aged_cost(other, now) < self._aged_cost(job, now))
+
+    def cancel(self, job_id: str) -> Optional[BacktestJob]:
+        """Cancel a waiting or running job (a finished job is returned unchanged)"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        if self._queued.pop(job_id, None) is not None:
+            self._finish(job, "cancelled")
+        elif job.status == "running":
+            # Finished as cancelled once its task and any offloaded thread are done
+            job.status = "cancelling"
+            if self._active_keys.get(job.key) == job.id:
+                del self._active_keys[job.key]
+            task_supervisor.cancel(JOB_GROUP, job_id)
+        return job
+
+    # ---- dispatch ----
+
+    @staticmethod
+    def _aged_cost(job: BacktestJob, now: float) -> float:
+        return job.cost * 0.5 ** ((now - job.submitted_at) / AGING_SECONDS)
+
+    async def run(self):
+        """Dispatcher service: start the cheapest waiting job whenever a slot is free"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queued and self.running < self.max_running:
+                now = time.time()
+                job = min(self._queued.values(), key=lambda j: self._aged_cost(j, now))
+                del self._queued[job.id]
+                self.running += 1
+                job.status = "running"
+                job.started_at = now
+                job.offload = functools.partial(self._offload, job)
+                task = task_supervisor.spawn(JOB_GROUP, self._execute(job), key=job.id)
+                if task is None:
+                    self._settle(job)  # shutting down
+                else:
+                    task.add_done_callback(lambda _, job=job: self._settle(job))
+
+    async def _offload(self, job: BacktestJob, func: Callable, *args):
+        """Run blocking `func` for `job` on the queue's threads"""
+        loop = asyncio.get_running_loop()
+        job.threads += 1
+        work = self.executor.submit(func, *args)
+        work.add_done_callback(lambda _: loop.call_soon_threadsafe(self._thread_done, job))
+        return await asyncio.wrap_future(work)
+
+    def _thread_done(self, job: BacktestJob):
+        job.threads -= 1
+        self._release(job)
+
+    def _settle(self, job: BacktestJob):
+        job.task_done = True
+        self._release(job)
+
+    def _release(self, job: BacktestJob):
+        """Free the job's slot once its task and its offloaded threads are all done"""
+        if not job.task_done or job.threads:
+            return
+        # Also covers a task cancelled before _execute got to run
+        if job.status not in FINISHED:
+            self._finish(job, "cancelled")
+        self.running -= 1
+        self._wakeup.set()
+
+    async def _execute(self, job: BacktestJob):
+        try:
+            while True:
+                try:
+                    result = await job.run(job)
+                    break
+                except SweepBusy:
+                    # The streaming sweep endpoints hold every pool slot; wait for one
+                    await asyncio.sleep(SWEEP_RETRY_SECONDS)
+            try:
+                await self.cache.put(job.key, job.kind, result)
+            except Exception as e:
+                logger.error(f"Caching backtest job {job.id} failed: {type(e).__name__}: {e}")
+            self._finish(job, "completed", result=result)
+        except asyncio.CancelledError:
+            if job.threads:
+                job.status = "cancelling"
+            else:
+                self._finish(job, "cancelled")
+            raise
+        except ValueError as e:
+            self._finish(job, "failed", error=str(e))
+        except Exception as e:
+            logger.error(f"Backtest job {job.id} ({job.kind}) failed: {type(e).__name__}: {e}")
+            self._finish(job, "failed", error=f"{type(e).__name__}: {e}")
+
+    def _finish(self, job: BacktestJob, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        if status == "completed":
+            job.progress = 1.0
+        if self._active_keys.get(job.key) == job.id:
+            del self._active_keys[job.key]
+        if not job.cached:
+            BACKTEST_JOBS.inc(job.kind, status)
+        self._finished[job.id] = None
+        while len(self._finished) > self.max_finished:
+            old, _ = self._finished.popitem(last=False)
+            self.jobs.pop(old, None)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "queued": len(self._queued),
+            "running": self.running,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "jobs": by_status,
+            "cache": self.cache.get_stats(),
+        }
+
+
+def job_queue_options_from_env() -> dict:
+    """BacktestJobQueue options: BACKTEST_JOB_WORKERS (concurrent jobs) and BACKTEST_JOB_QUEUE_LIMIT"""
+    return {
+        "max_running": max(1, int(os.environ.get("BACKTEST_JOB_WORKERS", "2"))),
+        "max_queued": int(os.environ.get("BACKTEST_JOB_QUEUE_LIMIT", str(MAX_QUEUED_JOBS))),
+    }
@@ -0,0 +1,358 @@
+# OracleIQTrader - Backtest Parameter Sweeps
+# Grid and random searches over a strategy's parameters, run on a process
+# pool. The candles are copied once into a shared-memory block that every
+# worker maps (tasks carry only the block's name), workers keep indicator
+# arrays between tasks, and results stream back chunk by chunk as they finish.
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.backtester import (ExecutionSettings, Indicators, PriceData, backtest_stats, resolve_parameters,
+                                simulate, strategy_positions)
+from modules.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_SWEEP_COMBINATIONS = 100_000
+MAX_CHUNK_SIZE = 64          # combinations per pool task
+CHUNKS_PER_WORKER = 8        # enough tasks that no core idles at the tail of a sweep
+WORKER_ATTACHMENTS = 2       # price blocks a worker keeps mapped (with their indicators)
+WORKER_INDICATOR_CACHE = 48  # indicator arrays a worker keeps per block
+OBJECTIVES = ("sharpe_ratio", "total_return_percent", "profit_factor", "win_rate",
+              "max_drawdown_percent", "final_balance")
+MINIMIZED_OBJECTIVES = ("max_drawdown_percent",)
+PRICE_COLUMNS = ("timestamps", "open", "high", "low", "close", "volume")
+
+SWEEP_COMBINATIONS = metrics.counter(
+    "oracle_backtest_sweep_combinations_total", "Parameter combinations backtested by sweeps, by outcome",
+    ("outcome",))
+
+
+class SweepBusy(Exception):
+    """Raised when the maximum number of sweeps is already running"""
+    pass
+
+
+# ============ SEARCH SPACES ============
+
+def grid_combinations(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of the listed values (the last parameter varies fastest)"""
+    if not grid:
+        raise ValueError("grid needs at least one parameter")
+    for key, values in grid.items():
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"grid values for {key!r} must be a non-empty list")
+    count = math.prod(len(values) for values in grid.values())
+    if count > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f"grid has {count} combinations; the limit is {MAX_SWEEP_COMBINATIONS}")
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def random_combinations(space: Dict[str, Any], samples: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    `samples` draws from `space`: a list is a choice, {"min", "max"} a
+    uniform range (integers when both bounds are), with "log": true a
+    log-uniform one. Duplicate draws are dropped, sorted so that draws
+    sharing indicator periods run together.
+    """
+    if not space:
+        raise ValueError("random search needs at least one parameter")
+    if not 1 <= samples <= MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f"samples must be between 1 and {MAX_SWEEP_COMBINATIONS}")
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for key, spec in space.items():
+        if isinstance(spec, (list, tuple)) and spec:
+            columns[key] = [spec[i] for i in rng.integers(0, len(spec), samples)]
+        elif isinstance(spec, dict) and "min" in spec and "max" in spec:
+            low, high = spec["min"], spec["max"]
+            if low > high:
+                raise ValueError(f"{key!r}: min is above max")
+            integer = isinstance(low, int) and isinstance(high, int)
+            if spec.get("log"):
+                if low <= 0:
+                    raise ValueError(f"{key!r}: a log range needs min > 0")
+                draws = np.exp(rng.uniform(math.log(low), math.log(high + integer), samples))
+                columns[key] = np.minimum(np.floor(draws), high).astype(int).tolist() if integer else draws.tolist()
+            elif integer:
+                columns[key] = rng.integers(low, high + 1, samples).tolist()
+            else:
+                columns[key] = rng.uniform(low, high, samples).tolist()
+        else:
+            raise ValueError(f"{key!r}: expected a list of values or a {{min, max}} range")
+    keys = list(space)
+    draws = sorted(set(zip(*(columns[key] for key in keys))), key=lambda values: [repr(v) for v in values])
+    return [dict(zip(keys, values)) for values in draws]
+
+
+def sweep_combinations(strategy: str, grid: Optional[Dict] = None, random: Optional[Dict] = None,
+                       samples: int = 100, seed: Optional[int] = None) -> List[Dict]:
+    """The combinations of a grid or a random search (exactly one), checked against the strategy"""
+    if (grid is None) == (random is None):
+        raise ValueError("Give either a grid or a random search space")
+    combinations = grid_combinations(grid) if grid is not None else random_combinations(random, samples, seed)
+    resolve_parameters(strategy, combinations[0])  # unknown strategy or parameter names
+    return combinations
+
+
+# ============ SHARED PRICES ============
+
+@dataclass(frozen=True)
+class SharedPriceBlock:
+    """What a worker needs to map a SharedPrices block (all that is pickled per task)"""
+    name: str
+    bars: int
+    symbol: str
+    timeframe: str
+    source: str
+
+
+def _price_views(buffer, block: SharedPriceBlock) -> PriceData:
+    columns = []
+    for i, column in enumerate(PRICE_COLUMNS):
+        array = np.ndarray((block.bars,), dtype=np.int64 if column == "timestamps" else np.float64,
+                           buffer=buffer, offset=i * block.bars * 8)
+        array.flags.writeable = False
+        columns.append(array)
+    return PriceData(block.symbol, block.timeframe, *columns, source=block.source)
+
+
+class SharedPrices:
+    """
+    Owner side of a price block: the candle columns copied into one
+    shared-memory segment, unlinked on close (use as a context manager)
+    """
+
+    def __init__(self, prices: PriceData):
+        bars = len(prices)
+        self.shm = SharedMemory(create=True, size=max(len(PRICE_COLUMNS) * bars * 8, 1),
+                                name=f"oracle-prices-{uuid.uuid4().hex[:12]}")
+        self.block = SharedPriceBlock(self.shm.name, bars, prices.symbol, prices.timeframe, prices.source)
+        for i, column in enumerate(PRICE_COLUMNS):
+            target = np.ndarray((bars,), dtype=np.int64 if column == "timestamps" else np.float64,
+                                buffer=self.shm.buf, offset=i * bars * 8)
+            target[:] = getattr(prices, column)
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SharedPrices":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============ WORKER SIDE ============
+
+# Block name -> (mapping, candles, indicators), most recently used last; one per worker process
+_attached: "OrderedDict[str, Tuple[SharedMemory, PriceData, Indicators]]" = OrderedDict()
+
+
+def _worker_series(block: SharedPriceBlock) -> Tuple[PriceData, Indicators]:
+    entry = _attached.get(block.name)
+    if entry is None:
+        shm = SharedMemory(name=block.name)
+        prices = _price_views(shm.buf, block)
+        entry = _attached[block.name] = (shm, prices, Indicators(prices.close, WORKER_INDICATOR_CACHE))
+        while len(_attached) > WORKER_ATTACHMENTS:
+            _, (old, *_) = _attached.popitem(last=False)
+            try:
+                old.close()
+            except BufferError:
+                pass  # a view is still referenced; the mapping goes with the process
+    _attached.move_to_end(block.name)
+    return entry[1], entry[2]
+
+
+def run_combinations(prices: PriceData, indicators: Indicators, combinations: Sequence[Dict], strategy: str,
+                     settings: ExecutionSettings, allow_short: bool = False) -> List[Dict]:
+    """Statistics of each parameter combination; a rejected combination gets an error row"""
+    rows = []
+    for parameters in combinations:
+        try:
+            params = resolve_parameters(strategy, parameters)
+            sim = simulate(prices, strategy_positions(strategy, params, indicators, allow_short), settings)
+            rows.append({"parameters": params, **backtest_stats(sim, settings, prices.bars_per_year)})
+        except ValueError as e:
+            rows.append({"parameters": parameters, "error": str(e)})
+        except Exception as e:
+            # One broken combination must not fail the rest of its chunk
+            rows.append({"parameters": parameters, "error": f"{type(e).__name__}: {e}"})
+    return rows
+
+
+def _run_chunk(block: SharedPriceBlock, task: Callable, combinations: Sequence[Dict], args: tuple):
+    prices, indicators = _worker_series(block)
+    return task(prices, indicators, combinations, *args)
+
+
+# ============ SWEEPS ============
+
+def objective_key(objective: str):
+    """Sort key putting the best row first for `objective`; error rows last"""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {list(OBJECTIVES)}")
+    sign = 1.0 if objective in MINIMIZED_OBJECTIVES else -1.0
+
+    def key(row: Dict) -> float:
+        value = row.get(objective)
+        return sign * value if value is not None and math.isfinite(value) else math.inf
+    return key
+
+
+class BacktestSweeper:
+    """
+    Parameter sweeps on a process pool of `max_workers` (default: every
+    core). At most `max_sweeps` run at once; beyond that sweep() raises
+    SweepBusy so the route can answer 503. Concurrent sweeps share the
+    pool, each with its own price block.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_sweeps: int = 4):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_sweeps = max_sweeps
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._active = 0
+        self.stats = {"sweeps": 0, "combinations": 0, "errors": 0, "rejected": 0}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Workers fork from a clean server process with the backtester preloaded,
+            # never from the event loop's process and its threads
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["modules.backtest_sweep"])
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._executor
+
+    def chunk_size(self, combinations: int) -> int:
+        return max(1, min(MAX_CHUNK_SIZE, math.ceil(combinations / (self.max_workers * CHUNKS_PER_WORKER))))
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Claim one of the max_sweeps slots for the duration of a sweep or study"""
+        if self._active >= self.max_sweeps:
+            self.stats["rejected"] += 1
+            raise SweepBusy(f"{self._active} sweeps already running")
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+
+    async def map_chunks(self, prices: PriceData, task: Callable, combinations: List[Dict],
+                         *args) -> AsyncIterator[Tuple[List[Dict], Optional[Any]]]:
+        """
+        Run `task(prices, indicators, chunk, *args)` (a module-level function)
+        on the pool for each chunk of `combinations` against one shared copy
+        of `prices`, yielding (chunk, result) as chunks finish; result is
+        None for a chunk that failed. Closing the iterator early cancels the
+        chunks that have not started.
+        """
+        size = self.chunk_size(len(combinations))
+        chunks = [combinations[i:i + size] for i in range(0, len(combinations), size)]
+        loop = asyncio.get_running_loop()
+        pending = []
+
+        async def run(chunk, future):
+            try:
+                return chunk, await future
+            except BrokenProcessPool:
+                self._executor = None
+                raise
+            except Exception as e:
+                logger.error(f"Backtest sweep chunk of {len(chunk)} failed: {type(e).__name__}: {e}")
+                return chunk, None
+
+        try:
+            with SharedPrices(prices) as shared:
+                pending = [asyncio.ensure_future(run(chunk, loop.run_in_executor(
+                    self.executor, _run_chunk, shared.block, task, chunk, args))) for chunk in chunks]
+                for next_chunk in asyncio.as_completed(pending):
+                    yield await next_chunk
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def sweep(self, prices: PriceData, strategy: str, combinations: List[Dict],
+                    settings: ExecutionSettings, allow_short: bool = False,
+                    objective: str = "sharpe_ratio", top: int = 10) -> AsyncIterator[Dict]:
+        """
+        Yield a "start" event, a "results" event per finished chunk (its
+        rows plus the best row so far) and a final "done" event with the
+        `top` rows by `objective`
+        """
+        rank = objective_key(objective)
+        started = time.perf_counter()
+        rows: List[Dict] = []
+        best = None
+        failed = 0
+        with self.slot():
+            yield {"event": "start", "combinations": len(combinations),
+                   "chunks": math.ceil(len(combinations) / self.chunk_size(len(combinations))),
+                   "workers": self.max_workers, "bars": len(prices), "objective": objective}
+            chunks = self.map_chunks(prices, run_combinations, combinations, strategy, settings, allow_short)
+            async with contextlib.aclosing(chunks):
+                async for chunk, chunk_rows in chunks:
+                    if chunk_rows is None:
+                        failed += len(chunk)
+                        continue
+                    rows.extend(chunk_rows)
+                    candidates = [row for row in chunk_rows if "error" not in row]
+                    if best is not None:
+                        candidates.append(best)
+                    if candidates:
+                        best = min(candidates, key=rank)
+                    yield {"event": "results", "completed": len(rows), "total": len(combinations),
+                           "rows": chunk_rows, "best": best}
+
+        ranked = sorted((row for row in rows if "error" not in row), key=rank)
+        errors = failed + len(rows) - len(ranked)
+        self.stats["sweeps"] += 1
+        self.stats["combinations"] += len(rows)
+        self.stats["errors"] += errors
+        SWEEP_COMBINATIONS.inc("ok", amount=len(ranked))
+        SWEEP_COMBINATIONS.inc("error", amount=errors)
+        yield {"event": "done", "completed": len(rows), "errors": errors,
+               "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+               "best": ranked[0] if ranked else None, "top": ranked[:top]}
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "active": self._active, "max_sweeps": self.max_sweeps,
+                "max_workers": self.max_workers}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def sweeper_from_env() -> BacktestSweeper:
+    """BACKTEST_SWEEP_WORKERS (default: cpu count) and BACKTEST_MAX_SWEEPS"""
+    workers = int(os.environ.get("BACKTEST_SWEEP_WORKERS", "0")) or None
+    return BacktestSweeper(max_workers=workers, max_sweeps=int(os.environ.get("BACKTEST_MAX_SWEEPS", "4")))
+
+
+# Global instance
+backtest_sweeper = sweeper_from_env()
@@ -0,0 +1,595 @@
+# OracleIQTrader - Vectorized Backtester
+# Candle data (aggregated from recorded ticks, or a deterministic synthetic
+# series), memoized indicators, and strategies evaluated as numpy array
+# operations: signals -> positions -> stop/take-profit exits -> fees and
+# slippage -> equity curve and trade statistics, with no per-bar Python loop.
+
+import logging
+import math
+import os
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.downsampling import lttb_indices
+from modules.lazy_imports import lazy_import
+from modules.tick_store import NS_PER_SECOND, TickStore, replay_price
+
+logger = logging.getLogger(__name__)
+
+scipy_signal = lazy_import("scipy.signal")  # ~1s to import; only backtests need it
+
+# Bumped whenever a change alters backtest results (part of result cache keys)
+ENGINE_VERSION = "1"
+
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+SECONDS_PER_YEAR = 365 * 86400  # crypto markets trade around the clock
+MAX_BARS = 2_000_000
+# Points kept in a stored equity curve (LTTB); requests can ask for fewer
+EQUITY_CURVE_POINTS = 1000
+SYNTHETIC_ANNUAL_VOLATILITY = 0.6
+
+
+# ============ PRICE DATA ============
+
+@dataclass
+class PriceData:
+    """OHLCV candles as read-only column arrays"""
+    symbol: str
+    timeframe: str
+    timestamps: np.ndarray  # bar open, unix seconds
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    source: str = "synthetic"
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def bars_per_year(self) -> float:
+        return SECONDS_PER_YEAR / TIMEFRAME_SECONDS[self.timeframe]
+
+    def slice(self, start: int, stop: int) -> "PriceData":
+        """Candles [start, stop) sharing memory with this series"""
+        return PriceData(self.symbol, self.timeframe, self.timestamps[start:stop], self.open[start:stop],
+                         self.high[start:stop], self.low[start:stop], self.close[start:stop],
+                         self.volume[start:stop], self.source)
+
+
+def _date_range_seconds(start_date: str, end_date: str) -> Tuple[int, int]:
+    """[start of start_date, end of end_date) in unix seconds (UTC)"""
+    start = datetime.combine(date.fromisoformat(start_date), datetime.min.time(), timezone.utc)
+    end = datetime.combine(date.fromisoformat(end_date), datetime.min.time(), timezone.utc) + timedelta(days=1)
+    if end <= start:
+        raise ValueError("end_date must not be before start_date")
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def _frozen(*arrays: np.ndarray) -> List[np.ndarray]:
+    for array in arrays:
+        array.flags.writeable = False
+    return list(arrays)
+
+
+def candles_from_ticks(ticks: np.ndarray, timeframe: str) -> Tuple[np.ndarray, ...]:
+    """Resample a time-sorted (ts, price, volume) tick array into OHLCV bars (empty bars are skipped)"""
+    step = TIMEFRAME_SECONDS[timeframe] * NS_PER_SECOND
+    bucket = ticks["ts"] // step
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(ticks))
+    price = ticks["price"]
+    return (
+        (bucket[starts] * step // NS_PER_SECOND).astype(np.int64),
+        price[starts].copy(),
+        np.maximum.reduceat(price, starts),
+        np.minimum.reduceat(price, starts),
+        price[ends - 1].copy(),
+        np.add.reduceat(ticks["volume"], starts),
+    )
+
+
+def synthetic_candles(symbol: str, timeframe: str, start_s: int, bars: int, base_price: float,
+                      annual_volatility: float = SYNTHETIC_ANNUAL_VOLATILITY) -> Tuple[np.ndarray, ...]:
+    """
+    Deterministic OHLCV (same arguments -> same candles): log returns are
+    noise plus a slowly mean-reverting drift, so series have trends and
+    ranges for strategies to find, at `annual_volatility`
+    """
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    rng = np.random.default_rng(zlib.crc32(f"{symbol.upper()}:{timeframe}:{start_s}:{bars}".encode()))
+    sigma = annual_volatility / math.sqrt(SECONDS_PER_YEAR / seconds)
+    # AR(1) drift with a half-life of ~200 bars, a tenth of the noise's scale
+    phi = 0.5 ** (1 / 200)
+    drift = scipy_signal.lfilter([1.0], [1.0, -phi], rng.normal(0.0, sigma / 10 * math.sqrt(1 - phi * phi), bars))
+    returns = rng.normal(0.0, sigma, bars) + drift
+    close = base_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([base_price], close[:-1]))
+    wick = np.abs(rng.normal(0.0, sigma / 2, (2, bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(0.0, 0.5, bars) * 1000
+    timestamps = start_s + np.arange(bars, dtype=np.int64) * seconds
+    return timestamps, open_, high, low, close, volume
+
+
+def _tick_stores() -> List[TickStore]:
+    roots = [os.environ.get(name, "").strip() for name in ("MARKET_REPLAY_DIR", "TICK_RECORD_DIR")]
+    return [TickStore(root) for root in roots if root]
+
+
+def estimate_bars(start_date: str, end_date: str, timeframe: str) -> int:
+    """Candles in [start_date, end_date] at `timeframe` (ValueError for a bad range, timeframe or size)"""
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unknown timeframe {timeframe!r}; expected one of {list(TIMEFRAME_SECONDS)}")
+    start_s, end_s = _date_range_seconds(start_date, end_date)
+    bars = (end_s - start_s) // TIMEFRAME_SECONDS[timeframe]
+    if bars > MAX_BARS:
+        raise ValueError(f"{bars} {timeframe} bars requested; the limit is {MAX_BARS}")
+    return bars
+
+
+@lru_cache(maxsize=16)
+def _load_price_data(symbol: str, start_date: str, end_date: str, timeframe: str) -> PriceData:
+    start_s, _ = _date_range_seconds(start_date, end_date)
+    bars = estimate_bars(start_date, end_date, timeframe)
+
+    for store in _tick_stores():
+        days = [d for d in store.days() if start_date <= d <= end_date and store.path_for(symbol, d).exists()]
+        chunks = []
+        for day in days:
+            tick_file = store.open(symbol, day)
+            try:
+                chunks.append(np.array(tick_file.to_numpy()))
+            finally:
+                tick_file.close()
+        chunks = [c for c in chunks if len(c)]
+        if chunks:
+            columns = candles_from_ticks(np.concatenate(chunks), timeframe)
+            return PriceData(symbol, timeframe, *_frozen(*columns), source="ticks")
+
+    columns = synthetic_candles(symbol, timeframe, start_s, bars, replay_price(symbol) or 100.0)
+    return PriceData(symbol, timeframe, *_frozen(*columns), source="synthetic")
+
+
+def load_price_data(symbol: str, start_date: str, end_date: str, timeframe: str = "1h") -> PriceData:
+    """
+    Candles for `symbol` over [start_date, end_date] (inclusive days):
+    resampled from recorded ticks when any exist in range, otherwise
+    synthetic. Results are memoized and their arrays are read-only.
+    """
+    estimate_bars(start_date, end_date, timeframe)
+    return _load_price_data(symbol.upper(), start_date, end_date, timeframe)
+
+
+# ============ INDICATORS ============
+
+def _ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponential moving average seeded with the first value (a C-level recursive filter)"""
+    if not len(x):
+        return x.astype(np.float64)
+    return scipy_signal.lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * x[0]])[0]
+
+
+class Indicators:
+    """
+    Indicator arrays over one close series, computed once per parameter
+    value and shared by every strategy evaluation on the series (sweeps
+    and walk-forward windows reuse one instance). Warm-up bars are NaN.
+    With `max_cached`, the least recently used arrays beyond that many are
+    dropped (a sweep over many periods of a long series).
+    """
+
+    def __init__(self, close: np.ndarray, max_cached: Optional[int] = None):
+        self.close = np.asarray(close, dtype=np.float64)
+        self.max_cached = max_cached
+        self._cache: Dict[tuple, np.ndarray] = {}
+
+    def _memo(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        value = self._cache.pop(key, None)
+        if value is None:
+            value = compute()
+            value.flags.writeable = False
+        self._cache[key] = value  # (re)inserted last: dict order is recency order
+        if self.max_cached is not None and len(self._cache) > self.max_cached:
+            del self._cache[next(iter(self._cache))]
+        return value
+
+    def sma(self, period: int) -> np.ndarray:
+        def compute():
+            out = np.full(len(self.close), np.nan)
+            if period <= len(self.close):
+                cumsum = np.concatenate(([0.0], np.cumsum(self.close)))
+                out[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+            return out
+        return self._memo(("sma", period), compute)
+
+    def ema(self, period: int) -> np.ndarray:
+        def compute():
+            out = _ema(self.close, 2.0 / (period + 1))
+            out[:period - 1] = np.nan
+            return out
+        return self._memo(("ema", period), compute)
+
+    def rsi(self, period: int = 14) -> np.ndarray:
+        def compute():
+            delta = np.diff(self.close, prepend=self.close[:1])
+            alpha = 1.0 / period  # Wilder smoothing
+            gain = _ema(np.maximum(delta, 0.0), alpha)
+            loss = _ema(np.maximum(-delta, 0.0), alpha)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+            out[:period] = np.nan
+            return out
+        return self._memo(("rsi", period), compute)
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+        def line():
+            out = _ema(self.close, 2.0 / (fast + 1)) - _ema(self.close, 2.0 / (slow + 1))
+            out[:slow - 1] = np.nan
+            return out
+
+        def signal_line():
+            out = np.full(len(macd), np.nan)
+            valid = slice(slow - 1, None)
+            out[valid] = _ema(macd[valid], 2.0 / (signal + 1))
+            out[:slow + signal - 2] = np.nan
+            return out
+        macd = self._memo(("macd", fast, slow), line)
+        return macd, self._memo(("macd_signal", fast, slow, signal), signal_line)
+
+    @staticmethod
+    def parse(spec) -> Tuple[str, Tuple[int, ...]]:
+        """
+        Validate a custom-rule operand: a number, "close", or "<name>:<args>"
+        (sma:20, ema:50, rsi or rsi:14, macd[:12:26:9], macd_signal[:12:26:9]);
+        returns (name, periods) with name "number" for numbers. Raises ValueError.
+        """
+        if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+            return "number", ()
+        if not isinstance(spec, str):
+            raise ValueError(f"Indicator must be a number or a string, got {spec!r}")
+        name, *args = spec.lower().split(":")
+        if name not in OPERAND_ARITY:
+            raise ValueError(f"Unknown indicator {spec!r}; expected a number or one of {list(OPERAND_ARITY)}")
+        low, high = OPERAND_ARITY[name]
+        if not low <= len(args) <= high:
+            expected = f"{low}" if low == high else f"{low}-{high}"
+            raise ValueError(f"Indicator {spec!r} takes {expected} period(s), got {len(args)}")
+        try:
+            periods = tuple(int(a) for a in args)
+        except ValueError:
+            raise ValueError(f"Indicator {spec!r} periods must be integers") from None
+        if any(p < 1 for p in periods):
+            raise ValueError(f"Indicator {spec!r} periods must be at least 1")
+        fast, slow = (periods + (12, 26, 9)[len(periods):])[:2]  # Indicators.macd defaults
+        if name in ("macd", "macd_signal") and fast >= slow:
+            raise ValueError(f"Indicator {spec!r} needs fast < slow")
+        return name, periods
+
+    def series(self, spec) -> np.ndarray:
+        """Array of a custom-rule operand (see parse)"""
+        name, periods = self.parse(spec)
+        if name == "number":
+            return np.full(len(self.close), float(spec))
+        if name == "close":
+            return self.close
+        if name in ("sma", "ema", "rsi"):
+            return getattr(self, name)(*periods)
+        return self.macd(*periods)[0 if name == "macd" else 1]
+
+
+# Custom-rule operand -> (min, max) number of periods
+OPERAND_ARITY = {"close": (0, 0), "sma": (1, 1), "ema": (1, 1), "rsi": (0, 1), "macd": (0, 3), "macd_signal": (0, 3)}
+
+
+# ============ STRATEGIES ============
+
+def _hold(entry: np.ndarray, exit: np.ndarray, entry_value: float = 1.0) -> np.ndarray:
+    """Position that switches to `entry_value` on entry bars and to 0 on exit bars (entry wins ties)"""
+    events = np.where(entry, entry_value, np.where(exit, 0.0, np.nan))
+    return _forward_fill(events)
+
+
+def _forward_fill(events: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value forward (0 before the first)"""
+    index = np.where(np.isnan(events), 0, np.arange(len(events)))
+    np.maximum.accumulate(index, out=index)
+    out = events[index]
+    return np.nan_to_num(out, nan=0.0)
+
+
+def _trend(fast: np.ndarray, slow: np.ndarray, allow_short: bool) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        above, below = fast > slow, fast < slow
+    return above.astype(np.float64) - (below if allow_short else 0)
+
+
+def _sma_cross(ind: Indicators, params: Dict, allow_short: bool) -> np.ndarray:
+    return _trend(ind.sma(params["fast"]), ind.sma(params["slow"]), allow_short)
+
+
+def _rsi(ind: Indicators, params: Dict, allow_short: bool) -> np.ndarray:
+    rsi = ind.rsi(params["period"])
+    with np.errstate(invalid="ignore"):
+        oversold, overbought = rsi < params["lower"], rsi > params["upper"]
+    if allow_short:
+        return _forward_fill(np.where(oversold, 1.0, np.where(overbought, -1.0, np.nan)))
+    return _hold(oversold, overbought)
+
+
+def _macd(ind: Indicators, params: Dict, allow_short: bool) -> np.ndarray:
+    macd, signal = ind.macd(params["fast"], params["slow"], params["signal"])
+    return _trend(macd, signal, allow_short)
+
+
+_COMPARISONS = {
+    ">": np.greater, "<": np.less, ">=": np.greater_equal, "<=": np.less_equal,
+}
+
+
+def _rule_mask(ind: Indicators, rules: Sequence[Sequence]) -> np.ndarray:
+    """All of `rules` ([lhs, op, rhs] with op one of > < >= <= cross_above cross_below) hold"""
+    mask = np.ones(len(ind.close), dtype=bool)
+    for lhs, op, rhs in rules:
+        a, b = ind.series(lhs), ind.series(rhs)
+        with np.errstate(invalid="ignore"):
+            if op in _COMPARISONS:
+                hit = _COMPARISONS[op](a, b)
+            else:
+                above = a > b if op == "cross_above" else a < b
+                hit = above & ~np.concatenate(([True], above[:-1]))
+        mask &= hit
+    return mask
+
+
+def _check_rules(key: str, rules) -> None:
+    if not isinstance(rules, (list, tuple)) or not rules:
+        raise ValueError(f"custom {key} must be a non-empty list of [lhs, op, rhs] rules")
+    for rule in rules:
+        if not isinstance(rule, (list, tuple)) or len(rule) != 3:
+            raise ValueError(f"custom {key} rule {rule!r} must be [lhs, op, rhs]")
+        lhs, op, rhs = rule
+        if op not in _COMPARISONS and op not in ("cross_above", "cross_below"):
+            raise ValueError(f"Unknown rule operator {op!r}; expected one of "
+                             f"{[*_COMPARISONS, 'cross_above', 'cross_below']}")
+        Indicators.parse(lhs)
+        Indicators.parse(rhs)
+
+
+def _custom(ind: Indicators, params: Dict, allow_short: bool) -> np.ndarray:
+    return _hold(_rule_mask(ind, params["entry"]), _rule_mask(ind, params["exit"]))
+
+
+@dataclass(frozen=True)
+class Strategy:
+    name: str
+    signal: Callable[[Indicators, Dict, bool], np.ndarray]
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    description: str = ""
+
+
+STRATEGIES: Dict[str, Strategy] = {s.name: s for s in (
+    Strategy("sma_cross", _sma_cross, {"fast": 10, "slow": 30},
+             "Long while the fast SMA is above the slow SMA"),
+    Strategy("rsi", _rsi, {"period": 14, "lower": 30, "upper": 70},
+             "Buy oversold RSI, exit when overbought"),
+    Strategy("macd", _macd, {"fast": 12, "slow": 26, "signal": 9},
+             "Long while the MACD line is above its signal line"),
+    Strategy("custom", _custom, {
+        "entry": [["close", ">", "sma:50"], ["rsi:14", "<", 70]],
+        "exit": [["close", "<", "sma:50"]],
+    }, "Enter when every entry rule holds, exit when every exit rule holds"),
+)}
+
+
+RSI_BOUNDS = ("lower", "upper")  # the only numeric parameters that are not periods
+
+
+def resolve_parameters(strategy: str, parameters: Optional[Dict]) -> Dict:
+    """
+    Strategy defaults overlaid with `parameters`, validated: unknown keys,
+    periods that are not whole numbers >= 1, fast >= slow, bad RSI bounds
+    and malformed custom rules raise ValueError
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {list(STRATEGIES)}")
+    defaults = STRATEGIES[strategy].defaults
+    parameters = parameters or {}
+    unknown = set(parameters) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown {strategy} parameters: {sorted(unknown)}")
+    resolved = {**defaults, **parameters}
+    for key, value in resolved.items():
+        if isinstance(defaults[key], list):
+            _check_rules(key, value)
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{strategy} parameter {key} must be a number, got {value!r}")
+        if key in RSI_BOUNDS:
+            resolved[key] = int(value) if float(value).is_integer() else float(value)
+        elif not float(value).is_integer() or value < 1:
+            raise ValueError(f"{strategy} parameter {key} must be a whole number of bars >= 1, got {value!r}")
+        else:
+            resolved[key] = int(value)
+    if strategy in ("sma_cross", "macd") and resolved["fast"] >= resolved["slow"]:
+        raise ValueError(f"{strategy} needs fast < slow")
+    if strategy == "rsi" and not 0 <= resolved["lower"] < resolved["upper"] <= 100:
+        raise ValueError("rsi needs 0 <= lower < upper <= 100")
+    return resolved
+
+
+def strategy_positions(strategy: str, params: Dict, indicators: Indicators, allow_short: bool = False) -> np.ndarray:
+    """Target position (-1, 0, 1) decided at each bar's close"""
+    return STRATEGIES[strategy].signal(indicators, params, allow_short)
+
+
+# ============ SIMULATION ============
+
+@dataclass
+class ExecutionSettings:
+    """Sizing and costs of a backtest; percentages as in BacktestConfig"""
+    initial_capital: float = 10000.0
+    position_size_percent: float = 10.0
+    stop_loss_percent: float = 5.0     # 0 disables
+    take_profit_percent: float = 10.0  # 0 disables
+    fee_bps: float = 10.0
+    slippage_bps: float = 5.0
+
+
+def _group_cumsum(values: np.ndarray, group_start: np.ndarray) -> np.ndarray:
+    """Cumulative sum restarting at every True in `group_start`"""
+    total = np.cumsum(values)
+    base = np.where(group_start, total - values, 0.0)
+    index = np.where(group_start, np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    return total - base[index]
+
+
+def simulate(prices: PriceData, targets: np.ndarray, settings: ExecutionSettings) -> Dict[str, np.ndarray]:
+    """
+    Turn target positions into bar returns, equity and trades.
+
+    The target decided at bar t's close is held through bar t+1. A run of
+    bars holding the same non-zero position is one trade, entered at the
+    previous close. A trade stops out (or takes profit) on the first bar
+    whose low/high crosses its level, filling at the level or at the open
+    if it gapped through, and stays flat until the signal changes; the
+    first such bar per trade is found with a grouped cumulative sum.
+    Every unit of turnover pays fee + slippage; exposure is
+    position_size_percent of equity, compounded.
+    """
+    close, open_, high, low = prices.close, prices.open, prices.high, prices.low
+    n = len(close)
+    held = np.concatenate(([0.0], targets[:-1])) if n else targets
+    prev_close = np.concatenate((close[:1], close[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bar_return = np.where(prev_close > 0, close / prev_close - 1.0, 0.0)
+
+    previous = np.concatenate(([0.0], held[:-1]))
+    trade_start = (held != 0) & (held != previous)
+    trade_id = np.cumsum(trade_start)
+    in_trade = held != 0
+    entry = prev_close[trade_start][np.maximum(trade_id - 1, 0)] if trade_start.any() else prev_close
+
+    exit_price = np.full(n, np.nan)
+    if settings.stop_loss_percent > 0 or settings.take_profit_percent > 0:
+        long = held > 0
+        sl = settings.stop_loss_percent / 100 if settings.stop_loss_percent > 0 else np.inf
+        tp = settings.take_profit_percent / 100 if settings.take_profit_percent > 0 else np.inf
+        stop_level = np.where(long, entry * (1 - sl), entry * (1 + sl))
+        target_level = np.where(long, entry * (1 + tp), entry * (1 - tp))
+        stopped = in_trade & np.where(long, low <= stop_level, high >= stop_level)
+        profited = in_trade & np.where(long, high >= target_level, low <= target_level)
+        hit = stopped | profited
+        hits_so_far = _group_cumsum(hit.astype(np.float64), trade_start)
+        first_hit = hit & (hits_so_far == 1)
+        after_exit = in_trade & (hits_so_far - hit > 0)
+        # Fill at the level, or at the open when the bar gapped through it (stops win ties)
+        stop_fill = np.where(long, np.minimum(open_, stop_level), np.maximum(open_, stop_level))
+        target_fill = np.where(long, np.maximum(open_, target_level), np.minimum(open_, target_level))
+        exit_price = np.where(first_hit, np.where(stopped, stop_fill, target_fill), np.nan)
+        held = np.where(after_exit, 0.0, held)
+        in_trade = held != 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bar_return = np.where(first_hit, exit_price / prev_close - 1.0, bar_return)
+
+    exited = ~np.isnan(exit_price)
+    end_position = np.where(exited, 0.0, held)
+    start_position = np.concatenate(([0.0], end_position[:-1]))
+    turnover = np.abs(held - start_position) + np.abs(end_position - held)
+    cost_rate = (settings.fee_bps + settings.slippage_bps) / 10_000
+
+    exposure = settings.position_size_percent / 100
+    gross = held * bar_return
+    step = exposure * (gross - cost_rate * turnover)
+    equity = settings.initial_capital * np.cumprod(1.0 + step)
+
+    # Per-trade return at full size: compounded gross bar returns less a round trip of costs
+    trades = int(trade_id[-1]) if n else 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_gross = np.where(in_trade | exited, np.log1p(gross), 0.0)
+    trade_log = np.bincount(trade_id, weights=log_gross, minlength=trades + 1)[1:]
+    trade_returns = np.expm1(trade_log) - 2 * cost_rate
+    return {
+        "returns": step,
+        "equity": equity,
+        "held": held,
+        "turnover": turnover,
+        "trade_returns": trade_returns,
+    }
+
+
+def drawdowns(equity: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Maximum drawdown and the drawdown at every bar, in percent of the running peak"""
+    peaks = np.maximum.accumulate(equity)
+    drawdown = (peaks - equity) / peaks * 100
+    return float(drawdown.max()) if len(drawdown) else 0.0, drawdown
+
+
+def backtest_stats(sim: Dict[str, np.ndarray], settings: ExecutionSettings, bars_per_year: float) -> Dict:
+    """The statistics the backtest API reports, from one simulation"""
+    equity, returns, trades = sim["equity"], sim["returns"], sim["trade_returns"]
+    final = float(equity[-1]) if len(equity) else settings.initial_capital
+    max_drawdown, _ = drawdowns(equity)
+    std = float(returns.std()) if len(returns) > 1 else 0.0
+    sharpe = float(returns.mean()) / std * math.sqrt(bars_per_year) if std > 0 else 0.0
+    wins, losses = trades[trades > 0], trades[trades <= 0]
+    gross_loss = float(-losses.sum())
+    return {
+        "total_trades": int(len(trades)),
+        "winning_trades": int(len(wins)),
+        "losing_trades": int(len(losses)),
+        "win_rate": float(len(wins) / len(trades) * 100) if len(trades) else 0.0,
+        "avg_win_percent": float(wins.mean() * 100) if len(wins) else 0.0,
+        "avg_loss_percent": float(-losses.mean() * 100) if len(losses) else 0.0,
+        "total_return_percent": (final / settings.initial_capital - 1) * 100,
+        "max_drawdown_percent": max_drawdown,
+        "sharpe_ratio": sharpe,
+        "profit_factor": float(wins.sum()) / gross_loss if gross_loss > 0 else 0.0,
+        "final_balance": final,
+        "exposure_percent": float(np.count_nonzero(sim["held"]) / len(equity) * 100) if len(equity) else 0.0,
+    }
+
+
+def equity_curve_points(equity: np.ndarray, max_points: int = EQUITY_CURVE_POINTS) -> List[Dict]:
+    """[{index, equity, drawdown}] for at most max_points bars chosen by LTTB on equity"""
+    if not len(equity):
+        return []
+    _, drawdown = drawdowns(equity)
+    keep = lttb_indices(np.arange(len(equity), dtype=np.float64), equity, max_points)
+    return [
+        {"index": i, "equity": e, "drawdown": d}
+        for i, e, d in zip(keep.tolist(), np.round(equity[keep], 2).tolist(), drawdown[keep].tolist())
+    ]
+
+
+def run_vectorized_backtest(prices: PriceData, strategy: str, parameters: Optional[Dict] = None,
+                            settings: Optional[ExecutionSettings] = None, allow_short: bool = False,
+                            indicators: Optional[Indicators] = None,
+                            curve_points: int = EQUITY_CURVE_POINTS) -> Dict:
+    """One backtest: statistics, resolved parameters and a downsampled equity curve"""
+    if len(prices) < 2:
+        raise ValueError("A backtest needs at least two candles")
+    settings = settings or ExecutionSettings()
+    params = resolve_parameters(strategy, parameters)
+    indicators = indicators or Indicators(prices.close)
+    targets = strategy_positions(strategy, params, indicators, allow_short)
+    sim = simulate(prices, targets, settings)
+    stats = backtest_stats(sim, settings, prices.bars_per_year)
+    stats.update({
+        "strategy": strategy,
+        "parameters": params,
+        "bars": len(prices),
+        "timeframe": prices.timeframe,
+        "data_source": prices.source,
+        "engine_version": ENGINE_VERSION,
+        "equity_curve": equity_curve_points(sim["equity"], curve_points) if curve_points else [],
+    })
+    return stats
@@ -0,0 +1,189 @@
+# OracleIQTrader - Response Compression
+# Negotiated brotli/gzip for response bodies over a size threshold, as a
+# pure ASGI middleware. Compressed bodies of ETag'd (cached) responses are
+# memoized so repeated hits are not recompressed.
+
+import asyncio
+import gzip
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from modules.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"application/xml", b"image/svg+xml")
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+COMPRESSION_BYTES = metrics.counter(
+    "oracle_response_compression_bytes_total", "Response bytes before and after compression, by encoding",
+    ("encoding", "stage"))
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values (br wins ties)"""
+    offered: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    wildcard = offered.get("*", 0.0)
+    choices = []
+    if brotli is not None:
+        choices.append(("br", offered.get("br", wildcard)))
+    choices.append(("gzip", offered.get("gzip", wildcard)))
+    best, q = max(choices, key=lambda c: c[1])
+    return best if q > 0 else None
+
+
+def encoded_etag(etag: bytes, encoding: str) -> bytes:
+    """Per-encoding variant of an entity tag: `"abc"` -> `"abc-br"` (weak tags stay weak)"""
+    if not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + b"-" + encoding.encode() + b'"'
+
+
+class CompressionMiddleware:
+    """
+    Compresses single-message response bodies of at least `minimum_size`
+    bytes with the client's preferred encoding. Streaming responses (SSE,
+    exports) and already-encoded bodies pass through untouched. A
+    compressed response keeps a strong ETag tagged with its encoding
+    (`"abc-br"`), so each representation has its own validator; the
+    response cache strips the tag when matching If-None-Match, and a 304
+    for the encoded tag echoes it back.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4,
+                 memo_entries: int = 512):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.memo_entries = memo_entries
+        self._memo: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        if_none_match = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = negotiate(value.decode("latin-1"))
+            elif name == b"if-none-match":
+                if_none_match = value
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[dict] = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.append(message)  # held until the body shows whether to compress
+                return
+            if not start:
+                await send(message)
+                return
+            head = start.pop()
+            body = message.get("body", b"")
+            if head["status"] == 304:
+                await send(self._not_modified(head, encoding, if_none_match))
+                await send(message)
+                return
+            if message.get("more_body") or len(body) < self.minimum_size or not self._compressible(head):
+                await send(head)
+                await send(message)
+                return
+            headers = head.get("headers", [])
+            etag = next((v for k, v in headers if k.lower() == b"etag"), None)
+            compressed = await self._compress(body, encoding, etag)
+            vary = b", ".join(v for k, v in headers if k.lower() == b"vary")
+            if b"accept-encoding" not in vary.lower():
+                vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag", b"vary")]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary),
+            ]
+            if etag is not None:
+                headers.append((b"etag", encoded_etag(etag, encoding)))
+            COMPRESSION_BYTES.inc(encoding, "in", amount=len(body))
+            COMPRESSION_BYTES.inc(encoding, "out", amount=len(compressed))
+            await send({**head, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _not_modified(head: dict, encoding: str, if_none_match: bytes) -> dict:
+        """Answer a revalidation of the encoded representation with the tag the client holds"""
+        headers = head.get("headers", [])
+        etag = next((v for k, v in headers if k.lower() == b"etag"), None)
+        if etag is None or encoded_etag(etag, encoding) not in if_none_match:
+            return head
+        headers = [(k, v) for k, v in headers if k.lower() != b"etag"]
+        return {**head, "headers": headers + [(b"etag", encoded_etag(etag, encoding))]}
+
+    @staticmethod
+    def _compressible(head: dict) -> bool:
+        if head["status"] < 200 or head["status"] in (204, 304):
+            return False
+        content_type = b""
+        for name, value in head.get("headers", []):
+            name = name.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def encode(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def _compress(self, body: bytes, encoding: str, etag: Optional[bytes]) -> bytes:
+        key = (etag, encoding) if etag else None
+        if key is not None:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+        if len(body) >= OFFLOAD_BYTES:
+            compressed = await asyncio.get_running_loop().run_in_executor(None, self.encode, body, encoding)
+        else:
+            compressed = self.encode(body, encoding)
+        if key is not None:
+            self._memo[key] = compressed
+            if len(self._memo) > self.memo_entries:
+                self._memo.popitem(last=False)
+        return compressed
+
+
+def compression_options_from_env() -> Optional[dict]:
+    """CompressionMiddleware options, or None when RESPONSE_COMPRESSION=0"""
+    if os.environ.get("RESPONSE_COMPRESSION", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return {
+        "minimum_size": int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+        "gzip_level": int(os.environ.get("RESPONSE_GZIP_LEVEL", "5")),
+        "brotli_quality": int(os.environ.get("RESPONSE_BROTLI_QUALITY", "4")),
+    }
@@ -10,6 +10,8 @@ import json
 import logging
 import uuid
 
+from modules.event_bus import event_bus, TradeExecuted
+
 logger = logging.getLogger(__name__)
 
 
@@ -294,6 +296,20 @@ class CopyTradingWebSocketManager:
             if master_trader_id in subscribed_traders:
                 followers.append(follower_id)
         return followers
+    
+    async def on_trades_executed(self, events: List[TradeExecuted]):
+        """Event-bus handler: copy every trade made by a trader that has followers"""
+        followed = set().union(*self.subscriptions.values()) if self.subscriptions else set()
+        for event in events:
+            if event.user_id in followed:
+                await self.propagate_trade(
+                    event.user_id,
+                    event.trader_name or event.user_id,
+                    TradeAction(event.side),
+                    event.symbol,
+                    event.quantity,
+                    event.price
+                )
 
 
 # Global instance
@@ -325,11 +341,13 @@ async def simulate_master_trades(manager: CopyTradingWebSocketManager):
             quantity = random.uniform(0.1, 5.0)
             price = random.uniform(100, 50000) if symbol == "BTC" else random.uniform(10, 3000)
             
-            await manager.propagate_trade(
-                trader["id"],
-                trader["name"],
-                action,
-                symbol,
-                round(quantity, 4),
-                round(price, 2)
-            )
+            event_bus.publish(TradeExecuted(
+                trade_id=f"SIM-{uuid.uuid4().hex[:8].upper()}",
+                user_id=trader["id"],
+                symbol=symbol,
+                side=action.value,
+                quantity=round(quantity, 4),
+                price=round(price, 2),
+                source="copy_master",
+                trader_name=trader["name"]
+            ))
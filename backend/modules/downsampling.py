@@ -0,0 +1,129 @@
+# OracleIQTrader - Series Downsampling
+# Shrinks chart series to at most `max_points` while keeping their visual
+# shape: Largest-Triangle-Three-Buckets for lines (with a min/max
+# preselection for very long inputs) and OHLCV aggregation for candles.
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# LTTB over inputs longer than this many times the target first keeps only
+# each bucket's min/max (MinMaxLTTB), which preserves spikes at a fraction of the cost
+MINMAX_PRESELECT_RATIO = 4
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.unique(np.linspace(0, n, buckets + 1).astype(np.int64))
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Sorted indices of the min and max of each of max_points // 2 equal-count buckets (plus endpoints)"""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, (max_points - 2) // 2)
+    edges = _bucket_edges(n - 2, buckets) + 1  # interior points only; endpoints are always kept
+    size = int(np.diff(edges).max())
+    # Pad buckets into a (buckets, size) matrix so argmin/argmax run in one pass
+    offsets = edges[:-1, None] + np.arange(size)[None, :]
+    valid = offsets < edges[1:, None]
+    offsets = np.where(valid, offsets, edges[:-1, None])
+    values = y[offsets]
+    lows = offsets[np.arange(len(offsets)), np.where(valid, values, np.inf).argmin(axis=1)]
+    highs = offsets[np.arange(len(offsets)), np.where(valid, values, -np.inf).argmax(axis=1)]
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices chosen by Largest-Triangle-Three-Buckets. The first and last
+    points are kept; every interior bucket keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. The per-bucket search is vectorized; only the walk over
+    buckets (which depends on the previous choice) is a Python loop.
+    """
+    n = len(y)
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    candidates = None
+    if n > max_points * MINMAX_PRESELECT_RATIO:
+        candidates = minmax_indices(y, max_points * MINMAX_PRESELECT_RATIO)
+        x, y = x[candidates], y[candidates]
+        n = len(y)
+
+    edges = _bucket_edges(n - 2, max_points - 2) + 1
+    starts, ends = edges[:-1], edges[1:]
+    # Average point of every bucket, plus the last point as the final "next bucket"
+    sums_x = np.add.reduceat(x[1:n - 1], starts - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], starts - 1)
+    counts = ends - starts
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(len(starts) + 2, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        bx, by = x[start:end], y[start:end]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - avg_x[i + 1]) * (by - ay) - (ax - bx) * (avg_y[i + 1] - ay))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return candidates[selected] if candidates is not None else selected
+
+
+def downsample_points(points: List[Dict], max_points: Optional[int], y_key: str,
+                      x_key: Optional[str] = None) -> List[Dict]:
+    """
+    Keep at most `max_points` of `points` (dicts of one series) by LTTB on
+    `y_key` against `x_key` (or the position when x is not numeric).
+    The kept points are returned unchanged.
+    """
+    if not max_points or len(points) <= max_points:
+        return points
+    y = np.fromiter((p[y_key] for p in points), dtype=np.float64, count=len(points))
+    x = np.arange(len(points), dtype=np.float64)
+    if x_key is not None:
+        try:
+            x = np.fromiter((p[x_key] for p in points), dtype=np.float64, count=len(points))
+        except (TypeError, ValueError):
+            pass
+    return [points[i] for i in lttb_indices(x, y, max_points).tolist()]
+
+
+def downsample_ohlc(candles: Sequence[Dict], max_points: Optional[int], open_key: str = "open",
+                    high_key: str = "high", low_key: str = "low", close_key: str = "close",
+                    volume_key: Optional[str] = "volume") -> List[Dict]:
+    """
+    Merge consecutive candles into at most `max_points` buckets: first
+    open, highest high, lowest low, last close and summed volume. Other
+    fields (time, timestamp) come from each bucket's first candle.
+    """
+    n = len(candles)
+    if not max_points or n <= max_points:
+        return list(candles)
+    starts = _bucket_edges(n, max_points)[:-1]
+    ends = np.append(starts[1:], n) - 1
+
+    def column(key):
+        return np.fromiter((c[key] for c in candles), dtype=np.float64, count=n)
+
+    highs = np.maximum.reduceat(column(high_key), starts).tolist()
+    lows = np.minimum.reduceat(column(low_key), starts).tolist()
+    volumes = np.add.reduceat(column(volume_key), starts).tolist() if volume_key else None
+    merged = []
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        candle = dict(candles[start])
+        candle[high_key] = highs[i]
+        candle[low_key] = lows[i]
+        candle[close_key] = candles[end][close_key]
+        if volumes is not None:
+            candle[volume_key] = type(candles[start][volume_key])(volumes[i])
+        merged.append(candle)
+    return merged
@@ -0,0 +1,238 @@
+# OracleIQTrader - Event Bus
+# In-process publish/subscribe for typed domain events (prices, trades, fills,
+# signals, market resolutions). Publishing only appends to bounded
+# per-subscriber queues; each subscriber drains its queue in batches on its
+# own supervised task, so a slow consumer never blocks the publisher.
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from modules.metrics import metrics
+from modules.query_counter import DB_OPERATIONS_PER_ITERATION, track_queries
+from modules.task_supervisor import task_supervisor
+
+logger = logging.getLogger(__name__)
+
+# ============ EVENTS ============
+
+
+@dataclass(slots=True)
+class PriceTick:
+    symbol: str
+    price: float
+    volume: float = 0.0
+    source: str = "stream"
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class TradeExecuted:
+    """A completed trade; `source` says which engine executed it"""
+    trade_id: str
+    user_id: Optional[str]
+    symbol: str
+    side: str  # "buy" / "sell"
+    quantity: float
+    price: float
+    source: str  # "trades", "playground", "competition", "copy_master"
+    account_id: Optional[str] = None
+    competition_id: Optional[str] = None
+    trader_name: Optional[str] = None
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class OrderFilled:
+    """A (partial) fill of a working order, e.g. one algo child slice"""
+    order_id: str
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    filled_quantity: float
+    total_quantity: float
+    status: str
+    user_id: Optional[str] = None
+    source: str = "algo"
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class SignalEmitted:
+    signal_id: str
+    symbol: str
+    signal_type: str  # crawler type ("whale", "news", ...) or "bot"
+    action: Optional[str] = None
+    confidence: Optional[float] = None
+    user_id: Optional[str] = None
+    source: str = "crawler"
+    data: Dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class MarketResolved:
+    market_id: str
+    question: str
+    outcome: str
+    payouts: Dict[str, float] = field(default_factory=dict)  # user_id -> payout
+    ts: float = field(default_factory=time.time)
+
+
+Event = Union[PriceTick, TradeExecuted, OrderFilled, SignalEmitted, MarketResolved]
+EVENT_TYPES: Tuple[type, ...] = (PriceTick, TradeExecuted, OrderFilled, SignalEmitted, MarketResolved)
+
+Handler = Callable[[List[Any]], Optional[Awaitable[None]]]
+
+# ============ BUS ============
+
+
+class Subscription:
+    """
+    One consumer: a bounded queue plus the task that drains it in batches.
+
+    When the queue is full the oldest event is dropped (and counted), which
+    favours fresh prices over stale ones. `min_interval` throttles delivery:
+    events arriving within the interval are coalesced into the next batch.
+    """
+
+    def __init__(self, name: str, handler: Handler, event_types: Tuple[type, ...],
+                 max_queue: int = 10_000, batch_size: int = 1000, min_interval: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.event_types = event_types
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self.queue: Deque[Any] = deque()
+        self._wakeup = asyncio.Event()
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_batch_at: Optional[float] = None
+
+    def offer(self, event):
+        queue = self.queue
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            self.dropped += 1
+        queue.append(event)
+        self._wakeup.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        last_delivery = 0.0
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.min_interval:
+                delay = last_delivery + self.min_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            while self.queue:
+                queue = self.queue
+                batch = [queue.popleft() for _ in range(min(len(queue), self.batch_size))]
+                with track_queries(self.name) as queries:
+                    try:
+                        result = self.handler(batch)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        self.errors += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                        logger.error(f"Event handler {self.name} failed on {len(batch)} events: {self.last_error}")
+                DB_OPERATIONS_PER_ITERATION.observe(f"event:{self.name}", value=queries.count)
+                self.delivered += len(batch)
+                self.batches += 1
+            last_delivery = loop.time()
+            self.last_batch_at = time.time()
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "events": [t.__name__ for t in self.event_types],
+            "queued": len(self.queue),
+            "max_queue": self.max_queue,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "min_interval_seconds": self.min_interval,
+        }
+
+
+class EventBus:
+    """
+    Typed publish/subscribe. publish() is synchronous and O(subscribers of
+    that event type): it never awaits, so it is safe to call from request
+    handlers and engine code without changing their control flow.
+    Subscriber drain tasks run as task-supervisor services.
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._routes: Dict[type, List[Subscription]] = {t: [] for t in EVENT_TYPES}
+        self.published: Dict[str, int] = {t.__name__: 0 for t in EVENT_TYPES}
+
+    def subscribe(self, name: str, event_types: Union[type, Iterable[type]], handler: Handler,
+                  **options) -> Subscription:
+        """Deliver batches of `event_types` events to `handler(events)` (sync or async)"""
+        if name in self.subscriptions:
+            raise ValueError(f"Event subscription {name} already exists")
+        types = (event_types,) if isinstance(event_types, type) else tuple(event_types)
+        for event_type in types:
+            if event_type not in self._routes:
+                raise TypeError(f"{event_type!r} is not an event type")
+        subscription = Subscription(name, handler, types, **options)
+        self.subscriptions[name] = subscription
+        for event_type in types:
+            self._routes[event_type].append(subscription)
+        task_supervisor.service(name, subscription.run)
+        return subscription
+
+    def publish(self, event: Event):
+        subscribers = self._routes[type(event)]
+        for subscription in subscribers:
+            subscription.offer(event)
+        self.published[type(event).__name__] += 1
+
+    def publish_many(self, events: Iterable[Event]):
+        routes, published = self._routes, self.published
+        for event in events:
+            for subscription in routes[type(event)]:
+                subscription.offer(event)
+            published[type(event).__name__] += 1
+
+    def get_status(self) -> dict:
+        return {
+            "published": dict(self.published),
+            "subscriptions": [s.status() for s in self.subscriptions.values()],
+        }
+
+
+# Global instance
+event_bus = EventBus()
+
+metrics.gauge(
+    "oracle_event_bus_published", "Events published since start, by type", ("event",),
+    callback=lambda: {(name,): count for name, count in event_bus.published.items()},
+)
+metrics.gauge(
+    "oracle_event_bus_delivered", "Events delivered since start, by subscriber", ("subscriber",),
+    callback=lambda: {(s.name,): s.delivered for s in event_bus.subscriptions.values()},
+)
+metrics.gauge(
+    "oracle_event_bus_dropped", "Events dropped from full subscriber queues, by subscriber", ("subscriber",),
+    callback=lambda: {(s.name,): s.dropped for s in event_bus.subscriptions.values()},
+)
+metrics.gauge(
+    "oracle_event_bus_queue_depth", "Events waiting per subscriber", ("subscriber",),
+    callback=lambda: {(s.name,): len(s.queue) for s in event_bus.subscriptions.values()},
+)
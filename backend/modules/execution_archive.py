@@ -0,0 +1,129 @@
+# OracleIQTrader - Algo Execution Archive
+# Completed algo parent orders and every child fill, moved out of the
+# execution engine's memory into indexed collections in batched writes.
+# Reads (order lookups, day reports) see rows still waiting for their
+# batch as well as archived ones.
+
+import logging
+from typing import Dict, List, Optional
+
+from pymongo import ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+# Rows held while the database is unreachable; beyond this the oldest are dropped
+MAX_PENDING_ROWS = 200_000
+
+
+class ExecutionArchive:
+    """
+    Maintains the `algo_orders` (one document per finished parent) and
+    `algo_child_orders` (one document per child fill) collections. The
+    engine hands rows over synchronously from its slice callback; flush()
+    writes them with one insert_many per collection.
+    """
+
+    ORDERS = "algo_orders"
+    CHILDREN = "algo_child_orders"
+
+    def __init__(self, db, max_pending: int = MAX_PENDING_ROWS):
+        self.db = db
+        self.max_pending = max_pending
+        self._parents: Dict[str, Dict] = {}
+        self._children: List[Dict] = []
+        self.archived_orders = 0
+        self.archived_children = 0
+        self.dropped = 0
+        self.errors = 0
+
+    async def ensure_indexes(self):
+        """Indexes for order lookups, day reports and an order's fills"""
+        orders = self.db[self.ORDERS]
+        await orders.create_index([("order_id", 1)], unique=True)
+        await orders.create_index([("day", 1), ("symbol", 1)])
+        await self.db[self.CHILDREN].create_index([("order_id", 1), ("seq", 1)])
+
+    # ---- engine side (synchronous) ----
+
+    def add_order(self, doc: Dict):
+        self._parents[doc["order_id"]] = doc
+        if len(self._parents) > self.max_pending:
+            self._parents.pop(next(iter(self._parents)))
+            self.dropped += 1
+
+    def add_child(self, row: Dict):
+        self._children.append(row)
+        if len(self._children) > self.max_pending:
+            excess = len(self._children) - self.max_pending
+            del self._children[:excess]
+            self.dropped += excess
+
+    @property
+    def pending(self) -> int:
+        return len(self._parents) + len(self._children)
+
+    # ---- writes ----
+
+    async def flush(self):
+        """Write every buffered row; rows of a failed write are kept for the next flush"""
+        children, self._children = self._children, []
+        if children:
+            try:
+                # Copies: the driver adds _id to the documents it is given
+                await self.db[self.CHILDREN].insert_many([dict(row) for row in children], ordered=False)
+                self.archived_children += len(children)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Archiving {len(children)} algo child fills failed: {type(e).__name__}: {e}")
+                self._children[:0] = children
+        if self._parents:
+            parents = list(self._parents.values())
+            try:
+                # Upserts keyed by order_id, so retrying a partly applied batch is harmless
+                await self.db[self.ORDERS].bulk_write(
+                    [ReplaceOne({"order_id": doc["order_id"]}, dict(doc), upsert=True) for doc in parents],
+                    ordered=False)
+                self.archived_orders += len(parents)
+                for doc in parents:
+                    self._parents.pop(doc["order_id"], None)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Archiving {len(parents)} algo orders failed: {type(e).__name__}: {e}")
+
+    # ---- reads ----
+
+    async def get_order(self, order_id: str) -> Optional[Dict]:
+        doc = self._parents.get(order_id)
+        if doc is not None:
+            return dict(doc)
+        return await self.db[self.ORDERS].find_one({"order_id": order_id}, {"_id": 0})
+
+    async def get_children(self, order_id: str, limit: int = 1000, latest: bool = False) -> List[Dict]:
+        """An order's child fills in sequence order: the first `limit`, or the last ones when `latest`"""
+        rows = await self.db[self.CHILDREN].find(
+            {"order_id": order_id}, {"_id": 0}).sort("seq", -1 if latest else 1).to_list(limit)
+        buffered = [dict(r) for r in self._children if r["order_id"] == order_id]
+        rows = sorted(rows + buffered, key=lambda r: r["seq"])
+        return rows[-limit:] if latest else rows[:limit]
+
+    async def find_day(self, day: str, symbol: Optional[str] = None, limit: int = 1_000_000) -> List[Dict]:
+        """Parent orders finished on `day` (YYYY-MM-DD), optionally for one symbol"""
+        query = {"day": day}
+        if symbol:
+            query["symbol"] = symbol.upper()
+        docs = await self.db[self.ORDERS].find(query, {"_id": 0}).to_list(limit)
+        seen = {doc["order_id"] for doc in docs}
+        docs += [dict(doc) for doc in self._parents.values()
+                 if doc["day"] == day and doc["order_id"] not in seen
+                 and (not symbol or doc["symbol"] == symbol.upper())]
+        return docs
+
+    def get_status(self) -> dict:
+        return {
+            "pending_orders": len(self._parents),
+            "pending_children": len(self._children),
+            "archived_orders": self.archived_orders,
+            "archived_children": self.archived_children,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
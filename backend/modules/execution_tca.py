@@ -0,0 +1,159 @@
+# OracleIQTrader - Transaction Cost Analysis
+# Execution-quality metrics for algo parent orders, computed column-wise:
+# slippage against arrival, interval VWAP and interval TWAP, participation
+# and implementation shortfall for thousands of orders in one numpy pass,
+# and day reports grouped by order type and symbol.
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Columns compute_tca reads; records missing a benchmark get NaN and drop out of that metric
+NUMERIC_FIELDS = ("total_quantity", "filled_quantity", "avg_fill_price", "arrival_price",
+                  "market_vwap", "market_twap", "market_volume", "end_price")
+LABEL_FIELDS = ("side", "order_type", "symbol")
+# Slippage is averaged over executed notional; shortfall over the paper (intended) notional,
+# so an order cancelled after a small fill weighs in with everything it failed to buy
+FILL_WEIGHTED = ("arrival_slippage_bps", "vwap_slippage_bps", "twap_slippage_bps", "participation")
+PAPER_WEIGHTED = ("shortfall_bps", "execution_cost_bps", "opportunity_cost_bps")
+
+
+def window_benchmarks(tape, start_bar, bars) -> Dict[str, np.ndarray]:
+    """
+    Market VWAP, TWAP, traded volume and closing price over each order's
+    bars [start_bar, start_bar + bars) of `tape` (wrapping past the close),
+    from prefix sums: O(1) per order whatever the window length
+    """
+    start = np.asarray(start_bar, dtype=np.int64)
+    stop = start + np.maximum(np.asarray(bars, dtype=np.int64), 1)
+    n = tape.bars
+    cum_pv = np.concatenate(([0.0], np.cumsum(tape.prices * tape.volumes)))
+    cum_v = np.concatenate(([0.0], np.cumsum(tape.volumes)))
+    cum_p = np.concatenate(([0.0], np.cumsum(tape.prices)))
+
+    def window_sum(cum):
+        # Prefix sum at an unwrapped bar index: whole laps plus the partial lap
+        def prefix(k):
+            return (k // n) * cum[-1] + cum[k % n]
+        return prefix(stop) - prefix(start)
+
+    volume = window_sum(cum_v)
+    return {
+        "market_vwap": window_sum(cum_pv) / volume,
+        "market_twap": window_sum(cum_p) / (stop - start),
+        "market_volume": volume,
+        "end_price": tape.prices[(stop - 1) % n],
+    }
+
+
+def to_columns(records: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """Archived order documents -> one array per TCA field (None -> NaN)"""
+    count = len(records)
+    columns = {}
+    for field in NUMERIC_FIELDS:
+        columns[field] = np.fromiter(
+            (np.nan if r.get(field) is None else r[field] for r in records), dtype=np.float64, count=count)
+    for field in LABEL_FIELDS:
+        columns[field] = np.array([r.get(field) or "" for r in records], dtype=object)
+    return columns
+
+
+def compute_tca(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Per-order metrics in basis points, signed so that positive is a cost
+    (buying above / selling below the benchmark):
+
+    - arrival, VWAP and TWAP slippage of the average fill price
+    - implementation shortfall against the paper portfolio (all of the
+      order at the arrival price): execution cost on the filled part plus
+      opportunity cost on the unfilled part, marked at the window's
+      closing price
+    - participation: filled quantity over market volume in the window
+    """
+    sign = np.where(columns["side"] == "sell", -1.0, 1.0)
+    total = columns["total_quantity"]
+    filled = np.nan_to_num(columns["filled_quantity"])
+    avg = columns["avg_fill_price"]
+    arrival = columns["arrival_price"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paper = total * arrival
+        execution = np.where(filled > 0, sign * filled * (avg - arrival), 0.0)
+        opportunity = sign * (total - filled) * (columns["end_price"] - arrival)
+        opportunity = np.where(total > filled, opportunity, 0.0)
+        metrics = {
+            "arrival_slippage_bps": sign * (avg - arrival) / arrival * 10_000,
+            "vwap_slippage_bps": sign * (avg - columns["market_vwap"]) / columns["market_vwap"] * 10_000,
+            "twap_slippage_bps": sign * (avg - columns["market_twap"]) / columns["market_twap"] * 10_000,
+            "execution_cost_bps": execution / paper * 10_000,
+            "opportunity_cost_bps": opportunity / paper * 10_000,
+            "participation": filled / columns["market_volume"],
+            "fill_rate": filled / total,
+            "notional": filled * avg,
+        }
+    metrics["shortfall_bps"] = metrics["execution_cost_bps"] + metrics["opportunity_cost_bps"]
+    metrics["notional"] = np.nan_to_num(metrics["notional"])
+    metrics["paper_notional"] = np.nan_to_num(paper)
+    return metrics
+
+
+def _weighted(values: np.ndarray, weights: np.ndarray, groups: np.ndarray, count: int) -> np.ndarray:
+    """Per-group weighted mean ignoring NaN values (NaN where a group has no weight)"""
+    valid = np.isfinite(values) & (weights > 0)
+    w = np.where(valid, weights, 0.0)
+    sums = np.bincount(groups, weights=np.where(valid, values, 0.0) * w, minlength=count)
+    totals = np.bincount(groups, weights=w, minlength=count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sums / totals
+
+
+def _round(value, digits: int = 2) -> Optional[float]:
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def _summarize(metrics: Dict[str, np.ndarray], columns: Dict[str, np.ndarray],
+               groups: np.ndarray, count: int) -> List[Dict]:
+    weights = metrics["notional"]
+    orders = np.bincount(groups, minlength=count)
+    rows = [{"orders": int(n)} for n in orders]
+    for key in (*FILL_WEIGHTED, *PAPER_WEIGHTED):
+        means = _weighted(metrics[key], weights if key in FILL_WEIGHTED else metrics["paper_notional"],
+                          groups, count)
+        digits = 4 if key == "participation" else 2
+        for row, value in zip(rows, means):
+            row[key] = _round(value, digits)
+    quantities = np.bincount(groups, weights=np.nan_to_num(columns["total_quantity"]), minlength=count)
+    filled = np.bincount(groups, weights=np.nan_to_num(columns["filled_quantity"]), minlength=count)
+    notional = np.bincount(groups, weights=weights, minlength=count)
+    for row, q, f, v in zip(rows, quantities, filled, notional):
+        row["quantity"] = _round(q, 6)
+        row["fill_rate"] = _round(f / q, 4) if q else None
+        row["notional"] = _round(v)
+    return rows
+
+
+def tca_report(records: Sequence[Dict], group_by: Iterable[str] = ("order_type", "symbol")) -> Dict:
+    """
+    Notional-weighted execution-quality summary of `records` (archived
+    parent orders), overall and per group, plus the slippage distribution
+    """
+    group_by = tuple(group_by)
+    if not records:
+        return {"orders": 0, "summary": None, "groups": {field: [] for field in group_by}}
+    columns = to_columns(records)
+    metrics = compute_tca(columns)
+
+    overall = _summarize(metrics, columns, np.zeros(len(records), dtype=np.int64), 1)[0]
+    arrival = metrics["arrival_slippage_bps"]
+    arrival = arrival[np.isfinite(arrival)]
+    if len(arrival):
+        p5, p50, p95 = np.percentile(arrival, [5, 50, 95])
+        overall["arrival_slippage_percentiles_bps"] = {"p5": _round(p5), "p50": _round(p50), "p95": _round(p95)}
+
+    groups = {}
+    for field in group_by:
+        labels, inverse = np.unique(columns[field].astype(str), return_inverse=True)
+        rows = _summarize(metrics, columns, inverse, len(labels))
+        groups[field] = [{field: label, **row} for label, row in zip(labels.tolist(), rows)]
+    return {"orders": len(records), "summary": overall, "groups": groups}
@@ -0,0 +1,104 @@
+# OracleIQTrader - Fast JSON Responses
+# orjson-backed default response class. Datetimes, UUIDs, enums, dataclasses
+# and numpy arrays/scalars are encoded natively, and handlers without a
+# response_model are rendered straight from their return value instead of
+# being copied through FastAPI's jsonable_encoder first.
+
+import functools
+import inspect
+import logging
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.datastructures import DefaultPlaceholder
+from pydantic import BaseModel
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any):
+    """Types orjson does not encode natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "tolist"):  # non-contiguous numpy arrays, numpy scalars orjson skipped
+        return obj.tolist()
+    if type(obj).__name__ == "ObjectId":
+        return str(obj)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    try:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    except TypeError:
+        # Anything else FastAPI knows how to encode (paths, bytes, custom encoders)
+        return orjson.dumps(jsonable_encoder(content), default=_default, option=ORJSON_OPTIONS)
+
+
+class OracleJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; NaN/Infinity become null instead of failing"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _renders_directly(endpoint, kwargs) -> bool:
+    if getattr(endpoint, "_oracle_json", False):
+        return False
+    if not isinstance(kwargs.get("response_model", DefaultPlaceholder(None)), DefaultPlaceholder):
+        return False
+    response_class = kwargs.get("response_class")
+    if response_class is not None and not isinstance(response_class, DefaultPlaceholder) \
+            and not issubclass(response_class, OracleJSONResponse):
+        return False
+    signature = inspect.signature(endpoint)
+    if signature.return_annotation is not inspect.Signature.empty:
+        return False
+    # Headers/cookies set on an injected Response are only merged into responses FastAPI builds itself
+    return not any(
+        inspect.isclass(p.annotation) and issubclass(p.annotation, Response) for p in signature.parameters.values()
+    )
+
+
+class OracleJSONRoute(APIRoute):
+    """
+    APIRoute that renders the return value of handlers without a
+    response_model directly with orjson. Handlers with a response_model
+    keep FastAPI's validation and filtering and are rendered with orjson
+    through the default response class.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if _renders_directly(endpoint, kwargs):
+            endpoint = _direct_endpoint(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _direct_endpoint(handler, status_code: int):
+    """Wrap `handler` (keeping its signature for dependency injection) to return an OracleJSONResponse"""
+    def render(result):
+        if isinstance(result, Response):
+            return result
+        return OracleJSONResponse(result, status_code=status_code)
+
+    if inspect.iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def direct(*args, **kwargs):
+            return render(await handler(*args, **kwargs))
+    else:
+        @functools.wraps(handler)
+        def direct(*args, **kwargs):
+            return render(handler(*args, **kwargs))
+    direct._oracle_json = True
+    return direct
@@ -0,0 +1,363 @@
+# OracleIQTrader - Execution Fill Simulation
+# Per-symbol intraday market tapes (one-minute bars of VWAP price and volume)
+# built from recorded tick files, or from a deterministic synthetic session
+# when no ticks exist, and a square-root market-impact model pricing child
+# fills against them. The batch simulator runs thousands of parent orders
+# over a full day with numpy: one vector step per bar across all orders.
+
+import logging
+import math
+import os
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from modules.tick_store import NS_PER_SECOND, TickStore, get_active_replay, replay_price
+
+logger = logging.getLogger(__name__)
+
+BAR_SECONDS = 60
+SESSION_BARS = 390  # synthetic day: a 6.5 hour session of one-minute bars
+DEFAULT_DAILY_VOLATILITY = 0.02
+DEFAULT_DAILY_NOTIONAL = 50_000_000.0
+MAX_CACHED_TAPES = 64
+
+STRATEGIES = ("twap", "vwap", "pov")
+
+
+# ============ MARKET TAPE ============
+
+@dataclass
+class MarketTape:
+    """One symbol's trading day as equal-length bars"""
+    symbol: str
+    day: str
+    prices: np.ndarray   # per-bar volume-weighted price
+    volumes: np.ndarray  # per-bar traded volume (always > 0)
+    bar_seconds: int = BAR_SECONDS
+    source: str = "synthetic"
+
+    @property
+    def bars(self) -> int:
+        return len(self.prices)
+
+    @cached_property
+    def daily_volume(self) -> float:
+        return float(self.volumes.sum())
+
+    @cached_property
+    def daily_volatility(self) -> float:
+        """Standard deviation of bar log returns scaled to the whole day"""
+        if self.bars < 2:
+            return DEFAULT_DAILY_VOLATILITY
+        returns = np.diff(np.log(self.prices))
+        return float(returns.std() * np.sqrt(self.bars)) or DEFAULT_DAILY_VOLATILITY
+
+    def bar_at(self, offset: float) -> int:
+        """Bar index `offset` bars into the day, wrapping past the close"""
+        return int(offset) % self.bars
+
+    def volume_profile(self, start: int, bars: int, buckets: Optional[int] = None) -> np.ndarray:
+        """
+        Fraction of the volume traded in each of `buckets` equal parts of
+        the `bars` bars from `start` (wrapping past the close); sums to 1
+        """
+        bars = max(int(bars), 1)
+        window = self.volumes[(start + np.arange(bars)) % self.bars]
+        buckets = min(buckets or bars, bars)
+        edges = np.linspace(0, bars, buckets + 1).astype(np.int64)
+        profile = np.add.reduceat(window, edges[:-1])
+        return profile / profile.sum()
+
+    @classmethod
+    def from_ticks(cls, symbol: str, day: str, ticks: np.ndarray, bar_seconds: int = BAR_SECONDS) -> "MarketTape":
+        """
+        Aggregate a structured (ts, price, volume) tick array into bars
+        spanning its first to last tick. Bars without trades carry the
+        previous price and a small volume floor so participation stays finite.
+        """
+        if not len(ticks):
+            raise ValueError(f"No ticks for {symbol} on {day}")
+        ts = ticks["ts"]
+        price = ticks["price"]
+        volume = np.where(ticks["volume"] > 0, ticks["volume"], 0.0)
+        bar = (ts - ts[0]) // (bar_seconds * NS_PER_SECOND)
+        bars = int(bar[-1]) + 1
+        bar_volume = np.bincount(bar, weights=volume, minlength=bars)
+        bar_notional = np.bincount(bar, weights=price * volume, minlength=bars)
+        # Unweighted mean where a bar only has zero-volume ticks (quotes)
+        bar_count = np.bincount(bar, minlength=bars)
+        bar_mean = np.bincount(bar, weights=price, minlength=bars) / np.maximum(bar_count, 1)
+        prices = np.where(bar_volume > 0, bar_notional / np.where(bar_volume > 0, bar_volume, 1), bar_mean)
+        # Forward-fill bars with no ticks at all
+        filled = np.where(bar_count > 0, np.arange(bars), 0)
+        np.maximum.accumulate(filled, out=filled)
+        prices = prices[filled]
+        traded = bar_volume[bar_volume > 0]
+        floor = float(np.median(traded)) * 0.01 if len(traded) else 1.0
+        return cls(symbol.upper(), day, prices, np.maximum(bar_volume, floor), bar_seconds, "ticks")
+
+    @classmethod
+    def synthetic(cls, symbol: str, day: str, base_price: float, bars: int = SESSION_BARS,
+                  daily_volatility: float = DEFAULT_DAILY_VOLATILITY,
+                  daily_volume: Optional[float] = None, seed: int = 0) -> "MarketTape":
+        """
+        Deterministic session (same arguments -> same tape): a random-walk
+        price and a U-shaped intraday volume curve (heavy open and close)
+        with lognormal noise
+        """
+        rng = np.random.default_rng(zlib.crc32(f"{seed}:{symbol.upper()}:{day}".encode()))
+        returns = rng.normal(0.0, daily_volatility / np.sqrt(bars), bars)
+        returns[0] = 0.0
+        prices = base_price * np.exp(np.cumsum(returns))
+        x = np.linspace(0.0, 1.0, bars)
+        shape = (1 + 3 * (2 * x - 1) ** 2) * rng.lognormal(0.0, 0.3, bars)
+        daily_volume = daily_volume or DEFAULT_DAILY_NOTIONAL / base_price
+        return cls(symbol.upper(), day, prices, shape / shape.sum() * daily_volume, BAR_SECONDS, "synthetic")
+
+
+class MarketTapes:
+    """
+    Tapes by (symbol, day), built on first use and kept in a small LRU.
+    Recorded ticks come from the active replay's store or the stores
+    under MARKET_REPLAY_DIR / TICK_RECORD_DIR; symbols without ticks get
+    a synthetic session around their current (replayed) price.
+    """
+
+    def __init__(self, roots: Optional[Sequence[str]] = None, max_tapes: int = MAX_CACHED_TAPES):
+        if roots is None:
+            roots = [os.environ.get(name, "").strip() for name in ("MARKET_REPLAY_DIR", "TICK_RECORD_DIR")]
+        self.stores = [TickStore(root) for root in roots if root]
+        self.max_tapes = max_tapes
+        self._tapes: "OrderedDict[tuple, MarketTape]" = OrderedDict()
+
+    def _candidate_stores(self) -> List[TickStore]:
+        replay = get_active_replay()
+        return ([replay.store] if replay is not None else []) + self.stores
+
+    def _load_ticks(self, symbol: str, day: Optional[str]) -> Optional[MarketTape]:
+        for store in self._candidate_stores():
+            days = [day] if day else reversed(store.days())
+            for d in days:
+                if not store.path_for(symbol, d).exists():
+                    continue
+                tick_file = store.open(symbol, d)
+                try:
+                    if tick_file.count:
+                        return MarketTape.from_ticks(symbol, d, np.array(tick_file.to_numpy()))
+                finally:
+                    tick_file.close()
+        return None
+
+    def get(self, symbol: str, day: Optional[str] = None, base_price: Optional[float] = None) -> MarketTape:
+        symbol = symbol.upper()
+        key = (symbol, day)
+        tape = self._tapes.get(key)
+        if tape is not None:
+            self._tapes.move_to_end(key)
+            return tape
+        try:
+            tape = self._load_ticks(symbol, day)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not build a tick tape for {symbol}: {type(e).__name__}: {e}")
+            tape = None
+        if tape is None:
+            synthetic_day = day or datetime.utcnow().date().isoformat()
+            tape = MarketTape.synthetic(symbol, synthetic_day, base_price or replay_price(symbol) or 100.0)
+        self._tapes[key] = tape
+        if len(self._tapes) > self.max_tapes:
+            self._tapes.popitem(last=False)
+        return tape
+
+    def put(self, tape: MarketTape):
+        """Install a tape (tests, benchmarks, what-if runs) for its symbol and day, and as its latest"""
+        for key in ((tape.symbol, tape.day), (tape.symbol, None)):
+            self._tapes[key] = tape
+        while len(self._tapes) > self.max_tapes:
+            self._tapes.popitem(last=False)
+
+    def clear(self):
+        self._tapes.clear()
+
+
+# ============ IMPACT MODEL ============
+
+@dataclass
+class ImpactModel:
+    """
+    Cost of a child fill relative to the bar price, as a fraction:
+    half the spread, plus temporary impact growing with the square root
+    of the child's share of bar volume, plus permanent impact linear in
+    the parent's cumulative share of daily volume (it persists for the
+    parent's later children). Volatility scales both impact terms.
+    """
+    half_spread_bps: float = 1.0
+    temporary_coef: float = 0.1
+    permanent_coef: float = 0.5
+    max_participation: float = 0.25  # per-bar cap on a child's share of market volume
+
+    def cost(self, participation, cumulative_share, daily_volatility: float):
+        """Fractional price concession; numpy arrays broadcast"""
+        return (self.half_spread_bps / 10_000
+                + self.temporary_coef * daily_volatility * np.sqrt(participation)
+                + self.permanent_coef * daily_volatility * cumulative_share)
+
+    def fill_price(self, tape: MarketTape, bar: int, side: str, quantity: float, already_filled: float = 0.0) -> float:
+        """Price of one child of `quantity` in `bar` (live slices; scalar math)"""
+        sigma = tape.daily_volatility
+        cost = (self.half_spread_bps / 10_000
+                + self.temporary_coef * sigma * math.sqrt(quantity / float(tape.volumes[bar]))
+                + self.permanent_coef * sigma * already_filled / tape.daily_volume)
+        sign = 1.0 if side == "buy" else -1.0
+        return float(tape.prices[bar]) * (1 + sign * cost)
+
+
+# ============ BATCH SIMULATION ============
+
+def simulate_parent_orders(tape: MarketTape, side, quantity, strategy, start_bar, duration_bars,
+                           participation_rate=0.1, model: Optional[ImpactModel] = None) -> Dict[str, np.ndarray]:
+    """
+    Simulate parent orders on one tape. Every argument after `tape` is a
+    scalar or an array with one entry per order: side "buy"/"sell",
+    strategy "twap"/"vwap"/"pov", start bar and window length in bars
+    (POV runs from its start to the close at `participation_rate`).
+
+    TWAP and VWAP targets are cumulative schedules over the window (flat,
+    or following the tape's volume); each bar fills the shortfall against
+    the target up to `max_participation` of bar volume, so capped
+    quantity rolls forward. The walk over bars is the only Python loop;
+    each step is a few array operations over all orders that only update
+    per-order running totals, so memory stays O(orders) however long the
+    tape (window aggregates come from prefix sums of the tape).
+
+    Returns arrays per order: filled, avg_price, arrival_price,
+    market_vwap, shortfall_bps, vwap_slippage_bps, max_participation,
+    completion and last_bar (-1 when nothing filled).
+    """
+    model = model or ImpactModel()
+    quantity = np.atleast_1d(np.asarray(quantity, dtype=np.float64))
+    n = len(quantity)
+    strategy = np.broadcast_to(np.asarray(strategy), (n,))
+    unknown = set(np.unique(strategy).tolist()) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown strategies {sorted(unknown)}; expected one of {STRATEGIES}")
+    sign = np.where(np.broadcast_to(np.asarray(side), (n,)) == "sell", -1.0, 1.0)
+    start = np.clip(np.broadcast_to(np.asarray(start_bar, dtype=np.int64), (n,)), 0, tape.bars - 1)
+    duration = np.maximum(np.broadcast_to(np.asarray(duration_bars, dtype=np.int64), (n,)), 1)
+    rate = np.broadcast_to(np.asarray(participation_rate, dtype=np.float64), (n,))
+    is_pov = strategy == "pov"
+    end = np.where(is_pov, tape.bars, np.minimum(start + duration, tape.bars))
+
+    prices, volumes = tape.prices, tape.volumes
+    cum_volume = np.concatenate(([0.0], np.cumsum(volumes)))
+    cum_notional = np.concatenate(([0.0], np.cumsum(prices * volumes)))
+    window_volume = cum_volume[end] - cum_volume[start]
+    market_vwap = (cum_notional[end] - cum_notional[start]) / window_volume
+
+    # Target weight per bar: tape volume (VWAP, POV) or 1 (TWAP), over the window total
+    is_twap = strategy == "twap"
+    schedule_total = np.where(is_twap, end - start, window_volume)
+    pov_rate = np.where(is_pov, rate, 0.0)
+    cap = model.max_participation * volumes
+
+    scheduled = np.zeros(n)  # weight of the window's bars so far
+    filled = np.zeros(n)
+    notional = np.zeros(n)
+    max_participation = np.zeros(n)
+    last_bar = np.full(n, -1)
+    for b in range(int(start.min()), tape.bars):
+        scheduled += np.where(is_twap, 1.0, volumes[b]) * ((start <= b) & (b < end))
+        # From the window's last bar on, TWAP/VWAP target the full quantity exactly
+        target = np.where(is_pov, np.minimum(pov_rate * scheduled, quantity),
+                          np.where(b >= end - 1, quantity, scheduled / schedule_total * quantity))
+        child = np.clip(target - filled, 0.0, cap[b])
+        participation = child / volumes[b]
+        cost = model.cost(participation, filled / tape.daily_volume, tape.daily_volatility)
+        notional += child * (prices[b] * (1 + sign * cost))
+        np.maximum(max_participation, participation, out=max_participation)
+        last_bar[child > 0] = b
+        filled += child
+
+    arrival = prices[start]
+    traded = last_bar >= 0
+    avg_price = np.where(traded, notional / np.where(traded, filled, 1.0), np.nan)
+    return {
+        "filled": filled,
+        "avg_price": avg_price,
+        "arrival_price": arrival,
+        "market_vwap": market_vwap,
+        "shortfall_bps": sign * (avg_price - arrival) / arrival * 10_000,
+        "vwap_slippage_bps": sign * (avg_price - market_vwap) / market_vwap * 10_000,
+        "max_participation": max_participation,
+        "completion": filled / quantity,
+        "last_bar": last_bar,
+    }
+
+
+def _is_iso_day(day) -> bool:
+    try:
+        return datetime.strptime(day, "%Y-%m-%d").date().isoformat() == day
+    except (TypeError, ValueError):
+        return False
+
+
+def simulate_orders(orders: List[Dict], model: Optional[ImpactModel] = None,
+                    tapes: Optional[MarketTapes] = None, day: Optional[str] = None) -> Dict:
+    """
+    Simulate parent orders given as dicts (symbol, side, quantity, strategy,
+    start_minute, duration_minutes, participation_rate) grouped by symbol,
+    one vectorized pass per tape. Returns per-order results in input order
+    and a quantity-weighted summary.
+    """
+    if day is not None and not _is_iso_day(day):
+        raise ValueError(f"day must be YYYY-MM-DD, got {day!r}")
+    tapes = tapes or market_tapes
+    model = model or ImpactModel()
+    by_symbol: Dict[str, List[int]] = {}
+    for i, order in enumerate(orders):
+        if not float(order["quantity"]) > 0:
+            raise ValueError(f"Order {i}: quantity must be positive, got {order['quantity']!r}")
+        by_symbol.setdefault(order["symbol"].upper(), []).append(i)
+
+    results: List[Optional[Dict]] = [None] * len(orders)
+    for symbol, indices in by_symbol.items():
+        tape = tapes.get(symbol, day)
+        group = [orders[i] for i in indices]
+        minutes_per_bar = tape.bar_seconds / 60
+        out = simulate_parent_orders(
+            tape,
+            side=[o.get("side", "buy").lower() for o in group],
+            quantity=[float(o["quantity"]) for o in group],
+            strategy=[o.get("strategy", "vwap").lower() for o in group],
+            start_bar=[int(o.get("start_minute", 0) / minutes_per_bar) for o in group],
+            duration_bars=[max(1, round(o.get("duration_minutes", 60) / minutes_per_bar)) for o in group],
+            participation_rate=[float(o.get("participation_rate", 0.1)) for o in group],
+            model=model,
+        )
+        # NaN (orders that never filled) becomes None
+        columns = {key: [None if v != v else v for v in np.round(values, 6).tolist()] for key, values in out.items()}
+        for row, i in enumerate(indices):
+            results[i] = {"symbol": symbol, "tape": tape.source, **{key: columns[key][row] for key in columns}}
+
+    quantities = np.array([float(o["quantity"]) for o in orders]) if orders else np.zeros(0)
+    shortfalls = np.array([r["shortfall_bps"] if r["shortfall_bps"] is not None else np.nan for r in results])
+    traded = ~np.isnan(shortfalls)
+    summary = {
+        "orders": len(orders),
+        "symbols": len(by_symbol),
+        "avg_shortfall_bps": round(float(np.average(shortfalls[traded], weights=quantities[traded])), 4)
+        if traded.any() else None,
+        "completion": round(float(sum(r["filled"] for r in results) / quantities.sum()), 6)
+        if len(orders) else None,
+    }
+    return {"orders": results, "summary": summary}
+
+
+# Global instance
+market_tapes = MarketTapes()
+fill_model = ImpactModel()
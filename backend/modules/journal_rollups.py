@@ -0,0 +1,189 @@
+"""
+Journal Rollups Module - Incrementally maintained per-day trade statistics
+Backs the trading journal weekly/monthly summaries with one small document
+per (scope, day) instead of rescanning the trades collection
+"""
+
+from typing import Dict, List, Optional, Any
+from datetime import datetime, timezone, timedelta
+import logging
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Scope used for trades that are summarized across all users
+# (unauthenticated journal requests have always seen every trade)
+GLOBAL_SCOPE = "__all__"
+
+
+def _day_range(start_date: str, end_date: str) -> List[str]:
+    """Return every YYYY-MM-DD between start_date and end_date inclusive"""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+
+def _empty_rollup(date: str) -> Dict[str, Any]:
+    return {"date": date, "trades_count": 0, "wins": 0, "losses": 0, "total_pnl": 0.0}
+
+
+class JournalRollupStore:
+    """
+    Maintains the `journal_daily_rollups` collection.
+
+    Every trade insert increments the rollup for its day (both for the
+    trading user and for the global scope) and its `version`. Days that
+    predate the rollups, or that were never touched, are rebuilt with a
+    single $group-by-day aggregation over the trades collection and then
+    marked complete so they are never rescanned.
+
+    Only days before today are stored by a rebuild (today's trades are
+    still arriving), and only if the day's version is unchanged since the
+    rebuild read it: an increment that lands in between leaves the day
+    incomplete, so it is rebuilt again on the next read instead of lost.
+    """
+
+    COLLECTION = "journal_daily_rollups"
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def collection(self):
+        return self.db[self.COLLECTION]
+
+    async def ensure_indexes(self):
+        """Create the indexes the rollup reads and the backfill aggregation rely on"""
+        await self.collection.create_index([("scope", 1), ("date", 1)], unique=True)
+        await self.db.trades.create_index([("user_id", 1), ("timestamp", 1)])
+
+    async def record_trade(self, trade: Dict[str, Any]):
+        """Fold a freshly inserted trade document into its day's rollups"""
+        timestamp = trade.get("timestamp")
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        if not timestamp:
+            timestamp = datetime.now(timezone.utc).isoformat()
+        date = timestamp[:10]
+
+        pnl = trade.get("profit_loss") or 0
+        update = {
+            "$inc": {
+                "trades_count": 1,
+                "wins": 1 if pnl > 0 else 0,
+                "losses": 1 if pnl < 0 else 0,
+                "total_pnl": pnl,
+                "version": 1
+            },
+            "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
+        }
+
+        scopes = [GLOBAL_SCOPE]
+        if trade.get("user_id"):
+            scopes.append(trade["user_id"])
+
+        try:
+            await self.collection.bulk_write(
+                [UpdateOne({"scope": scope, "date": date}, update, upsert=True) for scope in scopes],
+                ordered=False
+            )
+        except Exception as e:
+            # The rollup is rebuilt from trades on the next read if it is missing
+            logger.error(f"Journal rollup update error: {e}")
+
+    async def get_days(self, user_id: Optional[str], start_date: str, end_date: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return {date: rollup} for every day in [start_date, end_date].
+
+        Reads at most one small document per day; incomplete days are
+        rebuilt from trades with one aggregation before returning.
+        """
+        scope = user_id or GLOBAL_SCOPE
+        days = _day_range(start_date, end_date)
+
+        docs = await self.collection.find(
+            {"scope": scope, "date": {"$gte": start_date, "$lte": end_date}},
+            {"_id": 0}
+        ).to_list(len(days))
+        rollups = {doc["date"]: doc for doc in docs}
+
+        stale = [d for d in days if not rollups.get(d, {}).get("complete")]
+        if stale:
+            rebuilt = await self._rebuild(scope, stale[0], stale[-1])
+            for date in stale:
+                rollups[date] = rebuilt.get(date, _empty_rollup(date))
+
+        return {
+            d: {
+                "date": d,
+                "trades_count": int(rollups[d].get("trades_count", 0)),
+                "wins": int(rollups[d].get("wins", 0)),
+                "losses": int(rollups[d].get("losses", 0)),
+                "total_pnl": float(rollups[d].get("total_pnl", 0))
+            }
+            for d in days
+        }
+
+    async def _rebuild(self, scope: str, start_date: str, end_date: str) -> Dict[str, Dict[str, Any]]:
+        """Recompute rollups for a date range with one $group-by-day aggregation"""
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        versions = {
+            doc["date"]: doc.get("version")
+            async for doc in self.collection.find(
+                {"scope": scope, "date": {"$gte": start_date, "$lte": min(end_date, today)}},
+                {"_id": 0, "date": 1, "version": 1})
+        }
+        day_after = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        match: Dict[str, Any] = {"timestamp": {"$gte": start_date, "$lt": day_after}}
+        if scope != GLOBAL_SCOPE:
+            match["user_id"] = scope
+
+        pnl = {"$ifNull": ["$profit_loss", 0]}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"$substrBytes": ["$timestamp", 0, 10]},
+                "trades_count": {"$sum": 1},
+                "wins": {"$sum": {"$cond": [{"$gt": [pnl, 0]}, 1, 0]}},
+                "losses": {"$sum": {"$cond": [{"$lt": [pnl, 0]}, 1, 0]}},
+                "total_pnl": {"$sum": pnl}
+            }}
+        ]
+
+        rebuilt = {}
+        async for row in self.db.trades.aggregate(pipeline):
+            rebuilt[row["_id"]] = {
+                "date": row["_id"],
+                "trades_count": row["trades_count"],
+                "wins": row["wins"],
+                "losses": row["losses"],
+                "total_pnl": row["total_pnl"]
+            }
+
+        now = datetime.now(timezone.utc).isoformat()
+        ops = []
+        for date in _day_range(start_date, end_date):
+            if date >= today:
+                break
+            values = rebuilt.get(date, _empty_rollup(date))
+            # A missing day matches version None and is inserted; if record_trade
+            # creates it first, the upsert hits the unique index and is skipped
+            ops.append(UpdateOne(
+                {"scope": scope, "date": date, "version": versions.get(date)},
+                {"$set": {**values, "complete": True, "updated_at": now}},
+                upsert=True
+            ))
+        if not ops:
+            return rebuilt
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            skipped = len(ops) - result.matched_count - result.upserted_count
+        except Exception as e:
+            skipped = None
+            logger.warning(f"Journal rollup rebuild partly skipped: {e}")
+        if skipped:
+            logger.info(f"Journal rollup rebuild skipped {skipped} day(s) updated concurrently; "
+                        f"they are rebuilt on the next read")
+
+        return rebuilt
@@ -0,0 +1,123 @@
+# OracleIQTrader - Lazy Imports
+# Defers heavy optional dependencies (TensorFlow, pandas, scipy, yfinance, ...)
+# until a route actually needs them, with an optional warm-up
+
+import importlib
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_registry: Dict[str, "LazyModule"] = {}
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falls back to 0)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class LazyModule:
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    `pd = lazy_import("pandas")` behaves like `import pandas as pd` except
+    that pandas is only loaded when `pd.DataFrame` (or any attribute) is
+    first used, or when warm_up() is called.
+    """
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "load_seconds", None)
+        object.__setattr__(self, "rss_delta_mb", None)
+        object.__setattr__(self, "error", None)
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+        with self._lock:
+            if self._module is None:
+                rss_before = _rss_mb()
+                started = time.perf_counter()
+                try:
+                    module = importlib.import_module(self._name)
+                except Exception as e:
+                    object.__setattr__(self, "error", str(e))
+                    raise
+                object.__setattr__(self, "load_seconds", time.perf_counter() - started)
+                object.__setattr__(self, "rss_delta_mb", _rss_mb() - rss_before)
+                object.__setattr__(self, "_module", module)
+                logger.info(f"Lazy-loaded {self._name} in {self.load_seconds:.2f}s (+{self.rss_delta_mb:.0f} MB RSS)")
+        return self._module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a shared lazy proxy for the module `name`"""
+    if name not in _registry:
+        _registry[name] = LazyModule(name)
+    return _registry[name]
+
+
+def registered_modules() -> List[str]:
+    """Names of the modules the app has declared lazy (the only ones warm-up may load on request)"""
+    return sorted(_registry)
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Import the given lazy modules now (all registered ones by default).
+    Blocking: call from a worker thread when running inside the event loop.
+    """
+    results = []
+    for name in (names or list(_registry)):
+        module = lazy_import(name)
+        try:
+            module._load()
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+        results.append(get_module_status(name))
+    return results
+
+
+def get_module_status(name: str) -> dict:
+    module = _registry[name]
+    return {
+        "module": name,
+        "loaded": module.is_loaded,
+        "load_seconds": round(module.load_seconds, 3) if module.load_seconds is not None else None,
+        "rss_delta_mb": round(module.rss_delta_mb, 1) if module.rss_delta_mb is not None else None,
+        "error": module.error
+    }
+
+
+def get_lazy_status() -> dict:
+    """Load state of every registered lazy module"""
+    return {
+        "rss_mb": round(_rss_mb(), 1),
+        "modules": [get_module_status(name) for name in sorted(_registry)]
+    }
@@ -0,0 +1,193 @@
+# OracleIQTrader - Event Loop Blocking Watchdog
+# Debug-mode detector for synchronous work on the event loop: a watcher
+# thread notices when the loop stops heartbeating, captures the loop
+# thread's stack and attributes the stall to the route or task running it
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from modules.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOOP_BLOCKED = metrics.counter(
+    "oracle_event_loop_blocked_total", "Event-loop stalls longer than the watchdog threshold", ("site",))
+LOOP_BLOCKED_SECONDS = metrics.histogram(
+    "oracle_event_loop_blocked_seconds", "Duration of event-loop stalls detected by the watchdog", ("site",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+# asyncio task -> ASGI scope of the request it is serving (filled only while the watchdog runs)
+_task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, dict]" = weakref.WeakKeyDictionary()
+
+
+def _is_app_frame(filename: str) -> bool:
+    return filename.startswith(BACKEND_DIR) and "site-packages" not in filename
+
+
+class LoopContextMiddleware:
+    """Pure ASGI middleware remembering which request each task is serving"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        task = asyncio.current_task() if scope["type"] in ("http", "websocket") else None
+        if task is not None:
+            _task_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if task is not None:
+                _task_scopes.pop(task, None)
+
+
+class LoopBlockingWatchdog:
+    """
+    Heartbeat-based stall detector.
+
+    A coroutine on the loop stamps a heartbeat every `heartbeat_interval`;
+    a daemon thread checks it. When the heartbeat is older than
+    `threshold` the loop thread's current stack is captured once per stall,
+    and when the loop recovers the full stall duration is recorded, logged
+    and kept in a ring buffer for /api/system/blocking-events.
+    """
+
+    def __init__(self, threshold: float = 0.1, heartbeat_interval: float = 0.01, max_events: int = 200):
+        self.threshold = threshold
+        self.heartbeat_interval = heartbeat_interval
+        self.events: Deque[dict] = deque(maxlen=max_events)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._pending: Optional[dict] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Start watching the running loop (call from inside the loop)"""
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._running = True
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop_watchdog_heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        self._running = False
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while self._running:
+            beat = time.monotonic()
+            pending = self._pending
+            if pending is not None:
+                self._pending = None
+                # Ignore a capture that raced with the loop already recovering
+                if pending["_beat"] == self._last_beat:
+                    self._finish(pending, beat)
+            self._last_beat = beat
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _watch(self):
+        check_interval = max(self.threshold / 4, 0.005)
+        while self._running:
+            time.sleep(check_interval)
+            last_beat = self._last_beat
+            stalled_for = time.monotonic() - last_beat - self.heartbeat_interval
+            pending = self._pending
+            if stalled_for > self.threshold and (pending is None or pending["_beat"] != last_beat):
+                self._pending = self._capture(last_beat, stalled_for)
+
+    def _capture(self, last_beat: float, stalled_for: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+
+        app_frames = [f for f in stack if _is_app_frame(f.filename)]
+        site_frame = app_frames[-1] if app_frames else (stack[-1] if stack else None)
+        site = (
+            f"{os.path.relpath(site_frame.filename, BACKEND_DIR) if _is_app_frame(site_frame.filename) else site_frame.filename}"
+            f":{site_frame.lineno} in {site_frame.name}"
+            if site_frame else "unknown"
+        )
+
+        return {
+            "_beat": last_beat,
+            "site": site,
+            "context": self._describe_current_task(),
+            "detected_after_ms": round(stalled_for * 1000, 1),
+            "stack": traceback.format_list(stack[-25:]),
+            "detected_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def _describe_current_task(self) -> str:
+        """Route or task name that was running when the loop stalled (best effort, read cross-thread)"""
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+        task = current_tasks.get(self._loop)
+        if task is None:
+            return "callback"
+        scope = _task_scopes.get(task)
+        if scope is not None:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("path", "?")
+            return f"{scope.get('method', 'WS')} {path}"
+        return f"task {task.get_name()}"
+
+    def _finish(self, pending: dict, resumed_at: float):
+        event = {k: v for k, v in pending.items() if k != "_beat"}
+        duration = resumed_at - self._last_beat - self.heartbeat_interval
+        event["blocked_ms"] = round(max(duration, 0) * 1000, 1)
+        self.events.append(event)
+        LOOP_BLOCKED.inc(event["site"])
+        LOOP_BLOCKED_SECONDS.observe(event["site"], value=max(duration, 0))
+        logger.warning(
+            f"Event loop blocked for {event['blocked_ms']:.0f} ms at {event['site']} ({event['context']})\n"
+            + "".join(event["stack"][-8:])
+        )
+
+    def get_events(self, limit: int = 50) -> List[dict]:
+        return list(self.events)[-limit:][::-1]
+
+    def get_summary(self) -> Dict[str, dict]:
+        """Stall count and total/max blocked time per call site"""
+        summary: Dict[str, dict] = {}
+        for event in self.events:
+            entry = summary.setdefault(event["site"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "contexts": set()})
+            entry["count"] += 1
+            entry["total_ms"] += event["blocked_ms"]
+            entry["max_ms"] = max(entry["max_ms"], event["blocked_ms"])
+            entry["contexts"].add(event["context"])
+        return {
+            site: {**entry, "total_ms": round(entry["total_ms"], 1), "contexts": sorted(entry["contexts"])}
+            for site, entry in sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        }
+
+
+def watchdog_from_env() -> Optional[LoopBlockingWatchdog]:
+    """LOOP_WATCHDOG=1 enables the watchdog; LOOP_WATCHDOG_THRESHOLD_MS sets the threshold (default 100)"""
+    if os.environ.get("LOOP_WATCHDOG", "").lower() not in ("1", "true", "yes"):
+        return None
+    threshold_ms = float(os.environ.get("LOOP_WATCHDOG_THRESHOLD_MS", "100"))
+    return LoopBlockingWatchdog(threshold=threshold_ms / 1000)
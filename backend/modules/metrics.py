@@ -0,0 +1,339 @@
+# OracleIQTrader - Metrics Registry
+# Low-overhead counters, gauges and histograms rendered in the Prometheus
+# text exposition format, plus ASGI / Mongo / httpx / event-loop collectors
+
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond cache hits through multi-second ML routes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or computed at scrape time from a callback returning {labels: value}"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._callbacks: List[Callable[[], Dict[Tuple, float]]] = [callback] if callback else []
+
+    def set(self, *labels, value: float):
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def add_callback(self, callback: Callable[[], Dict[Tuple, float]]):
+        self._callbacks.append(callback)
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        for callback in self._callbacks:
+            try:
+                values.update(callback())
+            except Exception as e:
+                logger.error(f"Metrics callback error for {self.name}: {e}")
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(float(value))}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+
+    def observe(self, *labels, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - started)
+
+    def snapshot(self, *labels) -> Optional[dict]:
+        series = self._series.get(labels)
+        if series is None:
+            return None
+        return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None) -> Gauge:
+        gauge = self._register(Gauge(name, documentation, labelnames))
+        if callback:
+            gauge.add_callback(callback)
+        return gauge
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "oracle_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"))
+HTTP_IN_FLIGHT = metrics.gauge("oracle_http_requests_in_flight", "HTTP requests currently being served")
+WEBSOCKET_CONNECTIONS = metrics.gauge(
+    "oracle_websocket_connections", "Open WebSocket connections per manager", ("manager",))
+LOOP_ITERATION_DURATION = metrics.histogram(
+    "oracle_background_loop_iteration_seconds", "Background loop iteration duration", ("loop",))
+LOOP_ERRORS = metrics.counter("oracle_background_loop_errors_total", "Background loop iteration failures", ("loop",))
+OUTBOUND_HTTP_DURATION = metrics.histogram(
+    "oracle_outbound_http_duration_seconds", "Outbound HTTP latency per integration host", ("host", "status"))
+MONGO_OPERATION_DURATION = metrics.histogram(
+    "oracle_mongo_operation_duration_seconds", "MongoDB command latency per collection",
+    ("collection", "command", "outcome"))
+EVENT_LOOP_LAG = metrics.histogram(
+    "oracle_event_loop_lag_seconds", "Delay between scheduled and actual event-loop wakeups",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+
+# ============ COLLECTORS ============
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware: per-route latency histogram and in-flight gauge"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                scope["method"],
+                getattr(route, "path", None) or scope.get("cache_rule", "unmatched"),
+                str(status_holder[0]),
+                value=time.perf_counter() - started
+            )
+
+
+@contextmanager
+def track_loop_iteration(loop_name: str):
+    """Time one background-loop iteration and count it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        LOOP_ERRORS.inc(loop_name)
+        raise
+    finally:
+        LOOP_ITERATION_DURATION.observe(loop_name, value=time.perf_counter() - started)
+
+
+def register_websocket_manager(name: str, count: Callable[[], int]):
+    """Expose a WebSocket manager's open connection count as oracle_websocket_connections"""
+    WEBSOCKET_CONNECTIONS.add_callback(lambda: {(name,): count()})
+
+
+class MongoCommandListener:
+    """pymongo command listener recording per-collection command latency"""
+
+    # Commands whose first field names the target collection
+    _COLLECTION_COMMANDS = {
+        "find", "insert", "update", "delete", "aggregate", "count", "distinct",
+        "findAndModify", "createIndexes", "getMore"
+    }
+
+    def __init__(self):
+        self._pending: Dict[Tuple, Tuple[str, str]] = {}
+
+    def started(self, event):
+        command = event.command_name
+        if command == "getMore":
+            collection = event.command.get("collection", "unknown")
+        elif command in self._COLLECTION_COMMANDS:
+            collection = event.command.get(command, "unknown")
+        else:
+            collection = "-"
+        self._pending[(event.connection_id, event.request_id)] = (str(collection), command)
+
+    def _finish(self, event, outcome: str):
+        collection, command = self._pending.pop((event.connection_id, event.request_id), ("-", event.command_name))
+        MONGO_OPERATION_DURATION.observe(collection, command, outcome, value=event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+def mongo_command_listener():
+    """Build the pymongo CommandListener subclass lazily so this module imports without pymongo"""
+    from pymongo import monitoring
+
+    class _Listener(MongoCommandListener, monitoring.CommandListener):
+        pass
+
+    return _Listener()
+
+
+_httpx_instrumented = False
+
+
+def instrument_httpx():
+    """
+    Time every outbound httpx.AsyncClient request, labelled by host.
+
+    The integrations create short-lived clients ad hoc, so this wraps
+    AsyncClient.send once instead of threading event hooks through each one.
+    """
+    global _httpx_instrumented
+    if _httpx_instrumented:
+        return
+    import httpx
+
+    original_send = httpx.AsyncClient.send
+
+    async def send(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await original_send(self, request, *args, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            OUTBOUND_HTTP_DURATION.observe(request.url.host, status, value=time.perf_counter() - started)
+
+    httpx.AsyncClient.send = send
+    _httpx_instrumented = True
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Background task: record how late the loop wakes up compared to schedule"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(value=max(0.0, loop.time() - expected))
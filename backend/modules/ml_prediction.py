@@ -12,6 +12,8 @@ import random
 import numpy as np
 import logging
 
+from modules.tick_store import replay_history
+
 logger = logging.getLogger(__name__)
 
 # ============ ENUMS ============
@@ -223,6 +225,10 @@ class MLPredictionEngine:
     
     def _generate_simulated_prices(self, symbol: str, count: int = 100) -> List[float]:
         """Generate simulated historical prices for analysis"""
+        replayed = replay_history(symbol, count)
+        if replayed and len(replayed) == count:
+            return replayed
+        
         base_prices = {
             "BTC": 95000, "ETH": 3200, "SOL": 180, "XRP": 2.5,
             "ADA": 0.95, "DOGE": 0.35, "AVAX": 35, "LINK": 22
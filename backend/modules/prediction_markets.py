@@ -9,6 +9,8 @@ import random
 import uuid
 import asyncio
 
+from modules.event_bus import event_bus, MarketResolved
+
 class MarketCategory(str, Enum):
     SPORTS = "sports"
     POLITICS = "politics"
@@ -533,6 +535,13 @@ class PredictionMarketsEngine:
                     "net_pnl": round(net, 2)
                 })
         
+        event_bus.publish(MarketResolved(
+            market_id=market_id,
+            question=market.title,
+            outcome="YES" if outcome else "NO",
+            payouts={s["user_id"]: s["payout"] for s in settlements if s["payout"] > 0}
+        ))
+        
         return {
             "success": True,
             "market_id": market_id,
@@ -9,6 +9,8 @@ import httpx
 import logging
 import asyncio
 
+from modules.event_bus import TradeExecuted, OrderFilled, SignalEmitted, MarketResolved
+
 logger = logging.getLogger(__name__)
 
 
@@ -304,6 +306,37 @@ class PushNotificationService:
             notification_type=NotificationType.RISK_WARNING
         )
     
+    async def on_events(self, events: List):
+        """Event-bus handler: push executed trades, completed algo orders, agent signals and market payouts"""
+        for event in events:
+            if isinstance(event, MarketResolved):
+                for user_id, payout in event.payouts.items():
+                    if self.get_user_tokens(user_id):
+                        await self.send_to_user(
+                            user_id, "🏁 Market Resolved",
+                            f"{event.question} → {event.outcome}. Payout: ${payout:.2f}",
+                            data={"type": NotificationType.PORTFOLIO_UPDATE.value, "market_id": event.market_id}
+                        )
+                continue
+            # Most events belong to users without a registered device
+            if not event.user_id or not self.get_user_tokens(event.user_id):
+                continue
+            if isinstance(event, TradeExecuted) and event.source != "copy_master":
+                await self.notify_trade_executed(event.user_id, {
+                    "id": event.trade_id, "side": event.side, "quantity": event.quantity,
+                    "symbol": event.symbol, "price": event.price, "source": event.source
+                })
+            elif isinstance(event, OrderFilled) and event.status == "filled":
+                await self.notify_trade_executed(event.user_id, {
+                    "id": event.order_id, "side": event.side, "quantity": event.filled_quantity,
+                    "symbol": event.symbol, "price": event.price, "source": event.source
+                })
+            elif isinstance(event, SignalEmitted):
+                await self.notify_agent_signal(
+                    event.user_id, {"name": event.data.get("name", event.source.title()), "type": event.signal_type},
+                    {"action": event.action or "", "symbol": event.symbol, "confidence": event.confidence}
+                )
+    
     def get_stats(self) -> Dict:
         """Get notification statistics"""
         return {
@@ -0,0 +1,300 @@
+# OracleIQTrader - Database Operation Counter
+# Counts and times every database operation issued through the shared `db`
+# handle, attributed to the HTTP request or background-loop iteration that
+# issued it. Per-route and per-loop histograms make N+1 query patterns
+# visible; debug headers and the assert helpers let tests cap them.
+
+import logging
+import os
+import time
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from modules.metrics import metrics
+from modules.storage import Repository
+
+logger = logging.getLogger(__name__)
+
+# Collection methods that are a single awaited round trip
+AWAITED_OPERATIONS = (
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "count_documents", "estimated_document_count", "distinct",
+    "bulk_write", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "create_index", "create_indexes", "drop",
+)
+# Collection methods that return a cursor; the query runs on the first fetch
+CURSOR_OPERATIONS = ("find", "aggregate")
+
+OPERATION_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+DB_OPERATIONS = metrics.counter(
+    "oracle_db_operations_total", "Database operations issued, by collection and operation",
+    ("collection", "operation"))
+DB_OPERATIONS_PER_REQUEST = metrics.histogram(
+    "oracle_db_operations_per_request", "Database operations issued while serving one HTTP request",
+    ("route",), buckets=OPERATION_BUCKETS)
+DB_OPERATIONS_PER_ITERATION = metrics.histogram(
+    "oracle_db_operations_per_loop_iteration", "Database operations issued by one background-loop iteration",
+    ("loop",), buckets=OPERATION_BUCKETS)
+
+
+class QueryStats:
+    """Operations counted in one scope (a request, a loop iteration, a test block)"""
+
+    __slots__ = ("label", "count", "duration", "operations", "parent", "closed")
+
+    def __init__(self, label: Optional[str] = None, parent: Optional["QueryStats"] = None):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.operations: Dict[Tuple[str, str], int] = _Counter()
+        self.parent = parent
+        self.closed = False
+
+    def summary(self) -> dict:
+        return {
+            "label": self.label,
+            "count": self.count,
+            "duration_ms": round(self.duration * 1000, 2),
+            "operations": {f"{c}.{op}": n for (c, op), n in self.operations.most_common()},
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("oracle_query_stats", default=None)
+
+
+def current_queries() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(label: Optional[str] = None):
+    """Count the operations issued inside the block (nested scopes also count towards their parents)"""
+    stats = QueryStats(label, _current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.closed = True
+        _current.reset(token)
+
+
+def detach_queries():
+    """
+    Stop attributing the current task's operations to the scope it was
+    created in. Tasks copy their creator's context, so a task spawned by
+    a request would otherwise count towards that request while it runs.
+    """
+    _current.set(None)
+
+
+def _record(collection: str, operation: str, elapsed: float):
+    DB_OPERATIONS.inc(collection, operation)
+    stats = _current.get()
+    while stats is not None:
+        if not stats.closed:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.operations[(collection, operation)] += 1
+        stats = stats.parent
+
+
+# ============ INSTRUMENTED HANDLES ============
+
+class InstrumentedCursor:
+    """Cursor proxy counting the query once, on its first fetch, and timing every fetch"""
+
+    def __init__(self, cursor, collection: str, operation: str):
+        self._cursor = cursor
+        self._collection = collection
+        self._operation = operation
+        self._counted = False
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+        return chained
+
+    def _fetched(self, elapsed: float):
+        if not self._counted:
+            self._counted = True
+            _record(self._collection, self._operation, elapsed)
+            return
+        stats = _current.get()
+        while stats is not None:
+            if not stats.closed:
+                stats.duration += elapsed
+            stats = stats.parent
+
+    async def to_list(self, length: Optional[int] = None):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.to_list(length)
+        finally:
+            self._fetched(time.perf_counter() - started)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.__anext__()
+        finally:
+            self._fetched(time.perf_counter() - started)
+
+
+class InstrumentedCollection:
+    """Collection proxy recording every operation; anything else passes through"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = getattr(collection, "name", "unknown")
+
+    def __getattr__(self, attr_name):
+        attr = getattr(self._collection, attr_name)
+        if attr_name in AWAITED_OPERATIONS:
+            collection = self.name
+
+            async def operation(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await attr(*args, **kwargs)
+                finally:
+                    _record(collection, attr_name, time.perf_counter() - started)
+        elif attr_name in CURSOR_OPERATIONS:
+            def operation(*args, **kwargs):
+                return InstrumentedCursor(attr(*args, **kwargs), self.name, attr_name)
+        else:
+            return attr
+        # Cache the wrapper on the proxy so later lookups skip __getattr__
+        setattr(self, attr_name, operation)
+        return operation
+
+
+Repository.register(InstrumentedCollection)
+
+
+class InstrumentedDatabase:
+    """Database proxy handing out InstrumentedCollections (one per name, reused)"""
+
+    def __init__(self, db):
+        self._db = db
+        self._collections: Dict[str, InstrumentedCollection] = {}
+
+    @property
+    def wrapped(self):
+        return self._db
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self._db[name])
+        return collection
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._db, name)
+        if isinstance(attr, Repository):
+            return self[name]
+        return attr
+
+    def get_collection(self, name: str, **options) -> InstrumentedCollection:
+        if options:
+            return InstrumentedCollection(self._db.get_collection(name, **options))
+        return self[name]
+
+
+def instrument_database(db) -> InstrumentedDatabase:
+    return db if isinstance(db, InstrumentedDatabase) else InstrumentedDatabase(db)
+
+
+# ============ HTTP ============
+
+class QueryCountMiddleware:
+    """
+    Pure ASGI middleware giving each HTTP request its own operation scope.
+    Records the per-route histogram, logs requests above `warn_threshold`
+    and, when `headers` is set (debug mode), adds X-DB-Queries and
+    X-DB-Time-Ms to the response. Operations a streaming response issues
+    after its headers are sent still count in the histogram.
+    """
+
+    def __init__(self, app, headers: bool = False, warn_threshold: int = 0):
+        self.app = app
+        self.headers = headers
+        self.warn_threshold = warn_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(scope["path"]) as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and self.headers:
+                    message = {**message, "headers": [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.duration * 1000:.2f}".encode()),
+                    ]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None) or scope.get("cache_rule", "unmatched")
+                DB_OPERATIONS_PER_REQUEST.observe(route, value=stats.count)
+                if self.warn_threshold and stats.count > self.warn_threshold:
+                    top = ", ".join(f"{c}.{op} x{n}" for (c, op), n in stats.operations.most_common(3))
+                    logger.warning(f"{scope['method']} {route} issued {stats.count} database operations "
+                                   f"({stats.duration * 1000:.1f} ms): {top}")
+
+
+def query_counter_options_from_env() -> Optional[dict]:
+    """
+    QueryCountMiddleware options, or None when DB_QUERY_TRACKING=0.
+    DB_QUERY_HEADERS=1 adds the debug headers; DB_QUERY_WARN_THRESHOLD
+    (default 50, 0 disables) logs requests issuing more operations.
+    """
+    if os.environ.get("DB_QUERY_TRACKING", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return {
+        "headers": os.environ.get("DB_QUERY_HEADERS", "").lower() in ("1", "true", "yes"),
+        "warn_threshold": int(os.environ.get("DB_QUERY_WARN_THRESHOLD", "50")),
+    }
+
+
+# ============ TEST HELPERS ============
+
+@contextmanager
+def assert_max_queries(limit: int, label: Optional[str] = None):
+    """In-process: fail if the block issues more than `limit` database operations"""
+    with track_queries(label) as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(f"{label or 'block'} issued {stats.count} database operations "
+                             f"(limit {limit}): {stats.summary()['operations']}")
+
+
+def assert_response_queries(response, limit: int):
+    """
+    Against a server running with DB_QUERY_HEADERS=1: fail if the request
+    behind `response` (requests or httpx) issued more than `limit` operations.
+    """
+    header = response.headers.get("X-DB-Queries")
+    if header is None:
+        raise AssertionError("Response has no X-DB-Queries header; run the server with DB_QUERY_HEADERS=1")
+    count = int(header)
+    if count > limit:
+        raise AssertionError(f"{response.request.method} {response.request.url} issued {count} database "
+                             f"operations (limit {limit})")
+    return count
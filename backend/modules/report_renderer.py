@@ -0,0 +1,232 @@
+# OracleIQTrader - PDF Report Renderer
+# Renders trade history PDFs on a bounded worker pool, off the event loop,
+# with an LRU cache of finished reports
+
+import asyncio
+import logging
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPORT_COLUMNS = ["Date", "Action", "Symbol", "Qty", "Price", "Total", "Status"]
+ROWS_PER_TABLE = 40       # one table flowable per page keeps reportlab layout linear
+CHUNK_SIZE = 64 * 1024    # bytes per streamed response chunk
+SPOOL_THRESHOLD = 4 * 1024 * 1024  # rendered PDFs above this spill to disk
+
+
+class ReportQueueFull(Exception):
+    """Raised when the renderer already has the maximum number of reports queued"""
+    pass
+
+
+@dataclass
+class RenderedReport:
+    """A finished PDF, held either in memory (cached) or in a spooled temp file"""
+    data: Optional[bytes] = None
+    spool: Optional[object] = None
+    size: int = 0
+    cached: bool = False
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        if self.data is not None:
+            view = memoryview(self.data)
+            for offset in range(0, self.size, CHUNK_SIZE):
+                yield bytes(view[offset:offset + CHUNK_SIZE])
+            return
+        try:
+            self.spool.seek(0)
+            while True:
+                chunk = self.spool.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.spool.close()
+
+
+def render_trade_report(rows: Sequence[Sequence[str]], total_trades: int, output) -> None:
+    """Build the trade history PDF into a writable binary file (runs in a worker thread)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # Title
+    elements.append(Paragraph("Cognitive Oracle Trading Platform", styles['Title']))
+    elements.append(Paragraph("Trade History Report", styles['Heading2']))
+    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0.5, 0.5)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.Color(0.95, 0.95, 0.95)),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.Color(0.7, 0.7, 0.7)),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
+    ])
+
+    # Page-sized tables: reportlab never has to split one huge table
+    for start in range(0, max(len(rows), 1), ROWS_PER_TABLE):
+        chunk = [list(REPORT_COLUMNS)] + [list(r) for r in rows[start:start + ROWS_PER_TABLE]]
+        table = Table(chunk, colWidths=[80, 50, 50, 40, 70, 80, 60])
+        table.setStyle(table_style)
+        elements.append(table)
+
+    elements.append(Spacer(1, 20))
+    elements.append(Paragraph(f"Total trades: {total_trades}", styles['Normal']))
+
+    doc.build(elements)
+
+
+class PDFReportRenderer:
+    """
+    Bounded, cached PDF rendering.
+
+    - At most `max_workers` reports render concurrently on a thread pool
+    - At most `max_pending` reports may be waiting or rendering; beyond that
+      render() raises ReportQueueFull so the route can answer 503
+    - Identical concurrent requests share one render
+    - Finished reports up to `cache_entry_max_bytes` are kept in an LRU
+      bounded by `cache_max_bytes`
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8,
+                 cache_max_bytes: int = 64 * 1024 * 1024,
+                 cache_entry_max_bytes: int = 8 * 1024 * 1024):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_entry_max_bytes = cache_entry_max_bytes
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self.stats = {"renders": 0, "cache_hits": 0, "rejected": 0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pdf-report")
+        return self._executor
+
+    def get_cached(self, key: Tuple) -> Optional[RenderedReport]:
+        data = self._cache.get(key)
+        if data is None:
+            return None
+        self._cache.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        return RenderedReport(data=data, size=len(data), cached=True)
+
+    async def render(self, key: Tuple, rows: List[Tuple[str, ...]], total_trades: int) -> RenderedReport:
+        """Render a report for `key`, reusing the cache or an identical in-flight render"""
+        cached = self.get_cached(key)
+        if cached:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            await asyncio.shield(inflight)
+            cached = self.get_cached(key)
+            if cached:
+                return cached
+
+        if self._pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise ReportQueueFull(f"{self._pending} reports already queued")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._pending += 1
+        # The slot is held until the render thread is done, even if the request
+        # is cancelled first (a client disconnect cannot stop the thread)
+        work = self.executor.submit(self._render_to_spool, rows, total_trades)
+        work.add_done_callback(lambda _: self._release(loop))
+        try:
+            spool = await asyncio.wrap_future(work)
+        except asyncio.CancelledError:
+            work.add_done_callback(self._discard)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.set_result(None)
+
+        self.stats["renders"] += 1
+        size = spool.tell()
+        if size <= self.cache_entry_max_bytes:
+            spool.seek(0)
+            data = spool.read()
+            spool.close()
+            self._store(key, data)
+            return RenderedReport(data=data, size=size)
+        return RenderedReport(spool=spool, size=size)
+
+    def _release(self, loop: asyncio.AbstractEventLoop):
+        def release():
+            self._pending -= 1
+        if loop.is_closed():
+            self._pending -= 1
+        else:
+            loop.call_soon_threadsafe(release)
+
+    @staticmethod
+    def _discard(work):
+        """Close the spool of a render whose request went away"""
+        if not work.cancelled() and work.exception() is None:
+            work.result().close()
+
+    @staticmethod
+    def _render_to_spool(rows, total_trades):
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)
+        try:
+            render_trade_report(rows, total_trades, spool)
+        except Exception:
+            spool.close()
+            raise
+        return spool
+
+    def _store(self, key: Tuple, data: bytes):
+        if key in self._cache:
+            self._cache_bytes -= len(self._cache.pop(key))
+        self._cache[key] = data
+        self._cache_bytes += len(data)
+        while self._cache_bytes > self.cache_max_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "max_workers": self.max_workers,
+            "cached_reports": len(self._cache),
+            "cache_bytes": self._cache_bytes
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+report_renderer = PDFReportRenderer()
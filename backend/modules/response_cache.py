@@ -0,0 +1,337 @@
+# OracleIQTrader - Response Cache
+# Short-TTL caching of read-heavy GET endpoints as a pure ASGI middleware.
+# Cached bodies carry a strong ETag so pollers get 304 Not Modified, and
+# concurrent misses for the same key are coalesced into one computation.
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from modules.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Responses larger than this are served but never cached
+MAX_CACHED_BODY = 2 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """
+    `pattern` is a route path; `{param}` matches one path segment and a
+    trailing `*` matches any suffix. `vary_user` adds the caller's session
+    to the key, for endpoints whose payload depends on who is asking.
+    """
+    pattern: str
+    ttl: float
+    vary_user: bool = False
+
+
+# Read-heavy endpoints polled by every dashboard; TTLs follow how often the underlying data moves
+DEFAULT_RULES: Tuple[CacheRule, ...] = (
+    CacheRule("/api/market/prices", 2),
+    CacheRule("/api/trades/history", 2, vary_user=True),
+    CacheRule("/api/portfolios/public", 10),
+    CacheRule("/api/playground/leaderboard", 5),
+    CacheRule("/api/competition/global/leaderboard", 10),
+    CacheRule("/api/competition/{competition_id}/leaderboard", 5),
+    CacheRule("/api/tournament/{tournament_id}/leaderboard", 5),
+    CacheRule("/api/predictions/markets", 5),
+    CacheRule("/api/predictions/sports", 5),
+    CacheRule("/api/predictions/politics", 5),
+    CacheRule("/api/predictions/crypto", 5),
+    CacheRule("/api/predictions/trending", 5),
+    CacheRule("/api/predictions/leaderboard", 5),
+    CacheRule("/api/predictions/market/{market_id}", 2),
+    CacheRule("/api/quant/macro/*", 60),
+    CacheRule("/api/quant/institutional/*", 60),
+    CacheRule("/api/copy/traders*", 15),
+    CacheRule("/api/supply-chain/markets", 30),
+    CacheRule("/api/supply-chain/high-impact", 30),
+    CacheRule("/api/supply-chain/suppliers*", 30),
+    CacheRule("/api/supply-chain/ports*", 30),
+    CacheRule("/api/supply-chain/instruments", 30),
+    CacheRule("/api/supply-chain/control-tower", 30),
+    CacheRule("/api/supply-chain/geopolitical-risk", 30),
+)
+
+# Entity-tag suffixes of compressed representations (see modules.compression.encoded_etag)
+ENCODING_SUFFIXES = ('-br"', '-gzip"')
+
+CACHE_REQUESTS = metrics.counter(
+    "oracle_response_cache_requests_total",
+    "Cacheable GETs by rule and result (hit, miss, coalesced, not_modified, uncacheable)",
+    ("rule", "result"))
+
+
+def _compile(pattern: str) -> "re.Pattern":
+    regex = re.escape(pattern.rstrip("*"))
+    regex = re.sub(r"\\\{[^/]+?\\\}", "[^/]+", regex)
+    return re.compile(regex + (".*" if pattern.endswith("*") else "") + "$")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires; the compression middleware
+    # tags encoded representations "<etag>-br" / "<etag>-gzip"
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        for suffix in ENCODING_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+                break
+        if tag == etag:
+            return True
+    return False
+
+
+class CachedResponse:
+    __slots__ = ("status", "headers", "body", "etag", "stored_at", "expires_at", "scope_id")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, ttl: float, scope_id: str):
+        self.status = status
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.headers = [(k, v) for k, v in headers if k.lower() not in (b"etag", b"cache-control")]
+        self.headers.append((b"etag", self.etag.encode()))
+        self.headers.append((b"cache-control", b"no-cache"))
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+        self.scope_id = scope_id
+
+
+class ResponseCache:
+    """
+    LRU store of cached responses bounded by entry count and bytes.
+
+    Entries expire after their rule's TTL. A write (POST/PUT/PATCH/DELETE)
+    drops the user-scoped entries of the session that made it, so a client
+    always reads its own writes; shared entries only expire.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024):
+        self.rules = list(rules)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._exact: Dict[str, CacheRule] = {r.pattern: r for r in self.rules if "{" not in r.pattern and "*" not in r.pattern}
+        self._patterns = [(_compile(r.pattern), r) for r in self.rules if r.pattern not in self._exact]
+        self.entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.inflight: Dict[tuple, asyncio.Future] = {}
+        self._by_scope: Dict[str, Set[tuple]] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    def match(self, path: str) -> Optional[CacheRule]:
+        rule = self._exact.get(path)
+        if rule is None:
+            for regex, candidate in self._patterns:
+                if regex.match(path):
+                    return candidate
+        return rule
+
+    @staticmethod
+    def scope_id(headers: Dict[bytes, bytes]) -> str:
+        """Hash of the caller's session token (cookie or bearer), '' when anonymous"""
+        token = b""
+        cookie = headers.get(b"cookie")
+        if cookie:
+            for part in cookie.split(b";"):
+                name, _, value = part.strip().partition(b"=")
+                if name == b"session_token":
+                    token = value
+                    break
+        if not token:
+            auth = headers.get(b"authorization", b"")
+            if auth.startswith(b"Bearer "):
+                token = auth[7:]
+        return hashlib.blake2b(token, digest_size=8).hexdigest() if token else ""
+
+    @staticmethod
+    def key(rule: CacheRule, path: str, query_string: bytes, scope_id: str) -> tuple:
+        query = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))) if query_string else ""
+        return (path, query, scope_id if rule.vary_user else "")
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: CachedResponse):
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.bytes += len(entry.body)
+        if entry.scope_id:
+            self._by_scope.setdefault(entry.scope_id, set()).add(key)
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key)
+        self.bytes -= len(entry.body)
+        if entry.scope_id:
+            keys = self._by_scope.get(entry.scope_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_scope[entry.scope_id]
+
+    def invalidate_scope(self, scope_id: str):
+        for key in list(self._by_scope.get(scope_id, ())):
+            self._remove(key)
+
+    def invalidate(self, path_prefix: str = "") -> int:
+        """Drop every entry whose path starts with `path_prefix` (all entries by default)"""
+        keys = [k for k in self.entries if k[0].startswith(path_prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def get_status(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "inflight": len(self.inflight),
+            "rules": [{"pattern": r.pattern, "ttl_seconds": r.ttl, "vary_user": r.vary_user} for r in self.rules],
+        }
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI middleware serving matching GETs from a ResponseCache"""
+
+    def __init__(self, app, cache: Optional[ResponseCache] = None):
+        self.app = app
+        self.cache = cache or response_cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cache = self.cache
+        method = scope["method"]
+        if method != "GET":
+            if method not in ("HEAD", "OPTIONS") and cache._by_scope:
+                scope_id = cache.scope_id(dict(scope["headers"]))
+                if scope_id:
+                    cache.invalidate_scope(scope_id)
+            await self.app(scope, receive, send)
+            return
+        rule = cache.match(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Cache hits never reach the router; label their latency by rule instead
+        scope["cache_rule"] = rule.pattern
+        headers = dict(scope["headers"])
+        scope_id = cache.scope_id(headers) if rule.vary_user else ""
+        key = cache.key(rule, scope["path"], scope.get("query_string", b""), scope_id)
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1")
+
+        if b"no-cache" not in headers.get(b"cache-control", b""):
+            entry = cache.get(key)
+            if entry is not None:
+                await self._send_entry(entry, rule, if_none_match, send, "hit")
+                return
+            pending = cache.inflight.get(key)
+            if pending is not None:
+                entry = await asyncio.shield(pending)
+                if entry is not None:
+                    await self._send_entry(entry, rule, if_none_match, send, "coalesced")
+                    return
+                # The leader's response was not cacheable; compute our own
+
+        future = asyncio.get_running_loop().create_future()
+        cache.inflight[key] = future
+        entry = None
+        try:
+            status, response_headers, body, messages = await self._capture(scope, receive)
+            cacheable = (
+                status == 200 and len(body) <= MAX_CACHED_BODY
+                and not any(k.lower() == b"set-cookie" for k, _ in response_headers)
+            )
+            if cacheable:
+                entry = CachedResponse(status, response_headers, body, rule.ttl, scope_id)
+                cache.put(key, entry)
+        finally:
+            if cache.inflight.get(key) is future:
+                del cache.inflight[key]
+            future.set_result(entry)
+
+        if entry is not None:
+            await self._send_entry(entry, rule, if_none_match, send, "miss")
+        else:
+            CACHE_REQUESTS.inc(rule.pattern, "uncacheable")
+            for message in messages:
+                await send(message)
+
+    async def _capture(self, scope, receive):
+        """Run the app, buffering its response"""
+        messages = []
+        status = [500]
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def buffer(message):
+            messages.append(message)
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers.extend(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        return status[0], headers, b"".join(chunks), messages
+
+    @staticmethod
+    async def _send_entry(entry: CachedResponse, rule: CacheRule, if_none_match: str, send, result: str):
+        age = str(int(time.monotonic() - entry.stored_at)).encode()
+        extra = [(b"age", age), (b"x-cache", result.upper().encode())]
+        if if_none_match and _etag_matches(if_none_match, entry.etag):
+            CACHE_REQUESTS.inc(rule.pattern, "not_modified")
+            headers = [(k, v) for k, v in entry.headers if k.lower() in (b"etag", b"cache-control", b"vary")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        CACHE_REQUESTS.inc(rule.pattern, result)
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + extra})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """The shared cache unless RESPONSE_CACHE=0; RESPONSE_CACHE_MAX_ENTRIES/_MAX_MB size it"""
+    if os.environ.get("RESPONSE_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    response_cache.max_entries = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", response_cache.max_entries))
+    response_cache.max_bytes = int(float(os.environ.get("RESPONSE_CACHE_MAX_MB", response_cache.max_bytes / 2**20)) * 2**20)
+    return response_cache
+
+
+# Global instance
+response_cache = ResponseCache()
+
+metrics.gauge(
+    "oracle_response_cache_entries", "Responses currently cached",
+    callback=lambda: {(): len(response_cache.entries)},
+)
+metrics.gauge(
+    "oracle_response_cache_bytes", "Bytes of cached response bodies",
+    callback=lambda: {(): response_cache.bytes},
+)
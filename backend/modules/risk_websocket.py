@@ -1,13 +1,16 @@
 # OracleIQTrader - Risk WebSocket Manager
 # Real-time risk metrics streaming via WebSocket
 
-import asyncio
 import json
+import logging
 from datetime import datetime, timezone
-from typing import Dict, Set
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 
 from modules.risk_analysis import risk_engine
+from modules.event_bus import PriceTick
+
+logger = logging.getLogger(__name__)
 
 
 class RiskWebSocketManager:
@@ -18,7 +21,7 @@ class RiskWebSocketManager:
     
     def __init__(self):
         self.active_connections: Dict[str, Set[WebSocket]] = {}  # user_id -> set of websockets
-        self.broadcast_interval = 10  # seconds between risk updates
+        self.broadcast_interval = 10  # minimum seconds between risk updates
         self._running = False
     
     async def connect(self, websocket: WebSocket, user_id: str):
@@ -50,11 +53,13 @@ class RiskWebSocketManager:
             }
             await websocket.send_json(message)
         except Exception as e:
-            print(f"Error sending risk update: {e}")
+            logger.error(f"Error sending risk update: {e}")
     
-    async def broadcast_risk_updates(self):
-        """Broadcast risk updates to all connected clients"""
-        for user_id, connections in list(self.active_connections.items()):
+    async def broadcast_risk_updates(self, user_ids: Optional[Iterable[str]] = None):
+        """Broadcast risk updates to all connected clients (or only `user_ids`)"""
+        targets = self.active_connections if user_ids is None else set(user_ids)
+        for user_id in list(targets):
+            connections = self.active_connections.get(user_id)
             if not connections:
                 continue
                 
@@ -78,7 +83,7 @@ class RiskWebSocketManager:
                     self.active_connections[user_id].discard(ws)
                     
             except Exception as e:
-                print(f"Error broadcasting to {user_id}: {e}")
+                logger.error(f"Error broadcasting to {user_id}: {e}")
     
     async def send_alert(self, user_id: str, alert_type: str, message: str, data: dict = None):
         """Send a risk alert to a specific user"""
@@ -99,16 +104,21 @@ class RiskWebSocketManager:
             except Exception:
                 self.active_connections[user_id].discard(websocket)
     
-    async def run_broadcast_loop(self):
-        """Background task to periodically broadcast risk updates"""
-        self._running = True
-        while self._running:
-            await asyncio.sleep(self.broadcast_interval)
-            if self.active_connections:
-                await self.broadcast_risk_updates()
+    async def on_events(self, events: List):
+        """
+        Event-bus handler, throttled to one batch per broadcast_interval.
+        Price moves refresh every connected user; trades alone refresh only
+        the users who traded.
+        """
+        if not self._running or not self.active_connections:
+            return
+        if any(isinstance(e, PriceTick) for e in events):
+            await self.broadcast_risk_updates()
+        else:
+            await self.broadcast_risk_updates({e.user_id for e in events if e.user_id})
     
     def stop(self):
-        """Stop the broadcast loop"""
+        """Pause risk broadcasts"""
         self._running = False
     
     def get_stats(self) -> dict:
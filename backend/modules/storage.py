@@ -0,0 +1,1095 @@
+# OracleIQTrader - Storage Backends
+# The collection interface the app relies on, satisfied by Motor for
+# production and by a fast in-memory store for tests, benchmarks and load
+# tests (DB_BACKEND=memory)
+
+import asyncio
+import copy
+import functools
+import logging
+import re
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from bson import ObjectId as _ObjectId
+except ImportError:  # in-memory mode works without pymongo installed
+    _ObjectId = None
+
+try:
+    from pymongo.errors import DuplicateKeyError
+except ImportError:
+    class DuplicateKeyError(Exception):
+        """Unique index violation (mirrors pymongo.errors.DuplicateKeyError)"""
+
+
+# ============ INTERFACE ============
+
+class Repository(ABC):
+    """
+    Async collection interface used by the app (the Motor subset we call).
+
+    Motor's AsyncIOMotorCollection is registered as a virtual subclass, so
+    modules keep taking a plain `db` handle and calling `db.trades.find(...)`
+    whichever backend is configured.
+    """
+
+    @abstractmethod
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None): ...
+
+    @abstractmethod
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None): ...
+
+    @abstractmethod
+    async def insert_one(self, document: dict): ...
+
+    @abstractmethod
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True): ...
+
+    @abstractmethod
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False): ...
+
+    @abstractmethod
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False): ...
+
+    @abstractmethod
+    async def delete_one(self, filter: dict): ...
+
+    @abstractmethod
+    async def delete_many(self, filter: dict): ...
+
+    @abstractmethod
+    async def count_documents(self, filter: dict): ...
+
+    @abstractmethod
+    def aggregate(self, pipeline: List[dict]): ...
+
+    @abstractmethod
+    async def bulk_write(self, requests: List[Any], ordered: bool = True): ...
+
+    @abstractmethod
+    async def create_index(self, keys, **kwargs): ...
+
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+    Repository.register(AsyncIOMotorCollection)
+except ImportError:
+    pass
+
+
+def open_storage(backend: str, mongo_url: Optional[str], db_name: str, memory_latency: float = 0.0,
+                 **client_options) -> Tuple[Any, Any]:
+    """Return (client, db) for DB_BACKEND "mongo" (default) or "memory" """
+    if backend == "memory":
+        client = InMemoryClient(latency=memory_latency)
+        logger.warning("Using the in-memory storage backend; data is lost on restart")
+        return client, client[db_name]
+    if backend != "mongo":
+        raise ValueError(f"Unknown DB_BACKEND {backend!r} (expected 'mongo' or 'memory')")
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(mongo_url, **client_options)
+    return client, client[db_name]
+
+
+# ============ RESULTS ============
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.inserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+        self.upserted_count = 0
+        self.upserted_ids: Dict[int, Any] = {}
+        self.acknowledged = True
+
+
+# ============ QUERY ENGINE ============
+
+_MISSING = object()
+
+
+def _new_id():
+    return _ObjectId() if _ObjectId is not None else uuid.uuid4().hex
+
+
+def _path_values(doc: Any, path: str) -> List[Any]:
+    """All values at a dotted path, fanning out through arrays like MongoDB"""
+    values = [doc]
+    for part in path.split("."):
+        next_values = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    next_values.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    next_values.append(value[int(part)])
+                else:
+                    next_values.extend(v[part] for v in value if isinstance(v, dict) and part in v)
+        values = next_values
+    return values
+
+
+def _get_path(doc: dict, path: str, default=None):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return default
+    return value
+
+
+def _type_rank(value) -> int:
+    # MongoDB's BSON comparison order, for the types the app stores
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, datetime):
+        return 9
+    return 7
+
+
+def _compare(a, b) -> int:
+    ra, rb = _type_rank(a), _type_rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if ra == 1:
+        return 0
+    if ra in (4, 5, 7):
+        a, b = repr(a), repr(b)
+    return (a > b) - (a < b)
+
+
+def _comparable(a, b) -> bool:
+    return a is not None and b is not None and _type_rank(a) == _type_rank(b)
+
+
+def _same(a, b) -> bool:
+    # True == 1 in Python but not in MongoDB
+    return isinstance(a, bool) == isinstance(b, bool) and a == b
+
+
+def _equals(values: List[Any], expected) -> bool:
+    if not values:
+        return expected is None
+    for value in values:
+        if _same(value, expected):
+            return True
+        if isinstance(value, list) and not isinstance(expected, list) and any(_same(v, expected) for v in value):
+            return True
+    return False
+
+
+def _expand(values: List[Any]) -> List[Any]:
+    """Values plus the elements of array values (comparison operators match either)"""
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _regex(pattern, options: str = ""):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    for flag in options:
+        flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(flag, 0)
+    return re.compile(pattern, flags)
+
+
+def _match_operators(values: List[Any], ops: dict) -> bool:
+    for op, arg in ops.items():
+        if op == "$eq":
+            ok = _equals(values, arg)
+        elif op == "$ne":
+            ok = not _equals(values, arg)
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            test = {
+                "$gt": lambda c: c > 0, "$gte": lambda c: c >= 0,
+                "$lt": lambda c: c < 0, "$lte": lambda c: c <= 0,
+            }[op]
+            ok = any(_comparable(v, arg) and test(_compare(v, arg)) for v in _expand(values))
+        elif op == "$in":
+            ok = any(_equals(values, candidate) for candidate in arg)
+        elif op == "$nin":
+            ok = not any(_equals(values, candidate) for candidate in arg)
+        elif op == "$exists":
+            ok = bool(values) == bool(arg)
+        elif op == "$regex":
+            pattern = _regex(arg, ops.get("$options", ""))
+            ok = any(isinstance(v, str) and pattern.search(v) for v in _expand(values))
+        elif op == "$options":
+            continue
+        elif op == "$size":
+            ok = any(isinstance(v, list) and len(v) == arg for v in values)
+        elif op == "$all":
+            ok = all(_equals(values, candidate) for candidate in arg)
+        elif op == "$elemMatch":
+            ok = any(
+                isinstance(v, list) and any(
+                    _match(item, arg) if isinstance(item, dict) else _match_operators([item], arg) for item in v
+                )
+                for v in values
+            )
+        elif op == "$not":
+            ok = not (_match_operators(values, arg) if isinstance(arg, dict) else _match_operators(values, {"$regex": arg}))
+        else:
+            raise NotImplementedError(f"In-memory storage does not support query operator {op}")
+        if not ok:
+            return False
+    return True
+
+
+def _is_operator_dict(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(k.startswith("$") for k in value)
+
+
+def _match(doc: dict, query: Optional[dict]) -> bool:
+    if not query:
+        return True
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_match(doc, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(_match(doc, q) for q in condition):
+                return False
+        elif key == "$nor":
+            if any(_match(doc, q) for q in condition):
+                return False
+        else:
+            values = _path_values(doc, key)
+            if _is_operator_dict(condition):
+                if not _match_operators(values, condition):
+                    return False
+            elif isinstance(condition, re.Pattern):
+                if not _match_operators(values, {"$regex": condition}):
+                    return False
+            elif not _equals(values, condition):
+                return False
+    return True
+
+
+def _sort_key_list(key_or_list, direction=None) -> List[Tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction if direction is not None else 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(k, d) for k, d in key_or_list]
+
+
+def _sort_docs(docs: List[dict], keys: List[Tuple[str, int]]) -> List[dict]:
+    def compare(a, b):
+        for field, direction in keys:
+            result = _compare(_get_path(a, field, _MISSING), _get_path(b, field, _MISSING))
+            if result:
+                return result if direction >= 0 else -result
+        return 0
+    return sorted(docs, key=functools.cmp_to_key(compare))
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return doc
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(v for v in fields.values()):
+        projected: Dict[str, Any] = {}
+        if include_id and "_id" in doc:
+            projected["_id"] = doc["_id"]
+        for path in fields:
+            value = _get_path(doc, path, _MISSING)
+            if value is not _MISSING:
+                _set_path(projected, path, value)
+        return projected
+    projected = dict(doc)
+    if not include_id:
+        projected.pop("_id", None)
+    for path, keep in fields.items():
+        if not keep:
+            _unset_path(projected, path)
+    return projected
+
+
+# ============ UPDATE ENGINE ============
+
+def _set_path(doc: dict, path: str, value):
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        if isinstance(target, list) and part.isdigit():
+            target = target[int(part)]
+            continue
+        if not isinstance(target.get(part), (dict, list)):
+            target[part] = {}
+        target = target[part]
+    if isinstance(target, list) and parts[-1].isdigit():
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+def _unset_path(doc: dict, path: str):
+    parts = path.split(".")
+    target = _get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    for op, fields in update.items():
+        if op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, copy.deepcopy(value))
+            continue
+        for path, arg in fields.items():
+            current = _get_path(doc, path, _MISSING)
+            if op == "$set":
+                _set_path(doc, path, copy.deepcopy(arg))
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                _set_path(doc, path, (0 if current is _MISSING else current) + arg)
+            elif op == "$mul":
+                _set_path(doc, path, (0 if current is _MISSING else current) * arg)
+            elif op == "$min":
+                if current is _MISSING or _compare(arg, current) < 0:
+                    _set_path(doc, path, arg)
+            elif op == "$max":
+                if current is _MISSING or _compare(arg, current) > 0:
+                    _set_path(doc, path, arg)
+            elif op in ("$push", "$addToSet"):
+                items = arg["$each"] if isinstance(arg, dict) and "$each" in arg else [arg]
+                array = [] if current is _MISSING else current
+                if not isinstance(array, list):
+                    raise ValueError(f"{op} on non-array field {path}")
+                for item in copy.deepcopy(items):
+                    if op == "$push" or item not in array:
+                        array.append(item)
+                if op == "$push" and isinstance(arg, dict) and "$slice" in arg:
+                    limit = arg["$slice"]
+                    array[:] = array[limit:] if limit < 0 else array[:limit]
+                _set_path(doc, path, array)
+            elif op == "$pull":
+                if isinstance(current, list):
+                    if isinstance(arg, dict):
+                        keep = [v for v in current if not (
+                            _match_operators([v], arg) if _is_operator_dict(arg) else isinstance(v, dict) and _match(v, arg))]
+                    else:
+                        keep = [v for v in current if v != arg]
+                    _set_path(doc, path, keep)
+            else:
+                raise NotImplementedError(f"In-memory storage does not support update operator {op}")
+
+
+def _upsert_seed(filter: dict) -> dict:
+    """Equality fields of an upsert filter become fields of the inserted document"""
+    seed: Dict[str, Any] = {}
+    for key, condition in (filter or {}).items():
+        if key.startswith("$"):
+            if key == "$and":
+                for part in condition:
+                    seed.update(_upsert_seed(part))
+            continue
+        if _is_operator_dict(condition):
+            if "$eq" in condition:
+                _set_path(seed, key, copy.deepcopy(condition["$eq"]))
+        else:
+            _set_path(seed, key, copy.deepcopy(condition))
+    return seed
+
+
+# ============ AGGREGATION ============
+
+def _eval(expr, doc: dict):
+    if isinstance(expr, str):
+        if expr == "$$ROOT":
+            return doc
+        if expr.startswith("$"):
+            return _get_path(doc, expr[1:])
+        return expr
+    if isinstance(expr, list):
+        return [_eval(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) == 1:
+        op, arg = next(iter(expr.items()))
+        if op.startswith("$"):
+            return _eval_operator(op, arg, doc)
+    return {k: _eval(v, doc) for k, v in expr.items()}
+
+
+def _eval_operator(op: str, arg, doc: dict):
+    if op == "$literal":
+        return arg
+    if op == "$cond":
+        if isinstance(arg, dict):
+            condition, then, otherwise = arg["if"], arg["then"], arg["else"]
+        else:
+            condition, then, otherwise = arg
+        return _eval(then, doc) if _eval(condition, doc) else _eval(otherwise, doc)
+    if op == "$ifNull":
+        for candidate in arg:
+            value = _eval(candidate, doc)
+            if value is not None:
+                return value
+        return None
+
+    args = _eval(arg, doc)
+    if op in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        result = _compare(args[0], args[1])
+        return {"$eq": result == 0, "$ne": result != 0, "$gt": result > 0,
+                "$gte": result >= 0, "$lt": result < 0, "$lte": result <= 0}[op]
+    if op in ("$substrBytes", "$substr", "$substrCP"):
+        value, start, length = args
+        value = "" if value is None else str(value)
+        return value[start:] if length < 0 else value[start:start + length]
+    if op == "$add":
+        return sum(a for a in args if a is not None)
+    if op == "$subtract":
+        return args[0] - args[1]
+    if op == "$multiply":
+        return functools.reduce(lambda a, b: a * b, args, 1)
+    if op == "$divide":
+        return args[0] / args[1]
+    if op == "$abs":
+        return abs(args)
+    if op == "$round":
+        value, places = (args + [0])[:2] if isinstance(args, list) else (args, 0)
+        return round(value, places)
+    if op == "$and":
+        return all(args)
+    if op == "$or":
+        return any(args)
+    if op == "$not":
+        return not (args[0] if isinstance(args, list) else args)
+    if op == "$concat":
+        return None if any(a is None for a in args) else "".join(args)
+    if op == "$toLower":
+        return (args or "").lower()
+    if op == "$toUpper":
+        return (args or "").upper()
+    if op == "$size":
+        return len(args)
+    raise NotImplementedError(f"In-memory storage does not support aggregation operator {op}")
+
+
+def _group(docs: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[str, dict] = {}
+    for doc in docs:
+        key = _eval(spec["_id"], doc)
+        marker = repr(key)
+        group = groups.get(marker)
+        if group is None:
+            group = groups[marker] = {"_id": key, "_acc": {}}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expr), = accumulator.items()
+            value = _eval(expr, doc)
+            state = group["_acc"]
+            if op == "$sum":
+                state[field] = state.get(field, 0) + (value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0)
+            elif op == "$avg":
+                total, count = state.get(field, (0, 0))
+                if isinstance(value, (int, float)):
+                    total, count = total + value, count + 1
+                state[field] = (total, count)
+            elif op in ("$min", "$max"):
+                if value is not None and (field not in state or
+                                          (_compare(value, state[field]) < 0) == (op == "$min")):
+                    state[field] = value
+            elif op == "$first":
+                state.setdefault(field, value)
+            elif op == "$last":
+                state[field] = value
+            elif op == "$push":
+                state.setdefault(field, []).append(value)
+            elif op == "$addToSet":
+                bucket = state.setdefault(field, [])
+                if value not in bucket:
+                    bucket.append(value)
+            elif op == "$count":
+                state[field] = state.get(field, 0) + 1
+            else:
+                raise NotImplementedError(f"In-memory storage does not support accumulator {op}")
+
+    results = []
+    for group in groups.values():
+        row = {"_id": group["_id"]}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            op = next(iter(accumulator))
+            value = group["_acc"].get(field)
+            if op == "$avg":
+                total, count = value or (0, 0)
+                value = total / count if count else None
+            row[field] = value
+        results.append(row)
+    return results
+
+
+def _run_pipeline(docs: List[dict], pipeline: List[dict]) -> List[dict]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if _match(d, spec)]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$sort":
+            docs = _sort_docs(docs, list(spec.items()))
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$project":
+            if all(v in (0, 1, True, False) for v in spec.values()):
+                docs = [_project(d, spec) for d in docs]
+            else:
+                projected = []
+                for d in docs:
+                    row = {"_id": d.get("_id")} if spec.get("_id", 1) else {}
+                    for field, expr in spec.items():
+                        if field == "_id":
+                            continue
+                        row[field] = _get_path(d, field) if expr in (1, True) else _eval(expr, d)
+                    projected.append(row)
+                docs = projected
+        elif name in ("$addFields", "$set"):
+            docs = [{**d, **{field: _eval(expr, d) for field, expr in spec.items()}} for d in docs]
+        elif name == "$unwind":
+            path = spec if isinstance(spec, str) else spec["path"]
+            keep_empty = isinstance(spec, dict) and spec.get("preserveNullAndEmptyArrays", False)
+            field = path[1:]
+            unwound = []
+            for d in docs:
+                value = _get_path(d, field)
+                if isinstance(value, list) and value:
+                    for item in value:
+                        row = copy.deepcopy(d)
+                        _set_path(row, field, item)
+                        unwound.append(row)
+                elif keep_empty:
+                    unwound.append(d)
+                elif value is not None and not isinstance(value, list):
+                    unwound.append(d)
+            docs = unwound
+        elif name == "$count":
+            docs = [{spec: len(docs)}] if docs else []
+        else:
+            raise NotImplementedError(f"In-memory storage does not support pipeline stage {name}")
+    return docs
+
+
+# ============ HASH INDEXES ============
+
+def _index_key(value):
+    """Hashable stand-in for a stored value; keeps True apart from 1 as MongoDB does"""
+    if isinstance(value, bool):
+        return (bool, value)
+    if isinstance(value, (dict, list)):
+        return (type(value), repr(value))
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value), repr(value))
+    return value
+
+
+def _equality_keys(doc: dict, path: str) -> set:
+    """
+    Index keys under which a document can match `{path: value}`: every value
+    at the path and every element of array values, or None when the path is
+    missing (a null query matches missing fields)
+    """
+    values = _path_values(doc, path)
+    if not values:
+        return {None}
+    return {_index_key(v) for v in _expand(values)}
+
+
+def _lookup_values(condition) -> Optional[List[Any]]:
+    """Values an indexed field must equal under a query condition, or None if it is not an equality"""
+    if _is_operator_dict(condition):
+        if "$eq" in condition:
+            candidates = [condition["$eq"]]
+        elif "$in" in condition:
+            candidates = list(condition["$in"])
+        else:
+            return None
+    elif isinstance(condition, (dict, re.Pattern)):
+        return None
+    else:
+        candidates = [condition]
+    # Subdocument/array equality and regexes inside $in still need a scan
+    if any(isinstance(c, (dict, list, re.Pattern)) for c in candidates):
+        return None
+    return candidates
+
+
+# ============ IN-MEMORY BACKEND ============
+
+class InMemoryCursor:
+    """Motor-style cursor: chain sort/skip/limit, then `await to_list(n)` or `async for`"""
+
+    def __init__(self, load):
+        self._load = load
+        self._sort: Optional[List[Tuple[str, int]]] = None
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[dict]] = None
+        self._position = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _sort_key_list(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    async def _materialize(self) -> List[dict]:
+        if self._results is None:
+            self._results = await self._load(self._sort, self._skip, self._limit)
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        results = await self._materialize()
+        end = len(results) if length is None else min(len(results), self._position + length)
+        batch = results[self._position:end]
+        self._position = end
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        results = await self._materialize()
+        if self._position >= len(results):
+            raise StopAsyncIteration
+        self._position += 1
+        return results[self._position - 1]
+
+
+class InMemoryCollection(Repository):
+    """
+    Dict-backed collection with MongoDB query/update/aggregation semantics for
+    the operators the app uses. Documents are copied on the way in and out,
+    each operation is atomic with respect to the event loop, and an optional
+    per-call `latency` simulates a network round trip.
+
+    Every indexed field also gets a hash map from value to document ids, so
+    equality and `$in` filters on it only visit the matching documents, and
+    each unique index keeps a map from key to document id for O(1) checks.
+    """
+
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._docs: Dict[Any, dict] = {}
+        self._order: Dict[Any, int] = {}  # _id -> insertion sequence (the natural order of scans)
+        self._sequence = 0
+        self._unique: Dict[Tuple[str, ...], Dict[Tuple, Any]] = {}  # fields -> key -> _id
+        self._lookup: Dict[str, Dict[Any, set]] = {}  # field -> index key -> {_id}
+        self.indexes: Dict[str, dict] = {}
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    @staticmethod
+    def _unique_key(doc: dict, fields: Tuple[str, ...]) -> Tuple:
+        return tuple(_index_key(_get_path(doc, f)) for f in fields)
+
+    def _check_unique(self, doc: dict, ignore_id=None):
+        for fields, keys in self._unique.items():
+            key = self._unique_key(doc, fields)
+            other_id = keys.get(key, ignore_id)
+            if other_id != ignore_id:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {fields} "
+                                        f"key: {tuple(_get_path(doc, f) for f in fields)}")
+
+    def _index(self, doc: dict):
+        for fields, keys in self._unique.items():
+            keys[self._unique_key(doc, fields)] = doc["_id"]
+        for field, buckets in self._lookup.items():
+            for key in _equality_keys(doc, field):
+                buckets.setdefault(key, set()).add(doc["_id"])
+
+    def _unindex(self, doc: dict):
+        for fields, keys in self._unique.items():
+            key = self._unique_key(doc, fields)
+            if keys.get(key) == doc["_id"]:
+                del keys[key]
+        for field, buckets in self._lookup.items():
+            for key in _equality_keys(doc, field):
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(doc["_id"])
+                    if not bucket:
+                        del buckets[key]
+
+    def _store(self, doc: dict, previous: Optional[dict] = None):
+        """Write a checked document in place of `previous` (same _id), keeping the indexes current"""
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            self._sequence += 1
+            self._order[doc["_id"]] = self._sequence
+        self._docs[doc["_id"]] = doc
+        self._index(doc)
+
+    def _delete(self, doc: dict):
+        self._unindex(doc)
+        del self._docs[doc["_id"]]
+        del self._order[doc["_id"]]
+
+    def _insert(self, document: dict):
+        if "_id" not in document:
+            document["_id"] = _new_id()  # pymongo also sets _id on the caller's dict
+        if document["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} _id: {document['_id']}")
+        stored = copy.deepcopy(document)
+        self._check_unique(stored)
+        self._store(stored)
+        return stored["_id"]
+
+    def _candidates(self, filter: dict) -> Optional[List[dict]]:
+        """Documents that may match, from the smallest usable hash index (None = scan everything)"""
+        best: Optional[set] = None
+        for field, condition in filter.items():
+            buckets = self._lookup.get(field)
+            if buckets is None:
+                continue
+            values = _lookup_values(condition)
+            if values is None:
+                continue
+            ids = set()
+            for value in values:
+                ids |= buckets.get(_index_key(value), set())
+            if best is None or len(ids) < len(best):
+                best = ids
+        if best is None:
+            return None
+        return [self._docs[i] for i in sorted(best, key=self._order.__getitem__)]
+
+    def _matching(self, filter: Optional[dict]) -> Iterable[dict]:
+        if filter and set(filter) == {"_id"} and not isinstance(filter["_id"], dict):
+            doc = self._docs.get(filter["_id"])
+            return [doc] if doc is not None else []
+        candidates = self._candidates(filter) if filter else None
+        if candidates is None:
+            candidates = self._docs.values()
+        return [doc for doc in candidates if _match(doc, filter)]
+
+    # ---- reads ----
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None, *args, **kwargs) -> InMemoryCursor:
+        filter = copy.deepcopy(filter)
+
+        async def load(sort, skip, limit):
+            await self._round_trip()
+            docs = list(self._matching(filter))
+            if sort:
+                docs = _sort_docs(docs, sort)
+            docs = docs[skip:skip + limit] if limit else docs[skip:]
+            return [_project(copy.deepcopy(d), projection) for d in docs]
+
+        cursor = InMemoryCursor(load)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None, *args, **kwargs):
+        results = await self.find(filter, projection, **kwargs).limit(1).to_list(1)
+        return results[0] if results else None
+
+    async def count_documents(self, filter: dict, **kwargs) -> int:
+        await self._round_trip()
+        return len(list(self._matching(filter)))
+
+    async def estimated_document_count(self) -> int:
+        return len(self._docs)
+
+    async def distinct(self, key: str, filter: Optional[dict] = None) -> List[Any]:
+        await self._round_trip()
+        values: List[Any] = []
+        for doc in self._matching(filter):
+            for value in _expand(_path_values(doc, key)):
+                if not isinstance(value, list) and value not in values:
+                    values.append(copy.deepcopy(value))
+        return values
+
+    def aggregate(self, pipeline: List[dict], **kwargs) -> InMemoryCursor:
+        pipeline = copy.deepcopy(pipeline)
+
+        async def load(sort, skip, limit):
+            await self._round_trip()
+            stages = pipeline
+            if stages and "$match" in stages[0]:
+                docs = self._matching(stages[0]["$match"])  # served by the hash indexes when possible
+                stages = stages[1:]
+            else:
+                docs = self._docs.values()
+            return _run_pipeline([copy.deepcopy(d) for d in docs], stages)
+
+        return InMemoryCursor(load)
+
+    # ---- writes ----
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        await self._round_trip()
+        return InsertOneResult(self._insert(document))
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True, **kwargs) -> InsertManyResult:
+        await self._round_trip()
+        ids = []
+        for document in documents:
+            try:
+                ids.append(self._insert(document))
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+        return InsertManyResult(ids)
+
+    def _update(self, filter: dict, update: dict, upsert: bool, many: bool) -> UpdateResult:
+        if not _is_operator_dict(update):
+            raise ValueError("update only works with $ operators")
+        matched = list(self._matching(filter))
+        if not many:
+            matched = matched[:1]
+        modified = 0
+        for doc in matched:
+            updated = copy.deepcopy(doc)
+            _apply_update(updated, update)
+            if updated != doc:
+                self._check_unique(updated, ignore_id=doc["_id"])
+                self._store(updated, previous=doc)
+                modified += 1
+        if matched or not upsert:
+            return UpdateResult(len(matched), modified)
+
+        seed = _upsert_seed(filter)
+        _apply_update(seed, update, inserting=True)
+        return UpdateResult(0, 0, self._insert(seed))
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        await self._round_trip()
+        return self._update(filter, update, upsert, many=False)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        await self._round_trip()
+        return self._update(filter, update, upsert, many=True)
+
+    async def replace_one(self, filter: dict, replacement: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        await self._round_trip()
+        matched = list(self._matching(filter))[:1]
+        if matched:
+            doc_id = matched[0]["_id"]
+            stored = {**copy.deepcopy(replacement), "_id": doc_id}
+            self._check_unique(stored, ignore_id=doc_id)
+            modified = int(stored != matched[0])
+            self._store(stored, previous=matched[0])
+            return UpdateResult(1, modified)
+        if upsert:
+            return UpdateResult(0, 0, self._insert({**_upsert_seed(filter), **copy.deepcopy(replacement)}))
+        return UpdateResult(0, 0)
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[dict] = None,
+                                  upsert: bool = False, return_document: bool = False, **kwargs):
+        await self._round_trip()
+        matched = list(self._matching(filter))[:1]
+        before = copy.deepcopy(matched[0]) if matched else None
+        result = self._update(filter, update, upsert, many=False)
+        # pymongo's ReturnDocument.AFTER is True
+        if return_document:
+            doc_id = matched[0]["_id"] if matched else result.upserted_id
+            after = self._docs.get(doc_id)
+            return _project(copy.deepcopy(after), projection) if after else None
+        return _project(before, projection) if before else None
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        await self._round_trip()
+        for doc in list(self._matching(filter))[:1]:
+            self._delete(doc)
+            return DeleteResult(1)
+        return DeleteResult(0)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        await self._round_trip()
+        matched = list(self._matching(filter))
+        for doc in matched:
+            self._delete(doc)
+        return DeleteResult(len(matched))
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        """Apply pymongo request objects (InsertOne, UpdateOne, UpdateMany, ReplaceOne, DeleteOne, DeleteMany)"""
+        await self._round_trip()
+        result = BulkWriteResult()
+        for index, request in enumerate(requests):
+            kind = type(request).__name__
+            try:
+                if kind == "InsertOne":
+                    self._insert(request._doc)
+                    result.inserted_count += 1
+                elif kind in ("UpdateOne", "UpdateMany"):
+                    outcome = self._update(request._filter, request._doc, request._upsert, many=kind == "UpdateMany")
+                    result.matched_count += outcome.matched_count
+                    result.modified_count += outcome.modified_count
+                    if outcome.upserted_id is not None:
+                        result.upserted_count += 1
+                        result.upserted_ids[index] = outcome.upserted_id
+                elif kind == "ReplaceOne":
+                    outcome = await self.replace_one(request._filter, request._doc, request._upsert)
+                    result.matched_count += outcome.matched_count
+                    result.modified_count += outcome.modified_count
+                elif kind in ("DeleteOne", "DeleteMany"):
+                    matched = list(self._matching(request._filter))
+                    for doc in matched if kind == "DeleteMany" else matched[:1]:
+                        self._delete(doc)
+                        result.deleted_count += 1
+                else:
+                    raise NotImplementedError(f"In-memory storage does not support bulk request {kind}")
+            except DuplicateKeyError:
+                if ordered:
+                    raise
+        return result
+
+    async def create_index(self, keys, unique: bool = False, name: Optional[str] = None, **kwargs) -> str:
+        fields = tuple(k for k, _ in _sort_key_list(keys, 1))
+        name = name or "_".join(f"{k}_{d}" for k, d in _sort_key_list(keys, 1))
+        if unique and fields not in self._unique:
+            index: Dict[Tuple, Any] = {}
+            for doc in self._docs.values():
+                key = self._unique_key(doc, fields)
+                if key in index:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {fields} "
+                                            f"key: {tuple(_get_path(doc, f) for f in fields)}")
+                index[key] = doc["_id"]
+            self._unique[fields] = index
+        for field in fields:
+            if field not in self._lookup:
+                buckets: Dict[Any, set] = {}
+                for doc in self._docs.values():
+                    for key in _equality_keys(doc, field):
+                        buckets.setdefault(key, set()).add(doc["_id"])
+                self._lookup[field] = buckets
+        self.indexes[name] = {"key": list(_sort_key_list(keys, 1)), "unique": unique}
+        return name
+
+    async def drop(self):
+        self._docs.clear()
+        self._order.clear()
+        for keys in self._unique.values():
+            keys.clear()
+        for buckets in self._lookup.values():
+            buckets.clear()
+
+
+class InMemoryDatabase:
+    """Attribute/item access to InMemoryCollection objects, like AsyncIOMotorDatabase"""
+
+    def __init__(self, name: str = "memory", latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InMemoryCollection(name, self.latency)
+        return collection
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name: str, **options) -> InMemoryCollection:
+        """Motor-compatible; read preference and other options don't apply in memory"""
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return sorted(self._collections)
+
+    async def drop_collection(self, name: str):
+        self._collections.pop(name, None)
+
+    async def command(self, command, *args, **kwargs) -> dict:
+        return {"ok": 1.0}
+
+
+class InMemoryClient:
+    """Stand-in for AsyncIOMotorClient: client[db_name] returns a shared InMemoryDatabase"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(name, self.latency)
+        return self._databases[name]
+
+    def get_database(self, name: str) -> InMemoryDatabase:
+        return self[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,379 @@
+# OracleIQTrader - Background Task Supervisor
+# One owner for every background task: fixed-rate periodic jobs, restartable
+# long-running services and bounded groups of spawned tasks, with jittered
+# backoff, introspection and graceful shutdown
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional
+
+from modules.metrics import LOOP_ERRORS, LOOP_ITERATION_DURATION, metrics
+from modules.query_counter import DB_OPERATIONS_PER_ITERATION, detach_queries, track_queries
+
+logger = logging.getLogger(__name__)
+
+# Default concurrency limit per spawn group; tasks beyond the limit wait for a
+# slot, unless spawned with wait=False (long-running loops such as bots, which
+# would never free one), in which case spawn raises GroupFull
+DEFAULT_GROUP_LIMITS = {
+    "bots": 200,
+    "tournament_simulation": 20,
+}
+DEFAULT_GROUP_LIMIT = 100
+
+TASK_RESTARTS = metrics.counter(
+    "oracle_supervised_task_restarts_total", "Supervised service restarts after a crash", ("task",))
+
+
+class GroupFull(Exception):
+    """Raised by spawn(..., wait=False) when the group has no free slot"""
+    pass
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _Supervised:
+    """Shared bookkeeping for periodic jobs and services"""
+
+    kind = "task"
+
+    def __init__(self, name: str, backoff_base: float, backoff_max: float):
+        self.name = name
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.task: Optional[asyncio.Task] = None
+        self.state = "registered"
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_started_at: Optional[float] = None
+        self.last_finished_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.next_run_at: Optional[float] = None
+
+    def _failed(self, e: BaseException):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+        LOOP_ERRORS.inc(self.name)
+        logger.error(f"Supervised {self.kind} {self.name} failed: {self.last_error}")
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "state": self.state,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_started_at": _iso(self.last_started_at),
+            "last_finished_at": _iso(self.last_finished_at),
+            "last_duration_ms": round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            "next_run_at": _iso(self.next_run_at),
+        }
+
+
+class PeriodicJob(_Supervised):
+    """
+    Runs `func()` at a fixed rate: run N is scheduled at start + N * interval,
+    so slow iterations do not accumulate drift. Ticks missed because a run
+    overran are skipped (never run back-to-back to catch up). After a failure
+    the next run is delayed by a jittered backoff if that is later than the
+    next scheduled tick.
+    """
+
+    kind = "periodic"
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[Any]], interval: float,
+                 initial_delay: float = 0.0, backoff_base: float = 1.0, backoff_max: float = 60.0):
+        super().__init__(name, backoff_base, backoff_max)
+        self.func = func
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.skipped_ticks = 0
+        self.last_db_operations: Optional[int] = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        origin = loop.time() + self.initial_delay
+        tick = 0
+        while True:
+            scheduled = origin + tick * self.interval
+            delay = scheduled - loop.time()
+            self.next_run_at = time.time() + max(delay, 0)
+            self.state = "sleeping"
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.state = "running"
+            self.last_started_at = time.time()
+            started = time.perf_counter()
+            with track_queries(self.name) as queries:
+                try:
+                    await self.func()
+                    self.consecutive_failures = 0
+                except Exception as e:
+                    self._failed(e)
+                finally:
+                    self.last_duration = time.perf_counter() - started
+                    self.last_finished_at = time.time()
+                    self.runs += 1
+                    self.last_db_operations = queries.count
+                    LOOP_ITERATION_DURATION.observe(self.name, value=self.last_duration)
+                    DB_OPERATIONS_PER_ITERATION.observe(self.name, value=queries.count)
+
+            # Next tick on the fixed grid, skipping any the run overran
+            next_tick = int((loop.time() - origin) // self.interval) + 1
+            self.skipped_ticks += max(0, next_tick - tick - 1)
+            tick = next_tick
+            if self.consecutive_failures:
+                backoff = jittered_backoff(self.consecutive_failures - 1, self.backoff_base, self.backoff_max)
+                while origin + tick * self.interval < loop.time() + backoff:
+                    tick += 1
+                    self.skipped_ticks += 1
+
+    def status(self) -> dict:
+        return {**super().status(), "interval_seconds": self.interval, "skipped_ticks": self.skipped_ticks,
+                "last_db_operations": self.last_db_operations}
+
+
+class Service(_Supervised):
+    """
+    Long-running coroutine (e.g. a feed simulator) restarted with jittered
+    exponential backoff when it crashes or returns. Backoff resets once a run
+    has stayed up for `stable_after` seconds.
+    """
+
+    kind = "service"
+
+    def __init__(self, name: str, factory: Callable[[], Coroutine], restart: bool = True,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, stable_after: float = 60.0):
+        super().__init__(name, backoff_base, backoff_max)
+        self.factory = factory
+        self.restart = restart
+        self.stable_after = stable_after
+        self.restarts = 0
+
+    async def run(self):
+        while True:
+            self.state = "running"
+            self.last_started_at = time.time()
+            started = time.perf_counter()
+            try:
+                await self.factory()
+                self.last_error = None
+                logger.warning(f"Supervised service {self.name} returned")
+            except Exception as e:
+                self._failed(e)
+            self.runs += 1
+            self.last_duration = time.perf_counter() - started
+            self.last_finished_at = time.time()
+
+            if not self.restart:
+                self.state = "finished"
+                return
+            if self.last_duration >= self.stable_after:
+                self.consecutive_failures = 0
+            backoff = jittered_backoff(self.consecutive_failures, self.backoff_base, self.backoff_max)
+            self.next_run_at = time.time() + backoff
+            self.state = "backoff"
+            await asyncio.sleep(backoff)
+            self.restarts += 1
+            TASK_RESTARTS.inc(self.name)
+
+    def status(self) -> dict:
+        return {**super().status(), "restarts": self.restarts}
+
+
+class TaskGroup:
+    """Spawned one-off tasks sharing a concurrency limit (e.g. one task per bot)"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self.tasks) - self.running
+
+    @property
+    def full(self) -> bool:
+        return len(self.tasks) >= self.limit
+
+    async def _run(self, key: str, coro: Coroutine):
+        detach_queries()
+        try:
+            async with self.semaphore:
+                self.running += 1
+                try:
+                    await coro
+                    self.completed += 1
+                finally:
+                    self.running -= 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            LOOP_ERRORS.inc(f"{self.name}:task")
+            logger.error(f"Task {self.name}/{key} failed: {self.last_error}")
+        finally:
+            coro.close()
+            self.tasks.pop(key, None)
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "last_error": self.last_error,
+            "keys": sorted(self.tasks)[:50],
+        }
+
+
+class TaskSupervisor:
+    """
+    Registry and owner of the app's background tasks.
+
+    Periodic jobs and services are registered at import/startup time and
+    started by start(); registering after start() starts them immediately.
+    Ad-hoc work goes through spawn(group, coro, key) so it is bounded,
+    deduplicated by key and drained on shutdown.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, _Supervised] = {}
+        self.groups: Dict[str, TaskGroup] = {}
+        self._started = False
+        self._stopping = False
+
+    # ---- registration ----
+
+    def periodic(self, name: str, func: Callable[[], Awaitable[Any]], interval: float, **options) -> PeriodicJob:
+        return self._register(PeriodicJob(name, func, interval, **options))
+
+    def service(self, name: str, factory: Callable[[], Coroutine], **options) -> Service:
+        return self._register(Service(name, factory, **options))
+
+    def _register(self, job: _Supervised) -> _Supervised:
+        if job.name in self.jobs:
+            raise ValueError(f"Task {job.name} is already registered")
+        self.jobs[job.name] = job
+        if self._started:
+            self._start_job(job)
+        return job
+
+    def _start_job(self, job: _Supervised):
+        job.task = asyncio.create_task(job.run(), name=job.name)
+
+    def group(self, name: str) -> TaskGroup:
+        if name not in self.groups:
+            self.groups[name] = TaskGroup(name, DEFAULT_GROUP_LIMITS.get(name, DEFAULT_GROUP_LIMIT))
+        return self.groups[name]
+
+    def has_slot(self, group: str, key: Optional[str] = None) -> bool:
+        """Whether spawn(group, ..., key, wait=False) would start now (True if `key` is already running)"""
+        task_group = self.group(group)
+        existing = task_group.tasks.get(key) if key else None
+        return (existing is not None and not existing.done()) or not task_group.full
+
+    def spawn(self, group: str, coro: Coroutine, key: Optional[str] = None, wait: bool = True) -> Optional[asyncio.Task]:
+        """
+        Run `coro` in `group`, waiting for a slot if the group is at its limit
+        (or raising GroupFull with wait=False). Returns the existing task (and
+        discards `coro`) if `key` is already running, or None while shutting
+        down.
+        """
+        task_group = self.group(group)
+        if self._stopping:
+            coro.close()
+            return None
+        key = key or f"{group}-{id(coro):x}"
+        existing = task_group.tasks.get(key)
+        if existing is not None and not existing.done():
+            coro.close()
+            return existing
+        if not wait and task_group.full:
+            coro.close()
+            raise GroupFull(f"Task group {group} is at its limit of {task_group.limit}")
+        task = asyncio.create_task(task_group._run(key, coro), name=f"{group}:{key}")
+        task_group.tasks[key] = task
+        return task
+
+    def cancel(self, group: str, key: str) -> bool:
+        task_group = self.groups.get(group)
+        task = task_group.tasks.get(key) if task_group else None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    # ---- lifecycle ----
+
+    def start(self):
+        """Start every registered periodic job and service (call from inside the loop)"""
+        if self._started:
+            return
+        self._started = True
+        for job in self.jobs.values():
+            self._start_job(job)
+        logger.info(f"Task supervisor started {len(self.jobs)} background tasks")
+
+    async def shutdown(self, timeout: float = 10.0):
+        """
+        Cancel periodic jobs and services, then let spawned tasks drain for up
+        to `timeout` seconds before cancelling whatever is still running.
+        """
+        self._stopping = True
+        loops = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in loops:
+            task.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+        for job in self.jobs.values():
+            job.state = "stopped"
+
+        spawned = [t for g in self.groups.values() for t in g.tasks.values() if not t.done()]
+        if spawned:
+            logger.info(f"Draining {len(spawned)} spawned tasks (timeout {timeout}s)")
+            _, pending = await asyncio.wait(spawned, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if pending:
+                logger.warning(f"Cancelled {len(pending)} tasks still running after shutdown drain")
+
+    def get_status(self) -> dict:
+        return {
+            "started": self._started,
+            "stopping": self._stopping,
+            "tasks": [job.status() for job in self.jobs.values()],
+            "groups": [group.status() for group in self.groups.values()],
+        }
+
+
+# Global instance
+task_supervisor = TaskSupervisor()
@@ -0,0 +1,582 @@
+# OracleIQTrader - Tick Store & Market Replay
+# Compact memory-mapped tick files (one per symbol per UTC day), a recorder
+# fed by the price streamer, and a deterministic replay that stands in for
+# the live and simulated price feeds at 1x-1000x speed
+
+import asyncio
+import bisect
+import logging
+import mmap
+import os
+import random
+import re
+import struct
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ============ FILE FORMAT ============
+#
+# <root>/<YYYY-MM-DD>/<SYMBOL>.ticks
+#
+#   header  magic(8s) version(u32) record_size(u32) count(u64)     24 bytes
+#   record  ts_ns(i64) price(f64) volume(f64)                      24 bytes
+#
+# The header is the same size as a record, so the whole file can be viewed as
+# a flat int64/float64 array: record i's timestamp is int64 word 3*(i+1), its
+# price float64 word 3*(i+1)+1 and its volume 3*(i+1)+2. Writers preallocate
+# and grow the file geometrically; `count` is updated on every append, so a
+# crashed writer leaves a readable file with a zero-filled tail.
+
+MAGIC = b"OIQTICK\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+RECORD = struct.Struct("<qdd")
+RECORD_SIZE = RECORD.size
+WORDS_PER_RECORD = RECORD_SIZE // 8
+
+TICK_FILE_SUFFIX = ".ticks"
+INITIAL_CAPACITY = 4096
+MAX_REPLAY_SPEED = 1000.0
+NS_PER_SECOND = 1_000_000_000
+
+# numpy dtype matching RECORD, for zero-copy vectorized access
+TICK_DTYPE_SPEC = [("ts", "<i8"), ("price", "<f8"), ("volume", "<f8")]
+
+_SYMBOL_RE = re.compile(r"[^A-Z0-9._-]")
+
+
+def _symbol_filename(symbol: str) -> str:
+    return _SYMBOL_RE.sub("_", symbol.upper()) + TICK_FILE_SUFFIX
+
+
+def _day_of(ts_ns: int) -> str:
+    return datetime.fromtimestamp(ts_ns / NS_PER_SECOND, timezone.utc).date().isoformat()
+
+
+def _day_bounds(day: str) -> Tuple[int, int]:
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time(), timezone.utc)
+    start_ns = int(start.timestamp()) * NS_PER_SECOND
+    return start_ns, start_ns + 86400 * NS_PER_SECOND
+
+
+def now_ns() -> int:
+    return time.time_ns()
+
+
+class TickFileWriter:
+    """Appends ticks to one memory-mapped file, growing it as needed"""
+
+    def __init__(self, path: Path, initial_capacity: int = INITIAL_CAPACITY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        exists = self.path.exists() and self.path.stat().st_size >= HEADER.size
+        self._file = open(self.path, "r+b" if exists else "w+b")
+        if exists:
+            header = HEADER.unpack(self._file.read(HEADER.size))
+            _check_header(header, self.path)
+            self.count = header[3]
+        else:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0))
+            self.count = 0
+        self.capacity = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._map(max(initial_capacity, self.count))
+        self.last_ts = RECORD.unpack_from(self._mm, HEADER.size + (self.count - 1) * RECORD_SIZE)[0] \
+            if self.count else 0
+
+    def _map(self, capacity: int):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+        self._file.truncate(HEADER.size + capacity * RECORD_SIZE)
+        self._mm = mmap.mmap(self._file.fileno(), HEADER.size + capacity * RECORD_SIZE)
+        self.capacity = capacity
+
+    def append(self, ts_ns: int, price: float, volume: float = 0.0):
+        """Append one tick; timestamps are clamped so a file never goes backwards in time"""
+        if self.count == self.capacity:
+            self._map(self.capacity * 2)
+        if ts_ns < self.last_ts:
+            ts_ns = self.last_ts
+        RECORD.pack_into(self._mm, HEADER.size + self.count * RECORD_SIZE, ts_ns, price, volume)
+        self.count += 1
+        self.last_ts = ts_ns
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD_SIZE, self.count)
+
+    def extend(self, ticks: Iterable[Tuple[int, float, float]]):
+        """Bulk append (header written once at the end)"""
+        mm, pack_into, last_ts = self._mm, RECORD.pack_into, self.last_ts
+        offset = HEADER.size + self.count * RECORD_SIZE
+        end = HEADER.size + self.capacity * RECORD_SIZE
+        for ts_ns, price, volume in ticks:
+            if offset == end:
+                self.count = (offset - HEADER.size) // RECORD_SIZE
+                self._map(self.capacity * 2)
+                mm, end = self._mm, HEADER.size + self.capacity * RECORD_SIZE
+            if ts_ns < last_ts:
+                ts_ns = last_ts
+            pack_into(mm, offset, ts_ns, price, volume)
+            offset += RECORD_SIZE
+            last_ts = ts_ns
+        self.count = (offset - HEADER.size) // RECORD_SIZE
+        self.last_ts = last_ts
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD_SIZE, self.count)
+
+    def flush(self):
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        """Flush and trim the preallocated tail"""
+        if self._mm is None:
+            return
+        self._mm.flush()
+        self._mm.close()
+        self._mm = None
+        self._file.truncate(HEADER.size + self.count * RECORD_SIZE)
+        self._file.close()
+
+
+def _check_header(header: tuple, path: Path):
+    magic, version, record_size, _ = header
+    if magic != MAGIC or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} is not a tick file")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported tick file version {version}")
+
+
+class TickFile:
+    """
+    Read-only memory-mapped view of a tick file. `timestamps`, `prices` and
+    `volumes` are strided memoryviews over the mapping (no copies), so
+    bisecting or slicing a day of ticks never materializes Python objects
+    for the ticks that are skipped.
+    """
+
+    def __init__(self, path: Path, symbol: Optional[str] = None):
+        self.path = Path(path)
+        self.symbol = symbol or self.path.stem
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mm, 0)
+        _check_header(header, self.path)
+        self.count = min(header[3], (len(self._mm) - HEADER.size) // RECORD_SIZE)
+        self._words_q = memoryview(self._mm).cast("q")
+        self._words_d = memoryview(self._mm).cast("d")
+        start = WORDS_PER_RECORD
+        stop = WORDS_PER_RECORD * (self.count + 1)
+        self.timestamps = self._words_q[start:stop:WORDS_PER_RECORD]
+        self.prices = self._words_d[start + 1:stop:WORDS_PER_RECORD]
+        self.volumes = self._words_d[start + 2:stop:WORDS_PER_RECORD]
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        return self.timestamps[0] if self.count else None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return self.timestamps[self.count - 1] if self.count else None
+
+    def bisect_right(self, ts_ns: int, lo: int = 0) -> int:
+        """Index of the first tick strictly after `ts_ns`"""
+        return bisect.bisect_right(self.timestamps, ts_ns, lo, self.count)
+
+    def record(self, i: int) -> Tuple[int, float, float]:
+        return RECORD.unpack_from(self._mm, HEADER.size + i * RECORD_SIZE)
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, float, float]]:
+        stop = self.count if stop is None else stop
+        return RECORD.iter_unpack(self._mm[HEADER.size + start * RECORD_SIZE:HEADER.size + stop * RECORD_SIZE])
+
+    def to_numpy(self, start: int = 0, stop: Optional[int] = None):
+        """Structured array (ts, price, volume) sharing memory with the mapping"""
+        import numpy as np
+        stop = self.count if stop is None else stop
+        return np.frombuffer(self._mm, dtype=np.dtype(TICK_DTYPE_SPEC), count=stop - start,
+                             offset=HEADER.size + start * RECORD_SIZE)
+
+    def close(self):
+        for view in (self.timestamps, self.prices, self.volumes, self._words_q, self._words_d):
+            view.release()
+        self._mm.close()
+
+
+# ============ STORE & RECORDER ============
+
+class TickStore:
+    """Directory of tick files partitioned by UTC day and symbol"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, symbol: str, day: str) -> Path:
+        return self.root / day / _symbol_filename(symbol)
+
+    def days(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir() and re.fullmatch(r"\d{4}-\d{2}-\d{2}", p.name))
+
+    def symbols(self, day: Optional[str] = None) -> List[str]:
+        days = [day] if day else self.days()
+        found = set()
+        for d in days:
+            found.update(p.stem for p in (self.root / d).glob(f"*{TICK_FILE_SUFFIX}"))
+        return sorted(found)
+
+    def open(self, symbol: str, day: str) -> TickFile:
+        return TickFile(self.path_for(symbol, day), symbol)
+
+    def writer(self, symbol: str, day: str) -> TickFileWriter:
+        return TickFileWriter(self.path_for(symbol, day))
+
+    def info(self) -> List[dict]:
+        rows = []
+        for day in self.days():
+            for symbol in self.symbols(day):
+                tick_file = self.open(symbol, day)
+                try:
+                    rows.append({
+                        "day": day,
+                        "symbol": symbol,
+                        "ticks": len(tick_file),
+                        "bytes": tick_file.path.stat().st_size,
+                        "first": datetime.fromtimestamp(tick_file.first_ts / NS_PER_SECOND, timezone.utc).isoformat()
+                        if tick_file.count else None,
+                        "last": datetime.fromtimestamp(tick_file.last_ts / NS_PER_SECOND, timezone.utc).isoformat()
+                        if tick_file.count else None,
+                    })
+                finally:
+                    tick_file.close()
+        return rows
+
+
+class TickRecorder:
+    """Appends price snapshots to per-symbol, per-day files, rolling over at UTC midnight"""
+
+    def __init__(self, store: TickStore):
+        self.store = store
+        self.day: Optional[str] = None
+        self._day_end_ns = 0
+        self._writers: Dict[str, TickFileWriter] = {}
+        self.ticks_recorded = 0
+
+    def record(self, prices: Dict[str, Tuple[float, float]], ts_ns: Optional[int] = None):
+        """Record {symbol: (price, volume)} at `ts_ns` (default now)"""
+        ts_ns = ts_ns or now_ns()
+        if ts_ns >= self._day_end_ns or self.day is None:
+            self._roll(ts_ns)
+        for symbol, (price, volume) in prices.items():
+            writer = self._writers.get(symbol)
+            if writer is None:
+                writer = self._writers[symbol] = self.store.writer(symbol, self.day)
+            writer.append(ts_ns, price, volume or 0.0)
+        self.ticks_recorded += len(prices)
+
+    def _roll(self, ts_ns: int):
+        self.close()
+        self.day = _day_of(ts_ns)
+        self._day_end_ns = _day_bounds(self.day)[1]
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def get_status(self) -> dict:
+        return {
+            "root": str(self.store.root),
+            "day": self.day,
+            "symbols": sorted(self._writers),
+            "ticks_recorded": self.ticks_recorded,
+        }
+
+
+def write_synthetic_ticks(store: TickStore, symbol: str, day: str, count: int, base_price: float,
+                          volatility: float = 0.0002, interval_ms: float = 100.0, seed: int = 0) -> Path:
+    """
+    Write a deterministic random-walk tick file (same seed -> same bytes),
+    spaced `interval_ms` apart from the start of `day`
+    """
+    rng = random.Random(f"{seed}:{symbol}:{day}")
+    start_ns, _ = _day_bounds(day)
+    step_ns = int(interval_ms * 1_000_000)
+
+    def ticks():
+        price = base_price
+        for i in range(count):
+            price *= 1 + rng.gauss(0, volatility)
+            yield start_ns + i * step_ns, round(price, 6), round(rng.expovariate(1.0) * 10, 4)
+
+    path = store.path_for(symbol, day)
+    if path.exists():
+        path.unlink()
+    writer = TickFileWriter(path, initial_capacity=max(count, 1))
+    try:
+        writer.extend(ticks())
+    finally:
+        writer.close()
+    return path
+
+
+# ============ REPLAY ============
+
+class TickBatch:
+    """Contiguous run of one symbol's ticks delivered by a replay step"""
+
+    __slots__ = ("symbol", "file", "start", "stop")
+
+    def __init__(self, symbol: str, tick_file: TickFile, start: int, stop: int):
+        self.symbol = symbol
+        self.file = tick_file
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def last_price(self) -> float:
+        return self.file.prices[self.stop - 1]
+
+    def prices(self) -> List[float]:
+        return self.file.prices[self.start:self.stop].tolist()
+
+    def records(self) -> Iterator[Tuple[int, float, float]]:
+        return self.file.iter_records(self.start, self.stop)
+
+    def to_numpy(self):
+        return self.file.to_numpy(self.start, self.stop)
+
+
+class _SymbolCursor:
+    """Position within one symbol's day files"""
+
+    def __init__(self, symbol: str, files: List[TickFile]):
+        self.symbol = symbol
+        self.files = files
+        self.segment = 0
+        self.index = 0
+        self.open_price: Optional[float] = files[0].prices[0] if files else None
+        self.last: Optional[Tuple[int, float, float]] = None
+
+    def advance_to(self, ts_ns: int, out: List[TickBatch]) -> int:
+        consumed = 0
+        while self.segment < len(self.files):
+            tick_file = self.files[self.segment]
+            stop = tick_file.bisect_right(ts_ns, self.index)
+            if stop > self.index:
+                out.append(TickBatch(self.symbol, tick_file, self.index, stop))
+                consumed += stop - self.index
+                self.index = stop
+                self.last = (tick_file.timestamps[stop - 1], tick_file.prices[stop - 1], tick_file.volumes[stop - 1])
+            if stop < tick_file.count:
+                break
+            self.segment += 1
+            self.index = 0
+        return consumed
+
+    def history(self, count: int) -> List[float]:
+        """Up to `count` prices ending at the cursor, oldest first"""
+        chunks: List[List[float]] = []
+        needed = count
+        segment = min(self.segment, len(self.files) - 1)
+        stop = self.index if segment == self.segment else self.files[segment].count
+        while needed > 0 and segment >= 0:
+            start = max(0, stop - needed)
+            chunks.append(self.files[segment].prices[start:stop].tolist())
+            needed -= stop - start
+            segment -= 1
+            if segment >= 0:
+                stop = self.files[segment].count
+        return [p for chunk in reversed(chunks) for p in chunk]
+
+    def rewind(self):
+        self.segment = 0
+        self.index = 0
+        self.last = None
+
+
+class MarketReplay:
+    """
+    Replays recorded (or synthetic) tick files on a virtual clock.
+
+    Each step advances the clock to origin + elapsed_wall * speed and hands
+    subscribers the ticks passed since the previous step as TickBatch slices
+    of the mapped files. The tick sequence is fixed by the files, so two runs
+    over the same files see identical prices; step()/advance_to() drive the
+    clock manually for fully deterministic (wall-clock independent) runs.
+    """
+
+    def __init__(self, store: TickStore, days: Optional[List[str]] = None, symbols: Optional[List[str]] = None,
+                 speed: float = 1.0, loop: bool = False, step_interval: float = 0.05):
+        if not 0 < speed <= MAX_REPLAY_SPEED:
+            raise ValueError(f"Replay speed must be in (0, {MAX_REPLAY_SPEED:g}]")
+        self.store = store
+        self.days = days or store.days()
+        self.speed = speed
+        self.loop = loop
+        self.step_interval = step_interval
+        self.cursors: Dict[str, _SymbolCursor] = {}
+        for symbol in symbols or store.symbols():
+            files = [store.open(symbol, day) for day in self.days if store.path_for(symbol, day).exists()]
+            files = [f for f in files if f.count]
+            if files:
+                self.cursors[symbol.upper()] = _SymbolCursor(symbol.upper(), files)
+        if not self.cursors:
+            raise ValueError(f"No tick files found under {store.root}")
+        self.start_ts = min(c.files[0].first_ts for c in self.cursors.values())
+        self.end_ts = max(c.files[-1].last_ts for c in self.cursors.values())
+        self.position = self.start_ts - 1
+        self.ticks_replayed = 0
+        self.passes = 0
+        self.state = "ready"
+        self._subscribers: List[Callable[[List[TickBatch]], Any]] = []
+
+    # ---- clock ----
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= self.end_ts
+
+    def advance_to(self, ts_ns: int) -> List[TickBatch]:
+        """Move the clock to `ts_ns` and return the ticks passed, per symbol"""
+        batches: List[TickBatch] = []
+        if ts_ns <= self.position:
+            return batches
+        for cursor in self.cursors.values():
+            self.ticks_replayed += cursor.advance_to(ts_ns, batches)
+        self.position = ts_ns
+        return batches
+
+    def step(self, seconds: float) -> List[TickBatch]:
+        """Advance the clock by `seconds` of market time"""
+        return self.advance_to(self.position + int(seconds * NS_PER_SECOND))
+
+    def rewind(self):
+        for cursor in self.cursors.values():
+            cursor.rewind()
+        self.position = self.start_ts - 1
+
+    # ---- consumers ----
+
+    def subscribe(self, callback: Callable[[List[TickBatch]], Any]):
+        """Register a (sync or async) callback receiving each step's batches"""
+        self._subscribers.append(callback)
+
+    def latest_price(self, symbol: str) -> Optional[float]:
+        cursor = self.cursors.get(symbol.upper())
+        return cursor.last[1] if cursor and cursor.last else None
+
+    def history(self, symbol: str, count: int) -> Optional[List[float]]:
+        cursor = self.cursors.get(symbol.upper())
+        if cursor is None or cursor.last is None:
+            return None
+        return cursor.history(count)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Latest tick per symbol plus the replay's opening price"""
+        return {
+            symbol: {"ts": cursor.last[0], "price": cursor.last[1], "volume": cursor.last[2],
+                     "open": cursor.open_price}
+            for symbol, cursor in self.cursors.items() if cursor.last
+        }
+
+    async def run(self):
+        """Drive the clock from wall time until the files are exhausted (or forever with loop=True)"""
+        loop = asyncio.get_running_loop()
+        self.state = "running"
+        wall_origin, clock_origin = loop.time(), self.position
+        while True:
+            target = clock_origin + int((loop.time() - wall_origin) * self.speed * NS_PER_SECOND)
+            batches = self.advance_to(min(target, self.end_ts))
+            if batches:
+                for callback in self._subscribers:
+                    result = callback(batches)
+                    if asyncio.iscoroutine(result):
+                        await result
+            if self.finished:
+                self.passes += 1
+                if not self.loop:
+                    self.state = "finished"
+                    logger.info(f"Market replay finished after {self.ticks_replayed} ticks")
+                    return
+                self.rewind()
+                wall_origin, clock_origin = loop.time(), self.position
+            await asyncio.sleep(self.step_interval)
+
+    def close(self):
+        for cursor in self.cursors.values():
+            for tick_file in cursor.files:
+                tick_file.close()
+
+    def get_status(self) -> dict:
+        span = self.end_ts - self.start_ts
+        return {
+            "state": self.state,
+            "root": str(self.store.root),
+            "days": self.days,
+            "symbols": sorted(self.cursors),
+            "speed": self.speed,
+            "loop": self.loop,
+            "passes": self.passes,
+            "ticks_replayed": self.ticks_replayed,
+            "position": datetime.fromtimestamp(max(self.position, self.start_ts) / NS_PER_SECOND, timezone.utc).isoformat(),
+            "progress": round(min(1.0, (self.position - self.start_ts) / span), 4) if span > 0 else 1.0,
+        }
+
+
+# ============ ACTIVE FEED ============
+# Modules with simulated price sources ask here first, so a running replay
+# replaces random prices everywhere without threading it through constructors.
+
+_active_replay: Optional[MarketReplay] = None
+
+
+def set_active_replay(replay: Optional[MarketReplay]):
+    global _active_replay
+    _active_replay = replay
+
+
+def get_active_replay() -> Optional[MarketReplay]:
+    return _active_replay
+
+
+def replay_price(symbol: str) -> Optional[float]:
+    """Current replayed price for `symbol`, or None when no replay is active"""
+    return _active_replay.latest_price(symbol) if _active_replay else None
+
+
+def replay_history(symbol: str, count: int) -> Optional[List[float]]:
+    """Last `count` replayed prices for `symbol`, or None when unavailable"""
+    return _active_replay.history(symbol, count) if _active_replay else None
+
+
+def replay_from_env() -> Optional[MarketReplay]:
+    """
+    Build the replay configured by MARKET_REPLAY_DIR (plus optional
+    MARKET_REPLAY_SPEED, MARKET_REPLAY_DAYS=comma list, MARKET_REPLAY_LOOP=1)
+    """
+    root = os.environ.get("MARKET_REPLAY_DIR", "").strip()
+    if not root:
+        return None
+    days = [d.strip() for d in os.environ.get("MARKET_REPLAY_DAYS", "").split(",") if d.strip()] or None
+    return MarketReplay(
+        TickStore(root),
+        days=days,
+        speed=float(os.environ.get("MARKET_REPLAY_SPEED", "1")),
+        loop=os.environ.get("MARKET_REPLAY_LOOP", "").lower() in ("1", "true", "yes"),
+    )
+
+
+def recorder_from_env() -> Optional[TickRecorder]:
+    """Tick recorder writing under TICK_RECORD_DIR, if set"""
+    root = os.environ.get("TICK_RECORD_DIR", "").strip()
+    return TickRecorder(TickStore(root)) if root else None
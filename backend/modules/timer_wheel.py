@@ -0,0 +1,205 @@
+# OracleIQTrader - Hierarchical Timer Wheel
+# One scheduler owning many short deadlines (algo child slices): timers sit
+# in hashed slots of cascading wheels, one runner task advances the wheel a
+# tick at a time and hands every timer due in that tick to a single callback.
+# Scheduling and cancelling are O(1); there is no task or asyncio timer per
+# deadline.
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TIMER_BATCH_SIZE = metrics.histogram(
+    "oracle_timer_wheel_batch_size", "Timers fired together in one wheel tick", ("wheel",),
+    buckets=(1, 10, 100, 1000, 10_000, 100_000))
+
+
+class TimerHandle:
+    """A scheduled deadline; pass it to cancel()"""
+
+    __slots__ = ("deadline", "payload", "bucket")
+
+    def __init__(self, deadline: int, payload: Any):
+        self.deadline = deadline  # absolute tick
+        self.payload = payload
+        self.bucket: Optional[Dict["TimerHandle", None]] = None
+
+    @property
+    def active(self) -> bool:
+        return self.bucket is not None
+
+
+class HierarchicalTimerWheel:
+    """
+    `levels` wheels of `slots` slots each (slots a power of two). Level L
+    slots span slots**L ticks; a timer goes into the lowest level whose
+    range covers its distance and moves down a level each time the wheel
+    below completes a revolution (cascading), so every timer is touched
+    at most `levels` times. Slots are insertion-ordered dicts used as
+    sets: timers due in the same tick fire in scheduling order and
+    cancel is a dict delete.
+    """
+
+    def __init__(self, slots: int = 256, levels: int = 4):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.slots = slots
+        self.levels = levels
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.horizon = slots ** levels - 1
+        self.wheels: List[List[Dict[TimerHandle, None]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.current = 0  # last tick advanced past
+        self.count = 0
+
+    def _place(self, handle: TimerHandle):
+        # Timers beyond the horizon park in the top wheel and are re-placed when it cascades
+        deadline = min(handle.deadline, self.current + self.horizon)
+        distance = deadline - self.current
+        level = 0
+        while distance >= 1 << (self.bits * (level + 1)):
+            level += 1
+        bucket = self.wheels[level][(deadline >> (self.bits * level)) & self.mask]
+        bucket[handle] = None
+        handle.bucket = bucket
+
+    def schedule(self, deadline: int, payload: Any) -> TimerHandle:
+        """Fire `payload` at absolute tick `deadline` (at the next tick if that has passed)"""
+        handle = TimerHandle(max(deadline, self.current + 1), payload)
+        self._place(handle)
+        self.count += 1
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        bucket = handle.bucket
+        if bucket is None:
+            return False
+        del bucket[handle]
+        handle.bucket = None
+        self.count -= 1
+        return True
+
+    def advance(self, tick: int) -> List[TimerHandle]:
+        """Move the wheel up to `tick` and return the timers that fell due, in deadline order"""
+        due: List[TimerHandle] = []
+        if not self.count:
+            self.current = max(self.current, tick)
+            return due
+        while self.current < tick and self.count:
+            self.current += 1
+            now = self.current
+            # Cascade from the highest wheel that completed a revolution down to level 1
+            level = 0
+            while level + 1 < self.levels and not now & ((1 << (self.bits * (level + 1))) - 1):
+                level += 1
+            for upper in range(level, 0, -1):
+                bucket = self.wheels[upper][(now >> (self.bits * upper)) & self.mask]
+                if bucket:
+                    moved = list(bucket)
+                    bucket.clear()
+                    for handle in moved:
+                        self._place(handle)
+            bucket = self.wheels[0][now & self.mask]
+            if bucket:
+                fired = list(bucket)
+                bucket.clear()
+                for handle in fired:
+                    handle.bucket = None
+                self.count -= len(fired)
+                due.extend(fired)
+        self.current = max(self.current, tick)
+        return due
+
+
+class TimerScheduler:
+    """
+    A HierarchicalTimerWheel driven by one runner coroutine (run it as a
+    supervised service). Delays are rounded up to whole ticks, and each
+    tick's due payloads go to `handler(payloads)` in synchronous calls of
+    at most `max_batch`, yielding to the loop between them so a tick with
+    100k due timers does not stall request handling. The runner sleeps on
+    an event while no timers are pending.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], None], tick: float = 0.01,
+                 slots: int = 256, levels: int = 4, max_batch: int = 5000):
+        self.name = name
+        self.handler = handler
+        self.tick = tick
+        self.max_batch = max_batch
+        self.wheel = HierarchicalTimerWheel(slots, levels)
+        self.origin = time.monotonic()
+        self._wakeup = asyncio.Event()
+        self.dispatching = 0  # fired this tick but not yet handed to the handler
+        self.fired = 0
+        self.batches = 0
+        self.late_ticks = 0
+        self.errors = 0
+
+    def _now_tick(self) -> int:
+        return int((time.monotonic() - self.origin) / self.tick)
+
+    def schedule(self, delay: float, payload: Any) -> TimerHandle:
+        """Fire `payload` after at least `delay` seconds"""
+        ticks = -int(-delay // self.tick)  # ceil
+        now = self._now_tick()
+        idle = not self.wheel.count
+        if idle:
+            self.wheel.advance(now)  # jump an idle wheel to the present instead of stepping through the gap
+        handle = self.wheel.schedule(now + max(ticks, 1), payload)
+        if idle:
+            self._wakeup.set()
+        return handle
+
+    def cancel(self, handle: Optional[TimerHandle]) -> bool:
+        return handle is not None and self.wheel.cancel(handle)
+
+    @property
+    def pending(self) -> int:
+        return self.wheel.count + self.dispatching
+
+    async def run(self):
+        while True:
+            if not self.wheel.count:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            delay = self.origin + (self.wheel.current + 1) * self.tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = self._now_tick()
+            self.late_ticks += max(0, now - self.wheel.current - 1)
+            due = self.wheel.advance(now)
+            if not due:
+                continue
+            self.batches += 1
+            self.fired += len(due)
+            TIMER_BATCH_SIZE.observe(self.name, value=len(due))
+            self.dispatching = len(due)
+            for start in range(0, len(due), self.max_batch):
+                chunk = due[start:start + self.max_batch]
+                self.dispatching -= len(chunk)
+                try:
+                    self.handler([handle.payload for handle in chunk])
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Timer wheel {self.name} handler failed on {len(chunk)} timers: "
+                                 f"{type(e).__name__}: {e}")
+                # Let other coroutines run between chunks
+                await asyncio.sleep(0)
+
+    def get_status(self) -> dict:
+        return {
+            "name": self.name,
+            "tick_ms": self.tick * 1000,
+            "pending": self.pending,
+            "fired": self.fired,
+            "batches": self.batches,
+            "avg_batch": round(self.fired / self.batches, 1) if self.batches else 0,
+            "late_ticks": self.late_ticks,
+            "errors": self.errors,
+        }
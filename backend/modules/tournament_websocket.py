@@ -11,6 +11,8 @@ from typing import Dict, List, Set, Optional
 from dataclasses import dataclass, asdict
 import random
 
+from modules.task_supervisor import task_supervisor
+
 logger = logging.getLogger(__name__)
 
 
@@ -140,8 +142,8 @@ class TournamentWebSocketManager:
         """Start simulated trade feed for demo purposes"""
         if not self._running:
             self._running = True
-            self._simulation_task = asyncio.create_task(
-                self._simulate_trades(tournament_id)
+            self._simulation_task = task_supervisor.spawn(
+                "tournament_simulation", self._simulate_trades(tournament_id), key=tournament_id
             )
     
     def stop_simulation(self):
@@ -9,6 +9,10 @@ from datetime import datetime, timezone, timedelta
 from enum import Enum
 import uuid
 import random
+import time
+
+from modules.event_bus import event_bus, TradeExecuted
+from modules.account_executor import AccountBusy, VersionConflict, account_executor, version_filter
 
 # ============ ENUMS ============
 
@@ -118,6 +122,7 @@ class CompetitionEntry(BaseModel):
     
     joined_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     last_trade_at: Optional[str] = None
+    version: int = 0  # incremented by every write; checked so concurrent trades cannot lose updates
 
 class CompetitionResult(BaseModel):
     """Final results of a competition"""
@@ -180,9 +185,18 @@ class CompetitionEngine:
         TierLevel.DIAMOND: 7500
     }
     
+    # Leaderboards are cached per worker and rebuilt when this worker sees a
+    # trade in that competition on the event bus; the TTL bounds how stale a
+    # board can get from trades executed by other workers
+    LEADERBOARD_CACHE_SIZE = 100
+    LEADERBOARD_CACHE_TTL = 5.0
+    
     def __init__(self, db, playground_engine=None):
         self.db = db
         self.playground_engine = playground_engine
+        self._leaderboards: Dict[str, tuple] = {}  # competition_id -> (loaded_at, rows)
+        # Trades on one entry run one at a time, in submission order
+        self.executor = account_executor("competition")
     
     async def create_competition(self, competition: Competition) -> Competition:
         """Create a new competition"""
@@ -342,6 +356,7 @@ class CompetitionEngine:
         )
         
         await self.db.competition_entries.insert_one(entry.model_dump())
+        self._leaderboards.pop(competition_id, None)
         
         # Update participant count
         await self.db.competitions.update_one(
@@ -354,6 +369,17 @@ class CompetitionEngine:
     async def execute_competition_trade(self, entry_id: str, symbol: str, side: str, 
                                         quantity: float, current_price: float) -> Dict:
         """Execute a trade within a competition"""
+        try:
+            return await self.executor.submit(
+                entry_id, self._apply_competition_trade, entry_id, symbol, side, quantity, current_price
+            )
+        except AccountBusy:
+            return {"success": False, "error": "Too many pending trades for this entry"}
+        except VersionConflict:
+            return {"success": False, "error": "Entry is being updated elsewhere, please retry"}
+    
+    async def _apply_competition_trade(self, entry_id: str, symbol: str, side: str,
+                                       quantity: float, current_price: float) -> Dict:
         entry = await self.db.competition_entries.find_one({"id": entry_id}, {"_id": 0})
         if not entry:
             return {"success": False, "error": "Entry not found"}
@@ -440,11 +466,26 @@ class CompetitionEngine:
         drawdown = ((peak - entry.current_equity) / peak) * 100
         entry.max_drawdown = max(entry.max_drawdown, drawdown)
         
-        # Save updated entry
-        await self.db.competition_entries.update_one(
-            {"id": entry_id},
-            {"$set": entry.model_dump()}
+        # Save updated entry unless another writer got there first
+        result = await self.db.competition_entries.update_one(
+            {"id": entry_id, **version_filter(entry.version)},
+            {"$set": entry.model_dump(exclude={"version"}), "$inc": {"version": 1}}
         )
+        if result.matched_count == 0:
+            raise VersionConflict(f"Competition entry {entry_id} changed during the trade")
+        entry.version += 1
+        
+        event_bus.publish(TradeExecuted(
+            trade_id=trade_record["id"],
+            user_id=entry.user_id,
+            symbol=symbol,
+            side=side,
+            quantity=quantity,
+            price=current_price,
+            source="competition",
+            account_id=entry_id,
+            competition_id=entry.competition_id
+        ))
         
         return {"success": True, "trade": trade_record, "entry": entry.model_dump()}
     
@@ -463,8 +504,28 @@ class CompetitionEngine:
         
         return [Competition(**doc) for doc in docs]
     
-    async def get_competition_leaderboard(self, competition_id: str, limit: int = 50) -> List[Dict]:
+    async def get_competition_leaderboard(self, competition_id: str, limit: int = 50,
+                                          use_cache: bool = True) -> List[Dict]:
         """Get competition leaderboard"""
+        if use_cache and limit <= self.LEADERBOARD_CACHE_SIZE:
+            cached = self._leaderboards.get(competition_id)
+            if cached is None or time.monotonic() - cached[0] > self.LEADERBOARD_CACHE_TTL:
+                cached = await self._rebuild_leaderboard(competition_id)
+            return cached[1][:limit]
+        return await self._load_leaderboard(competition_id, limit)
+    
+    async def on_trades_executed(self, events: List[TradeExecuted]):
+        """Event-bus handler: rebuild cached leaderboards of competitions that just traded"""
+        for competition_id in {e.competition_id for e in events if e.competition_id}:
+            if competition_id in self._leaderboards:
+                await self._rebuild_leaderboard(competition_id)
+    
+    async def _rebuild_leaderboard(self, competition_id: str) -> tuple:
+        rows = await self._load_leaderboard(competition_id, self.LEADERBOARD_CACHE_SIZE)
+        self._leaderboards[competition_id] = (time.monotonic(), rows)
+        return self._leaderboards[competition_id]
+    
+    async def _load_leaderboard(self, competition_id: str, limit: int) -> List[Dict]:
         entries = await self.db.competition_entries.find(
             {"competition_id": competition_id, "is_disqualified": False},
             {"_id": 0}
@@ -501,7 +562,7 @@ class CompetitionEngine:
             raise ValueError("Competition not found")
         
         # Get final leaderboard
-        leaderboard = await self.get_competition_leaderboard(competition_id, 100)
+        leaderboard = await self.get_competition_leaderboard(competition_id, 100, use_cache=False)
         
         # Calculate statistics
         returns = [e["pnl_percent"] for e in leaderboard]
@@ -10,6 +10,10 @@ import uuid
 import random
 import asyncio
 
+from modules.tick_store import replay_price
+from modules.event_bus import event_bus, TradeExecuted
+from modules.account_executor import AccountBusy, VersionConflict, account_executor, version_filter
+
 # ============ MODELS ============
 
 class PlaygroundAccount(BaseModel):
@@ -27,6 +31,7 @@ class PlaygroundAccount(BaseModel):
     trade_history: List[Dict] = []
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     last_updated: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    version: int = 0  # incremented by every write; checked so concurrent writers cannot lose updates
     settings: Dict = {
         "leverage": 1,
         "margin_enabled": False,
@@ -86,6 +91,8 @@ class TradingPlaygroundEngine:
     def __init__(self, db):
         self.db = db
         self.price_cache = {}
+        # Operations on one account run one at a time, in submission order
+        self.executor = account_executor("playground")
         
     async def get_current_price(self, symbol: str) -> float:
         """Get current market price for a symbol"""
@@ -95,6 +102,11 @@ class TradingPlaygroundEngine:
             if datetime.now(timezone.utc) - cache_time < timedelta(seconds=5):
                 return price
         
+        # A running market replay is the price source when active
+        replayed = replay_price(symbol)
+        if replayed is not None:
+            return replayed
+        
         # Default prices for major cryptos (fallback)
         default_prices = {
             "BTC": 95000.0,
@@ -153,8 +165,31 @@ class TradingPlaygroundEngine:
         doc = await self.db.playground_accounts.find_one({"user_id": user_id}, {"_id": 0})
         return PlaygroundAccount(**doc) if doc else None
     
+    async def _save_account(self, account: PlaygroundAccount, fields: Optional[Dict] = None):
+        """Write `fields` (default: the whole account) unless the account changed since it was read"""
+        result = await self.db.playground_accounts.update_one(
+            {"id": account.id, **version_filter(account.version)},
+            {"$set": fields if fields is not None else account.model_dump(exclude={"version"}),
+             "$inc": {"version": 1}}
+        )
+        if result.matched_count == 0:
+            raise VersionConflict(f"Playground account {account.id} changed during the update")
+        account.version += 1
+    
+    async def _submit(self, account_id: str, operation, *args) -> Dict:
+        """Run an account operation after the account's earlier ones"""
+        try:
+            return await self.executor.submit(account_id, operation, *args)
+        except AccountBusy:
+            return {"success": False, "error": "Too many pending orders for this account"}
+        except VersionConflict:
+            return {"success": False, "error": "Account is being updated elsewhere, please retry"}
+    
     async def execute_market_order(self, order: PlaygroundOrder) -> Dict:
         """Execute a market order immediately"""
+        return await self._submit(order.account_id, self._fill_market_order, order)
+    
+    async def _fill_market_order(self, order: PlaygroundOrder) -> Dict:
         account = await self.get_account(order.account_id)
         if not account:
             return {"success": False, "error": "Account not found"}
@@ -242,13 +277,21 @@ class TradingPlaygroundEngine:
         account.trade_history.append(trade_record)
         
         # Save updates
-        await self.db.playground_accounts.update_one(
-            {"id": account.id},
-            {"$set": account.model_dump()}
-        )
+        await self._save_account(account)
         
         await self.db.playground_orders.insert_one(order.model_dump())
         
+        event_bus.publish(TradeExecuted(
+            trade_id=order.id,
+            user_id=account.user_id,
+            symbol=order.symbol,
+            side=order.side,
+            quantity=order.quantity,
+            price=fill_price,
+            source="playground",
+            account_id=account.id
+        ))
+        
         return {
             "success": True,
             "order": order.model_dump(),
@@ -262,6 +305,9 @@ class TradingPlaygroundEngine:
     
     async def execute_limit_order(self, order: PlaygroundOrder) -> Dict:
         """Place a limit order (will be filled when price reaches target)"""
+        return await self._submit(order.account_id, self._place_limit_order, order)
+    
+    async def _place_limit_order(self, order: PlaygroundOrder) -> Dict:
         account = await self.get_account(order.account_id)
         if not account:
             return {"success": False, "error": "Account not found"}
@@ -276,10 +322,7 @@ class TradingPlaygroundEngine:
                 return {"success": False, "error": "Insufficient buying power"}
             
             account.buying_power -= order_value
-            await self.db.playground_accounts.update_one(
-                {"id": account.id},
-                {"$set": {"buying_power": account.buying_power}}
-            )
+            await self._save_account(account, {"buying_power": account.buying_power})
         
         order.status = "pending"
         await self.db.playground_orders.insert_one(order.model_dump())
@@ -296,6 +339,11 @@ class TradingPlaygroundEngine:
         if not order_doc:
             return {"success": False, "error": "Order not found"}
         
+        return await self._submit(order_doc["account_id"], self._cancel_order, order_id)
+    
+    async def _cancel_order(self, order_id: str) -> Dict:
+        # Re-read inside the account's queue: an earlier operation may have filled or cancelled it
+        order_doc = await self.db.playground_orders.find_one({"id": order_id}, {"_id": 0})
         if order_doc["status"] != "pending":
             return {"success": False, "error": "Order is not pending"}
         
@@ -305,10 +353,7 @@ class TradingPlaygroundEngine:
             if account:
                 order_value = order_doc["quantity"] * order_doc["price"]
                 account.buying_power += order_value
-                await self.db.playground_accounts.update_one(
-                    {"id": account.id},
-                    {"$set": {"buying_power": account.buying_power}}
-                )
+                await self._save_account(account, {"buying_power": account.buying_power})
         
         await self.db.playground_orders.update_one(
             {"id": order_id},
@@ -319,6 +364,9 @@ class TradingPlaygroundEngine:
     
     async def update_positions(self, account_id: str) -> Dict:
         """Update all position prices and P&L"""
+        return await self._submit(account_id, self._update_positions, account_id)
+    
+    async def _update_positions(self, account_id: str) -> Dict:
         account = await self.get_account(account_id)
         if not account:
             return {"success": False, "error": "Account not found"}
@@ -353,15 +401,12 @@ class TradingPlaygroundEngine:
         account.total_pnl_percent = ((account.total_equity - account.initial_balance) / account.initial_balance) * 100
         account.last_updated = datetime.now(timezone.utc).isoformat()
         
-        await self.db.playground_accounts.update_one(
-            {"id": account.id},
-            {"$set": {
-                "positions": account.positions,
-                "total_equity": account.total_equity,
-                "total_pnl_percent": account.total_pnl_percent,
-                "last_updated": account.last_updated
-            }}
-        )
+        await self._save_account(account, {
+            "positions": account.positions,
+            "total_equity": account.total_equity,
+            "total_pnl_percent": account.total_pnl_percent,
+            "last_updated": account.last_updated
+        })
         
         return {
             "success": True,
@@ -371,6 +416,9 @@ class TradingPlaygroundEngine:
     
     async def reset_account(self, account_id: str, initial_balance: float = 100000.0) -> Dict:
         """Reset account to initial state"""
+        return await self._submit(account_id, self._reset_account, account_id, initial_balance)
+    
+    async def _reset_account(self, account_id: str, initial_balance: float) -> Dict:
         account = await self.get_account(account_id)
         if not account:
             return {"success": False, "error": "Account not found"}
@@ -385,10 +433,7 @@ class TradingPlaygroundEngine:
         account.trade_history = []
         account.last_updated = datetime.now(timezone.utc).isoformat()
         
-        await self.db.playground_accounts.update_one(
-            {"id": account_id},
-            {"$set": account.model_dump()}
-        )
+        await self._save_account(account)
         
         return {"success": True, "account": account.model_dump()}
     
@@ -4,12 +4,21 @@ Tutorial walkthroughs, AI-guided lessons, trading simulators, and backtesting
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
+from dataclasses import asdict
 from datetime import datetime, timezone, timedelta
 from enum import Enum
+import asyncio
 import uuid
 import random
 
+from modules.backtest_jobs import cache_key
+from modules.backtest_sweep import backtest_sweeper, objective_key, sweep_combinations
+from modules.backtester import (ExecutionSettings, estimate_bars, load_price_data, resolve_parameters,
+                                run_vectorized_backtest)
+from modules.downsampling import downsample_points
+from modules.walk_forward import OBJECTIVES as WALK_FORWARD_OBJECTIVES, walk_forward, walk_forward_windows
+
 # ============ ENUMS ============
 
 class LessonCategory(str, Enum):
@@ -117,12 +126,30 @@ class BacktestConfig(BaseModel):
     position_size_percent: float = 10.0
     stop_loss_percent: float = 5.0
     take_profit_percent: float = 10.0
+    fee_bps: float = 10.0
+    slippage_bps: float = 5.0
+    allow_short: bool = False
     
     # Results
     status: str = "pending"  # pending, running, completed, failed
     results: Optional[Dict] = None
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+class ParameterSweep(BaseModel):
+    """Parameter search over a BacktestConfig's strategy: a grid, or random draws"""
+    grid: Optional[Dict[str, List[Any]]] = None      # {"fast": [5, 10], "slow": [50, 100]}
+    random: Optional[Dict[str, Any]] = None          # {"fast": {"min": 5, "max": 50}, "slow": [50, 100]}
+    samples: int = 100
+    seed: Optional[int] = None
+    objective: str = "sharpe_ratio"
+    top: int = Field(10, ge=1, le=100)
+
+class WalkForwardStudy(ParameterSweep):
+    """Walk-forward optimization: a parameter search re-run on each rolling or anchored train window"""
+    windows: int = Field(10, ge=1, le=500)
+    train_ratio: float = Field(3.0, gt=0, le=100)  # train window length / test window length
+    anchored: bool = False                         # train windows all start at the first bar
+
 class UserProgress(BaseModel):
     """Track user's learning progress"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -618,70 +645,165 @@ Holding losing positions too long, hoping they'll recover.
             "badge": badge
         }
     
-    async def run_backtest(self, config: BacktestConfig) -> Dict:
-        """Run a strategy backtest"""
-        # Simulate backtest results
+    async def run_backtest(self, config: BacktestConfig, max_points: Optional[int] = None,
+                           offload: Optional[Callable[..., Awaitable[Any]]] = None) -> Dict:
+        """
+        Run a strategy backtest on the vectorized engine; the stored equity
+        curve keeps EQUITY_CURVE_POINTS bars, the returned one at most max_points.
+        Raises ValueError for an unknown strategy, bad parameters or an empty range.
+        `offload(func, *args)` runs the blocking work (default: the loop's executor).
+        """
         await self.db.backtests.insert_one(config.model_dump())
-        
-        # Generate simulated results
-        num_trades = random.randint(50, 200)
-        win_rate = random.uniform(0.4, 0.65)
-        winning_trades = int(num_trades * win_rate)
-        losing_trades = num_trades - winning_trades
-        
-        avg_win = random.uniform(2, 5)
-        avg_loss = random.uniform(1, 3)
-        
-        total_profit = (winning_trades * avg_win) - (losing_trades * avg_loss)
-        total_return = (total_profit / config.initial_capital) * 100
-        
-        max_drawdown = random.uniform(5, 20)
-        sharpe_ratio = random.uniform(0.5, 2.5)
-        
-        results = {
-            "total_trades": num_trades,
-            "winning_trades": winning_trades,
-            "losing_trades": losing_trades,
-            "win_rate": win_rate * 100,
-            "avg_win_percent": avg_win,
-            "avg_loss_percent": avg_loss,
-            "total_return_percent": total_return,
-            "max_drawdown_percent": max_drawdown,
-            "sharpe_ratio": sharpe_ratio,
-            "profit_factor": (winning_trades * avg_win) / (losing_trades * avg_loss) if losing_trades > 0 else 0,
-            "final_balance": config.initial_capital * (1 + total_return / 100),
-            "equity_curve": self._generate_equity_curve(config.initial_capital, total_return, num_trades)
-        }
-        
+        settings = self._execution_settings(config)
+
+        def run():
+            prices = load_price_data(config.symbol, config.start_date, config.end_date, config.timeframe)
+            return run_vectorized_backtest(prices, config.strategy_type, config.parameters, settings,
+                                           allow_short=config.allow_short)
+
+        try:
+            results = await (offload or self._offload)(run)
+        except Exception as e:
+            # Any error must leave the record failed, not pending
+            error = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+            await self.db.backtests.update_one(
+                {"id": config.id},
+                {"$set": {"status": "failed", "error": error}}
+            )
+            config.status = "failed"
+            raise
+
         config.status = "completed"
         config.results = results
-        
+
         await self.db.backtests.update_one(
             {"id": config.id},
             {"$set": {"status": "completed", "results": results}}
         )
-        
+
+        if max_points:
+            results = {**results, "equity_curve": downsample_points(results["equity_curve"], max_points, "equity", "index")}
+            config.results = results
+        return results
+
+    @staticmethod
+    async def _offload(func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    @staticmethod
+    def _execution_settings(config: BacktestConfig) -> ExecutionSettings:
+        return ExecutionSettings(
+            initial_capital=config.initial_capital,
+            position_size_percent=config.position_size_percent,
+            stop_loss_percent=config.stop_loss_percent,
+            take_profit_percent=config.take_profit_percent,
+            fee_bps=config.fee_bps,
+            slippage_bps=config.slippage_bps,
+        )
+
+    async def run_sweep(self, config: BacktestConfig, sweep: ParameterSweep,
+                        offload: Optional[Callable[..., Awaitable[Any]]] = None) -> AsyncIterator[Dict]:
+        """
+        Stream a parameter sweep's events (see BacktestSweeper.sweep) and
+        store its summary in `backtest_sweeps`. Invalid input raises
+        ValueError, and a full sweeper SweepBusy, before the first event.
+        """
+        combinations = sweep_combinations(config.strategy_type, sweep.grid, sweep.random, sweep.samples, sweep.seed)
+        prices = await (offload or self._offload)(
+            load_price_data, config.symbol, config.start_date, config.end_date, config.timeframe)
+        sweep_id = str(uuid.uuid4())
+        events = backtest_sweeper.sweep(prices, config.strategy_type, combinations, self._execution_settings(config),
+                                        config.allow_short, sweep.objective, sweep.top)
+        async for event in events:
+            event = {**event, "sweep_id": sweep_id}
+            if event["event"] == "done":
+                await self.db.backtest_sweeps.insert_one({
+                    "id": sweep_id,
+                    "user_id": config.user_id,
+                    "config": config.model_dump(exclude={"results"}),
+                    "sweep": sweep.model_dump(),
+                    **{k: event[k] for k in ("completed", "errors", "elapsed_ms", "best", "top")},
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                })
+            yield event
+
+    async def run_walk_forward(self, config: BacktestConfig, study: WalkForwardStudy,
+                               progress: Optional[Callable[[float], None]] = None,
+                               offload: Optional[Callable[..., Awaitable[Any]]] = None) -> Dict:
+        """
+        Walk-forward study of the config's strategy over `study`'s search
+        space, stored in `walk_forward_studies`. Invalid input raises
+        ValueError, a full sweeper SweepBusy.
+        """
+        combinations = sweep_combinations(config.strategy_type, study.grid, study.random, study.samples, study.seed)
+        prices = await (offload or self._offload)(
+            load_price_data, config.symbol, config.start_date, config.end_date, config.timeframe)
+        windows = walk_forward_windows(len(prices), study.windows, study.train_ratio, study.anchored)
+        results = await walk_forward(prices, config.strategy_type, combinations, self._execution_settings(config),
+                                     windows, study.objective, config.allow_short, progress=progress)
+        results = {"id": str(uuid.uuid4()), "strategy": config.strategy_type, "symbol": config.symbol,
+                   "timeframe": config.timeframe, "anchored": study.anchored, **results}
+        await self.db.walk_forward_studies.insert_one({
+            **results,
+            "user_id": config.user_id,
+            "config": config.model_dump(exclude={"results"}),
+            "study": study.model_dump(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
         return results
     
-    def _generate_equity_curve(self, initial: float, total_return: float, 
-                               num_points: int = 100) -> List[Dict]:
-        """Generate simulated equity curve data"""
-        curve = []
-        current = initial
-        step_return = total_return / num_points
-        
-        for i in range(num_points):
-            # Add some randomness
-            variation = random.uniform(-2, 2)
-            current = current * (1 + (step_return + variation) / 100)
-            curve.append({
-                "index": i,
-                "equity": round(current, 2),
-                "drawdown": max(0, (max(c["equity"] for c in curve + [{"equity": current}]) - current) / max(c["equity"] for c in curve + [{"equity": current}]) * 100) if curve else 0
-            })
-        
-        return curve
-    
+    def plan_job(self, kind: str, config: BacktestConfig,
+                 search: Optional[ParameterSweep] = None) -> Tuple[str, float, Callable[[Any], Awaitable[Dict]]]:
+        """
+        Cache key, cost estimate (bars x combinations) and runner of a queued
+        "backtest", "sweep" or "walk_forward" job. The input is validated
+        here (ValueError), so a bad job is rejected at submission.
+        """
+        bars = estimate_bars(config.start_date, config.end_date, config.timeframe)
+        fields = {
+            "strategy": config.strategy_type,
+            "symbol": config.symbol.upper(),
+            "start_date": config.start_date,
+            "end_date": config.end_date,
+            "timeframe": config.timeframe,
+            "settings": asdict(self._execution_settings(config)),
+            "allow_short": config.allow_short,
+        }
+        if kind == "backtest":
+            # Resolved, so omitted and explicit default parameters share a cache entry
+            fields["parameters"] = resolve_parameters(config.strategy_type, config.parameters)
+            combinations = 1
+
+            async def run(job):
+                return await self.run_backtest(config, offload=job.offload)
+        elif kind in ("sweep", "walk_forward") and search is not None:
+            combinations = len(sweep_combinations(config.strategy_type, search.grid, search.random,
+                                                  search.samples, search.seed))
+            fields["search"] = search.model_dump()
+            if kind == "sweep":
+                objective_key(search.objective)
+
+                async def run(job):
+                    async for event in self.run_sweep(config, search, offload=job.offload):
+                        if event["event"] == "results":
+                            job.progress = event["completed"] / event["total"]
+                        elif event["event"] == "done":
+                            return {k: v for k, v in event.items() if k != "event"}
+            else:
+                if search.objective not in WALK_FORWARD_OBJECTIVES:
+                    raise ValueError(f"Unknown walk-forward objective {search.objective!r}; "
+                                     f"expected one of {list(WALK_FORWARD_OBJECTIVES)}")
+                walk_forward_windows(bars, search.windows, search.train_ratio, search.anchored)
+                combinations *= 2  # a scoring pass plus the picks' pass
+
+                async def run(job):
+                    return await self.run_walk_forward(config, search,
+                                                       progress=lambda done: setattr(job, "progress", done),
+                                                       offload=job.offload)
+        else:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        return cache_key(kind, **fields), float(bars * combinations), run
+
     def _get_recommendations(self, progress: UserProgress) -> List[str]:
         """Get personalized recommendations based on progress"""
         recommendations = []
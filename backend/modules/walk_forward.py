@@ -0,0 +1,285 @@
+# OracleIQTrader - Walk-Forward Optimization
+# Rolling or anchored train/test windows over one candle series: each
+# window picks the parameters that scored best on its training bars, the
+# picks are judged on the following unseen test bars, and the test
+# segments are stitched into one out-of-sample equity curve with
+# robustness metrics (efficiency, degradation, parameter stability).
+#
+# Every combination is simulated once over the whole series on the sweep
+# pool, sharing one shared-memory price block and each worker's indicator
+# arrays; window scores come from prefix sums of that one return stream, so
+# a 50-window study costs about the same as a single parameter sweep.
+
+import asyncio
+import contextlib
+import math
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from modules.backtest_sweep import BacktestSweeper, backtest_sweeper
+from modules.backtester import (EQUITY_CURVE_POINTS, ExecutionSettings, Indicators, PriceData, drawdowns,
+                                equity_curve_points, resolve_parameters, simulate, strategy_positions)
+
+MAX_WINDOWS = 500
+MAX_STUDY_CELLS = 5_000_000  # combinations x windows held in the score matrices
+MIN_TEST_BARS = 2
+OBJECTIVES = ("sharpe_ratio", "total_return_percent")
+
+
+@dataclass(frozen=True)
+class Window:
+    """Bar ranges [start, stop) of one train/test split"""
+    index: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+
+def walk_forward_windows(bars: int, windows: int, train_ratio: float = 3.0, anchored: bool = False) -> List[Window]:
+    """
+    `windows` consecutive test segments preceded by training segments
+    `train_ratio` times as long: the training segment rolls forward with
+    the test segment, or, when `anchored`, always starts at bar 0. The
+    test segments tile the end of the series back to back.
+    """
+    if not 1 <= windows <= MAX_WINDOWS:
+        raise ValueError(f"windows must be between 1 and {MAX_WINDOWS}")
+    if train_ratio <= 0:
+        raise ValueError("train_ratio must be positive")
+    test = int(bars // (windows + train_ratio))
+    if test < MIN_TEST_BARS:
+        raise ValueError(f"{bars} bars are too few for {windows} windows at a {train_ratio}:1 train/test ratio")
+    first_test = bars - windows * test
+    train = first_test  # the remainder of the division lengthens the training segments
+    return [
+        Window(i, 0 if anchored else first_test - train + i * test, first_test + i * test,
+               first_test + i * test, first_test + (i + 1) * test)
+        for i in range(windows)
+    ]
+
+
+# ============ WORKER TASKS ============
+
+def _segment_scores(returns: np.ndarray, starts: np.ndarray, stops: np.ndarray, objective: str,
+                    bars_per_year: float):
+    """(objective, summed log return) of `returns` over each [start, stop), from prefix sums"""
+    log = np.log1p(returns)
+    cum = np.concatenate(([0.0], np.cumsum(returns)))
+    cum_sq = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    cum_log = np.concatenate(([0.0], np.cumsum(log)))
+    n = (stops - starts).astype(np.float64)
+    log_return = cum_log[stops] - cum_log[starts]
+    if objective == "total_return_percent":
+        return np.expm1(log_return) * 100, log_return
+    mean = (cum[stops] - cum[starts]) / n
+    var = np.maximum((cum_sq[stops] - cum_sq[starts]) / n - mean * mean, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(var > 1e-20, mean / np.sqrt(var) * math.sqrt(bars_per_year), 0.0)
+    return sharpe, log_return
+
+
+def score_windows(prices: PriceData, indicators: Indicators, combinations: Sequence[Dict], strategy: str,
+                  settings: ExecutionSettings, allow_short: bool, bounds: np.ndarray,
+                  objective: str) -> Dict[str, np.ndarray]:
+    """
+    One full-series simulation per combination, scored on every window:
+    (combinations x windows) matrices of the train and test objective and
+    log return. Rejected combinations stay NaN.
+    """
+    shape = (len(combinations), len(bounds))
+    out = {key: np.full(shape, np.nan) for key in ("train", "test", "train_log", "test_log")}
+    for i, parameters in enumerate(combinations):
+        try:
+            params = resolve_parameters(strategy, parameters)
+            sim = simulate(prices, strategy_positions(strategy, params, indicators, allow_short), settings)
+        except ValueError:
+            continue
+        returns = sim["returns"]
+        out["train"][i], out["train_log"][i] = _segment_scores(
+            returns, bounds[:, 0], bounds[:, 1], objective, prices.bars_per_year)
+        out["test"][i], out["test_log"][i] = _segment_scores(
+            returns, bounds[:, 2], bounds[:, 3], objective, prices.bars_per_year)
+    return out
+
+
+def segment_returns(prices: PriceData, indicators: Indicators, picks: Sequence[Dict], strategy: str,
+                    settings: ExecutionSettings, allow_short: bool) -> List[List[np.ndarray]]:
+    """Bar returns of each pick's parameters over its test segments ({"parameters", "segments"})"""
+    out = []
+    for pick in picks:
+        params = resolve_parameters(strategy, pick["parameters"])
+        returns = simulate(prices, strategy_positions(strategy, params, indicators, allow_short), settings)["returns"]
+        out.append([returns[start:stop].copy() for start, stop in pick["segments"]])
+    return out
+
+
+# ============ STUDY ============
+
+def _iso(timestamp) -> str:
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).isoformat()
+
+
+def _mean(values) -> Optional[float]:
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    return float(values.mean()) if len(values) else None
+
+
+def _parameter_stability(chosen: List[Dict]) -> Dict[str, Optional[float]]:
+    """Coefficient of variation of each numeric parameter across the windows' picks (0 = never changed)"""
+    stability = {}
+    for key in chosen[0] if chosen else ():
+        values = [p[key] for p in chosen]
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            mean = float(np.mean(values))
+            stability[key] = round(float(np.std(values)) / abs(mean), 4) if mean else None
+    return stability
+
+
+async def walk_forward(prices: PriceData, strategy: str, combinations: List[Dict], settings: ExecutionSettings,
+                       windows: List[Window], objective: str = "sharpe_ratio", allow_short: bool = False,
+                       sweeper: BacktestSweeper = backtest_sweeper,
+                       curve_points: int = EQUITY_CURVE_POINTS,
+                       progress: Optional[Callable[[float], None]] = None) -> Dict:
+    """
+    Optimize `objective` over `combinations` on each window's training
+    bars and report the picks' out-of-sample results. Positions carry
+    across window edges (the series is simulated once), so a test segment
+    can open holding what its parameters held on the bar before it.
+    `progress`, if given, is called with the fraction done as chunks finish.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown walk-forward objective {objective!r}; expected one of {list(OBJECTIVES)}")
+    if len(combinations) * len(windows) > MAX_STUDY_CELLS:
+        raise ValueError(f"{len(combinations)} combinations x {len(windows)} windows exceeds {MAX_STUDY_CELLS}")
+    bounds = np.array([[w.train_start, w.train_stop, w.test_start, w.test_stop] for w in windows], dtype=np.int64)
+    shape = (len(combinations), len(windows))
+    scores = {key: np.full(shape, np.nan) for key in ("train", "test", "train_log", "test_log")}
+    position = {id(c): i for i, c in enumerate(combinations)}
+    failed = scored = 0
+
+    with sweeper.slot():
+        chunks = sweeper.map_chunks(prices, score_windows, combinations, strategy, settings, allow_short,
+                                    bounds, objective)
+        async with contextlib.aclosing(chunks):
+            async for chunk, result in chunks:
+                scored += len(chunk)
+                if progress:
+                    progress(0.9 * scored / len(combinations))  # the picks' pass is the last tenth
+                if result is None:
+                    failed += len(chunk)
+                    continue
+                start = position[id(chunk[0])]
+                for key, matrix in result.items():
+                    scores[key][start:start + len(chunk)] = matrix
+
+        # Each window's pick: the best training score (NaN rows never win)
+        train = np.where(np.isfinite(scores["train"]), scores["train"], -np.inf)
+        picked = np.argmax(train, axis=0)
+        has_pick = np.isfinite(train[picked, np.arange(len(windows))])
+        picks: Dict[int, List[int]] = {}
+        for w in np.flatnonzero(has_pick).tolist():
+            picks.setdefault(int(picked[w]), []).append(w)
+        items = [{"parameters": combinations[c], "segments": bounds[ws, 2:].tolist(), "windows": ws}
+                 for c, ws in picks.items()]
+
+        segments: Dict[int, np.ndarray] = {}
+        if items:
+            chunks = sweeper.map_chunks(prices, segment_returns, items, strategy, settings, allow_short)
+            async with contextlib.aclosing(chunks):
+                async for chunk, result in chunks:
+                    if result is None:
+                        raise RuntimeError("Simulating the walk-forward picks failed")
+                    for item, arrays in zip(chunk, result):
+                        segments.update(zip(item["windows"], arrays))
+
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _report, prices, strategy, combinations, windows, scores, picked, has_pick, segments, settings,
+        objective, failed, curve_points)
+
+
+def _report(prices: PriceData, strategy: str, combinations: List[Dict], windows: List[Window], scores: Dict[str, np.ndarray],
+            picked: np.ndarray, has_pick: np.ndarray, segments: Dict[int, np.ndarray],
+            settings: ExecutionSettings, objective: str, failed: int, curve_points: int) -> Dict:
+    bars_per_year = prices.bars_per_year
+    rows, chosen = [], []
+    for window in windows:
+        w = window.index
+        row = {
+            **asdict(window),
+            "train_from": _iso(prices.timestamps[window.train_start]),
+            "test_from": _iso(prices.timestamps[window.test_start]),
+            "test_to": _iso(prices.timestamps[window.test_stop - 1]),
+            "parameters": None,
+        }
+        if has_pick[w]:
+            c = int(picked[w])
+            test = scores["test"][:, w]
+            finite = test[np.isfinite(test)]
+            # Where the pick's test score ranks among every combination's (100 = it was the best there too)
+            rank = ((finite < test[c]).sum() + 0.5 * (finite == test[c]).sum()) / len(finite) * 100
+            row.update({
+                "parameters": resolve_parameters(strategy, combinations[c]),
+                "in_sample": round(float(scores["train"][c, w]), 4),
+                "out_of_sample": round(float(test[c]), 4),
+                "out_of_sample_return_percent": round(float(np.expm1(scores["test_log"][c, w]) * 100), 4),
+                "out_of_sample_rank_percentile": round(float(rank), 2),
+            })
+            chosen.append(row["parameters"])
+        rows.append(row)
+
+    # Out-of-sample curve: the test segments back to back, flat where a window had no pick
+    stitched = np.concatenate([
+        segments.get(w.index, np.zeros(w.test_stop - w.test_start)) for w in windows])
+    equity = settings.initial_capital * np.cumprod(1.0 + stitched)
+    max_drawdown, _ = drawdowns(equity)
+    std = float(stitched.std()) if len(stitched) > 1 else 0.0
+    curve = equity_curve_points(equity, curve_points) if curve_points else []
+    for point in curve:
+        point["index"] += windows[0].test_start
+
+    picked_windows = np.flatnonzero(has_pick)
+    cols = picked[picked_windows]
+    train_lengths = np.array([w.train_stop - w.train_start for w in windows], dtype=np.float64)[picked_windows]
+    test_lengths = np.array([w.test_stop - w.test_start for w in windows], dtype=np.float64)[picked_windows]
+    # Annualized log returns of the picks in and out of sample
+    is_annual = scores["train_log"][cols, picked_windows] / train_lengths * bars_per_year
+    oos_annual = scores["test_log"][cols, picked_windows] / test_lengths * bars_per_year
+    mean_is, mean_oos = _mean(is_annual), _mean(oos_annual)
+    in_sample = _mean(scores["train"][cols, picked_windows])
+    out_of_sample = _mean(scores["test"][cols, picked_windows])
+    ranks = [r["out_of_sample_rank_percentile"] for r in rows if r["parameters"] is not None]
+    distinct = {tuple(sorted((k, repr(v)) for k, v in p.items())) for p in chosen}
+
+    final = float(equity[-1]) if len(equity) else settings.initial_capital
+    return {
+        "objective": objective,
+        "combinations": len(combinations),
+        "failed_combinations": failed,
+        "windows": rows,
+        "out_of_sample": {
+            "bars": int(len(stitched)),
+            "total_return_percent": (final / settings.initial_capital - 1) * 100,
+            "sharpe_ratio": float(stitched.mean()) / std * math.sqrt(bars_per_year) if std > 0 else 0.0,
+            "max_drawdown_percent": max_drawdown,
+            "final_balance": final,
+            "equity_curve": curve,
+        },
+        "robustness": {
+            "walk_forward_efficiency": round(mean_oos / mean_is, 4) if mean_is and mean_is > 0 else None,
+            "mean_in_sample": round(in_sample, 4) if in_sample is not None else None,
+            "mean_out_of_sample": round(out_of_sample, 4) if out_of_sample is not None else None,
+            # How much of the in-sample objective survives out of sample
+            "degradation_percent": round((1 - out_of_sample / in_sample) * 100, 2)
+            if in_sample and in_sample > 0 and out_of_sample is not None else None,
+            "profitable_windows_percent": round(
+                float((scores["test_log"][cols, picked_windows] > 0).mean() * 100), 2) if len(cols) else None,
+            "mean_out_of_sample_rank_percentile": round(float(np.mean(ranks)), 2) if ranks else None,
+            "distinct_parameter_sets": len(distinct),
+            "parameter_variation": _parameter_stability(chosen),
+        },
+    }
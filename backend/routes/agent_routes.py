@@ -3,9 +3,10 @@
 
 from fastapi import APIRouter, HTTPException
 
+from modules.fast_json import OracleJSONRoute
 from modules.ai_trading_agents import ai_trading_engine, AgentStatus
 
-agent_router = APIRouter(prefix="/agents", tags=["agents"])
+agent_router = APIRouter(prefix="/agents", tags=["agents"], route_class=OracleJSONRoute)
 
 
 def init_agent_db(db):
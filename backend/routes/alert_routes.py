@@ -5,8 +5,9 @@ from fastapi import APIRouter, Request, HTTPException
 from typing import List, Optional
 from datetime import datetime
 
+from modules.fast_json import OracleJSONRoute
 
-alert_router = APIRouter(prefix="/alerts", tags=["alerts"])
+alert_router = APIRouter(prefix="/alerts", tags=["alerts"], route_class=OracleJSONRoute)
 
 # These will be set during initialization
 _db = None
@@ -93,7 +94,7 @@ async def delete_price_alert(alert_id: str):
 
 
 # Crawler routes (related to alerts/signals)
-crawler_router = APIRouter(prefix="/crawler", tags=["crawler"])
+crawler_router = APIRouter(prefix="/crawler", tags=["crawler"], route_class=OracleJSONRoute)
 
 
 def init_crawler_routes(db):
@@ -5,9 +5,10 @@ from fastapi import APIRouter, HTTPException
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from modules.fast_json import OracleJSONRoute
 from modules.alpaca_trading import alpaca_service
 
-alpaca_router = APIRouter(prefix="/alpaca", tags=["alpaca-trading"])
+alpaca_router = APIRouter(prefix="/alpaca", tags=["alpaca-trading"], route_class=OracleJSONRoute)
 
 
 class MarketOrderRequest(BaseModel):
@@ -1,12 +1,14 @@
 # OracleIQTrader - Alpha Vantage Routes
 # Real stock market data endpoints
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 
+from modules.fast_json import OracleJSONRoute
+from modules.downsampling import downsample_ohlc
 from modules.alpha_vantage import alpha_vantage_service
 
-alpha_vantage_router = APIRouter(prefix="/stocks", tags=["stocks"])
+alpha_vantage_router = APIRouter(prefix="/stocks", tags=["stocks"], route_class=OracleJSONRoute)
 
 
 @alpha_vantage_router.get("/quote/{symbol}")
@@ -22,31 +24,35 @@ async def get_stock_quote(symbol: str):
 
 
 @alpha_vantage_router.get("/intraday/{symbol}")
-async def get_intraday_data(symbol: str, interval: str = "5min"):
+async def get_intraday_data(symbol: str, interval: str = "5min", max_points: Optional[int] = Query(None, ge=2)):
     """
     Get intraday time series data.
     Intervals: 1min, 5min, 15min, 30min, 60min
+    max_points merges consecutive bars so at most that many are returned.
     """
     bars = await alpha_vantage_service.get_intraday(symbol.upper(), interval)
+    bars = downsample_ohlc([b.model_dump() for b in bars], max_points)
     return {
         "symbol": symbol.upper(),
         "interval": interval,
         "count": len(bars),
-        "bars": [b.model_dump() for b in bars]
+        "bars": bars
     }
 
 
 @alpha_vantage_router.get("/daily/{symbol}")
-async def get_daily_data(symbol: str, days: int = 100):
+async def get_daily_data(symbol: str, days: int = 100, max_points: Optional[int] = Query(None, ge=2)):
     """
     Get daily time series data.
+    max_points merges consecutive bars so at most that many are returned.
     """
     bars = await alpha_vantage_service.get_daily(symbol.upper(), days)
+    bars = downsample_ohlc([b.model_dump() for b in bars], max_points)
     return {
         "symbol": symbol.upper(),
         "timeframe": "daily",
         "count": len(bars),
-        "bars": [b.model_dump() for b in bars]
+        "bars": bars
     }
 
 
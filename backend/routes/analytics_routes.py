@@ -0,0 +1,107 @@
+# OracleIQTrader - Analytics Export Routes
+# Incremental Parquet export of trades/signals/predictions and bulk queries
+# served from the exported files (never from Mongo)
+
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Response
+
+from modules.fast_json import OracleJSONRoute
+from modules.analytics_export import AnalyticsExporter, AnalyticsReader, parse_where, to_arrow_ipc
+from modules.task_supervisor import task_supervisor
+
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=OracleJSONRoute)
+
+# These will be set during initialization
+_exporter: Optional[AnalyticsExporter] = None
+_reader: Optional[AnalyticsReader] = None
+
+# Rows returned by a JSON query unless the caller asks for fewer; use format=arrow for bulk pulls
+JSON_ROW_LIMIT = 10_000
+
+
+def init_analytics_routes(source_db, root: str, interval: float = 0.0):
+    """
+    Set up the exporter over `source_db` (ideally a secondary/analytics node)
+    writing under `root`, and schedule it every `interval` seconds if > 0
+    """
+    global _exporter, _reader
+    _exporter = AnalyticsExporter(source_db, root)
+    _reader = AnalyticsReader(root)
+    if interval > 0 and "analytics_export" not in task_supervisor.jobs:
+        task_supervisor.periodic("analytics_export", _exporter.run, interval, initial_delay=min(interval, 60))
+
+
+@analytics_router.get("/datasets")
+async def list_datasets():
+    """Exported collections with their high-water marks and on-disk size"""
+    status = _exporter.get_status()
+    summary = _reader.summary()
+    return {
+        "root": status["root"],
+        "datasets": {
+            name: {**state, **summary.get(name, {}), "schema": _exporter.datasets[name].fields}
+            for name, state in status["collections"].items()
+        },
+    }
+
+
+@analytics_router.post("/export")
+async def run_export(collections: Optional[str] = None, full: bool = False):
+    """Run the incremental export now (comma-separated collections, default all)"""
+    names = [c.strip() for c in collections.split(",") if c.strip()] if collections else None
+    try:
+        return await _exporter.run(names, full=full)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@analytics_router.get("/{collection}")
+async def query_dataset(
+    collection: str,
+    columns: Optional[str] = None,
+    where: Optional[str] = None,
+    symbols: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    format: str = "json",
+):
+    """
+    Query exported rows with column projection and pushed-down filters.
+
+    - columns: comma-separated projection (default all)
+    - where: comma-separated predicates, e.g. `price>100,action==BUY,status in EXECUTED|FILLED`
+    - symbols / start / end: prune symbol and date partitions (`end` is exclusive)
+    - format: `json` (capped at 10k rows) or `arrow` (Arrow IPC stream, uncapped)
+    """
+    if format not in ("json", "arrow"):
+        raise HTTPException(status_code=400, detail="format must be json or arrow")
+    if format == "json":
+        limit = min(limit or JSON_ROW_LIMIT, JSON_ROW_LIMIT)
+    try:
+        query = partial(
+            _reader.query,
+            collection,
+            columns=[c.strip() for c in columns.split(",") if c.strip()] if columns else None,
+            filters=parse_where(where),
+            start=start,
+            end=end,
+            symbols=[s.strip() for s in symbols.split(",") if s.strip()] if symbols else None,
+            limit=limit,
+        )
+        # Parquet scans run off the event loop
+        table = await asyncio.get_running_loop().run_in_executor(None, query)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {collection}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "arrow":
+        return Response(content=to_arrow_ipc(table), media_type="application/vnd.apache.arrow.stream")
+    return {"dataset": collection, "count": table.num_rows, "rows": table.to_pylist()}
@@ -3,13 +3,14 @@
 
 from fastapi import APIRouter
 
+from modules.fast_json import OracleJSONRoute
 from modules.copy_trading import (
     get_master_traders, get_master_trader, get_top_performers, get_trending_traders,
     start_copy_trading, stop_copy_trading, pause_copy_trading, resume_copy_trading,
     update_copy_settings, get_user_copies, get_copy_portfolio, add_funds_to_copy
 )
 
-copy_router = APIRouter(prefix="/copy", tags=["copy-trading"])
+copy_router = APIRouter(prefix="/copy", tags=["copy-trading"], route_class=OracleJSONRoute)
 
 
 @copy_router.get("/traders")
@@ -3,13 +3,14 @@
 
 from fastapi import APIRouter
 
+from modules.fast_json import OracleJSONRoute
 from modules.push_notifications import (
     push_notification_service, 
     NotificationPreferences, 
     DeviceRegistration
 )
 
-notification_router = APIRouter(prefix="/notifications", tags=["notifications"])
+notification_router = APIRouter(prefix="/notifications", tags=["notifications"], route_class=OracleJSONRoute)
 
 
 def init_notification_db(db):
@@ -4,9 +4,10 @@
 from fastapi import APIRouter
 import uuid
 
+from modules.fast_json import OracleJSONRoute
 from modules.glass_box_pricing import glass_box_engine, COMPETITOR_FEES, AssetClass
 
-pricing_router = APIRouter(prefix="/pricing", tags=["pricing"])
+pricing_router = APIRouter(prefix="/pricing", tags=["pricing"], route_class=OracleJSONRoute)
 
 
 def init_pricing_db(db):
@@ -2,12 +2,13 @@
 # Portfolio risk metrics, VaR, stress testing, and execution audit trail
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import asyncio
 
+from modules.fast_json import OracleJSONRoute
 from modules.risk_analysis import risk_engine
 from modules.risk_websocket import risk_ws_manager
+from modules.event_bus import event_bus, PriceTick, TradeExecuted
 
-risk_router = APIRouter(prefix="/risk", tags=["risk"])
+risk_router = APIRouter(prefix="/risk", tags=["risk"], route_class=OracleJSONRoute)
 
 
 def init_risk_db(db):
@@ -16,8 +17,13 @@ def init_risk_db(db):
 
 
 def start_risk_broadcast():
-    """Start the risk WebSocket broadcast loop"""
-    asyncio.create_task(risk_ws_manager.run_broadcast_loop())
+    """Subscribe the risk WebSocket broadcast to price and trade events"""
+    risk_ws_manager._running = True
+    if "risk_broadcast" not in event_bus.subscriptions:
+        event_bus.subscribe(
+            "risk_broadcast", (PriceTick, TradeExecuted), risk_ws_manager.on_events,
+            min_interval=risk_ws_manager.broadcast_interval
+        )
 
 
 @risk_router.get("/portfolio/{user_id}")
@@ -100,7 +106,7 @@ async def get_risk_heat_map(user_id: str = "demo_user"):
 
 
 # Execution Audit Trail routes
-audit_router = APIRouter(prefix="/audit", tags=["audit"])
+audit_router = APIRouter(prefix="/audit", tags=["audit"], route_class=OracleJSONRoute)
 
 
 @audit_router.get("/executions/{user_id}")
@@ -4,6 +4,7 @@
 from fastapi import APIRouter
 from datetime import datetime, timezone
 
+from modules.fast_json import OracleJSONRoute
 from modules.supply_chain import (
     get_supply_chain_markets, get_supply_chain_market, get_high_impact_events,
     buy_supply_chain_position, get_suppliers, get_supplier, get_at_risk_suppliers,
@@ -14,7 +15,7 @@ from modules.supply_chain_alerts import (
     supply_chain_alert_engine, SCAlertType, SCAlertCondition, SCAlertPriority
 )
 
-supply_chain_router = APIRouter(prefix="/supply-chain", tags=["supply-chain"])
+supply_chain_router = APIRouter(prefix="/supply-chain", tags=["supply-chain"], route_class=OracleJSONRoute)
 
 
 # ============ Market Routes ============
@@ -1,8 +1,7 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Request, Response, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Request, Response, Depends, Query, Body
 from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
@@ -17,10 +16,24 @@ import json
 import csv
 import io
 import base64
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from modules.lazy_imports import lazy_import, warm_up, get_lazy_status, registered_modules
+from modules.metrics import (
+    metrics, PrometheusMiddleware, register_websocket_manager,
+    mongo_command_listener, instrument_httpx, monitor_event_loop_lag
+)
+from modules.loop_watchdog import LoopContextMiddleware, watchdog_from_env
+from modules.task_supervisor import GroupFull, task_supervisor
+from modules.storage import open_storage
+from modules.tick_store import get_active_replay, set_active_replay, replay_from_env, recorder_from_env
+from modules.response_cache import ResponseCacheMiddleware, response_cache_from_env
+from modules.compression import CompressionMiddleware, compression_options_from_env
+from modules.fast_json import OracleJSONResponse, OracleJSONRoute, dumps as fast_dumps
+from modules.downsampling import downsample_ohlc, downsample_points
+from modules.account_executor import executors as account_executors
+from modules.query_counter import QueryCountMiddleware, instrument_database, query_counter_options_from_env
+from modules.event_bus import (
+    event_bus, PriceTick, TradeExecuted, OrderFilled, SignalEmitted, MarketResolved
+)
 
 # TTS Integration
 try:
@@ -32,10 +45,19 @@ except ImportError:
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (DB_BACKEND=memory swaps in the in-memory store for tests and load runs)
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mongo').lower()
+if DB_BACKEND == 'mongo':
+    client, db = open_storage('mongo', os.environ['MONGO_URL'], os.environ['DB_NAME'],
+                              event_listeners=[mongo_command_listener()])
+else:
+    client, db = open_storage(DB_BACKEND, None, os.environ.get('DB_NAME', 'oracleiq'),
+                              memory_latency=float(os.environ.get('DB_MEMORY_LATENCY_MS', '0')) / 1000)
+
+# Per-request / per-loop-iteration operation counts (DB_QUERY_TRACKING=0 disables)
+query_counter_options = query_counter_options_from_env()
+if query_counter_options:
+    db = instrument_database(db)
 
 # TTS Client
 tts_client = None
@@ -45,10 +67,37 @@ if TTS_AVAILABLE:
         tts_client = OpenAITextToSpeech(api_key=emergent_key)
 
 # Create the main app
-app = FastAPI(title="Cognitive Oracle Trading Platform")
+app = FastAPI(title="Cognitive Oracle Trading Platform", default_response_class=OracleJSONResponse)
+
+# Short-TTL response cache with ETags for read-heavy GETs (RESPONSE_CACHE=0 disables);
+# added first so the latency histograms below include cache hits
+response_cache = response_cache_from_env()
+if response_cache:
+    app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
+# Negotiated brotli/gzip above a size threshold (RESPONSE_COMPRESSION=0 disables)
+compression_options = compression_options_from_env()
+if compression_options:
+    app.add_middleware(CompressionMiddleware, **compression_options)
+
+# Database operations per request; X-DB-Queries/X-DB-Time-Ms headers with DB_QUERY_HEADERS=1.
+# Outside the cache, so a hit reports the 0 operations it actually cost
+if query_counter_options:
+    app.add_middleware(QueryCountMiddleware, **query_counter_options)
+
+# Route latency histograms and outbound integration timings
+app.add_middleware(PrometheusMiddleware)
+instrument_httpx()
+
+task_supervisor.service("event_loop_lag", monitor_event_loop_lag)
+
+# Debug-mode event-loop blocking detector (LOOP_WATCHDOG=1)
+loop_watchdog = watchdog_from_env()
+if loop_watchdog:
+    app.add_middleware(LoopContextMiddleware)
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=OracleJSONRoute)
 
 # Configure logging
 logging.basicConfig(
@@ -255,6 +304,11 @@ async def fetch_coingecko_prices() -> Dict[str, MarketData]:
     """Fetch real prices from CoinGecko API"""
     global price_cache, cache_timestamp
     
+    # A running market replay stands in for the external feed
+    if get_active_replay():
+        replayed = {symbol: replayed_market_data(symbol) for symbol in COINGECKO_IDS}
+        return {symbol: data for symbol, data in replayed.items() if data}
+    
     # Check cache
     if cache_timestamp and (datetime.now(timezone.utc) - cache_timestamp).seconds < CACHE_TTL:
         return price_cache
@@ -300,11 +354,38 @@ async def fetch_coingecko_prices() -> Dict[str, MarketData]:
     # Return cached data or empty dict on error
     return price_cache if price_cache else {}
 
+def replayed_market_data(symbol: str) -> Optional[MarketData]:
+    """Market data from the active replay's latest tick, or None if the symbol isn't replayed"""
+    replay = get_active_replay()
+    tick = replay.snapshot().get(symbol) if replay else None
+    if not tick:
+        return None
+    price = tick["price"]
+    open_price = tick["open"] or price
+    change = price - open_price
+    name = STOCK_SYMBOLS[symbol]["name"] if symbol in STOCK_SYMBOLS else COINGECKO_IDS.get(symbol, symbol).capitalize()
+    return MarketData(
+        symbol=symbol,
+        name=name,
+        price=round(price, 2),
+        change_24h=round(change, 2),
+        change_percent=round(change / open_price * 100, 2) if open_price else 0,
+        volume=tick["volume"],
+        high_24h=round(price * 1.02, 2),
+        low_24h=round(price * 0.98, 2),
+        timestamp=datetime.fromtimestamp(tick["ts"] / 1e9, timezone.utc),
+        source="replay"
+    )
+
 def generate_stock_price(symbol: str) -> MarketData:
     """Generate simulated stock data"""
     if symbol not in STOCK_SYMBOLS:
         raise ValueError(f"Unknown stock symbol: {symbol}")
     
+    replayed = replayed_market_data(symbol)
+    if replayed:
+        return replayed
+    
     config = STOCK_SYMBOLS[symbol]
     base = config["base_price"]
     vol = config["volatility"]
@@ -348,6 +429,7 @@ class ConnectionManager:
                 logger.error(f"Error broadcasting: {e}")
 
 manager = ConnectionManager()
+register_websocket_manager("prices", lambda: len(manager.active_connections))
 
 # ============ ALERT MANAGER ============
 
@@ -450,6 +532,7 @@ class AlertManager:
         logger.info(f"Loaded {len(self.alerts)} pending alerts from database")
 
 alert_manager = AlertManager()
+register_websocket_manager("alerts", lambda: len(alert_manager.alert_connections))
 
 # ============ TRADE CRAWLER ============
 
@@ -477,6 +560,15 @@ class TradeCrawler:
         }
         message['data']['timestamp'] = message['data']['timestamp'].isoformat()
         
+        event_bus.publish(SignalEmitted(
+            signal_id=signal.id,
+            symbol=signal.symbol,
+            signal_type=signal.signal_type,
+            action=signal.action_suggested,
+            source="crawler",
+            data={"urgency": signal.urgency, "message": signal.message}
+        ))
+        
         for conn in self.crawler_connections:
             try:
                 await conn.send_json(message)
@@ -634,138 +726,144 @@ class TradeCrawler:
         )
 
 crawler = TradeCrawler()
+register_websocket_manager("crawler", lambda: len(crawler.crawler_connections))
 
-# Background task for price streaming with alert checking
-async def price_streamer():
-    """Background task to stream prices to all connected clients and check alerts"""
-    while True:
-        try:
-            # Fetch real crypto prices
-            crypto_prices = await fetch_coingecko_prices()
-            
-            # Generate stock prices
-            all_prices = []
-            price_dict = {}
-            
-            for symbol, data in crypto_prices.items():
-                all_prices.append(data.model_dump())
-                price_dict[symbol] = data.price
-            
-            for symbol in STOCK_SYMBOLS.keys():
-                stock_data = generate_stock_price(symbol)
-                all_prices.append(stock_data.model_dump())
-                price_dict[symbol] = stock_data.price
-            
-            # Check price alerts
-            await alert_manager.check_alerts(price_dict)
-            
-            if manager.active_connections:
-                # Convert datetime to ISO string for JSON
-                for price in all_prices:
-                    if isinstance(price.get('timestamp'), datetime):
-                        price['timestamp'] = price['timestamp'].isoformat()
-                
-                await manager.broadcast({
-                    "type": "price_update",
-                    "data": all_prices,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                })
-            
-            await asyncio.sleep(5)  # Update every 5 seconds
-        except Exception as e:
-            logger.error(f"Price streamer error: {e}")
-            await asyncio.sleep(5)
+# Seconds between price broadcasts (the load test runs it faster)
+PRICE_STREAM_INTERVAL = float(os.environ.get("PRICE_STREAM_INTERVAL", "5"))
 
-# Background task for trade crawler
-async def trade_crawler_task():
-    """Background task to crawl for trade signals"""
-    while True:
-        try:
-            # Fetch whale transactions
-            whales = await crawler.fetch_whale_transactions()
-            for whale in whales:
-                urgency = "critical" if whale.usd_value > 10000000 else "high" if whale.usd_value > 1000000 else "medium"
-                action = None
-                if whale.exchange_flow == "inflow":
-                    action = "POTENTIAL_SELL_PRESSURE"
-                elif whale.exchange_flow == "outflow":
-                    action = "POTENTIAL_ACCUMULATION"
-                
-                signal = crawler.create_signal(
-                    signal_type="whale",
-                    urgency=urgency,
-                    symbol=whale.symbol,
-                    message=f"🐋 Whale Alert: {whale.amount:,.2f} {whale.symbol} (${whale.usd_value:,.0f}) moved",
-                    data=whale.model_dump(),
-                    action=action
-                )
-                signal.data['timestamp'] = signal.data['timestamp'].isoformat()
-                await crawler.broadcast_signal(signal)
-                
-                # Store in database
-                doc = signal.model_dump()
-                doc['timestamp'] = doc['timestamp'].isoformat()
-                await db.crawler_signals.insert_one(doc)
-            
-            # Fetch news headlines
-            news = await crawler.fetch_news_headlines()
-            for item in news:
-                urgency = "critical" if item.impact == "high" else "medium" if item.impact == "medium" else "low"
-                action = "CONSIDER_LONG" if item.sentiment == "bullish" else "CONSIDER_SHORT" if item.sentiment == "bearish" else None
-                
-                signal = crawler.create_signal(
-                    signal_type="news",
-                    urgency=urgency,
-                    symbol=item.symbols[0] if item.symbols else "MARKET",
-                    message=f"📰 {item.title}",
-                    data=item.model_dump(),
-                    action=action
-                )
-                signal.data['timestamp'] = signal.data['timestamp'].isoformat()
-                await crawler.broadcast_signal(signal)
-                
-                doc = signal.model_dump()
-                doc['timestamp'] = doc['timestamp'].isoformat()
-                await db.crawler_signals.insert_one(doc)
-            
-            # Fetch social signals
-            social = await crawler.fetch_social_signals()
-            for item in social:
-                urgency = "high" if item.engagement > 10000 else "medium" if item.engagement > 1000 else "low"
-                
-                signal = crawler.create_signal(
-                    signal_type="social",
-                    urgency=urgency,
-                    symbol=item.symbols[0] if item.symbols else "CRYPTO",
-                    message=f"📱 [{item.platform.upper()}] {item.content[:100]}",
-                    data=item.model_dump(),
-                    action=None
-                )
-                signal.data['timestamp'] = signal.data['timestamp'].isoformat()
-                await crawler.broadcast_signal(signal)
-            
-            # Fetch orderbook signals
-            orderbook = await crawler.fetch_orderbook_signals()
-            for item in orderbook:
-                if abs(item.imbalance) > 0.15:  # Only significant imbalances
-                    urgency = "high" if abs(item.imbalance) > 0.3 else "medium"
-                    action = "BULLISH_PRESSURE" if item.imbalance > 0 else "BEARISH_PRESSURE"
-                    
-                    signal = crawler.create_signal(
-                        signal_type="orderbook",
-                        urgency=urgency,
-                        symbol=item.symbol,
-                        message=f"📊 Order book imbalance on {item.exchange}: {item.imbalance:+.1%}",
-                        data=item.model_dump(),
-                        action=action
-                    )
-                    signal.data['timestamp'] = signal.data['timestamp'].isoformat()
-                    await crawler.broadcast_signal(signal)
-            
-            await asyncio.sleep(10)  # Check every 10 seconds
-        except Exception as e:
-            logger.error(f"Trade crawler error: {e}")
-            await asyncio.sleep(10)
+# Optional tick recording (TICK_RECORD_DIR) and market replay (MARKET_REPLAY_DIR)
+tick_recorder = recorder_from_env()
+market_replay = replay_from_env()
+if market_replay:
+    set_active_replay(market_replay)
+    task_supervisor.service("market_replay", market_replay.run, restart=False)
+    logger.info(f"Market replay enabled: {market_replay.get_status()}")
+
+async def stream_prices():
+    """Stream prices to all connected clients and check alerts (one supervised tick)"""
+    # Fetch real crypto prices
+    crypto_prices = await fetch_coingecko_prices()
+
+    # Generate stock prices
+    all_prices = []
+    price_dict = {}
+
+    for symbol, data in crypto_prices.items():
+        all_prices.append(data.model_dump())
+        price_dict[symbol] = data.price
+
+    for symbol in STOCK_SYMBOLS.keys():
+        stock_data = generate_stock_price(symbol)
+        all_prices.append(stock_data.model_dump())
+        price_dict[symbol] = stock_data.price
+
+    # Record what was streamed (replayed ticks are already on disk)
+    if tick_recorder and not market_replay:
+        tick_recorder.record({p["symbol"]: (p["price"], p["volume"]) for p in all_prices})
+
+    # Alerts, risk and other price consumers subscribe to the ticks
+    event_bus.publish_many(PriceTick(symbol, price) for symbol, price in price_dict.items())
+
+    if manager.active_connections:
+        # Convert datetime to ISO string for JSON
+        for price in all_prices:
+            if isinstance(price.get('timestamp'), datetime):
+                price['timestamp'] = price['timestamp'].isoformat()
+
+        await manager.broadcast({
+            "type": "price_update",
+            "data": all_prices,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
+
+task_supervisor.periodic("price_streamer", stream_prices, PRICE_STREAM_INTERVAL)
+
+TRADE_CRAWL_INTERVAL = 10
+
+async def crawl_trade_signals():
+    """Crawl for trade signals and broadcast them (one supervised tick)"""
+    # Fetch whale transactions
+    whales = await crawler.fetch_whale_transactions()
+    for whale in whales:
+        urgency = "critical" if whale.usd_value > 10000000 else "high" if whale.usd_value > 1000000 else "medium"
+        action = None
+        if whale.exchange_flow == "inflow":
+            action = "POTENTIAL_SELL_PRESSURE"
+        elif whale.exchange_flow == "outflow":
+            action = "POTENTIAL_ACCUMULATION"
+
+        signal = crawler.create_signal(
+            signal_type="whale",
+            urgency=urgency,
+            symbol=whale.symbol,
+            message=f"🐋 Whale Alert: {whale.amount:,.2f} {whale.symbol} (${whale.usd_value:,.0f}) moved",
+            data=whale.model_dump(),
+            action=action
+        )
+        signal.data['timestamp'] = signal.data['timestamp'].isoformat()
+        await crawler.broadcast_signal(signal)
+
+        # Store in database
+        doc = signal.model_dump()
+        doc['timestamp'] = doc['timestamp'].isoformat()
+        await db.crawler_signals.insert_one(doc)
+
+    # Fetch news headlines
+    news = await crawler.fetch_news_headlines()
+    for item in news:
+        urgency = "critical" if item.impact == "high" else "medium" if item.impact == "medium" else "low"
+        action = "CONSIDER_LONG" if item.sentiment == "bullish" else "CONSIDER_SHORT" if item.sentiment == "bearish" else None
+
+        signal = crawler.create_signal(
+            signal_type="news",
+            urgency=urgency,
+            symbol=item.symbols[0] if item.symbols else "MARKET",
+            message=f"📰 {item.title}",
+            data=item.model_dump(),
+            action=action
+        )
+        signal.data['timestamp'] = signal.data['timestamp'].isoformat()
+        await crawler.broadcast_signal(signal)
+
+        doc = signal.model_dump()
+        doc['timestamp'] = doc['timestamp'].isoformat()
+        await db.crawler_signals.insert_one(doc)
+
+    # Fetch social signals
+    social = await crawler.fetch_social_signals()
+    for item in social:
+        urgency = "high" if item.engagement > 10000 else "medium" if item.engagement > 1000 else "low"
+
+        signal = crawler.create_signal(
+            signal_type="social",
+            urgency=urgency,
+            symbol=item.symbols[0] if item.symbols else "CRYPTO",
+            message=f"📱 [{item.platform.upper()}] {item.content[:100]}",
+            data=item.model_dump(),
+            action=None
+        )
+        signal.data['timestamp'] = signal.data['timestamp'].isoformat()
+        await crawler.broadcast_signal(signal)
+
+    # Fetch orderbook signals
+    orderbook = await crawler.fetch_orderbook_signals()
+    for item in orderbook:
+        if abs(item.imbalance) > 0.15:  # Only significant imbalances
+            urgency = "high" if abs(item.imbalance) > 0.3 else "medium"
+            action = "BULLISH_PRESSURE" if item.imbalance > 0 else "BEARISH_PRESSURE"
+
+            signal = crawler.create_signal(
+                signal_type="orderbook",
+                urgency=urgency,
+                symbol=item.symbol,
+                message=f"📊 Order book imbalance on {item.exchange}: {item.imbalance:+.1%}",
+                data=item.model_dump(),
+                action=action
+            )
+            signal.data['timestamp'] = signal.data['timestamp'].isoformat()
+            await crawler.broadcast_signal(signal)
+
+task_supervisor.periodic("trade_crawler", crawl_trade_signals, TRADE_CRAWL_INTERVAL)
 
 # ============ AUTHENTICATION ============
 
@@ -978,8 +1076,8 @@ async def get_market_price(symbol: str):
     raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
 
 @api_router.get("/market/{symbol}/history")
-async def get_price_history(symbol: str, periods: int = 50):
-    """Get historical price data for charting"""
+async def get_price_history(symbol: str, periods: int = 50, max_points: Optional[int] = Query(None, ge=2)):
+    """Get historical price data for charting (merged into at most max_points candles)"""
     symbol = symbol.upper()
     
     # Get base price
@@ -1018,7 +1116,7 @@ async def get_price_history(symbol: str, periods: int = 50):
             "volume": round(random.uniform(1e6, 10e6), 0)
         })
     
-    return history
+    return downsample_ohlc(history, max_points)
 
 # ============ AI AGENT ROUTES ============
 
@@ -1195,6 +1293,16 @@ async def execute_trade(action: str, symbol: str, quantity: int, request: Reques
     doc = trade.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
     await db.trades.insert_one(doc)
+    await journal_rollups.record_trade(doc)
+    event_bus.publish(TradeExecuted(
+        trade_id=trade.id,
+        user_id=trade.user_id,
+        symbol=symbol,
+        side=trade.action.lower(),
+        quantity=quantity,
+        price=price,
+        source="trades"
+    ))
     
     return trade
 
@@ -1283,30 +1391,59 @@ init_alert_routes(db, alert_manager, get_current_user, fetch_coingecko_prices,
 init_crawler_routes(db)
 
 # ============ EXPORT ROUTES ============
+from modules.report_renderer import report_renderer, ReportQueueFull
 
-@api_router.get("/export/trades/csv")
-async def export_trades_csv(request: Request):
-    """Export trade history as CSV"""
-    user = await get_current_user(request)
+EXPORT_BATCH_SIZE = 500
+
+CSV_EXPORT_HEADER = ["ID", "Date", "Time", "Action", "Symbol", "Quantity", "Price", "Total Value", "Status", "Confidence"]
+
+def build_trade_export_query(user: Optional[User], start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, symbol: Optional[str] = None) -> Dict[str, Any]:
+    """Build the trades filter for exports (dates are YYYY-MM-DD, inclusive)"""
+    query: Dict[str, Any] = {"user_id": user.user_id} if user else {}
     
-    query = {"user_id": user.user_id} if user else {}
-    trades = await db.trades.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date and end_date must be formatted as YYYY-MM-DD")
     
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
+    timestamp_filter = {}
+    if start:
+        timestamp_filter["$gte"] = start.strftime("%Y-%m-%d")
+    if end:
+        timestamp_filter["$lt"] = (end + timedelta(days=1)).strftime("%Y-%m-%d")
+    if timestamp_filter:
+        query["timestamp"] = timestamp_filter
     
-    # Header
-    writer.writerow(["ID", "Date", "Time", "Action", "Symbol", "Quantity", "Price", "Total Value", "Status", "Confidence"])
+    if symbol:
+        symbols = [s.strip().upper() for s in symbol.split(",") if s.strip()]
+        query["symbol"] = symbols[0] if len(symbols) == 1 else {"$in": symbols}
     
-    for trade in trades:
+    return query
+
+def _csv_line(row: List[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+async def stream_trades_csv(query: Dict[str, Any]):
+    """Yield CSV text one cursor batch at a time"""
+    yield _csv_line(CSV_EXPORT_HEADER)
+    
+    cursor = db.trades.find(query, {"_id": 0}).sort("timestamp", -1).batch_size(EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = 0
+    
+    async for trade in cursor:
         timestamp = trade.get('timestamp')
         if isinstance(timestamp, str):
             timestamp = datetime.fromisoformat(timestamp)
         
         date_str = timestamp.strftime("%Y-%m-%d") if timestamp else ""
         time_str = timestamp.strftime("%H:%M:%S") if timestamp else ""
-        total_value = trade.get('quantity', 0) * trade.get('price', 0)
+        total_value = (trade.get('quantity') or 0) * (trade.get('price') or 0)
         
         writer.writerow([
             trade.get('id', ''),
@@ -1315,90 +1452,125 @@ async def export_trades_csv(request: Request):
             trade.get('action', ''),
             trade.get('symbol', ''),
             trade.get('quantity', 0),
-            f"${trade.get('price', 0):,.2f}",
+            f"${trade.get('price') or 0:,.2f}",
             f"${total_value:,.2f}",
             trade.get('status', ''),
-            f"{trade.get('consensus_confidence', 0)*100:.1f}%"
+            f"{(trade.get('consensus_confidence') or 0)*100:.1f}%"
         ])
+        rows += 1
+        
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
     
-    output.seek(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def stream_trades_ndjson(query: Dict[str, Any]):
+    """Yield newline-delimited JSON, one trade per line, flushed per cursor batch"""
+    cursor = db.trades.find(query, {"_id": 0}).sort("timestamp", -1).batch_size(EXPORT_BATCH_SIZE)
+    lines = []
+    
+    async for trade in cursor:
+        lines.append(json.dumps(trade, default=str))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+@api_router.get("/export/trades/csv")
+async def export_trades_csv(request: Request, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None, symbol: Optional[str] = None):
+    """Export trade history as CSV, streamed from the database without a row cap"""
+    user = await get_current_user(request)
+    query = build_trade_export_query(user, start_date, end_date, symbol)
     
     return StreamingResponse(
-        iter([output.getvalue()]),
+        stream_trades_csv(query),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
     )
 
-@api_router.get("/export/trades/pdf")
-async def export_trades_pdf(request: Request):
-    """Export trade history as PDF"""
+@api_router.get("/export/trades/json")
+async def export_trades_json(request: Request, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, symbol: Optional[str] = None):
+    """Export trade history as newline-delimited JSON, streamed without a row cap"""
     user = await get_current_user(request)
+    query = build_trade_export_query(user, start_date, end_date, symbol)
     
-    query = {"user_id": user.user_id} if user else {}
-    trades = await db.trades.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    
-    # Create PDF in memory
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    elements = []
-    
-    # Title
-    elements.append(Paragraph("Cognitive Oracle Trading Platform", styles['Title']))
-    elements.append(Paragraph("Trade History Report", styles['Heading2']))
-    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-    elements.append(Spacer(1, 20))
+    return StreamingResponse(
+        stream_trades_ndjson(query),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"}
+    )
+
+PDF_REPORT_MAX_ROWS = 10000
+
+@api_router.get("/export/trades/pdf")
+async def export_trades_pdf(request: Request, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None, symbol: Optional[str] = None):
+    """Export trade history as PDF, rendered off the event loop and cached per trade state"""
+    user = await get_current_user(request)
+    query = build_trade_export_query(user, start_date, end_date, symbol)
     
-    # Create table data
-    table_data = [["Date", "Action", "Symbol", "Qty", "Price", "Total", "Status"]]
+    # The newest matching trade identifies the report contents for caching
+    latest = await db.trades.find_one(query, {"_id": 0, "id": 1, "timestamp": 1}, sort=[("timestamp", -1)])
+    cache_key = (
+        user.user_id if user else None, start_date, end_date, symbol,
+        (latest or {}).get("id"), str((latest or {}).get("timestamp"))
+    )
     
-    for trade in trades[:50]:  # Limit to 50 for PDF
-        timestamp = trade.get('timestamp')
-        if isinstance(timestamp, str):
-            timestamp = datetime.fromisoformat(timestamp)
+    report = report_renderer.get_cached(cache_key)
+    if report is None:
+        total_trades = await db.trades.count_documents(query)
         
-        date_str = timestamp.strftime("%Y-%m-%d %H:%M") if timestamp else ""
-        total_value = trade.get('quantity', 0) * trade.get('price', 0)
+        rows = []
+        cursor = db.trades.find(query, {"_id": 0}).sort("timestamp", -1).limit(PDF_REPORT_MAX_ROWS).batch_size(EXPORT_BATCH_SIZE)
+        async for trade in cursor:
+            timestamp = trade.get('timestamp')
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            
+            date_str = timestamp.strftime("%Y-%m-%d %H:%M") if timestamp else ""
+            total_value = (trade.get('quantity') or 0) * (trade.get('price') or 0)
+            
+            rows.append((
+                date_str,
+                str(trade.get('action', '')),
+                str(trade.get('symbol', '')),
+                str(trade.get('quantity', 0)),
+                f"${trade.get('price') or 0:,.2f}",
+                f"${total_value:,.2f}",
+                str(trade.get('status', ''))
+            ))
         
-        table_data.append([
-            date_str,
-            trade.get('action', ''),
-            trade.get('symbol', ''),
-            str(trade.get('quantity', 0)),
-            f"${trade.get('price', 0):,.2f}",
-            f"${total_value:,.2f}",
-            trade.get('status', '')
-        ])
-    
-    # Create and style table
-    table = Table(table_data, colWidths=[80, 50, 50, 40, 70, 80, 60])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0.5, 0.5)),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.Color(0.95, 0.95, 0.95)),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, colors.Color(0.7, 0.7, 0.7)),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)])
-    ]))
-    
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-    elements.append(Paragraph(f"Total trades: {len(trades)}", styles['Normal']))
-    
-    doc.build(elements)
-    buffer.seek(0)
+        try:
+            report = await report_renderer.render(cache_key, rows, total_trades)
+        except ReportQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Report generation is busy, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
     
     return StreamingResponse(
-        buffer,
+        report.iter_chunks(),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"}
+        headers={
+            "Content-Disposition": f"attachment; filename=trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            "Content-Length": str(report.size),
+            "X-Report-Cache": "hit" if report.cached else "miss"
+        }
     )
 
+@api_router.get("/export/reports/stats")
+async def export_report_stats():
+    """PDF renderer pool and cache statistics"""
+    return report_renderer.get_stats()
+
 @api_router.get("/export/alerts/csv")
 async def export_alerts_csv(request: Request):
     """Export price alerts as CSV"""
@@ -1764,6 +1936,16 @@ async def announce_trade(request: TradeAnnouncementRequest):
         "announced": True
     }
     await db.trades.insert_one(trade_doc)
+    await journal_rollups.record_trade(trade_doc)
+    event_bus.publish(TradeExecuted(
+        trade_id=trade_doc["id"],
+        user_id=None,
+        symbol=symbol,
+        side=request.action.lower(),
+        quantity=quantity,
+        price=price,
+        source="trades"
+    ))
     
     # Broadcast trade to WebSocket clients
     await manager.broadcast({
@@ -1909,6 +2091,56 @@ class JournalEntry(BaseModel):
     ai_insights: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+from modules.journal_rollups import JournalRollupStore
+journal_rollups = JournalRollupStore(db)
+
+def sample_journal_trades(date: str) -> List[Dict[str, Any]]:
+    """Demo trades shown for days without any recorded trades"""
+    return [
+        {"action": "buy", "symbol": "BTC", "quantity": 0.5, "price": 89500, "profit_loss": 250, "timestamp": f"{date}T10:30:00"},
+        {"action": "sell", "symbol": "ETH", "quantity": 5, "price": 2950, "profit_loss": -75, "timestamp": f"{date}T14:15:00"},
+        {"action": "buy", "symbol": "SOL", "quantity": 20, "price": 125, "profit_loss": 180, "timestamp": f"{date}T16:45:00"},
+    ]
+
+async def summarize_journal_period(user: Optional[User], start_date: str, end_date: str) -> Dict[str, Any]:
+    """Aggregate daily journal stats for a date range from the daily rollups"""
+    rollups = await journal_rollups.get_days(user.user_id if user else None, start_date, end_date)
+    
+    daily_summaries = []
+    total_pnl = 0
+    total_trades = 0
+    total_wins = 0
+    
+    for date in sorted(rollups, reverse=True):
+        day = rollups[date]
+        if day["trades_count"] == 0:
+            # Same demo fallback the daily summary uses
+            sample = sample_journal_trades(date)
+            day = {
+                "trades_count": len(sample),
+                "wins": sum(1 for t in sample if t["profit_loss"] > 0),
+                "total_pnl": sum(t["profit_loss"] for t in sample)
+            }
+        win_rate = day["wins"] / day["trades_count"] * 100
+        daily_summaries.append({
+            "date": date,
+            "pnl": round(day["total_pnl"], 2),
+            "trades": day["trades_count"],
+            "win_rate": round(win_rate, 1)
+        })
+        total_pnl += day["total_pnl"]
+        total_trades += day["trades_count"]
+        total_wins += day["wins"]
+    
+    overall_win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0
+    
+    return {
+        "daily_summaries": daily_summaries,
+        "total_pnl": round(total_pnl, 2),
+        "total_trades": total_trades,
+        "overall_win_rate": round(overall_win_rate, 1)
+    }
+
 @api_router.get("/journal/daily-summary")
 async def get_daily_summary(date: Optional[str] = None, include_audio: bool = False, request: Request = None):
     """Get trading journal summary for a specific day"""
@@ -1931,11 +2163,7 @@ async def get_daily_summary(date: Optional[str] = None, include_audio: bool = Fa
     
     if not trades:
         # Generate sample trades for demo
-        trades = [
-            {"action": "buy", "symbol": "BTC", "quantity": 0.5, "price": 89500, "profit_loss": 250, "timestamp": f"{date}T10:30:00"},
-            {"action": "sell", "symbol": "ETH", "quantity": 5, "price": 2950, "profit_loss": -75, "timestamp": f"{date}T14:15:00"},
-            {"action": "buy", "symbol": "SOL", "quantity": 20, "price": 125, "profit_loss": 180, "timestamp": f"{date}T16:45:00"},
-        ]
+        trades = sample_journal_trades(date)
     
     # Calculate statistics
     wins = sum(1 for t in trades if (t.get("profit_loss") or 0) > 0)
@@ -2003,25 +2231,13 @@ async def get_weekly_summary(request: Request = None):
     """Get trading journal summary for the past 7 days"""
     user = await get_current_user(request) if request else None
     
-    daily_summaries = []
-    total_pnl = 0
-    total_trades = 0
-    total_wins = 0
-    
-    for i in range(7):
-        date = (datetime.now(timezone.utc) - timedelta(days=i)).strftime("%Y-%m-%d")
-        summary = await get_daily_summary(date, request)
-        daily_summaries.append({
-            "date": date,
-            "pnl": summary["total_pnl"],
-            "trades": summary["trades_count"],
-            "win_rate": summary["win_rate"]
-        })
-        total_pnl += summary["total_pnl"]
-        total_trades += summary["trades_count"]
-        total_wins += summary["wins"]
-    
-    overall_win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0
+    today = datetime.now(timezone.utc)
+    summary = await summarize_journal_period(
+        user,
+        (today - timedelta(days=6)).strftime("%Y-%m-%d"),
+        today.strftime("%Y-%m-%d")
+    )
+    total_pnl = summary["total_pnl"]
     
     # AI weekly insight
     if total_pnl > 500:
@@ -2035,13 +2251,44 @@ async def get_weekly_summary(request: Request = None):
     
     return {
         "period": "7 days",
-        "daily_summaries": daily_summaries,
-        "total_pnl": round(total_pnl, 2),
-        "total_trades": total_trades,
-        "overall_win_rate": round(overall_win_rate, 1),
+        **summary,
         "ai_insights": weekly_insight
     }
 
+@api_router.get("/journal/monthly-summary")
+async def get_monthly_summary(month: Optional[str] = None, request: Request = None):
+    """Get trading journal summary for a calendar month (YYYY-MM, defaults to current)"""
+    user = await get_current_user(request) if request else None
+    
+    today = datetime.now(timezone.utc)
+    if not month:
+        month = today.strftime("%Y-%m")
+    try:
+        first_day = datetime.strptime(f"{month}-01", "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must be formatted as YYYY-MM")
+    
+    next_month = (first_day + timedelta(days=32)).replace(day=1)
+    last_day = min(next_month - timedelta(days=1), today.replace(tzinfo=None))
+    if last_day < first_day:
+        raise HTTPException(status_code=400, detail="month is in the future")
+    
+    summary = await summarize_journal_period(user, first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d"))
+    total_pnl = summary["total_pnl"]
+    
+    if total_pnl > 0:
+        monthly_insight = f"Profitable month with ${total_pnl:,.2f} gained across {summary['total_trades']} trades."
+    elif total_pnl < 0:
+        monthly_insight = f"Down ${abs(total_pnl):,.2f} this month. Review your losing days for recurring patterns."
+    else:
+        monthly_insight = "Flat month. Focus on consistency and disciplined entries."
+    
+    return {
+        "period": month,
+        **summary,
+        "ai_insights": monthly_insight
+    }
+
 @api_router.post("/journal/add-note")
 async def add_journal_note(date: str, note: str, request: Request = None):
     """Add a personal note to a trading journal entry"""
@@ -2378,7 +2625,9 @@ async def websocket_crawler(websocket: WebSocket):
 # Import new modules
 from modules.trading_playground import TradingPlaygroundEngine, PlaygroundOrder
 from modules.autonomous_bot import AutonomousBotEngine, TradingStrategy, BotMode
-from modules.training_system import TrainingEngine, BacktestConfig
+from modules.training_system import TrainingEngine, BacktestConfig, ParameterSweep, WalkForwardStudy
+from modules.backtest_sweep import backtest_sweeper, SweepBusy
+from modules.backtest_jobs import BacktestJobQueue, BacktestResultCache, JobQueueFull, job_queue_options_from_env
 from modules.exchange_integration import ExchangeManager, ExchangeType, OrderSide, OrderType
 from modules.social_integration import SocialManager
 
@@ -2386,6 +2635,8 @@ from modules.social_integration import SocialManager
 playground_engine = TradingPlaygroundEngine(db)
 bot_engine = AutonomousBotEngine(db, playground_engine)
 training_engine = TrainingEngine(db)
+backtest_jobs = BacktestJobQueue(BacktestResultCache(db), **job_queue_options_from_env())
+task_supervisor.service("backtest_job_dispatcher", backtest_jobs.run)
 exchange_manager = ExchangeManager(db)
 social_manager = SocialManager(db)
 
@@ -2518,7 +2769,10 @@ async def set_bot_mode(bot_id: str, mode: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid mode. Use: full_auto, semi_auto, paused")
     
-    result = await bot_engine.update_bot_mode(bot_id, mode_enum)
+    try:
+        result = await bot_engine.update_bot_mode(bot_id, mode_enum)
+    except GroupFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "60"})
     return result
 
 @api_router.get("/bot/{bot_id}/performance")
@@ -2616,31 +2870,174 @@ async def complete_scenario(
     )
     return result
 
-@api_router.post("/training/backtest")
-async def run_backtest(
+async def backtest_config_from_query(
     symbol: str = "BTC",
     start_date: str = "2024-01-01",
     end_date: str = "2024-12-31",
     strategy_type: str = "sma_cross",
+    timeframe: str = "1h",
     initial_capital: float = 10000.0,
+    position_size_percent: float = Query(10.0, gt=0, le=100),
+    stop_loss_percent: float = Query(5.0, ge=0),
+    take_profit_percent: float = Query(10.0, ge=0),
+    fee_bps: float = Query(10.0, ge=0),
+    slippage_bps: float = Query(5.0, ge=0),
+    allow_short: bool = False,
     request: Request = None
-):
-    """Run a strategy backtest"""
+) -> BacktestConfig:
+    """Backtest data range, strategy, sizing and costs from the query string (shared by backtests and sweeps)"""
     user = await get_current_user(request) if request else None
     user_id = user.get("id") if user else "demo"
     
-    config = BacktestConfig(
+    return BacktestConfig(
         user_id=user_id,
         symbol=symbol,
         start_date=start_date,
         end_date=end_date,
+        timeframe=timeframe,
         strategy_type=strategy_type,
-        initial_capital=initial_capital
+        initial_capital=initial_capital,
+        position_size_percent=position_size_percent,
+        stop_loss_percent=stop_loss_percent,
+        take_profit_percent=take_profit_percent,
+        fee_bps=fee_bps,
+        slippage_bps=slippage_bps,
+        allow_short=allow_short,
     )
-    
-    results = await training_engine.run_backtest(config)
+
+@api_router.post("/training/backtest")
+async def run_backtest(
+    max_points: Optional[int] = Query(None, ge=3),
+    parameters: Optional[Dict[str, Any]] = Body(None),
+    config: BacktestConfig = Depends(backtest_config_from_query)
+):
+    """
+    Run a strategy backtest (equity curve downsampled to max_points).
+    The optional JSON body holds strategy parameters, e.g. {"fast": 10, "slow": 30}.
+    """
+    config.parameters = parameters or {}
+    try:
+        results = await training_engine.run_backtest(config, max_points=max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"config": config.model_dump(), "results": results}
 
+@api_router.post("/training/sweep")
+async def run_parameter_sweep(sweep: ParameterSweep, config: BacktestConfig = Depends(backtest_config_from_query)):
+    """
+    Backtest every combination of a parameter grid, or random draws from a
+    search space, across the sweep process pool. Streams newline-delimited
+    JSON events: start, one results event per finished chunk, done (top rows).
+    """
+    events = training_engine.run_sweep(config, sweep)
+    try:
+        # The first event comes after validation, so bad input is still a plain 400
+        first = await events.__anext__()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SweepBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+    async def stream():
+        # orjson, like every other response: NaN metrics become null, not invalid JSON
+        yield fast_dumps(first) + b"\n"
+        async for event in events:
+            yield fast_dumps(event) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@api_router.post("/training/walk-forward")
+async def run_walk_forward(study: WalkForwardStudy, config: BacktestConfig = Depends(backtest_config_from_query)):
+    """
+    Walk-forward optimization: pick the best parameters on each training
+    window, judge them on the next unseen window, and report the stitched
+    out-of-sample equity curve with robustness metrics
+    """
+    try:
+        return await training_engine.run_walk_forward(config, study)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SweepBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+# ---- queued backtest jobs ----
+
+async def submit_backtest_job(kind: str, config: BacktestConfig, search: Optional[ParameterSweep] = None):
+    try:
+        key, cost, run = training_engine.plan_job(kind, config, search)
+        job = await backtest_jobs.submit(kind, key, cost, config.user_id, run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return {**job.to_dict(), "queue_position": backtest_jobs.queue_position(job)}
+
+def get_backtest_job(job_id: str):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.post("/training/jobs/backtest")
+async def submit_backtest(
+    parameters: Optional[Dict[str, Any]] = Body(None),
+    config: BacktestConfig = Depends(backtest_config_from_query)
+):
+    """Queue a backtest (answered at once when an identical one is cached); poll the job for its result"""
+    config.parameters = parameters or {}
+    return await submit_backtest_job("backtest", config)
+
+@api_router.post("/training/jobs/sweep")
+async def submit_sweep(sweep: ParameterSweep, config: BacktestConfig = Depends(backtest_config_from_query)):
+    """Queue a parameter sweep; the result is the sweep's final event (best and top rows)"""
+    return await submit_backtest_job("sweep", config, sweep)
+
+@api_router.post("/training/jobs/walk-forward")
+async def submit_walk_forward(study: WalkForwardStudy, config: BacktestConfig = Depends(backtest_config_from_query)):
+    """Queue a walk-forward study"""
+    return await submit_backtest_job("walk_forward", config, study)
+
+@api_router.get("/training/jobs")
+async def get_backtest_job_stats():
+    """Queued and running jobs, slot limits and result cache counters"""
+    return backtest_jobs.get_stats()
+
+@api_router.get("/training/jobs/{job_id}")
+async def get_backtest_job_status(job_id: str):
+    """Job status, timings and queue position (the result has its own endpoint)"""
+    job = get_backtest_job(job_id)
+    return {**job.to_dict(), "queue_position": backtest_jobs.queue_position(job)}
+
+@api_router.get("/training/jobs/{job_id}/progress")
+async def get_backtest_job_progress(job_id: str):
+    """Lightweight progress poll: status, fraction done and queue position"""
+    job = get_backtest_job(job_id)
+    return {"job_id": job.id, "status": job.status, "progress": round(job.progress, 4),
+            "queue_position": backtest_jobs.queue_position(job)}
+
+@api_router.get("/training/jobs/{job_id}/result")
+async def get_backtest_job_result(job_id: str, max_points: Optional[int] = Query(None, ge=3)):
+    """A completed job's result (409 until then); backtest equity curves downsampled to max_points"""
+    job = get_backtest_job(job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}" + (f": {job.error}" if job.error else ""))
+    result = job.result
+    if max_points and job.kind == "backtest":
+        result = {**result, "equity_curve": downsample_points(result["equity_curve"], max_points, "equity", "index")}
+    return {"job_id": job.id, "kind": job.kind, "cached": job.cached, "result": result}
+
+@api_router.post("/training/jobs/{job_id}/cancel")
+async def cancel_backtest_job(job_id: str):
+    """Cancel a queued or running job; finished jobs are returned unchanged"""
+    get_backtest_job(job_id)
+    job = backtest_jobs.cancel(job_id)
+    return job.to_dict()
+
+@api_router.get("/training/sweep/stats")
+async def get_sweep_stats():
+    """Sweep pool size, running sweeps and totals"""
+    return backtest_sweeper.get_stats()
+
 # ============ EXCHANGE INTEGRATION ENDPOINTS ============
 
 @api_router.get("/exchange/supported")
@@ -2947,17 +3344,18 @@ async def finalize_competition(competition_id: str):
 
 # ============ ML TRAINING ENDPOINTS ============
 
-from modules.ml_training import get_training_status, start_training, get_prediction, ml_trainer
+# sklearn/pandas load on first use of an ML route
+ml_training = lazy_import("modules.ml_training")
 
 @api_router.get("/ml/training/status")
 async def get_ml_training_status():
     """Get ML training status and available models"""
-    return get_training_status()
+    return ml_training.get_training_status()
 
 @api_router.get("/ml/training/models")
 async def list_trained_models():
     """List all trained ML models"""
-    return {"models": ml_trainer.list_models()}
+    return {"models": ml_training.ml_trainer.list_models()}
 
 @api_router.post("/ml/training/train")
 async def train_ml_model(
@@ -2970,7 +3368,7 @@ async def train_ml_model(
         # Use mock data for demo
         return {"error": "Training data required. Provide OHLCV data."}
     
-    result = start_training(symbol, model_type, data)
+    result = ml_training.start_training(symbol, model_type, data)
     return result
 
 @api_router.post("/ml/training/predict")
@@ -2983,7 +3381,7 @@ async def ml_trained_predict(
     if not features:
         return {"error": "Features required for prediction"}
     
-    return get_prediction(symbol, model_type, features)
+    return ml_training.get_prediction(symbol, model_type, features)
 
 # ============ BENZINGA NEWS ENDPOINTS ============
 
@@ -3262,8 +3660,7 @@ async def ai_sentiment_for_symbol(symbol: str):
 
 
 # ============ ENHANCED ML TRAINING ENDPOINTS ============
-from modules.ml_training import ml_trainer, TrainingConfig, ModelType, FeatureEngineer
-import pandas as pd
+pd = lazy_import("pandas")
 
 @api_router.post("/ml/train/full/{symbol}")
 async def train_full_model(symbol: str, model_type: str = "direction", periods: int = 500):
@@ -3335,22 +3732,22 @@ async def train_full_model(symbol: str, model_type: str = "direction", periods:
         df = df.sort_index()
         
         # Create training config
-        config = TrainingConfig(
-            model_type=ModelType(model_type),
+        config = ml_training.TrainingConfig(
+            model_type=ml_training.ModelType(model_type),
             symbol=symbol
         )
         
         # Prepare data and train
-        X, y = ml_trainer.prepare_data(df, config)
+        X, y = ml_training.ml_trainer.prepare_data(df, config)
         
         if len(X) < 50:
             return {"success": False, "error": "Insufficient data for training"}
         
         # Train model
-        result = ml_trainer.train_sklearn_model(X, y, config)
+        result = ml_training.ml_trainer.train_sklearn_model(X, y, config)
         
         # Save model
-        model_path = ml_trainer.save_model(result['model_key'])
+        model_path = ml_training.ml_trainer.save_model(result['model_key'])
         
         return {
             "success": True,
@@ -3371,8 +3768,8 @@ async def train_full_model(symbol: str, model_type: str = "direction", periods:
 async def list_ml_models():
     """List all trained ML models"""
     return {
-        "models": ml_trainer.list_models(),
-        "model_types": [t.value for t in ModelType],
+        "models": ml_training.ml_trainer.list_models(),
+        "model_types": [t.value for t in ml_training.ModelType],
         "supported_symbols": ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE"],
         "status": "ready"
     }
@@ -3381,7 +3778,7 @@ async def list_ml_models():
 async def get_ml_model_info(symbol: str, model_type: str):
     """Get info about a specific trained model"""
     model_key = f"{symbol.upper()}_{model_type}"
-    return ml_trainer.get_model_info(model_key)
+    return ml_training.ml_trainer.get_model_info(model_key)
 
 @api_router.post("/ml/predict/trained/{symbol}")
 async def predict_with_trained_model(symbol: str, model_type: str = "direction"):
@@ -3415,7 +3812,7 @@ async def predict_with_trained_model(symbol: str, model_type: str = "direction")
         df['volume'] = [random.uniform(1000000, 10000000) for _ in range(len(df))]
         
         # Generate features
-        feature_engineer = FeatureEngineer()
+        feature_engineer = ml_training.FeatureEngineer()
         features = feature_engineer.generate_features(df)
         
         if len(features) == 0:
@@ -3425,7 +3822,7 @@ async def predict_with_trained_model(symbol: str, model_type: str = "direction")
         latest_features = features.iloc[-1].values
         
         # Make prediction
-        result = ml_trainer.predict(model_key, latest_features)
+        result = ml_training.ml_trainer.predict(model_key, latest_features)
         
         # Map prediction to label
         direction_labels = {0: "bearish", 1: "bullish"}
@@ -3462,13 +3859,14 @@ async def predict_with_trained_model(symbol: str, model_type: str = "direction")
 
 
 # ============ LSTM DEEP LEARNING ENDPOINTS ============
-from modules.lstm_model import train_lstm_model, predict_with_lstm, get_lstm_status, LSTMConfig, get_lstm_predictor
-import yfinance as yf
+# TensorFlow and yfinance load on first use of an LSTM route
+lstm_model = lazy_import("modules.lstm_model")
+yf = lazy_import("yfinance")
 
 @api_router.get("/ml/lstm/status")
 async def lstm_status():
     """Get LSTM model status"""
-    return get_lstm_status()
+    return lstm_model.get_lstm_status()
 
 @api_router.post("/ml/lstm/train/{symbol}")
 async def train_lstm(symbol: str, lookback: int = 60, forecast_horizon: int = 24):
@@ -3506,7 +3904,7 @@ async def train_lstm(symbol: str, lookback: int = 60, forecast_horizon: int = 24
         
         if data is None or len(data) < 200:
             # Generate synthetic data for training
-            import numpy as np
+            np = lazy_import("numpy")
             base_price = {"BTC": 45000, "ETH": 3000, "SOL": 100, "XRP": 0.5, "ADA": 0.5}.get(symbol, 100)
             periods = 500
             
@@ -3531,7 +3929,7 @@ async def train_lstm(symbol: str, lookback: int = 60, forecast_horizon: int = 24
         logger.info(f"Training LSTM with {len(data)} data points")
         
         # Train model
-        result = await train_lstm_model(symbol, data)
+        result = await lstm_model.train_lstm_model(symbol, data)
         
         return result
         
@@ -3608,7 +4006,7 @@ async def predict_lstm(symbol: str):
         if len(data) < 120:
             return {"success": False, "error": "Insufficient data for prediction"}
         
-        result = await predict_with_lstm(symbol, data)
+        result = await lstm_model.predict_with_lstm(symbol, data)
         return result
         
     except Exception as e:
@@ -3722,16 +4120,12 @@ async def disconnect_from_exchange(exchange: str, user_id: str):
 
 
 # ============ TRANSFORMER & ENSEMBLE MODEL ENDPOINTS ============
-from modules.transformer_model import (
-    train_transformer_model, predict_with_transformer, get_transformer_status,
-    get_transformer_predictor, get_ensemble_predictor
-)
-from modules.lstm_model import predict_with_lstm, get_lstm_predictor
+transformer_model = lazy_import("modules.transformer_model")
 
 @api_router.get("/ml/transformer/status")
 async def transformer_status():
     """Get Transformer model status"""
-    return get_transformer_status()
+    return transformer_model.get_transformer_status()
 
 @api_router.post("/ml/transformer/train/{symbol}")
 async def train_transformer(symbol: str):
@@ -3757,7 +4151,7 @@ async def train_transformer(symbol: str):
             'volume': [random.uniform(1e6, 1e8) for _ in prices]
         }, index=dates)
         
-        result = await train_transformer_model(symbol, data)
+        result = await transformer_model.train_transformer_model(symbol, data)
         return result
         
     except Exception as e:
@@ -3789,11 +4183,11 @@ async def ensemble_predict(symbol: str):
         }, index=dates)
         
         # Get predictions from both models
-        lstm_pred = await predict_with_lstm(symbol, data)
-        transformer_pred = await predict_with_transformer(symbol, data)
+        lstm_pred = await lstm_model.predict_with_lstm(symbol, data)
+        transformer_pred = await transformer_model.predict_with_transformer(symbol, data)
         
         # Combine with ensemble
-        ensemble = get_ensemble_predictor(symbol)
+        ensemble = transformer_model.get_ensemble_predictor(symbol)
         result = ensemble.predict(lstm_pred, transformer_pred)
         
         return result
@@ -3806,6 +4200,7 @@ async def ensemble_predict(symbol: str):
 # ============ TOURNAMENT WEBSOCKET ENDPOINTS ============
 from fastapi import WebSocket, WebSocketDisconnect
 from modules.tournament_websocket import handle_tournament_websocket, get_spectator_stats, ws_manager
+register_websocket_manager("tournament", lambda: sum(len(c) for c in ws_manager.active_connections.values()))
 
 @app.websocket("/ws/tournament/{tournament_id}")
 async def tournament_websocket(websocket: WebSocket, tournament_id: str):
@@ -3829,6 +4224,8 @@ async def start_spectator_simulation(tournament_id: str):
 from modules.copy_trading_ws import (
     copy_trading_ws_manager, TradeAction, simulate_master_trades
 )
+register_websocket_manager("copy_trading", lambda: sum(len(c) for c in copy_trading_ws_manager.connections.values()))
+task_supervisor.service("copy_trading_simulation", lambda: simulate_master_trades(copy_trading_ws_manager))
 
 @app.websocket("/ws/copy-trading/{user_id}")
 async def copy_trading_websocket(websocket: WebSocket, user_id: str):
@@ -3904,104 +4301,98 @@ async def get_trader_followers(trader_id: str):
 # ============ BRIDGEWATER-STYLE QUANTITATIVE RESEARCH ============
 
 # Macro Economic Engine
-from modules.macro_engine import (
-    get_economic_indicators, get_debt_cycle_analysis, get_economic_phase,
-    get_central_bank_policies, get_global_liquidity, get_dalio_principles
-)
+# pandas loads on first use of a macro route
+macro_engine = lazy_import("modules.macro_engine")
 
 @api_router.get("/quant/macro/indicators")
 async def macro_indicators():
     """Get all economic indicators"""
-    return get_economic_indicators()
+    return macro_engine.get_economic_indicators()
 
 @api_router.get("/quant/macro/debt-cycle")
 async def debt_cycle():
     """Analyze current debt cycle position (Ray Dalio framework)"""
-    return get_debt_cycle_analysis()
+    return macro_engine.get_debt_cycle_analysis()
 
 @api_router.get("/quant/macro/economic-phase")
 async def economic_phase():
     """Get current economic machine phase"""
-    return get_economic_phase()
+    return macro_engine.get_economic_phase()
 
 @api_router.get("/quant/macro/central-banks")
 async def central_banks():
     """Get central bank policy summary"""
-    return get_central_bank_policies()
+    return macro_engine.get_central_bank_policies()
 
 @api_router.get("/quant/macro/liquidity")
 async def global_liquidity():
     """Get global liquidity conditions"""
-    return get_global_liquidity()
+    return macro_engine.get_global_liquidity()
 
 @api_router.get("/quant/macro/dalio-principles")
 async def dalio_principles():
     """Apply Ray Dalio's Principles to current market"""
-    return get_dalio_principles()
+    return macro_engine.get_dalio_principles()
 
 
 # Market Inefficiency Detector
-from modules.inefficiency_detector import (
-    get_inefficiency_signals, get_pairs_trades, get_signal_summary,
-    analyze_mean_reversion, analyze_momentum
-)
+# scipy loads on first use of an inefficiency route
+inefficiency_detector = lazy_import("modules.inefficiency_detector")
 
 @api_router.get("/quant/inefficiency/signals")
 async def inefficiency_signals():
     """Get all detected market inefficiencies"""
-    return get_inefficiency_signals()
+    return inefficiency_detector.get_inefficiency_signals()
 
 @api_router.get("/quant/inefficiency/pairs")
 async def pairs_trades():
     """Get pairs trading opportunities"""
-    return get_pairs_trades()
+    return inefficiency_detector.get_pairs_trades()
 
 @api_router.get("/quant/inefficiency/summary")
 async def inefficiency_summary():
     """Get summary of all signals"""
-    return get_signal_summary()
+    return inefficiency_detector.get_signal_summary()
 
 @api_router.post("/quant/inefficiency/analyze-reversion")
 async def analyze_reversion(prices: List[float]):
     """Analyze mean reversion opportunity"""
-    return analyze_mean_reversion(prices)
+    return inefficiency_detector.analyze_mean_reversion(prices)
 
 @api_router.post("/quant/inefficiency/analyze-momentum")
 async def analyze_momentum_signal(prices: List[float]):
     """Analyze momentum signal"""
-    return analyze_momentum(prices)
+    return inefficiency_detector.analyze_momentum(prices)
 
 
 # Portfolio Optimization
-from modules.portfolio_optimizer import (
-    get_all_weather_portfolio, get_risk_parity_portfolio,
-    get_pure_alpha_strategy, get_strategy_comparison, get_drawdown_protection
-)
+# scipy loads on first use of a portfolio route
+portfolio_optimizer = lazy_import("modules.portfolio_optimizer")
 
 @api_router.get("/quant/portfolio/all-weather")
 async def all_weather_portfolio(growth: str = "rising", inflation: str = "falling"):
     """Get All Weather portfolio allocation (Ray Dalio's flagship)"""
-    return get_all_weather_portfolio(growth, inflation)
+    return portfolio_optimizer.get_all_weather_portfolio(growth, inflation)
 
 @api_router.get("/quant/portfolio/risk-parity")
 async def risk_parity_portfolio():
     """Get Risk Parity portfolio allocation"""
-    return get_risk_parity_portfolio()
+    return portfolio_optimizer.get_risk_parity_portfolio()
 
 @api_router.get("/quant/portfolio/pure-alpha")
 async def pure_alpha_portfolio():
     """Get Pure Alpha strategy (market-neutral)"""
-    return get_pure_alpha_strategy()
+    return portfolio_optimizer.get_pure_alpha_strategy()
 
 @api_router.get("/quant/portfolio/strategies")
 async def portfolio_strategies():
     """Compare all available portfolio strategies"""
-    return get_strategy_comparison()
+    return portfolio_optimizer.get_strategy_comparison()
 
 @api_router.get("/quant/portfolio/drawdown-protection")
 async def drawdown_protection(current_drawdown: float = 0.0):
     """Get drawdown protection recommendations"""
-    return get_drawdown_protection(current_drawdown)
+    return portfolio_optimizer.get_drawdown_protection(current_drawdown)
 
 
 # AI Research Analyst
@@ -4104,45 +4495,53 @@ async def tail_risk_analysis(data: dict):
 from modules.algo_execution import (
     create_vwap_order, create_twap_order, create_iceberg_order,
     create_smart_order, get_algo_order, cancel_algo_order,
-    get_all_algo_orders, get_algo_analytics
+    get_all_algo_orders, get_algo_analytics, simulate_algo_orders, algo_engine
 )
+from modules.execution_archive import ExecutionArchive
+algo_engine.archive = ExecutionArchive(db)
 
 @api_router.post("/algo/vwap")
-async def algo_vwap_order(data: dict):
+async def algo_vwap_order(data: dict, request: Request):
     """Create VWAP (Volume Weighted Average Price) order"""
+    user = await get_current_user(request)
     return await create_vwap_order(
         data.get("symbol"), data.get("side"), data.get("quantity"),
-        data.get("duration_minutes", 60)
+        data.get("duration_minutes", 60), user_id=user.user_id if user else None
     )
 
 @api_router.post("/algo/twap")
-async def algo_twap_order(data: dict):
+async def algo_twap_order(data: dict, request: Request):
     """Create TWAP (Time Weighted Average Price) order"""
+    user = await get_current_user(request)
     return await create_twap_order(
         data.get("symbol"), data.get("side"), data.get("quantity"),
-        data.get("duration_minutes", 60), data.get("slices", 12)
+        data.get("duration_minutes", 60), data.get("slices", 12),
+        user_id=user.user_id if user else None
     )
 
 @api_router.post("/algo/iceberg")
-async def algo_iceberg_order(data: dict):
+async def algo_iceberg_order(data: dict, request: Request):
     """Create Iceberg (Hidden) order"""
+    user = await get_current_user(request)
     return await create_iceberg_order(
         data.get("symbol"), data.get("side"), data.get("quantity"),
-        data.get("visible_quantity"), data.get("limit_price")
+        data.get("visible_quantity"), data.get("limit_price"),
+        user_id=user.user_id if user else None
     )
 
 @api_router.post("/algo/smart")
-async def algo_smart_order(data: dict):
+async def algo_smart_order(data: dict, request: Request):
     """Create Smart order with intelligent routing"""
+    user = await get_current_user(request)
     return await create_smart_order(
         data.get("symbol"), data.get("side"), data.get("quantity"),
-        data.get("urgency", "medium")
+        data.get("urgency", "medium"), user_id=user.user_id if user else None
     )
 
 @api_router.get("/algo/order/{order_id}")
 async def get_algo_order_status(order_id: str):
     """Get algorithmic order status"""
-    return get_algo_order(order_id)
+    return await get_algo_order(order_id)
 
 @api_router.delete("/algo/order/{order_id}")
 async def cancel_algorithmic_order(order_id: str):
@@ -4155,9 +4554,26 @@ async def get_all_algorithmic_orders():
     return get_all_algo_orders()
 
 @api_router.get("/algo/analytics")
-async def get_execution_analytics():
-    """Get algorithmic execution performance analytics"""
-    return get_algo_analytics()
+async def get_execution_analytics(day: Optional[str] = None):
+    """Transaction-cost analysis of the algo orders finished on `day` (YYYY-MM-DD, default today)"""
+    return await get_algo_analytics(day)
+
+MAX_SIMULATED_ORDERS = 5_000  # ~0.35s of one worker thread on a full-day tape
+
+@api_router.post("/algo/simulate")
+async def simulate_execution(data: dict):
+    """
+    Simulate TWAP/VWAP/POV parent orders over a day of recorded (or
+    synthetic) market tape with the square-root impact model
+    """
+    orders = data.get("orders") or []
+    if not orders or len(orders) > MAX_SIMULATED_ORDERS:
+        raise HTTPException(status_code=400, detail=f"orders must hold 1-{MAX_SIMULATED_ORDERS} parent orders")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, simulate_algo_orders, orders, data.get("day"), data.get("impact"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid simulation request: {e}")
 
 
 # ============ PREDICTION MARKETS ============
@@ -4211,9 +4627,9 @@ async def get_single_prediction_market(market_id: str):
     return get_prediction_market(market_id)
 
 @api_router.get("/predictions/market/{market_id}/history")
-async def prediction_market_history(market_id: str):
-    """Get trade history for a prediction market"""
-    return get_market_trade_history(market_id)
+async def prediction_market_history(market_id: str, max_points: Optional[int] = Query(None, ge=3)):
+    """Get trade history for a prediction market (LTTB-downsampled on price to max_points)"""
+    return downsample_points(get_market_trade_history(market_id), max_points, "new_market_price")
 
 @api_router.post("/predictions/buy")
 async def buy_prediction(data: dict):
@@ -4307,11 +4723,50 @@ init_notification_db(db)
 # ==================== RISK ANALYSIS & AUDIT TRAIL ====================
 # Routes for portfolio risk metrics and execution audit trail
 from routes.risk_routes import risk_router, audit_router, init_risk_db, start_risk_broadcast
+from modules.risk_websocket import risk_ws_manager
+register_websocket_manager("risk", lambda: sum(len(c) for c in risk_ws_manager.active_connections.values()))
 app.include_router(risk_router, prefix="/api")
 app.include_router(audit_router, prefix="/api")
 init_risk_db(db)
 
 
+# ==================== ANALYTICS EXPORT ====================
+# Partitioned Parquet export for offline analytics. ANALYTICS_MONGO_URL can
+# point the exporter at a secondary/analytics node; otherwise it reads the app
+# database with a secondary-preferred read preference.
+from routes.analytics_routes import analytics_router, init_analytics_routes
+if os.environ.get("ANALYTICS_MONGO_URL"):
+    _, analytics_source_db = open_storage(
+        "mongo", os.environ["ANALYTICS_MONGO_URL"], os.environ["DB_NAME"], readPreference="secondaryPreferred"
+    )
+else:
+    analytics_source_db = db
+init_analytics_routes(
+    analytics_source_db,
+    os.environ.get("ANALYTICS_EXPORT_DIR", str(ROOT_DIR / "data" / "analytics")),
+    interval=float(os.environ.get("ANALYTICS_EXPORT_INTERVAL", "0")),
+)
+app.include_router(analytics_router, prefix="/api")
+
+
+# ==================== EVENT BUS SUBSCRIBERS ====================
+# Consumers of prices, trades, fills, signals and market resolutions. Each
+# drains its own queue on a supervised task (risk_broadcast is subscribed in
+# start_risk_broadcast at startup).
+from modules.push_notifications import push_notification_service
+
+event_bus.subscribe(
+    "price_alerts", PriceTick,
+    lambda ticks: alert_manager.check_alerts({t.symbol: t.price for t in ticks})
+)
+event_bus.subscribe("competition_leaderboards", TradeExecuted, competition_engine.on_trades_executed)
+event_bus.subscribe("copy_trading", TradeExecuted, copy_trading_ws_manager.on_trades_executed)
+event_bus.subscribe(
+    "push_notifications", (TradeExecuted, OrderFilled, SignalEmitted, MarketResolved),
+    push_notification_service.on_events
+)
+
+
 # ==================== ALPHA VANTAGE INTEGRATION ====================
 # Real stock market data from Alpha Vantage
 from routes.alpha_vantage_routes import alpha_vantage_router
@@ -4324,6 +4779,80 @@ from routes.alpaca_routes import alpaca_router
 app.include_router(alpaca_router, prefix="/api")
 
 
+# ==================== SYSTEM / STARTUP ====================
+# Lazy heavy-dependency state, on-demand warm-up and Prometheus metrics
+
+@app.get("/metrics", include_in_schema=False)
+@api_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text-format metrics for this worker"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/system/lazy-modules")
+async def lazy_module_status():
+    """Which heavy optional dependencies this worker has loaded, with load time and RSS cost"""
+    return get_lazy_status()
+
+@api_router.get("/system/tasks")
+async def background_tasks():
+    """State, run counts, failures and schedule of every supervised background task"""
+    return task_supervisor.get_status()
+
+@api_router.get("/system/market-data")
+async def market_data_source():
+    """Where prices come from: live/simulated feeds or a tick replay, and whether ticks are being recorded"""
+    return {
+        "source": "replay" if market_replay else "live",
+        "replay": market_replay.get_status() if market_replay else None,
+        "recorder": tick_recorder.get_status() if tick_recorder else None,
+    }
+
+@api_router.get("/system/events")
+async def event_bus_status():
+    """Events published by type and per-subscriber delivery, drops and queue depth"""
+    return event_bus.get_status()
+
+@api_router.get("/system/account-executors")
+async def account_executor_status():
+    """Per-account ordered execution: accounts with queued operations, throughput and version conflicts"""
+    return {"executors": [executor.get_status() for executor in account_executors.values()]}
+
+@api_router.get("/system/response-cache")
+async def response_cache_status():
+    """Cached entries, bytes and the per-route TTL rules (RESPONSE_CACHE=0 disables caching)"""
+    if not response_cache:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.get_status()}
+
+@api_router.delete("/system/response-cache")
+async def clear_response_cache(path_prefix: str = ""):
+    """Drop cached responses under a path prefix (all by default)"""
+    removed = response_cache.invalidate(path_prefix) if response_cache else 0
+    return {"removed": removed}
+
+@api_router.get("/system/blocking-events")
+async def loop_blocking_events(limit: int = 50):
+    """Event-loop stalls caught by the watchdog, grouped by call site (requires LOOP_WATCHDOG=1)"""
+    if not loop_watchdog:
+        return {"enabled": False, "hint": "Set LOOP_WATCHDOG=1 (and optionally LOOP_WATCHDOG_THRESHOLD_MS) to enable"}
+    return {
+        "enabled": True,
+        "threshold_ms": loop_watchdog.threshold * 1000,
+        "by_site": loop_watchdog.get_summary(),
+        "recent": loop_watchdog.get_events(limit)
+    }
+
+@api_router.post("/system/warmup")
+async def warmup_lazy_modules(modules: Optional[str] = None):
+    """Load lazy modules now (comma-separated names, default all) without blocking the event loop"""
+    names = [m.strip() for m in modules.split(",") if m.strip()] if modules else None
+    unknown = sorted(set(names or []) - set(registered_modules()))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown lazy modules {unknown}; expected any of {registered_modules()}")
+    results = await asyncio.get_running_loop().run_in_executor(None, warm_up, names)
+    return {"warmed": results, **get_lazy_status()}
+
+
 # Include the router
 app.include_router(api_router)
 
@@ -4344,25 +4873,39 @@ async def startup_event():
     await alert_manager.load_alerts_from_db()
     logger.info("Alert manager initialized")
     
-    # Start price streaming background task
-    asyncio.create_task(price_streamer())
-    logger.info("Price streamer started")
-    
-    # Start trade crawler background task
-    asyncio.create_task(trade_crawler_task())
-    logger.info("Trade crawler started")
+    # Indexes for the journal daily rollups
+    await journal_rollups.ensure_indexes()
+    await algo_engine.archive.ensure_indexes()
+    await backtest_jobs.cache.ensure_indexes()
     
-    # Start copy trading simulation for demo
-    asyncio.create_task(simulate_master_trades(copy_trading_ws_manager))
-    logger.info("Copy trading simulation started")
+    if loop_watchdog:
+        loop_watchdog.start()
     
-    # Start risk WebSocket broadcast loop
+    # Price streamer, trade crawler, copy trading simulation, risk broadcast
+    # and event-loop lag sampling, all owned by the supervisor
     start_risk_broadcast()
-    logger.info("Risk WebSocket broadcast started")
+    task_supervisor.start()
     
     # Load social media credentials
     await social_manager.load_credentials()
     logger.info("Social manager initialized")
+    
+    # Optional warm-up of lazily imported heavy modules ("all" or comma-separated names)
+    lazy_warmup = os.environ.get("LAZY_WARMUP", "").strip()
+    if lazy_warmup:
+        names = None if lazy_warmup == "all" else [n.strip() for n in lazy_warmup.split(",") if n.strip()]
+        asyncio.get_running_loop().run_in_executor(None, warm_up, names)
+        logger.info(f"Lazy module warm-up started: {lazy_warmup}")
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await task_supervisor.shutdown(timeout=float(os.environ.get("SHUTDOWN_DRAIN_SECONDS", "10")))
+    if tick_recorder:
+        tick_recorder.close()
+    if loop_watchdog:
+        loop_watchdog.stop()
+    report_renderer.shutdown()
+    backtest_sweeper.shutdown()
+    backtest_jobs.shutdown()
+    # Orders finished since the last archive pass
+    await algo_engine.archive_completed()
     client.close()
@@ -0,0 +1,254 @@
+"""
+In-Memory Storage Backend - Unit Tests
+Tests the MongoDB query, update and aggregation semantics of InMemoryCollection
+(DB_BACKEND=memory), and that its hash indexes agree with full scans
+"""
+import asyncio
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.storage import DuplicateKeyError, InMemoryDatabase  # noqa: E402
+
+pymongo = pytest.importorskip("pymongo")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def seeded(indexed: bool = False):
+    collection = InMemoryDatabase()["docs"]
+    if indexed:
+        await collection.create_index([("symbol", 1), ("qty", -1)])
+        await collection.create_index("tags")
+    await collection.insert_many([
+        {"_id": 1, "symbol": "BTC", "qty": 2, "price": 100.0, "tags": ["core", "spot"], "meta": {"venue": "a"}},
+        {"_id": 2, "symbol": "ETH", "qty": 5, "price": 10.0, "tags": ["spot"], "active": True},
+        {"_id": 3, "symbol": "BTC", "qty": 1, "price": 110.0, "tags": [], "active": 1},
+        {"_id": 4, "symbol": "SOL", "qty": 10, "price": None, "legs": [{"side": "buy", "qty": 3}, {"side": "sell", "qty": 1}]},
+        {"_id": 5, "symbol": "btc", "qty": 7, "meta": {"venue": "b"}},
+    ])
+    return collection
+
+
+async def ids(collection, query):
+    return [doc["_id"] for doc in await collection.find(query).to_list(None)]
+
+
+QUERIES = [
+    ({"symbol": "BTC"}, [1, 3]),
+    ({"symbol": {"$eq": "ETH"}}, [2]),
+    ({"symbol": {"$ne": "BTC"}}, [2, 4, 5]),
+    ({"qty": {"$gt": 2}}, [2, 4, 5]),
+    ({"qty": {"$gte": 2, "$lt": 7}}, [1, 2]),
+    ({"qty": {"$lte": 1}}, [3]),
+    ({"symbol": {"$in": ["ETH", "SOL"]}}, [2, 4]),
+    ({"symbol": {"$nin": ["ETH", "SOL"]}}, [1, 3, 5]),
+    ({"active": {"$exists": True}}, [2, 3]),
+    ({"active": True}, [2]),  # True does not equal 1
+    ({"price": None}, [4, 5]),  # null matches missing fields
+    ({"symbol": {"$regex": "^b", "$options": "i"}}, [1, 3, 5]),
+    ({"symbol": re.compile("^B")}, [1, 3]),
+    ({"symbol": {"$not": {"$regex": "^B"}}}, [2, 4, 5]),
+    ({"tags": "spot"}, [1, 2]),  # array fields match their elements
+    ({"tags": {"$size": 0}}, [3]),
+    ({"tags": {"$all": ["core", "spot"]}}, [1]),
+    ({"meta.venue": "b"}, [5]),
+    ({"legs.side": "sell"}, [4]),
+    ({"legs": {"$elemMatch": {"side": "buy", "qty": {"$gte": 3}}}}, [4]),
+    ({"$or": [{"symbol": "ETH"}, {"qty": {"$gt": 8}}]}, [2, 4]),
+    ({"$and": [{"symbol": "BTC"}, {"qty": 2}]}, [1]),
+    ({"$nor": [{"symbol": "BTC"}, {"symbol": "btc"}]}, [2, 4]),
+    ({"symbol": "BTC", "qty": {"$in": [1, 7]}}, [3]),
+]
+
+
+class TestQueries:
+    """Query operators, evaluated with and without hash indexes on the filtered fields"""
+
+    @pytest.mark.parametrize("indexed", [False, True])
+    @pytest.mark.parametrize("query,expected", QUERIES)
+    def test_query(self, query, expected, indexed):
+        async def check():
+            collection = await seeded(indexed)
+            assert await ids(collection, query) == expected
+            assert await collection.count_documents(query) == len(expected)
+        run(check())
+
+    def test_sort_skip_limit_projection(self):
+        async def check():
+            collection = await seeded()
+            docs = await collection.find({}, {"_id": 0, "symbol": 1, "qty": 1}).sort("qty", -1).skip(1).limit(2).to_list(None)
+            assert docs == [{"symbol": "btc", "qty": 7}, {"symbol": "ETH", "qty": 5}]
+            excluded = await collection.find_one({"_id": 1}, {"tags": 0, "meta": 0})
+            assert excluded == {"_id": 1, "symbol": "BTC", "qty": 2, "price": 100.0}
+            assert sorted(await collection.distinct("tags")) == ["core", "spot"]
+        run(check())
+
+    def test_results_are_copies(self):
+        async def check():
+            collection = await seeded()
+            doc = await collection.find_one({"_id": 1})
+            doc["tags"].append("mutated")
+            assert (await collection.find_one({"_id": 1}))["tags"] == ["core", "spot"]
+        run(check())
+
+
+class TestUpdates:
+    """Update operators, upserts and bulk writes"""
+
+    def test_update_operators(self):
+        async def check():
+            collection = await seeded()
+            await collection.update_one({"_id": 1}, {
+                "$set": {"meta.venue": "c", "risk.limit": 5},
+                "$unset": {"price": ""},
+                "$inc": {"qty": 3, "fills": 1},
+                "$mul": {"risk.limit": 2},
+                "$push": {"tags": {"$each": ["x", "y", "z"], "$slice": -3}},
+            })
+            doc = await collection.find_one({"_id": 1})
+            assert doc["meta"] == {"venue": "c"} and doc["risk"] == {"limit": 10}
+            assert "price" not in doc and doc["qty"] == 5 and doc["fills"] == 1
+            assert doc["tags"] == ["x", "y", "z"]
+
+            await collection.update_one({"_id": 2}, {"$min": {"qty": 3}, "$max": {"price": 5.0},
+                                                     "$addToSet": {"tags": {"$each": ["spot", "perp"]}}})
+            doc = await collection.find_one({"_id": 2})
+            assert doc["qty"] == 3 and doc["price"] == 10.0 and doc["tags"] == ["spot", "perp"]
+
+            await collection.update_one({"_id": 4}, {"$pull": {"legs": {"side": "sell"}}})
+            await collection.update_one({"_id": 2}, {"$pull": {"tags": "perp"}})
+            assert (await collection.find_one({"_id": 4}))["legs"] == [{"side": "buy", "qty": 3}]
+            assert (await collection.find_one({"_id": 2}))["tags"] == ["spot"]
+        run(check())
+
+    def test_update_many_counts(self):
+        async def check():
+            collection = await seeded()
+            result = await collection.update_many({"symbol": "BTC"}, {"$set": {"qty": 2}})
+            assert (result.matched_count, result.modified_count) == (2, 1)
+            with pytest.raises(ValueError):
+                await collection.update_one({"_id": 1}, {"qty": 3})
+        run(check())
+
+    def test_upsert_seeds_from_filter(self):
+        async def check():
+            collection = await seeded()
+            result = await collection.update_one(
+                {"symbol": "ADA", "day": {"$eq": "2024-01-01"}, "qty": {"$gt": 0}},
+                {"$inc": {"count": 1}, "$setOnInsert": {"created": True}}, upsert=True)
+            doc = await collection.find_one({"_id": result.upserted_id}, {"_id": 0})
+            assert doc == {"symbol": "ADA", "day": "2024-01-01", "count": 1, "created": True}
+            await collection.update_one({"symbol": "ADA"}, {"$inc": {"count": 1}, "$setOnInsert": {"created": False}},
+                                        upsert=True)
+            assert (await collection.find_one({"symbol": "ADA"}))["created"] is True
+        run(check())
+
+    def test_replace_and_find_one_and_update(self):
+        async def check():
+            collection = await seeded()
+            await collection.replace_one({"_id": 3}, {"symbol": "DOGE"})
+            assert await collection.find_one({"_id": 3}) == {"_id": 3, "symbol": "DOGE"}
+            before = await collection.find_one_and_update({"_id": 2}, {"$inc": {"qty": 1}})
+            after = await collection.find_one_and_update({"_id": 2}, {"$inc": {"qty": 1}}, return_document=True)
+            assert (before["qty"], after["qty"]) == (5, 7)
+        run(check())
+
+    def test_bulk_write(self):
+        async def check():
+            collection = await seeded()
+            result = await collection.bulk_write([
+                pymongo.InsertOne({"_id": 6, "symbol": "XRP"}),
+                pymongo.UpdateOne({"symbol": "XRP"}, {"$set": {"qty": 1}}),
+                pymongo.UpdateOne({"symbol": "DOT"}, {"$set": {"qty": 2}}, upsert=True),
+                pymongo.DeleteMany({"symbol": "BTC"}),
+            ])
+            assert (result.inserted_count, result.modified_count, result.upserted_count, result.deleted_count) == (1, 1, 1, 2)
+            assert await ids(collection, {"qty": {"$lte": 2}}) == [6, (await collection.find_one({"symbol": "DOT"}))["_id"]]
+        run(check())
+
+
+class TestIndexes:
+    """Unique indexes and the equality hash indexes stay consistent across writes"""
+
+    def test_unique_index(self):
+        async def check():
+            collection = InMemoryDatabase()["rollups"]
+            await collection.create_index([("user_id", 1), ("day", 1)], unique=True)
+            await collection.insert_one({"user_id": "u", "day": "d1"})
+            await collection.insert_one({"user_id": "u", "day": "d2"})
+            with pytest.raises(DuplicateKeyError):
+                await collection.insert_one({"user_id": "u", "day": "d1"})
+            with pytest.raises(DuplicateKeyError):
+                await collection.update_one({"day": "d2"}, {"$set": {"day": "d1"}})
+            assert await collection.count_documents({"day": "d2"}) == 1
+
+            result = await collection.insert_many([{"user_id": "u", "day": "d1"}, {"user_id": "u", "day": "d3"}],
+                                                  ordered=False)
+            assert len(result.inserted_ids) == 1
+            await collection.delete_one({"day": "d1"})
+            await collection.insert_one({"user_id": "u", "day": "d1"})
+            assert await collection.count_documents({"user_id": "u"}) == 3
+        run(check())
+
+    def test_unique_index_on_existing_duplicates_fails(self):
+        async def check():
+            collection = InMemoryDatabase()["orders"]
+            await collection.insert_many([{"order_id": "a"}, {"order_id": "a"}])
+            with pytest.raises(DuplicateKeyError):
+                await collection.create_index("order_id", unique=True)
+        run(check())
+
+    def test_index_follows_updates_and_deletes(self):
+        async def check():
+            collection = await seeded(indexed=True)
+            await collection.update_many({"symbol": "BTC"}, {"$set": {"symbol": "XBT"}})
+            assert await ids(collection, {"symbol": "BTC"}) == []
+            assert await ids(collection, {"symbol": "XBT"}) == [1, 3]  # natural order survives re-indexing
+            await collection.update_one({"_id": 2}, {"$push": {"tags": "core"}})
+            assert await ids(collection, {"tags": "core"}) == [1, 2]
+            await collection.delete_many({"symbol": "XBT"})
+            assert await ids(collection, {"tags": {"$in": ["core", "spot"]}}) == [2]
+            await collection.drop()
+            assert await ids(collection, {"symbol": "ETH"}) == []
+        run(check())
+
+
+class TestAggregation:
+    """Pipeline stages and accumulators"""
+
+    def test_group_sort_project(self):
+        async def check():
+            collection = await seeded(indexed=True)
+            rows = await collection.aggregate([
+                {"$match": {"symbol": {"$in": ["BTC", "ETH"]}}},
+                {"$group": {"_id": "$symbol", "qty": {"$sum": "$qty"}, "avg_price": {"$avg": "$price"},
+                            "high": {"$max": "$price"}, "n": {"$count": {}}}},
+                {"$sort": {"qty": -1}},
+                {"$project": {"_id": 0, "symbol": "$_id", "qty": 1, "avg_price": 1, "n": 1,
+                              "notional": {"$multiply": ["$qty", "$high"]}}},
+            ]).to_list(None)
+            assert rows == [
+                {"symbol": "ETH", "qty": 5, "avg_price": 10.0, "n": 1, "notional": 50.0},
+                {"symbol": "BTC", "qty": 3, "avg_price": 105.0, "n": 2, "notional": 330.0},
+            ]
+        run(check())
+
+    def test_unwind_and_count(self):
+        async def check():
+            collection = await seeded()
+            rows = await collection.aggregate([
+                {"$unwind": "$tags"},
+                {"$group": {"_id": "$tags", "symbols": {"$addToSet": "$symbol"}}},
+                {"$sort": {"_id": 1}},
+            ]).to_list(None)
+            assert rows == [{"_id": "core", "symbols": ["BTC"]}, {"_id": "spot", "symbols": ["BTC", "ETH"]}]
+            counted = await collection.aggregate([{"$match": {"qty": {"$gt": 1}}}, {"$count": "n"}]).to_list(None)
+            assert counted == [{"n": 4}]
+        run(check())
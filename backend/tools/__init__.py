@@ -0,0 +1,2 @@
+# OracleIQTrader Backend Tools
+# Developer commands for profiling and benchmarking the backend
@@ -0,0 +1,556 @@
+# OracleIQTrader - Hot Path Benchmarks
+# Micro-benchmarks for the engines on the request and streaming hot paths,
+# compared against a stored baseline so performance regressions fail CI.
+#
+# Usage (from backend/):
+#   python -m tools.benchmark
+#   python -m tools.benchmark --only risk_var_historical,alerts_check --json
+#   python -m tools.benchmark --save tools/benchmark_baseline.json
+#   python -m tools.benchmark --baseline tools/benchmark_baseline.json --tolerance 0.2
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = BACKEND_DIR / "tools" / "benchmark_baseline.json"
+
+# In-memory storage keeps database latency out of CPU measurements
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("DB_NAME", "benchmark")
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+_BENCHMARKS: Dict[str, "Benchmark"] = {}
+
+
+class Benchmark:
+    """
+    One benchmark case. `setup()` builds the state once (not timed) and
+    returns a zero-argument callable, sync or async, which is one timed
+    round. `ops` is how many operations one round performs, so results are
+    comparable as per-op time and ops/sec.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], Callable], ops: int = 1, rounds: int = 20, warmup: int = 2):
+        self.name = name
+        self.setup = setup
+        self.ops = ops
+        self.rounds = rounds
+        self.warmup = warmup
+
+
+def benchmark(name: str, ops: int = 1, rounds: int = 20, warmup: int = 2):
+    """Register a setup function as a named benchmark"""
+    def decorator(setup):
+        _BENCHMARKS[name] = Benchmark(name, setup, ops=ops, rounds=rounds, warmup=warmup)
+        return setup
+    return decorator
+
+
+# ============ FIXTURES ============
+
+def _random_walk(n: int, start: float = 100.0, seed: int = 7) -> List[float]:
+    rng = random.Random(seed)
+    prices = [start]
+    for _ in range(n - 1):
+        prices.append(prices[-1] * (1 + rng.gauss(0.0002, 0.015)))
+    return prices
+
+
+class _FakeWebSocket:
+    """Serializes like Starlette's send_json but writes nowhere"""
+
+    def __init__(self):
+        self.bytes_sent = 0
+
+    async def send_json(self, data):
+        self.bytes_sent += len(json.dumps(data, separators=(",", ":")))
+
+
+# ============ BENCHMARKS ============
+
+@benchmark("features_create", rounds=10)
+def _features_create():
+    import numpy as np
+    import pandas as pd
+    from modules.ml_training import FeatureEngineer
+
+    close = np.array(_random_walk(5000))
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.002, len(close))),
+        "high": close * (1 + np.abs(rng.normal(0, 0.01, len(close)))),
+        "low": close * (1 - np.abs(rng.normal(0, 0.01, len(close)))),
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, len(close)).astype(float),
+    })
+    engineer = FeatureEngineer()
+    return lambda: engineer.generate_features(df)
+
+
+@benchmark("ml_comprehensive_prediction", ops=20)
+def _ml_comprehensive_prediction():
+    from modules.ml_prediction import MLPredictionEngine, TimeHorizon
+    from modules.storage import InMemoryDatabase
+
+    engine = MLPredictionEngine(InMemoryDatabase())
+    symbols = ["BTC", "ETH", "SOL", "AAPL", "NVDA"]
+
+    async def run():
+        for i in range(20):
+            await engine.get_comprehensive_prediction(symbols[i % len(symbols)], TimeHorizon.HOUR_24)
+    return run
+
+
+@benchmark("risk_var_historical", ops=100)
+def _risk_var_historical():
+    import numpy as np
+    from modules.risk_modeling import RiskModelingEngine
+
+    engine = RiskModelingEngine()
+    returns = np.diff(np.log(_random_walk(2521)))
+
+    def run():
+        for _ in range(100):
+            engine.value_at_risk(returns, 0.95, "historical")
+    return run
+
+
+@benchmark("risk_var_monte_carlo", ops=20)
+def _risk_var_monte_carlo():
+    import numpy as np
+    from modules.risk_modeling import RiskModelingEngine
+
+    engine = RiskModelingEngine()
+    returns = np.diff(np.log(_random_walk(2521)))
+
+    def run():
+        for _ in range(20):
+            engine.value_at_risk(returns, 0.99, "monte_carlo")
+    return run
+
+
+@benchmark("risk_parity_optimize", rounds=10)
+def _risk_parity_optimize():
+    import numpy as np
+    import pandas as pd
+    from modules.portfolio_optimizer import RiskParityOptimizer
+
+    assets = ["SPY", "TLT", "GLD", "DBC", "VNQ", "EFA", "EEM", "IEF", "LQD", "HYG"]
+    rng = np.random.default_rng(7)
+    returns = pd.DataFrame(rng.normal(0.0003, 0.01, (756, len(assets))), columns=assets)
+    optimizer = RiskParityOptimizer()
+    return lambda: optimizer.optimize(returns)
+
+
+@benchmark("tournament_execute_trade", ops=500)
+def _tournament_execute_trade():
+    from modules.tournament import TournamentEngine, TournamentStatus
+
+    engine = TournamentEngine()
+    tournament = next(iter(engine.tournaments.values()))
+    for i in range(1000):
+        engine.register_participant(tournament.id, f"bench_{i}", f"Bench {i}")
+    tournament.status = TournamentStatus.ACTIVE
+
+    def run():
+        # Alternate buy/sell so balances and position lists stay stable across rounds
+        for i in range(250):
+            user_id = f"bench_{i % 1000}"
+            engine.execute_trade(tournament.id, user_id, "BTC", "buy", 0.01, 65000.0)
+            engine.execute_trade(tournament.id, user_id, "BTC", "sell", 0.01, 65100.0)
+    return run
+
+
+@benchmark("alerts_check", ops=1)
+def _alerts_check():
+    import server
+
+    manager = server.AlertManager()
+    rng = random.Random(7)
+    symbols = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "AVAX", "DOT", "AAPL", "NVDA"]
+    prices = {s: 100.0 for s in symbols}
+    for i in range(10_000):
+        # Targets far from the current price: measures the per-tick scan, not DB writes
+        condition = rng.choice(["above", "below"])
+        target = 1_000_000.0 if condition == "above" else 0.0001
+        alert = server.PriceAlert(symbol=symbols[i % len(symbols)], condition=condition, target_price=target)
+        manager.alerts[alert.id] = alert
+
+    async def run():
+        await manager.check_alerts(prices)
+    return run
+
+
+@benchmark("websocket_broadcast", ops=1000)
+def _websocket_broadcast():
+    import server
+
+    manager = server.ConnectionManager()
+    manager.active_connections = [_FakeWebSocket() for _ in range(1000)]
+    message = {
+        "type": "price_update",
+        "data": [{"symbol": s, "price": 100.0 + i, "change_24h": 1.23, "volume": 1e9} for i, s in
+                 enumerate(["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "AVAX", "DOT"])],
+        "timestamp": "2024-01-01T00:00:00+00:00",
+    }
+
+    async def run():
+        await manager.broadcast(message)
+    return run
+
+
+@benchmark("prediction_market_buy", ops=1000)
+def _prediction_market_buy():
+    from modules.prediction_markets import PredictionMarketsEngine
+
+    engine = PredictionMarketsEngine()
+    market_ids = list(engine.markets)
+
+    def run():
+        for i in range(1000):
+            user_id = f"bench_{i % 200}"
+            engine.user_balances[user_id] = 1e12
+            engine.buy_shares(user_id, market_ids[i % len(market_ids)], "yes" if i % 2 else "no", 10.0)
+    return run
+
+
+@benchmark("algo_execution_throughput", ops=2000 * 12, rounds=3, warmup=0)
+def _algo_execution_throughput():
+    from modules.algo_execution import AlgorithmicExecutionEngine, OrderSide
+
+    async def run():
+        engine = AlgorithmicExecutionEngine()
+        runner = asyncio.ensure_future(engine.scheduler.run())
+        for i in range(2000):
+            await engine.create_twap_order("BTC", OrderSide.BUY if i % 2 else OrderSide.SELL,
+                                           quantity=1200, duration_minutes=60, slices=12, randomize=False)
+        # Each slice is 0.1s apart; the wall time above that floor is engine overhead
+        while engine.scheduler.pending:
+            await asyncio.sleep(0.05)
+        runner.cancel()
+    return run
+
+
+@benchmark("algo_parent_orders_100k", ops=100_000 * 4, rounds=3, warmup=0)
+def _algo_parent_orders_100k():
+    from modules.algo_execution import AlgorithmicExecutionEngine, OrderSide
+
+    async def run():
+        # 100k concurrent TWAP parents x 4 child slices on one timer wheel; the 0.4s
+        # schedule is the floor, everything above it is slice execution and scheduling
+        engine = AlgorithmicExecutionEngine()
+        runner = asyncio.ensure_future(engine.scheduler.run())
+        for i in range(100_000):
+            await engine.create_twap_order("BTC", OrderSide.BUY if i % 2 else OrderSide.SELL,
+                                           quantity=400, duration_minutes=60, slices=4, randomize=False)
+        while engine.scheduler.pending:
+            await asyncio.sleep(0.05)
+        runner.cancel()
+        assert all(o.status.value == "filled" for o in engine.active_orders.values())
+    return run
+
+
+@benchmark("algo_fill_simulation_day", ops=5000, rounds=5)
+def _algo_fill_simulation_day():
+    import random
+    import tempfile
+    from modules.fill_simulator import MarketTapes, simulate_orders
+    from modules.tick_store import TickStore, write_synthetic_ticks
+
+    workdir = tempfile.TemporaryDirectory(prefix="oracle-fills-")
+    store = TickStore(workdir.name)
+    symbols = (("BTC", 95000), ("ETH", 3200), ("SOL", 180), ("SPY", 598), ("NVDA", 145))
+    for symbol, base in symbols:
+        # One full day of 1s ticks -> 1440 one-minute bars
+        write_synthetic_ticks(store, symbol, "2026-01-05", 86_400, base, interval_ms=1000)
+    tapes = MarketTapes([workdir.name])
+    rng = random.Random(7)
+    orders = [{
+        "symbol": rng.choice(symbols)[0],
+        "side": rng.choice(("buy", "sell")),
+        "quantity": rng.uniform(1, 200),
+        "strategy": rng.choice(("twap", "vwap", "pov")),
+        "start_minute": rng.randrange(0, 1200),
+        "duration_minutes": rng.randrange(5, 240),
+        "participation_rate": rng.uniform(0.05, 0.2),
+    } for _ in range(5000)]
+
+    def run():
+        # 5000 parents over a full day of recorded bars (tapes are built on the first round)
+        result = simulate_orders(orders, tapes=tapes)
+        assert result["summary"]["orders"] == 5000
+    run.workdir = workdir
+    return run
+
+
+@benchmark("algo_tca_day_report", ops=20_000, rounds=5)
+def _algo_tca_day_report():
+    import random
+    from modules.execution_tca import tca_report, window_benchmarks
+    from modules.fill_simulator import MarketTape
+
+    rng = random.Random(11)
+    records = []
+    for symbol, base in (("BTC", 95000), ("ETH", 3200), ("SOL", 180), ("SPY", 598)):
+        tape = MarketTape.synthetic(symbol, "2026-01-05", base)
+        starts = [rng.randrange(tape.bars) for _ in range(5000)]
+        lengths = [rng.randrange(1, 120) for _ in range(5000)]
+        benchmarks = {k: v.tolist() for k, v in window_benchmarks(tape, starts, lengths).items()}
+        for i, start in enumerate(starts):
+            total = rng.uniform(1, 100)
+            arrival = float(tape.prices[start])
+            records.append({
+                "order_id": f"{symbol}-{i}", "symbol": symbol, "side": rng.choice(("buy", "sell")),
+                "order_type": rng.choice(("vwap", "twap", "pov", "iceberg")), "total_quantity": total,
+                "filled_quantity": total * rng.choice((1.0, 1.0, 1.0, rng.random())),
+                "avg_fill_price": arrival * (1 + rng.gauss(0, 0.001)), "arrival_price": arrival,
+                **{k: v[i] for k, v in benchmarks.items()},
+            })
+
+    def run():
+        # A whole day's archived parents (as read back from the archive) -> grouped TCA report
+        report = tca_report(records)
+        assert report["orders"] == len(records)
+    return run
+
+
+@benchmark("backtest_minute_year", ops=4, rounds=5)
+def _backtest_minute_year():
+    from modules.backtester import load_price_data, run_vectorized_backtest
+
+    prices = load_price_data("BTC", "2025-01-01", "2025-12-31", "1m")
+
+    def run():
+        # Each built-in strategy over a year of one-minute candles (525,600 bars)
+        for strategy in ("sma_cross", "rsi", "macd", "custom"):
+            result = run_vectorized_backtest(prices, strategy)
+            assert result["bars"] == len(prices)
+    return run
+
+
+@benchmark("backtest_sweep_hourly_grid", ops=100, rounds=5)
+def _backtest_sweep_hourly_grid():
+    from modules.backtester import ExecutionSettings, load_price_data
+    from modules.backtest_sweep import BacktestSweeper, sweep_combinations
+
+    prices = load_price_data("BTC", "2025-01-01", "2025-12-31", "1h")
+    combinations = sweep_combinations("sma_cross", grid={"fast": list(range(5, 55, 5)), "slow": list(range(60, 260, 20))})
+    sweeper = BacktestSweeper()
+
+    async def run():
+        # 100 combinations over a year of hourly candles on every core (the pool starts during warm-up)
+        async for event in sweeper.sweep(prices, "sma_cross", combinations, ExecutionSettings()):
+            pass
+        assert event["completed"] == 100 and not event["errors"]
+    return run
+
+
+@benchmark("walk_forward_50_windows", ops=100, rounds=5)
+def _walk_forward_50_windows():
+    from modules.backtester import ExecutionSettings, load_price_data
+    from modules.backtest_sweep import BacktestSweeper, sweep_combinations
+    from modules.walk_forward import walk_forward, walk_forward_windows
+
+    prices = load_price_data("BTC", "2025-01-01", "2025-12-31", "1h")
+    combinations = sweep_combinations("sma_cross", grid={"fast": list(range(5, 55, 5)), "slow": list(range(60, 260, 20))})
+    windows = walk_forward_windows(len(prices), 50)
+    sweeper = BacktestSweeper()
+
+    async def run():
+        # The backtest_sweep_hourly_grid search re-optimized on 50 rolling windows
+        result = await walk_forward(prices, "sma_cross", combinations, ExecutionSettings(), windows, sweeper=sweeper)
+        assert len(result["windows"]) == 50 and not result["failed_combinations"]
+    return run
+
+
+@benchmark("tick_replay", ops=1_000_000, rounds=5)
+def _tick_replay():
+    import tempfile
+    from modules.tick_store import MarketReplay, TickStore, write_synthetic_ticks
+
+    workdir = tempfile.TemporaryDirectory(prefix="oracle-ticks-")
+    store = TickStore(workdir.name)
+    for symbol, base in (("BTC", 95000), ("ETH", 3200), ("SOL", 180), ("SPY", 598), ("NVDA", 145)):
+        write_synthetic_ticks(store, symbol, "2026-01-05", 200_000, base, interval_ms=50)
+    replay = MarketReplay(store, speed=1000)
+
+    def run():
+        # Full-fidelity replay: every tick's price is read, one market minute per step
+        replay.rewind()
+        while not replay.finished:
+            for batch in replay.step(60):
+                batch.prices()
+    run.workdir = workdir  # files live as long as the benchmark
+    return run
+
+
+@benchmark("event_bus_dispatch", ops=100_000, rounds=10)
+def _event_bus_dispatch():
+    from modules.event_bus import EventBus, PriceTick, TradeExecuted
+
+    bus = EventBus()
+    seen = [0]
+
+    def consume(events):
+        seen[0] += len(events)
+
+    # A price-only and a price+trade consumer, like alerts and the risk broadcast
+    subscriptions = [
+        bus.subscribe("bench_prices", PriceTick, consume, max_queue=200_000),
+        bus.subscribe("bench_prices_trades", (PriceTick, TradeExecuted), consume, max_queue=200_000),
+    ]
+    ticks = [PriceTick(s, 100.0 + i) for i in range(10_000) for s in
+             ("BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "AVAX", "DOT", "SPY", "NVDA")]
+    drains = []
+
+    async def run():
+        # Publish and drain: every tick reaches both subscribers
+        if not drains:
+            drains.extend(asyncio.ensure_future(s.run()) for s in subscriptions)
+        target = seen[0] + 2 * len(ticks)
+        bus.publish_many(ticks)
+        while seen[0] < target:
+            await asyncio.sleep(0)
+    run.drains = drains
+    return run
+
+
+# ============ RUNNER ============
+
+def run_benchmark(bench: Benchmark, loop: asyncio.AbstractEventLoop, rounds: Optional[int] = None) -> dict:
+    """Set up and time one benchmark; errors (e.g. a missing dependency) are reported, not raised"""
+    try:
+        target = bench.setup()
+        is_async = asyncio.iscoroutinefunction(target)
+        call = (lambda: loop.run_until_complete(target())) if is_async else target
+
+        for _ in range(bench.warmup):
+            call()
+        timings = []
+        for _ in range(rounds or bench.rounds):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+    except Exception as e:
+        return {"name": bench.name, "error": f"{type(e).__name__}: {e}"}
+
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        "name": bench.name,
+        "rounds": len(timings),
+        "ops_per_round": bench.ops,
+        "min_s": timings[0],
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "p95_s": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "per_op_us": median / bench.ops * 1e6,
+        "ops_per_sec": bench.ops / median if median > 0 else None,
+    }
+
+
+def compare_to_baseline(results: List[dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Median-based regressions beyond `tolerance` (fractional); sub-50us noise
+    is ignored. A benchmark that errored counts as a regression.
+    """
+    regressions = []
+    for r in results:
+        if r.get("error"):
+            regressions.append(f"{r['name']}: failed with {r['error']}")
+            continue
+        base = baseline.get(r["name"])
+        if not base or base.get("error"):
+            continue
+        old, new = base["median_s"], r["median_s"]
+        if new > max(old * (1 + tolerance), old + 50e-6):
+            regressions.append(
+                f"{r['name']}: median {old * 1000:.3f} ms -> {new * 1000:.3f} ms (+{(new / old - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def _print_table(results: List[dict], baseline: Dict[str, dict]):
+    print(f"{'benchmark':<30} {'median ms':>10} {'p95 ms':>10} {'per-op us':>11} {'ops/s':>12} {'vs base':>8}")
+    print("-" * 86)
+    for r in results:
+        if r.get("error"):
+            print(f"{r['name']:<30} ERROR {r['error']}")
+            continue
+        base = baseline.get(r["name"])
+        delta = f"{(r['median_s'] / base['median_s'] - 1) * 100:+.0f}%" if base and base.get("median_s") else "-"
+        print(
+            f"{r['name']:<30} {r['median_s'] * 1000:>10.3f} {r['p95_s'] * 1000:>10.3f} "
+            f"{r['per_op_us']:>11.1f} {r['ops_per_sec'] or 0:>12,.0f} {delta:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark backend hot paths against a stored baseline")
+    parser.add_argument("--only", help="Comma-separated benchmark names (default: all)")
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    parser.add_argument("--rounds", type=int, help="Override timed rounds per benchmark")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", metavar="PATH", help="Write results to PATH as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", nargs="?", const=str(DEFAULT_BASELINE),
+                        help=f"Fail on regressions against a saved baseline (default path {DEFAULT_BASELINE.name})")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional slowdown (default 0.2)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(_BENCHMARKS))
+        return 0
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(_BENCHMARKS)
+    unknown = [n for n in names if n not in _BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text()).get("results", {})
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results = [run_benchmark(_BENCHMARKS[name], loop, args.rounds) for name in names]
+    finally:
+        loop.close()
+
+    if args.json:
+        print(json.dumps({"results": results}, indent=2))
+    else:
+        _print_table(results, baseline)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor() or platform.machine()},
+            "results": {r["name"]: r for r in results if not r.get("error")}
+        }, indent=2))
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPerformance regressions and failures:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance * 100:.0f}% against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+# OracleIQTrader - Analytics Export Job
+# Batch/cron entry point for the incremental Parquet export, run outside the
+# API server against a secondary or dedicated analytics node.
+#
+# Usage (from backend/):
+#   python -m tools.export_analytics --mongo-url mongodb://analytics-node:27017 --out data/analytics
+#   python -m tools.export_analytics --collections trades,trade_signals --full
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from modules.analytics_export import DEFAULT_BATCH_SIZE, AnalyticsExporter  # noqa: E402
+from modules.storage import open_storage  # noqa: E402
+
+
+async def run_export(args) -> dict:
+    client, db = open_storage("mongo", args.mongo_url, args.db_name, readPreference="secondaryPreferred")
+    try:
+        exporter = AnalyticsExporter(db, args.out, batch_size=args.batch_size)
+        collections = [c.strip() for c in args.collections.split(",") if c.strip()] if args.collections else None
+        return await exporter.run(collections, full=args.full)
+    finally:
+        client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental Parquet export of trades, signals and predictions")
+    parser.add_argument("--mongo-url", default=os.environ.get("ANALYTICS_MONGO_URL") or os.environ.get("MONGO_URL"),
+                        help="Source MongoDB (prefer a secondary or analytics node)")
+    parser.add_argument("--db-name", default=os.environ.get("DB_NAME"))
+    parser.add_argument("--out", default=os.environ.get("ANALYTICS_EXPORT_DIR", str(BACKEND_DIR / "data" / "analytics")))
+    parser.add_argument("--collections", help="Comma-separated collections (default: all)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="Discard previous output and re-export everything")
+    args = parser.parse_args(argv)
+    if not args.mongo_url or not args.db_name:
+        parser.error("--mongo-url and --db-name are required (or set MONGO_URL/DB_NAME)")
+
+    results = asyncio.run(run_export(args))
+    print(json.dumps(results, indent=2, default=str))
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
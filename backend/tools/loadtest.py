@@ -0,0 +1,458 @@
+# OracleIQTrader - Offline Load Test
+# Drives the FastAPI app in-process (ASGI, no sockets, no outbound network)
+# with simulated WebSocket subscribers and an open-loop REST trade mix, then
+# reports latency percentiles, throughput, dropped frames and memory growth.
+#
+# Usage (from backend/):
+#   python -m tools.loadtest --duration 30                  # local mongod
+#   python -m tools.loadtest --db memory --db-latency-ms 0  # application overhead only
+#   python -m tools.loadtest --replay-dir ticks/ --replay-speed 100  # reproducible prices
+#   python -m tools.loadtest --price-clients 5000 --copy-clients 500 --spectators 1000 \
+#       --rps 300 --mix playground_order=4,competition_trade=3,prediction_buy=3,reads=10 --json
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+LOCAL_HOSTS = {"loadtest", "localhost", "127.0.0.1"}
+DEFAULT_MIX = "playground_order=4,competition_trade=3,prediction_buy=3,reads=10"
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1] * 1000, 2)}
+
+
+class OpStats:
+    """Latencies and outcomes for one operation type"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ok = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def record(self, latency: float, ok: bool, error: Optional[str] = None):
+        self.latencies.append(latency)
+        if ok:
+            self.ok += 1
+        else:
+            self.errors += 1
+            self.last_error = error
+
+    def summary(self, duration: float) -> dict:
+        return {
+            "requests": self.ok + self.errors,
+            "errors": self.errors,
+            "throughput_rps": round((self.ok + self.errors) / duration, 1) if duration else None,
+            **_percentiles(self.latencies),
+            "last_error": self.last_error
+        }
+
+
+# ============ IN-PROCESS WEBSOCKET CLIENT ============
+
+class ASGIWebSocketClient:
+    """
+    Minimal WebSocket client speaking ASGI directly to the app.
+
+    Frames the server sends land in a bounded buffer standing in for the
+    socket's receive window; frames arriving while it is full are counted as
+    dropped. `consume_delay` models a slow client draining its buffer.
+    """
+
+    def __init__(self, app, path: str, buffer_frames: int = 64, consume_delay: float = 0.0, client_id: int = 0):
+        self.app = app
+        self.path = path
+        self.consume_delay = consume_delay
+        self.client_id = client_id
+        self.frames: asyncio.Queue = asyncio.Queue(maxsize=buffer_frames)
+        self.received = 0
+        self.dropped = 0
+        self.latencies: List[float] = []
+        self.accepted = asyncio.Event()
+        self.closed = False
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._app_task: Optional[asyncio.Task] = None
+        self._consumer_task: Optional[asyncio.Task] = None
+
+    async def connect(self, timeout: float = 10.0):
+        path, _, query = self.path.partition("?")
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "http_version": "1.1",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+            "headers": [(b"host", b"loadtest")], "client": ("127.0.0.1", 10000 + self.client_id),
+            "server": ("loadtest", 80), "subprotocols": [], "state": {}
+        }
+        await self._inbox.put({"type": "websocket.connect"})
+        self._app_task = asyncio.create_task(self.app(scope, self._receive, self._send), name=f"ws-client {self.path}")
+        self._consumer_task = asyncio.create_task(self._consume())
+        await asyncio.wait_for(self.accepted.wait(), timeout)
+
+    async def send_json(self, data):
+        await self._inbox.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        await self._inbox.put({"type": "websocket.disconnect", "code": 1000})
+        if self._consumer_task is not None:
+            self._consumer_task.cancel()
+        if self._app_task is not None:
+            try:
+                await asyncio.wait_for(self._app_task, 5)
+            except Exception:
+                # Handlers may raise on disconnect; the connection is gone either way
+                pass
+
+    async def _receive(self):
+        return await self._inbox.get()
+
+    async def _send(self, message):
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self.accepted.set()
+        elif kind == "websocket.send":
+            try:
+                self.frames.put_nowait((time.time(), message.get("text") or message.get("bytes")))
+            except asyncio.QueueFull:
+                self.dropped += 1
+        elif kind == "websocket.close":
+            self.closed = True
+
+    async def _consume(self):
+        while True:
+            arrived, payload = await self.frames.get()
+            self.received += 1
+            if isinstance(payload, str):
+                try:
+                    timestamp = json.loads(payload).get("timestamp")
+                    if timestamp:
+                        # Server-stamped frames: delivery latency from broadcast to client
+                        self.latencies.append(max(0.0, arrived - datetime.fromisoformat(timestamp).timestamp()))
+                except (ValueError, AttributeError):
+                    pass
+            if self.consume_delay:
+                await asyncio.sleep(self.consume_delay)
+
+
+# ============ REST MIX ============
+
+class RestMix:
+    """Weighted REST operations against the playground, competition and prediction routes"""
+
+    def __init__(self, client, weights: Dict[str, int], seed: int = 7):
+        self.client = client
+        self.weights = weights
+        self.rng = random.Random(seed)
+        self.accounts: List[str] = []
+        self.entries: List[str] = []
+        self.markets: List[str] = []
+        self.ops = {
+            "playground_order": self.playground_order,
+            "competition_trade": self.competition_trade,
+            "prediction_buy": self.prediction_buy,
+            "reads": self.reads,
+        }
+        unknown = set(weights) - set(self.ops)
+        if unknown:
+            raise ValueError(f"Unknown REST ops: {', '.join(sorted(unknown))}")
+
+    async def setup(self, accounts: int):
+        for _ in range(accounts):
+            response = await self.client.post("/api/playground/account", params={"initial_balance": 1_000_000})
+            self.accounts.append(response.json()["id"])
+
+        competition = (await self.client.post("/api/competition/create/daily")).json()
+        for _ in range(accounts):
+            joined = (await self.client.post(f"/api/competition/{competition['id']}/join")).json()
+            if joined.get("success"):
+                self.entries.append(joined["entry"]["id"])
+
+        self.markets = [m["market_id"] for m in (await self.client.get("/api/predictions/markets")).json()
+                        if m.get("status") == "open"]
+
+    def pick(self) -> str:
+        names = list(self.weights)
+        return self.rng.choices(names, weights=[self.weights[n] for n in names])[0]
+
+    async def playground_order(self):
+        return await self.client.post("/api/playground/order?" + urlencode({
+            "account_id": self.rng.choice(self.accounts), "symbol": self.rng.choice(["BTC", "ETH", "SOL"]),
+            "side": self.rng.choice(["buy", "sell"]), "quantity": 0.001
+        }))
+
+    async def competition_trade(self):
+        return await self.client.post(f"/api/competition/entry/{self.rng.choice(self.entries)}/trade?" + urlencode({
+            "symbol": "BTC", "side": "buy", "quantity": 0.0001, "price": 65000
+        }))
+
+    async def prediction_buy(self):
+        return await self.client.post("/api/predictions/buy", json={
+            "user_id": f"loadtest_{self.rng.randrange(1000)}", "market_id": self.rng.choice(self.markets),
+            "side": self.rng.choice(["yes", "no"]), "amount": 1.0
+        })
+
+    async def reads(self):
+        path = self.rng.choice(["/api/predictions/markets", "/api/playground/leaderboard", "/api/competition/active"])
+        return await self.client.get(path)
+
+
+async def _run_rest_load(mix: RestMix, rps: float, duration: float, concurrency: int,
+                         stats: Dict[str, OpStats]):
+    """
+    Open-loop arrivals at a fixed rate. Latency is measured from each request's
+    scheduled start, so queueing behind a slow server is not hidden
+    (no coordinated omission).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    in_flight = set()
+
+    async def fire(name: str, scheduled: float):
+        async with semaphore:
+            try:
+                response = await mix.ops[name]()
+                body = response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+                failed = response.status_code >= 400 or (
+                    isinstance(body, dict) and (body.get("success") is False or "error" in body))
+                error = None if not failed else f"{response.status_code} {str(body)[:120]}"
+                stats[name].record(loop.time() - scheduled, not failed, error)
+            except Exception as e:
+                stats[name].record(loop.time() - scheduled, False, f"{type(e).__name__}: {e}")
+
+    i = 0
+    while True:
+        scheduled = started + i / rps
+        if scheduled - started >= duration:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = mix.pick()
+        task = asyncio.create_task(fire(name, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        i += 1
+    if in_flight:
+        await asyncio.wait(in_flight, timeout=30)
+
+
+# ============ RUNNER ============
+
+def _block_outbound_http():
+    """Fail any httpx request to a non-local host immediately, keeping the run offline and deterministic"""
+    import httpx
+
+    original_send = httpx.AsyncClient.send
+
+    async def send(self, request, *args, **kwargs):
+        if request.url.host not in LOCAL_HOSTS:
+            raise httpx.ConnectError(f"offline load test: blocked {request.url.host}", request=request)
+        return await original_send(self, request, *args, **kwargs)
+
+    httpx.AsyncClient.send = send
+
+
+async def _connect_clients(app, paths: List[str], buffer_frames: int, slow_fraction: float, slow_delay: float,
+                           batch: int = 200) -> List[ASGIWebSocketClient]:
+    rng = random.Random(11)
+    clients = [
+        ASGIWebSocketClient(app, path, buffer_frames, slow_delay if rng.random() < slow_fraction else 0.0, i)
+        for i, path in enumerate(paths)
+    ]
+    for start in range(0, len(clients), batch):
+        await asyncio.gather(*(c.connect() for c in clients[start:start + batch]))
+    return clients
+
+
+def _ws_summary(clients: List[ASGIWebSocketClient], duration: float) -> dict:
+    latencies = [latency for c in clients for latency in c.latencies]
+    received = sum(c.received for c in clients)
+    dropped = sum(c.dropped for c in clients)
+    return {
+        "clients": len(clients),
+        "frames_received": received,
+        "frames_dropped": dropped,
+        "drop_rate": round(dropped / (received + dropped), 4) if received + dropped else 0.0,
+        "frames_per_sec": round(received / duration, 1) if duration else None,
+        **_percentiles(latencies)
+    }
+
+
+async def run_load_test(args) -> dict:
+    import httpx
+
+    os.environ.setdefault("DB_BACKEND", args.db)
+    os.environ.setdefault("DB_MEMORY_LATENCY_MS", str(args.db_latency_ms))
+    os.environ.setdefault("MONGO_URL", args.mongo_url)
+    os.environ.setdefault("DB_NAME", args.db_name)
+    os.environ.setdefault("PRICE_STREAM_INTERVAL", str(args.price_interval))
+    if args.replay_dir:
+        os.environ.setdefault("MARKET_REPLAY_DIR", args.replay_dir)
+        os.environ.setdefault("MARKET_REPLAY_SPEED", str(args.replay_speed))
+        os.environ.setdefault("MARKET_REPLAY_LOOP", "1")
+    import server
+
+    _block_outbound_http()
+    app = server.app
+    rss_start = _rss_mb()
+    await app.router.startup()
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60)
+    weights = {k: int(v) for k, v in (p.split("=") for p in args.mix.split(",") if p)}
+    mix = RestMix(client, weights)
+    await mix.setup(args.accounts)
+
+    paths = (
+        ["/ws/prices"] * args.price_clients
+        + [f"/ws/copy-trading/loadtest_{i}" for i in range(args.copy_clients)]
+        + [f"/ws/tournament/{args.tournament_id}"] * args.spectators
+    )
+    connect_started = time.perf_counter()
+    clients = await _connect_clients(app, paths, args.buffer_frames, args.slow_fraction, args.slow_delay)
+    connect_seconds = time.perf_counter() - connect_started
+
+    # Copy-trading followers subscribe to a master trader, as the UI does
+    for c in clients:
+        if c.path.startswith("/ws/copy-trading/"):
+            await c.send_json({"action": "subscribe", "trader_id": "master_1", "settings": {}})
+
+    rss_peak = _rss_mb()
+    stats = {name: OpStats() for name in weights}
+
+    async def sample_memory():
+        nonlocal rss_peak
+        while True:
+            await asyncio.sleep(1)
+            rss_peak = max(rss_peak, _rss_mb())
+
+    sampler = asyncio.create_task(sample_memory())
+    rss_loaded = _rss_mb()
+    run_started = time.perf_counter()
+    await _run_rest_load(mix, args.rps, args.duration, args.concurrency, stats)
+    duration = time.perf_counter() - run_started
+    sampler.cancel()
+    rss_end = _rss_mb()
+
+    await asyncio.gather(*(c.close() for c in clients))
+    await client.aclose()
+    await app.router.shutdown()
+
+    by_kind = {"prices": [], "copy_trading": [], "tournament": []}
+    for c in clients:
+        kind = "prices" if c.path == "/ws/prices" else "copy_trading" if "copy-trading" in c.path else "tournament"
+        by_kind[kind].append(c)
+
+    all_latencies = [latency for s in stats.values() for latency in s.latencies]
+    return {
+        "duration_s": round(duration, 2),
+        "websocket_connect_s": round(connect_seconds, 2),
+        "rest": {
+            "total": {
+                "requests": len(all_latencies),
+                "errors": sum(s.errors for s in stats.values()),
+                "throughput_rps": round(len(all_latencies) / duration, 1),
+                **_percentiles(all_latencies)
+            },
+            "by_op": {name: s.summary(duration) for name, s in stats.items()}
+        },
+        "websockets": {kind: _ws_summary(group, duration) for kind, group in by_kind.items() if group},
+        "memory_mb": {
+            "start": round(rss_start, 1),
+            "after_connect": round(rss_loaded, 1),
+            "end": round(rss_end, 1),
+            "peak": round(rss_peak, 1),
+            "growth_during_run": round(rss_end - rss_loaded, 1)
+        }
+    }
+
+
+def _print_report(report: dict):
+    print(f"Run: {report['duration_s']}s, {sum(w['clients'] for w in report['websockets'].values())} "
+          f"WebSocket clients connected in {report['websocket_connect_s']}s\n")
+    print(f"{'REST op':<20} {'reqs':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 75)
+    for name, s in list(report["rest"]["by_op"].items()) + [("TOTAL", report["rest"]["total"])]:
+        print(f"{name:<20} {s['requests']:>7} {s['errors']:>7} {s['throughput_rps'] or 0:>8} "
+              f"{s['p50_ms'] or 0:>9} {s['p95_ms'] or 0:>9} {s['p99_ms'] or 0:>9}")
+    print(f"\n{'WebSocket':<20} {'clients':>7} {'frames':>9} {'dropped':>8} {'drop %':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    print("-" * 75)
+    for kind, w in report["websockets"].items():
+        print(f"{kind:<20} {w['clients']:>7} {w['frames_received']:>9} {w['frames_dropped']:>8} "
+              f"{w['drop_rate'] * 100:>7.2f} {w['p50_ms'] or 0:>9} {w['p99_ms'] or 0:>9}")
+    m = report["memory_mb"]
+    print(f"\nRSS MB: start {m['start']}, after connect {m['after_connect']}, end {m['end']}, "
+          f"peak {m['peak']}, growth during run {m['growth_during_run']:+}")
+    for name, s in report["rest"]["by_op"].items():
+        if s["last_error"]:
+            print(f"Last {name} error: {s['last_error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline in-process load test for the backend")
+    parser.add_argument("--duration", type=float, default=30, help="REST load duration in seconds")
+    parser.add_argument("--rps", type=float, default=100, help="Target REST requests per second (open loop)")
+    parser.add_argument("--concurrency", type=int, default=200, help="Max in-flight REST requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted REST ops (default {DEFAULT_MIX})")
+    parser.add_argument("--accounts", type=int, default=50, help="Playground accounts / competition entries to trade")
+    parser.add_argument("--price-clients", type=int, default=1000, help="/ws/prices subscribers")
+    parser.add_argument("--copy-clients", type=int, default=100, help="/ws/copy-trading followers")
+    parser.add_argument("--spectators", type=int, default=200, help="/ws/tournament spectators")
+    parser.add_argument("--tournament-id", default="loadtest")
+    parser.add_argument("--buffer-frames", type=int, default=64, help="Per-client receive buffer before drops")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="Fraction of WebSocket clients that are slow")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="Seconds a slow client spends per frame")
+    parser.add_argument("--price-interval", type=float, default=1.0, help="Price broadcast interval in seconds")
+    parser.add_argument("--replay-dir", help="Replay recorded/synthetic tick files instead of simulated prices")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay speed multiplier (1-1000)")
+    parser.add_argument("--db", choices=("mongo", "memory"), default="mongo",
+                        help="Storage backend: a local mongod, or the in-memory store")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0,
+                        help="Simulated round trip per in-memory storage call")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="oracleiq_loadtest")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# OracleIQTrader - Response Encoding Benchmark
+# Finds the largest JSON responses the API serves (in-process, offline) and
+# compares, for the top N, stdlib JSON encoding (jsonable_encoder + json.dumps,
+# FastAPI's previous default) against orjson, plus raw/gzip/brotli sizes and
+# compression time at the levels the middleware uses.
+#
+# Usage (from backend/):
+#   python -m tools.response_bench
+#   python -m tools.response_bench --top 10 --rounds 50 --json
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("DB_NAME", "response_bench")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+# Measure the application's own bodies, not cached or compressed copies
+os.environ["RESPONSE_CACHE"] = "0"
+os.environ["RESPONSE_COMPRESSION"] = "0"
+
+# Values for path parameters when probing parameterized GET routes
+PATH_EXAMPLES = {
+    "symbol": "BTC",
+    "client_type": "hedge_fund",
+    "model_type": "lstm",
+    "exchange": "binance",
+    "user_id": "demo_user",
+    "trader_id": "MTR-001",
+}
+SKIP_PATHS = {"/openapi.json", "/docs", "/redoc", "/docs/oauth2-redirect", "/api/metrics"}
+
+
+def _probe_paths(app) -> List[str]:
+    """Every GET route whose path parameters all have an example value"""
+    from fastapi.routing import APIRoute
+
+    paths = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods or route.path in SKIP_PATHS:
+            continue
+        names = re.findall(r"\{(\w+)(?::\w+)?\}", route.path)
+        if all(n in PATH_EXAMPLES for n in names):
+            paths.append(re.sub(r"\{(\w+)(?::\w+)?\}", lambda m: PATH_EXAMPLES[m.group(1)], route.path))
+    return paths
+
+
+def _best_time(func, rounds: int) -> float:
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(path: str, payload, rounds: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from modules.compression import CompressionMiddleware, brotli
+    from modules.fast_json import dumps
+
+    def stdlib():
+        # What FastAPI + starlette.JSONResponse did per response
+        return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                          indent=None, separators=(",", ":")).encode("utf-8")
+
+    stdlib_body = stdlib()
+    orjson_body = dumps(payload)
+    encoder = CompressionMiddleware(None)
+    gzip_body = encoder.encode(orjson_body, "gzip")
+    result = {
+        "path": path,
+        "stdlib_bytes": len(stdlib_body),
+        "orjson_bytes": len(orjson_body),
+        "stdlib_encode_ms": _best_time(stdlib, rounds) * 1000,
+        "orjson_encode_ms": _best_time(lambda: dumps(payload), rounds) * 1000,
+        "gzip_bytes": len(gzip_body),
+        "gzip_ms": _best_time(lambda: encoder.encode(orjson_body, "gzip"), rounds) * 1000,
+        "br_bytes": None,
+        "br_ms": None,
+    }
+    if brotli is not None:
+        result["br_bytes"] = len(encoder.encode(orjson_body, "br"))
+        result["br_ms"] = _best_time(lambda: encoder.encode(orjson_body, "br"), rounds) * 1000
+    result["encode_speedup"] = result["stdlib_encode_ms"] / result["orjson_encode_ms"] if result["orjson_encode_ms"] else None
+    return result
+
+
+async def run(args) -> dict:
+    import httpx
+    import server
+    from tools.loadtest import _block_outbound_http
+
+    _block_outbound_http()
+    app = server.app
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=args.timeout)
+
+    sizes = []
+    failed = 0
+    for path in _probe_paths(app):
+        try:
+            response = await asyncio.wait_for(client.get(path), args.timeout)
+        except Exception:
+            failed += 1
+            continue
+        if response.status_code == 200 and response.headers.get("content-type", "").startswith("application/json"):
+            sizes.append((len(response.content), path, response.content))
+    await client.aclose()
+
+    sizes.sort(reverse=True)
+    # Payloads are re-parsed from the served JSON, so both encoders see the same plain objects
+    results = [measure(path, json.loads(body), args.rounds) for _, path, body in sizes[:args.top]]
+    return {"probed": len(sizes) + failed, "failed": failed, "results": results}
+
+
+def _print_report(report: dict):
+    print(f"Probed {report['probed']} GET routes ({report['failed']} failed); largest {len(report['results'])}:")
+    print(f"{'path':<48} {'bytes':>9} {'stdlib ms':>10} {'orjson ms':>10} {'x':>5} {'gzip':>8} {'br':>8} {'gzip ms':>8} {'br ms':>7}")
+    for r in report["results"]:
+        br = r["br_bytes"] if r["br_bytes"] is not None else "-"
+        br_ms = f"{r['br_ms']:.2f}" if r["br_ms"] is not None else "-"
+        print(f"{r['path'][:48]:<48} {r['stdlib_bytes']:>9,} {r['stdlib_encode_ms']:>10.3f} {r['orjson_encode_ms']:>10.3f} "
+              f"{r['encode_speedup']:>5.1f} {r['gzip_bytes']:>8,} {br:>8} {r['gzip_ms']:>8.2f} {br_ms:>7}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Encode time and bytes of the largest API responses")
+    parser.add_argument("--top", type=int, default=10, help="How many of the largest responses to measure")
+    parser.add_argument("--rounds", type=int, default=30, help="Timing rounds per encoder (best is reported)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds allowed per probed route")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
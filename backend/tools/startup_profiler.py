@@ -0,0 +1,194 @@
+# OracleIQTrader - Startup Profiler
+# Reports cold import time and RSS per module, each measured in a fresh
+# interpreter, so cold-start regressions are visible.
+#
+# Usage (from backend/):
+#   python -m tools.startup_profiler
+#   python -m tools.startup_profiler --modules server,pandas --json
+#   python -m tools.startup_profiler --save startup_baseline.json
+#   python -m tools.startup_profiler --baseline startup_baseline.json --tolerance 0.25
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = [
+    "server",
+    "fastapi",
+    "motor.motor_asyncio",
+    "numpy",
+    "pandas",
+    "scipy.optimize",
+    "sklearn.ensemble",
+    "yfinance",
+    "reportlab.platypus",
+    "tensorflow",
+    "modules.ml_prediction",
+    "modules.ml_training",
+    "modules.lstm_model",
+    "modules.transformer_model",
+    "modules.portfolio_optimizer",
+    "modules.inefficiency_detector",
+    "modules.macro_engine",
+]
+
+# Runs inside the child interpreter: import one module, report cost as JSON
+_PROBE = r"""
+import importlib, json, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+name = sys.argv[1]
+modules_before = len(sys.modules)
+rss_before = rss_mb()
+started = time.perf_counter()
+error = None
+try:
+    importlib.import_module(name)
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - started
+heavy = [m for m in ("tensorflow", "pandas", "scipy", "sklearn", "yfinance", "reportlab") if m in sys.modules]
+print(json.dumps({
+    "module": name,
+    "import_seconds": elapsed,
+    "rss_mb": rss_mb(),
+    "rss_delta_mb": rss_mb() - rss_before,
+    "modules_loaded": len(sys.modules) - modules_before,
+    "heavy_loaded": heavy,
+    "error": error,
+}))
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # server.py reads these at import time; no connection is made on import
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "startup_profiler")
+    env["PYTHONPATH"] = str(BACKEND_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def profile_module(name: str, timeout: float = 300) -> dict:
+    """Import `name` in a fresh interpreter and return its import time and RSS cost"""
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, name],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, timeout=timeout
+    )
+    for line in reversed(proc.stdout.strip().splitlines()):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return {"module": name, "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def importtime_breakdown(name: str, top: int = 15, timeout: float = 300) -> List[dict]:
+    """Top modules by cumulative import time when importing `name` (python -X importtime)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {name}"],
+        cwd=BACKEND_DIR, env=_child_env(), capture_output=True, text=True, timeout=timeout
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": module.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    # Only top-level packages, to keep the breakdown readable
+    rows = [r for r in rows if "." not in r["module"]]
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+
+
+def compare_to_baseline(results: List[dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return human-readable regressions beyond `tolerance` (fractional, e.g. 0.25)"""
+    regressions = []
+    for r in results:
+        base = baseline.get(r["module"])
+        if not base or r.get("error") or base.get("error"):
+            continue
+        for key, floor in (("import_seconds", 0.05), ("rss_delta_mb", 5.0)):
+            old, new = base.get(key, 0), r.get(key, 0)
+            if new > max(old * (1 + tolerance), old + floor):
+                regressions.append(f"{r['module']}: {key} {old:.2f} -> {new:.2f}")
+    return regressions
+
+
+def _print_table(results: List[dict]):
+    print(f"{'module':<34} {'import s':>9} {'RSS MB':>8} {'+RSS MB':>8} {'mods':>6}  heavy deps")
+    print("-" * 100)
+    for r in results:
+        if r.get("error") and "import_seconds" not in r:
+            print(f"{r['module']:<34} ERROR {r['error']}")
+            continue
+        suffix = f"  ERROR {r['error']}" if r.get("error") else ""
+        print(
+            f"{r['module']:<34} {r['import_seconds']:>9.3f} {r['rss_mb']:>8.1f} "
+            f"{r['rss_delta_mb']:>8.1f} {r['modules_loaded']:>6}  {','.join(r['heavy_loaded']) or '-'}{suffix}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report cold import time and RSS per backend module")
+    parser.add_argument("--modules", help="Comma-separated modules to profile (default: server and heavy deps)")
+    parser.add_argument("--importtime", type=int, default=10, metavar="N",
+                        help="Show the top N packages by import time for `server` (0 to skip)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save", metavar="PATH", help="Write results to PATH as a baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed fractional regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    names = [m.strip() for m in args.modules.split(",")] if args.modules else DEFAULT_MODULES
+    results = [profile_module(name) for name in names]
+    breakdown = importtime_breakdown("server", args.importtime) if args.importtime else []
+
+    if args.json:
+        print(json.dumps({"results": results, "server_importtime": breakdown}, indent=2))
+    else:
+        _print_table(results)
+        if breakdown:
+            print(f"\nTop {len(breakdown)} packages by cumulative import time for `server`:")
+            for row in breakdown:
+                print(f"  {row['module']:<30} {row['cumulative_ms']:>10.1f} ms")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({r["module"]: r for r in results}, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nStartup regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo startup regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
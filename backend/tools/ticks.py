@@ -0,0 +1,119 @@
+# OracleIQTrader - Tick File Tools
+# Generate deterministic synthetic tick files, inspect a tick directory and
+# measure replay throughput from disk.
+#
+# Usage (from backend/):
+#   python -m tools.ticks synth ticks/ --day 2026-01-05 --ticks 1000000
+#   python -m tools.ticks info ticks/
+#   python -m tools.ticks bench ticks/ --min-rate 1000000
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from modules.tick_store import MarketReplay, TickStore, write_synthetic_ticks  # noqa: E402
+
+# Default synthetic universe: the streamer's crypto and stock symbols
+SYNTHETIC_SYMBOLS = {
+    "BTC": (95000.0, 0.0004), "ETH": (3200.0, 0.0005), "SOL": (180.0, 0.0007),
+    "XRP": (2.5, 0.0006), "DOGE": (0.35, 0.0008), "ADA": (0.95, 0.0006),
+    "SPY": (598.0, 0.0001), "AAPL": (248.0, 0.0002), "NVDA": (145.0, 0.0004),
+    "TSLA": (412.0, 0.0005), "MSFT": (420.0, 0.0002), "GOOGL": (175.0, 0.0002),
+}
+
+
+def synth(args) -> dict:
+    store = TickStore(args.root)
+    symbols = [s.strip().upper() for s in args.symbols.split(",")] if args.symbols else list(SYNTHETIC_SYMBOLS)
+    per_symbol = max(1, args.ticks // len(symbols))
+    started = time.perf_counter()
+    for symbol in symbols:
+        base, volatility = SYNTHETIC_SYMBOLS.get(symbol, (100.0, 0.0003))
+        write_synthetic_ticks(store, symbol, args.day, per_symbol, base, volatility,
+                              interval_ms=args.interval_ms, seed=args.seed)
+    return {
+        "root": str(store.root),
+        "day": args.day,
+        "symbols": len(symbols),
+        "ticks": per_symbol * len(symbols),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def bench(args) -> dict:
+    """Replay everything as fast as possible, reading every tick's price"""
+    replay = MarketReplay(TickStore(args.root), speed=1000)
+    try:
+        best = None
+        for _ in range(args.rounds):
+            replay.rewind()
+            before = replay.ticks_replayed
+            started = time.perf_counter()
+            while not replay.finished:
+                for batch in replay.step(args.step_seconds):
+                    batch.prices()
+            elapsed = time.perf_counter() - started
+            best = min(best or elapsed, elapsed)
+            ticks = replay.ticks_replayed - before
+    finally:
+        replay.close()
+    return {"ticks": ticks, "seconds": round(best, 4), "ticks_per_sec": round(ticks / best) if best else None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic tick generation, inspection and replay throughput")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_synth = sub.add_parser("synth", help="Write deterministic random-walk tick files")
+    p_synth.add_argument("root")
+    p_synth.add_argument("--day", default="2026-01-05", help="UTC day (YYYY-MM-DD)")
+    p_synth.add_argument("--ticks", type=int, default=1_000_000, help="Total ticks across symbols")
+    p_synth.add_argument("--symbols", help="Comma-separated symbols (default: streamer symbols)")
+    p_synth.add_argument("--interval-ms", type=float, default=100.0, help="Spacing between a symbol's ticks")
+    p_synth.add_argument("--seed", type=int, default=0)
+
+    p_info = sub.add_parser("info", help="List tick files with counts and time ranges")
+    p_info.add_argument("root")
+
+    p_bench = sub.add_parser("bench", help="Measure full-speed replay throughput")
+    p_bench.add_argument("root")
+    p_bench.add_argument("--rounds", type=int, default=3)
+    p_bench.add_argument("--step-seconds", type=float, default=60.0, help="Market time per replay step")
+    p_bench.add_argument("--min-rate", type=float, help="Exit non-zero below this many ticks/s")
+
+    for p in (p_synth, p_info, p_bench):
+        p.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "synth":
+        result = synth(args)
+    elif args.command == "info":
+        result = TickStore(args.root).info()
+    else:
+        result = bench(args)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.command == "info":
+        print(f"{'day':<12} {'symbol':<8} {'ticks':>12} {'MB':>8}  first -> last")
+        for row in result:
+            print(f"{row['day']:<12} {row['symbol']:<8} {row['ticks']:>12,} {row['bytes'] / 1e6:>8.1f}  "
+                  f"{row['first']} -> {row['last']}")
+    else:
+        print(", ".join(f"{k}={v}" for k, v in result.items()))
+
+    if args.command == "bench" and args.min_rate and (result["ticks_per_sec"] or 0) < args.min_rate:
+        print(f"Replay throughput below {args.min_rate:,.0f} ticks/s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,319 @@ class TestHealthAndRoot:
         assert data["version"] == "2.0.0"
         print(f"SUCCESS: API root returns version {data['version']}")
 
+    def test_metrics_endpoint(self):
+        """Test Prometheus metrics endpoint exposes route and loop metrics"""
+        requests.get(f"{BASE_URL}/api/market/prices")
+        response = requests.get(f"{BASE_URL}/api/metrics")
+        assert response.status_code == 200
+        assert 'text/plain' in response.headers.get('content-type', '')
+
+        body = response.text
+        assert '# TYPE oracle_http_request_duration_seconds histogram' in body
+        assert 'route="/api/market/prices"' in body
+        assert 'oracle_websocket_connections{manager="prices"}' in body
+        print("SUCCESS: Metrics endpoint exposes Prometheus text format")
+
+    def test_background_tasks_endpoint(self):
+        """Test supervised background tasks are listed with their schedule"""
+        response = requests.get(f"{BASE_URL}/api/system/tasks")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["started"] is True
+        tasks = {t["name"]: t for t in data["tasks"]}
+        for name in ("price_streamer", "trade_crawler", "copy_trading_simulation", "risk_broadcast"):
+            assert name in tasks
+        assert tasks["price_streamer"]["kind"] == "periodic"
+        assert tasks["price_streamer"]["runs"] >= 1
+        print(f"SUCCESS: {len(tasks)} supervised background tasks reported")
+
+    def test_market_data_source_endpoint(self):
+        """Test the price source (live feeds or tick replay) is reported"""
+        response = requests.get(f"{BASE_URL}/api/system/market-data")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["source"] in ("live", "replay")
+        if data["source"] == "replay":
+            assert 1 <= data["replay"]["speed"] <= 1000
+            assert data["replay"]["symbols"]
+        print(f"SUCCESS: Market data source is {data['source']}")
+
+    def test_analytics_export_and_query(self):
+        """Test the incremental Parquet export and a projected, filtered read"""
+        response = requests.post(f"{BASE_URL}/api/analytics/export", params={"collections": "trades"})
+        assert response.status_code == 200
+        assert "error" not in response.json()["trades"]
+
+        response = requests.get(f"{BASE_URL}/api/analytics/datasets")
+        assert response.status_code == 200
+        trades = response.json()["datasets"]["trades"]
+        assert trades["schema"]["price"] == "float64"
+        if not trades["files"]:
+            print("SKIPPED: no settled trades to export yet")
+            return
+
+        response = requests.get(f"{BASE_URL}/api/analytics/trades",
+                                params={"columns": "id,symbol,price", "where": "price>0", "limit": 5})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] <= 5
+        for row in data["rows"]:
+            assert set(row) == {"id", "symbol", "price"}
+            assert row["price"] > 0
+        print(f"SUCCESS: {trades['rows']} trades exported, {data['count']} rows queried")
+
+    def test_event_bus_status(self):
+        """Test price ticks flow through the event bus to their subscribers"""
+        response = requests.get(f"{BASE_URL}/api/system/events")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["published"]["PriceTick"] > 0
+        subscribers = {s["name"]: s for s in data["subscriptions"]}
+        for name in ("price_alerts", "risk_broadcast", "competition_leaderboards", "copy_trading", "push_notifications"):
+            assert name in subscribers
+        assert "PriceTick" in subscribers["price_alerts"]["events"]
+        print(f"SUCCESS: {sum(data['published'].values())} events published to {len(subscribers)} subscribers")
+
+    def test_response_cache_etag(self):
+        """Test cached GETs carry a strong ETag and revalidate to 304"""
+        status = requests.get(f"{BASE_URL}/api/system/response-cache").json()
+        if not status["enabled"]:
+            print("SKIPPED: response cache disabled (RESPONSE_CACHE=0)")
+            return
+
+        first = requests.get(f"{BASE_URL}/api/portfolios/public")
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+
+        second = requests.get(f"{BASE_URL}/api/portfolios/public", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+        print(f"SUCCESS: ETag {etag} revalidated with 304 ({second.headers['X-Cache']})")
+
+    def test_compressed_json_response(self):
+        """Test large JSON bodies are gzip-compressed when the client accepts it"""
+        response = requests.get(f"{BASE_URL}/api/copy/traders", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert int(response.headers["Content-Length"]) < len(response.content)
+
+        plain = requests.get(f"{BASE_URL}/api/copy/traders", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers
+        assert plain.json() == response.json()
+        print(f"SUCCESS: {len(response.content)} bytes sent as {response.headers['Content-Length']} gzip")
+
+    def test_price_history_max_points(self):
+        """Test GET /api/market/{symbol}/history merges candles down to max_points"""
+        response = requests.get(f"{BASE_URL}/api/market/BTC/history", params={"periods": 1000, "max_points": 100})
+        assert response.status_code == 200
+        candles = response.json()
+        assert 0 < len(candles) <= 100
+        assert all(c["high"] >= c["low"] for c in candles)
+        assert candles[0]["time"] == 0
+        print(f"SUCCESS: 1000 candles downsampled to {len(candles)}")
+
+    def test_query_count_budget(self):
+        """Test read endpoints stay within their database operation budget (needs DB_QUERY_HEADERS=1)"""
+        import sys
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+        from modules.query_counter import assert_response_queries
+
+        response = requests.get(f"{BASE_URL}/api/alerts")
+        assert response.status_code == 200
+        if "X-DB-Queries" not in response.headers:
+            pytest.skip("query headers disabled (DB_QUERY_HEADERS=1 enables them)")
+        count = assert_response_queries(response, 2)
+        assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+        assert_response_queries(requests.get(f"{BASE_URL}/api/trades/history"), 2)
+        print(f"SUCCESS: /api/alerts issued {count} database operations")
+
+    def test_concurrent_playground_orders(self):
+        """Test concurrent market orders on one account are all applied, none lost"""
+        from concurrent.futures import ThreadPoolExecutor
+        account = requests.post(f"{BASE_URL}/api/playground/account").json()
+
+        def buy(_):
+            return requests.post(f"{BASE_URL}/api/playground/order", params={
+                "account_id": account["id"], "symbol": "BTC", "side": "buy", "quantity": 0.01
+            }).json()
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(buy, range(10)))
+        filled = sum(1 for r in results if r.get("success"))
+        assert filled == 10
+
+        data = requests.get(f"{BASE_URL}/api/playground/account/{account['id']}").json()
+        assert len(data["trade_history"]) == filled
+        assert len(data["positions"]) == filled
+        assert data["version"] >= filled
+        print(f"SUCCESS: {filled} concurrent orders applied at version {data['version']}")
+
+    def test_algo_slices_and_cancel(self):
+        """Test TWAP child slices run on the timer wheel and a cancel stops the remaining ones"""
+        import time
+        twap = requests.post(f"{BASE_URL}/api/algo/twap", json={
+            "symbol": "BTC", "side": "buy", "quantity": 3, "slices": 3
+        }).json()
+        long_twap = requests.post(f"{BASE_URL}/api/algo/twap", json={
+            "symbol": "ETH", "side": "sell", "quantity": 500, "slices": 500
+        }).json()
+        cancelled = requests.delete(f"{BASE_URL}/api/algo/order/{long_twap['order_id']}").json()
+        assert cancelled["status"] == "CANCELLED"
+
+        time.sleep(1.0)
+        order = requests.get(f"{BASE_URL}/api/algo/order/{twap['order_id']}").json()
+        assert order["status"] == "filled"
+        assert order["child_orders"] == 0 and len(order["execution_log"]) == 3
+        stopped = requests.get(f"{BASE_URL}/api/algo/order/{long_twap['order_id']}").json()
+        assert stopped["filled_quantity"] == cancelled["filled_quantity"]
+
+        scheduler = requests.get(f"{BASE_URL}/api/algo/analytics").json()["scheduler"]
+        assert scheduler["fired"] >= 3
+        print(f"SUCCESS: {scheduler['fired']} slices fired in {scheduler['batches']} wheel ticks")
+
+    def test_algo_fill_simulation(self):
+        """Test batch fill simulation: impact makes larger orders cost more, POV respects its rate"""
+        orders = [
+            {"symbol": "BTC", "side": side, "quantity": qty, "strategy": strategy,
+             "start_minute": 30, "duration_minutes": 60, "participation_rate": 0.1}
+            for side in ("buy", "sell") for qty in (10, 10_000) for strategy in ("twap", "vwap", "pov")
+        ]
+        response = requests.post(f"{BASE_URL}/api/algo/simulate", json={"orders": orders, "day": "2026-01-05"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"]["orders"] == len(orders)
+        rows = data["orders"]
+        for row, order in zip(rows, orders):
+            assert row["filled"] > 0 and row["completion"] <= 1.0 + 1e-9
+            if order["strategy"] == "pov":
+                assert row["max_participation"] <= 0.1 + 1e-6
+        # Same strategy and side, 1000x the size: more market impact relative to arrival
+        assert rows[3]["shortfall_bps"] > rows[0]["shortfall_bps"]
+        assert rows[9]["shortfall_bps"] > rows[6]["shortfall_bps"]
+
+        bad = requests.post(f"{BASE_URL}/api/algo/simulate", json={"orders": [{"symbol": "BTC", "quantity": 1, "strategy": "moc"}]})
+        assert bad.status_code == 400
+        print(f"SUCCESS: simulated {len(rows)} parents, avg shortfall {data['summary']['avg_shortfall_bps']} bps")
+
+    def test_algo_archive_and_tca(self):
+        """Test finished algo orders move to the archive and show up in the day's TCA report"""
+        import time
+        twap = requests.post(f"{BASE_URL}/api/algo/twap", json={
+            "symbol": "SOL", "side": "buy", "quantity": 4, "slices": 4
+        }).json()
+        time.sleep(2.5)  # four 0.1s slices plus one archive pass
+
+        order = requests.get(f"{BASE_URL}/api/algo/order/{twap['order_id']}").json()
+        assert order["status"] == "filled" and order.get("archived") is True
+        assert order["child_fills"] == 4 and len(order["execution_log"]) == 4
+        for key in ("arrival_price", "market_vwap", "market_twap", "market_volume"):
+            assert order[key] > 0
+        assert twap["order_id"] not in [o["order_id"] for o in requests.get(f"{BASE_URL}/api/algo/orders").json()]
+
+        analytics = requests.get(f"{BASE_URL}/api/algo/analytics").json()
+        assert analytics["total_orders"] >= 1
+        summary = analytics["tca"]["summary"]
+        for key in ("arrival_slippage_bps", "vwap_slippage_bps", "twap_slippage_bps", "shortfall_bps", "participation"):
+            assert key in summary
+        assert "twap" in analytics["by_order_type"]
+        assert any(row["symbol"] == "SOL" for row in analytics["tca"]["groups"]["symbol"])
+        print(f"SUCCESS: {analytics['total_orders']} orders in today's TCA, shortfall {summary['shortfall_bps']} bps")
+
+    def test_backtest_is_deterministic(self):
+        """Test backtests run a real simulation: same inputs, same results; bad inputs are rejected"""
+        params = {"symbol": "ETH", "start_date": "2024-01-01", "end_date": "2024-06-30",
+                  "strategy_type": "sma_cross", "timeframe": "1h", "max_points": 100}
+        first = requests.post(f"{BASE_URL}/api/training/backtest", params=params, json={"fast": 12, "slow": 48})
+        assert first.status_code == 200
+        results = first.json()["results"]
+        assert results["parameters"] == {"fast": 12, "slow": 48}
+        assert results["bars"] == 182 * 24 and len(results["equity_curve"]) <= 100
+        second = requests.post(f"{BASE_URL}/api/training/backtest", params=params,
+                               json={"fast": 12, "slow": 48}).json()["results"]
+        for key in ("total_trades", "win_rate", "total_return_percent", "max_drawdown_percent", "sharpe_ratio"):
+            assert second[key] == results[key]
+
+        assert requests.post(f"{BASE_URL}/api/training/backtest", params={**params, "strategy_type": "nope"}).status_code == 400
+        assert requests.post(f"{BASE_URL}/api/training/backtest", params=params,
+                             json={"fast": 50, "slow": 20}).status_code == 400
+        print(f"SUCCESS: {results['total_trades']} trades over {results['bars']} bars, sharpe {results['sharpe_ratio']:.2f}")
+
+    def test_backtest_sweep_streams_results(self):
+        """Test a parameter grid sweep streams chunk results and ends with the ranked top rows"""
+        response = requests.post(f"{BASE_URL}/api/training/sweep", params={
+            "symbol": "ETH", "start_date": "2024-01-01", "end_date": "2024-03-31", "strategy_type": "sma_cross"
+        }, json={"grid": {"fast": [5, 10, 20], "slow": [30, 60, 120]}, "top": 3}, stream=True)
+        assert response.status_code == 200
+        events = [json.loads(line) for line in response.iter_lines() if line]
+        assert events[0]["event"] == "start" and events[0]["combinations"] == 9
+        rows = [row for event in events if event["event"] == "results" for row in event["rows"]]
+        assert len(rows) == 9
+        done = events[-1]
+        assert done["event"] == "done" and done["completed"] == 9 and len(done["top"]) == 3
+        sharpes = [row["sharpe_ratio"] for row in done["top"]]
+        assert sharpes == sorted(sharpes, reverse=True) and done["best"] == done["top"][0]
+
+        bad = requests.post(f"{BASE_URL}/api/training/sweep", json={"grid": {"period": [10]}})
+        assert bad.status_code == 400
+        print(f"SUCCESS: 9-combination sweep in {done['elapsed_ms']}ms, best {done['best']['parameters']}")
+
+    def test_walk_forward_study(self):
+        """Test walk-forward optimization picks parameters per window and stitches the out-of-sample curve"""
+        response = requests.post(f"{BASE_URL}/api/training/walk-forward", params={
+            "symbol": "BTC", "start_date": "2024-01-01", "end_date": "2024-06-30", "strategy_type": "sma_cross"
+        }, json={"grid": {"fast": [5, 10], "slow": [50, 100]}, "windows": 6, "train_ratio": 2})
+        assert response.status_code == 200
+        data = response.json()
+        windows = data["windows"]
+        assert len(windows) == 6
+        for previous, window in zip(windows, windows[1:]):
+            assert window["test_start"] == previous["test_stop"]
+            assert window["train_stop"] == window["test_start"]
+        assert all(w["parameters"] is None or w["parameters"]["fast"] in (5, 10) for w in windows)
+        assert data["out_of_sample"]["bars"] == sum(w["test_stop"] - w["test_start"] for w in windows)
+        for key in ("walk_forward_efficiency", "profitable_windows_percent", "mean_out_of_sample_rank_percentile",
+                    "distinct_parameter_sets", "parameter_variation"):
+            assert key in data["robustness"]
+
+        bad = requests.post(f"{BASE_URL}/api/training/walk-forward", json={"grid": {"fast": [5]}, "objective": "win_rate"})
+        assert bad.status_code == 400
+        print(f"SUCCESS: 6-window walk-forward, out-of-sample return {data['out_of_sample']['total_return_percent']:.2f}%")
+
+    def test_backtest_job_queue_and_cache(self):
+        """Test queued backtests report progress, return results, and identical configs hit the result cache"""
+        import time
+        params = {"symbol": "SOL", "start_date": "2020-01-01", "end_date": "2024-12-31",
+                  "strategy_type": "macd", "timeframe": "1d", "stop_loss_percent": 7.5}
+        job = requests.post(f"{BASE_URL}/api/training/jobs/backtest", params=params, json={"signal": 7}).json()
+        assert job["status"] in ("queued", "running", "completed")
+        for _ in range(100):
+            status = requests.get(f"{BASE_URL}/api/training/jobs/{job['job_id']}/progress").json()
+            if status["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.1)
+        assert status["status"] == "completed" and status["progress"] == 1.0
+        first = requests.get(f"{BASE_URL}/api/training/jobs/{job['job_id']}/result").json()
+        assert first["result"]["parameters"]["signal"] == 7
+
+        # Same configuration (explicit defaults included): answered from the cache at submission
+        again = requests.post(f"{BASE_URL}/api/training/jobs/backtest", params=params,
+                              json={"fast": 12, "slow": 26, "signal": 7}).json()
+        assert again["status"] == "completed" and again["cached"] is True
+        assert again["cache_key"] == job["cache_key"]
+        cached = requests.get(f"{BASE_URL}/api/training/jobs/{again['job_id']}/result").json()
+        assert cached["result"]["total_return_percent"] == first["result"]["total_return_percent"]
+
+        assert requests.get(f"{BASE_URL}/api/training/jobs/unknown-job").status_code == 404
+        assert requests.post(f"{BASE_URL}/api/training/jobs/backtest", params={**params, "timeframe": "2h"}).status_code == 400
+        print(f"SUCCESS: backtest job completed, resubmission served from cache key {job['cache_key'][:12]}")
+
 
 class TestMarketData:
     """Market data endpoint tests - CoinGecko integration"""
@@ -32,7 +32,33 @@ class TestExportEndpoints:
         assert 'Quantity' in header
         assert 'Price' in header
         print(f"CSV export successful - {len(lines)} lines")
-    
+
+    def test_export_trades_csv_filtered(self):
+        """Test CSV export with symbol and date-range filters"""
+        response = requests.get(
+            f"{BASE_URL}/api/export/trades/csv?symbol=BTC&start_date=2025-01-01&end_date=2025-12-31"
+        )
+        assert response.status_code == 200
+
+        rows = response.text.strip().split('\n')[1:]
+        for row in rows:
+            assert ',BTC,' in row
+
+    def test_export_trades_csv_bad_date(self):
+        """Test CSV export rejects malformed dates"""
+        response = requests.get(f"{BASE_URL}/api/export/trades/csv?start_date=01-01-2025")
+        assert response.status_code == 400
+
+    def test_export_trades_ndjson(self):
+        """Test NDJSON export for trades"""
+        response = requests.get(f"{BASE_URL}/api/export/trades/json?symbol=BTC")
+        assert response.status_code == 200
+        assert 'application/x-ndjson' in response.headers.get('content-type', '')
+
+        for line in response.text.splitlines():
+            trade = json.loads(line)
+            assert trade['symbol'] == 'BTC'
+
     def test_export_trades_pdf(self):
         """Test PDF export for trades"""
         response = requests.get(f"{BASE_URL}/api/export/trades/pdf")
@@ -43,6 +69,16 @@ class TestExportEndpoints:
         content = response.content
         assert content[:4] == b'%PDF'
         print(f"PDF export successful - {len(content)} bytes")
+
+    def test_export_trades_pdf_cached(self):
+        """Test repeated PDF downloads are served from the report cache"""
+        first = requests.get(f"{BASE_URL}/api/export/trades/pdf?symbol=BTC")
+        assert first.status_code == 200
+
+        second = requests.get(f"{BASE_URL}/api/export/trades/pdf?symbol=BTC")
+        assert second.status_code == 200
+        assert second.content[:4] == b'%PDF'
+        assert second.headers.get('x-report-cache') == 'hit'
     
     def test_export_alerts_csv(self):
         """Test CSV export for alerts"""
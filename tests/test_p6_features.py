@@ -122,7 +122,23 @@ class TestTradingJournal:
             assert "pnl" in day
             assert "trades" in day
             assert "win_rate" in day
-            
+
+    def test_monthly_summary_returns_data(self):
+        """Test monthly summary endpoint returns one entry per day of the month"""
+        response = requests.get(f"{BASE_URL}/api/journal/monthly-summary?month=2025-01")
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["period"] == "2025-01"
+        assert len(data["daily_summaries"]) == 31
+        assert data["total_trades"] == sum(d["trades"] for d in data["daily_summaries"])
+        assert "ai_insights" in data
+
+    def test_monthly_summary_rejects_bad_month(self):
+        """Test monthly summary validates the month parameter"""
+        response = requests.get(f"{BASE_URL}/api/journal/monthly-summary?month=January")
+        assert response.status_code == 400
+
     def test_add_journal_note(self):
         """Test adding a journal note"""
         response = requests.post(